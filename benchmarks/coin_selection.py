@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from random import Random
+from time import monotonic
+from typing import List, Union
+
+from chia.consensus.default_constants import DEFAULT_CONSTANTS
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util.ints import uint32, uint64, uint128
+from chia.wallet.coin_selection import CoinAmountIndex, select_coins
+from chia.wallet.util.wallet_types import WalletType
+from chia.wallet.wallet_coin_record import WalletCoinRecord
+
+NUM_SELECTIONS = 20
+
+log = logging.getLogger(__name__)
+
+
+def rand_hash(rng: Random) -> bytes32:
+    return bytes32(rng.getrandbits(256).to_bytes(32, "big"))
+
+
+def rand_amount(rng: Random) -> uint64:
+    # mostly farming rewards and dust, like the wallet of a farmer or an exchange
+    kind = rng.random()
+    if kind < 0.5:
+        return uint64(rng.randint(1, 1000))
+    if kind < 0.9:
+        return uint64(rng.choice([250000000000, 1750000000000]))
+    return uint64(rng.randint(1, 10000000000000))
+
+
+async def time_selections(
+    name: str, spendable_coins: Union[List[WalletCoinRecord], CoinAmountIndex], total: int, targets: List[int]
+) -> None:
+    start = monotonic()
+    for target in targets:
+        coins = await select_coins(
+            uint128(total),
+            uint64(DEFAULT_CONSTANTS.MAX_COIN_AMOUNT),
+            spendable_coins,
+            {},
+            log,
+            uint128(target),
+        )
+        assert sum(c.amount for c in coins) >= target
+    print(f"  {name}: {(monotonic() - start) / len(targets) * 1000:0.2f}ms per selection")
+
+
+async def run_coin_selection_benchmark() -> None:
+    """
+    Selects coins for sends of various sizes from wallets with a large number of
+    coins. Passing the records, like the CAT wallet does, sorts all the coins on
+    every selection. The index the coin store keeps for the standard wallet is
+    sorted already and is updated coin by coin as the wallet syncs.
+    """
+    rng = Random(1337)
+    for num_coins in [1000, 100000, 1000000]:
+        print(f"\n== {num_coins} coins")
+        coins = [Coin(rand_hash(rng), rand_hash(rng), rand_amount(rng)) for _ in range(num_coins)]
+        records = [
+            WalletCoinRecord(coin, uint32(1), uint32(0), False, False, WalletType.STANDARD_WALLET, 1) for coin in coins
+        ]
+        total = sum(coin.amount for coin in coins)
+        targets = [rng.choice(coins).amount for _ in range(NUM_SELECTIONS // 2)]  # exact matches
+        targets += [rng.randint(1, total // 100) for _ in range(NUM_SELECTIONS // 2)]
+
+        await time_selections("from records", records, total, targets)
+
+        start = monotonic()
+        index = CoinAmountIndex.from_coins((coin.name(), coin) for coin in coins)
+        print(f"  building the index: {(monotonic() - start) * 1000:0.2f}ms")
+        await time_selections("from index", index, total, targets)
+
+        # a block of spends and new coins
+        start = monotonic()
+        for coin in coins[:100]:
+            index.remove(coin.name())
+        for coin in coins[:100]:
+            index.add(coin.name(), coin)
+        print(f"  updating the index: {(monotonic() - start) / 200 * 1000000:0.1f}us per coin")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_coin_selection_benchmark())
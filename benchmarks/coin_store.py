@@ -306,8 +306,58 @@ async def run_new_block_benchmark(version: int) -> None:
     print(f"database size: {db_size/1000000:.3f} MB")
 
 
+async def run_sync_benchmark(version: int, cache_flush_blocks: int) -> None:
+    """
+    Adds blocks the way the full node does while syncing: look up the coins
+    being spent, then apply the block in its own transaction.
+    """
+    db_wrapper: DBWrapper2 = await setup_db("coin-store-sync-benchmark.db", version)
+
+    try:
+        coin_store = await CoinStore.create(db_wrapper, cache_flush_blocks=cache_flush_blocks)
+
+        all_unspent: List[bytes32] = []
+        timestamp = 1631794488
+
+        start = monotonic()
+        for height in range(1, NUM_ITERS * 2 + 1):
+            additions, hashes = make_coins(500)
+            farmer_coin, pool_coin = rewards(uint32(height))
+
+            # spend some of the coins that were added earlier
+            random.shuffle(all_unspent)
+            removals = all_unspent[:500]
+            all_unspent = all_unspent[500:]
+            all_unspent += hashes
+            all_unspent += [pool_coin.name(), farmer_coin.name()]
+
+            records = await coin_store.get_coin_records(removals)
+            assert len(records) == len(removals)
+            async with db_wrapper.writer():
+                await coin_store.new_block(
+                    uint32(height),
+                    uint64(timestamp),
+                    {pool_coin, farmer_coin},
+                    additions,
+                    removals,
+                )
+            coin_store.commit_cache_changes()
+            await coin_store.maybe_flush_cache()
+            timestamp += 19
+        await coin_store.flush_cache()
+        total_time = monotonic() - start
+        print(
+            f"{total_time:0.4f}s, SYNC {NUM_ITERS * 2} blocks, cache_flush_blocks: {cache_flush_blocks}, "
+            f"{NUM_ITERS * 2 / total_time:0.1f} blocks/s"
+        )
+    finally:
+        await db_wrapper.close()
+
+
 if __name__ == "__main__":
     print("version 1")
     asyncio.run(run_new_block_benchmark(1))
     print("version 2")
     asyncio.run(run_new_block_benchmark(2))
+    for cache_flush_blocks in [0, 32, 128]:
+        asyncio.run(run_sync_benchmark(2, cache_flush_blocks))
@@ -2,23 +2,35 @@ from __future__ import annotations
 
 import asyncio
 import cProfile
+import sys
 from contextlib import contextmanager
 from dataclasses import dataclass
+from random import Random
 from subprocess import check_call
 from time import monotonic
 from typing import Dict, Iterator, List, Optional, Tuple
 
+from blspy import G2Element
+
 from chia.consensus.coinbase import create_farmer_coin, create_pool_coin
 from chia.consensus.cost_calculator import NPCResult
 from chia.consensus.default_constants import DEFAULT_CONSTANTS
+from chia.full_node.bitcoin_fee_estimator import create_bitcoin_fee_estimator
+from chia.full_node.fee_estimation import MempoolInfo
+from chia.full_node.mempool import BlockFillStrategy, Mempool, MempoolRemoveReason
+from chia.full_node.mempool_index import MempoolIndexBackend
 from chia.full_node.mempool_manager import MempoolManager
 from chia.simulator.wallet_tools import WalletTool
 from chia.types.blockchain_format.coin import Coin
 from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.clvm_cost import CLVMCost
 from chia.types.coin_record import CoinRecord
+from chia.types.fee_rate import FeeRate
 from chia.types.mempool_inclusion_status import MempoolInclusionStatus
+from chia.types.mempool_item import MempoolItem
 from chia.types.spend_bundle import SpendBundle
 from chia.types.spend_bundle_conditions import Spend, SpendBundleConditions
+from chia.util.hash import std_hash
 from chia.util.ints import uint32, uint64
 from chia.util.misc import to_batches
 
@@ -338,10 +350,185 @@ async def run_mempool_benchmark() -> None:
         print(f"  per call: {(stop - start) / len(blocks) * 1000:0.2f}ms")
 
 
+def make_index_item(coin_id: bytes32, cost: int, fee: int, assert_before_height: Optional[uint32]) -> MempoolItem:
+    npc_result = NPCResult(
+        None,
+        SpendBundleConditions(
+            [
+                Spend(
+                    coin_id,
+                    bytes32(b" " * 32),
+                    bytes32(b" " * 32),
+                    123,
+                    None,
+                    None,
+                    None,
+                    None,
+                    None,
+                    None,
+                    [],
+                    [],
+                    [],
+                    [],
+                    [],
+                    [],
+                    [],
+                    [],
+                    0,
+                )
+            ],
+            0,
+            0,
+            0,
+            None,
+            None,
+            [],
+            cost,
+            0,
+            0,
+        ),
+        uint64(cost),
+    )
+    return MempoolItem(
+        SpendBundle([], G2Element()),
+        uint64(fee),
+        npc_result,
+        std_hash(coin_id),
+        uint32(0),
+        None,
+        assert_before_height,
+    )
+
+
+def run_mempool_index_benchmark() -> None:
+    """
+    Compares the mempool index backends on synthetic items, without any CLVM
+    or signature validation, to isolate the cost of the index itself.
+    """
+    rng = Random(1337)
+    for num_items in [10000, 50000, 100000]:
+        print(f"\n== Mempool index, {num_items} items")
+        items = []
+        for i in range(num_items):
+            cost = rng.randint(1000000, 20000000)
+            items.append(
+                make_index_item(
+                    make_hash(i),
+                    cost,
+                    rng.randint(0, cost * 10),
+                    uint32(rng.randint(100, 10000)) if rng.random() < 0.1 else None,
+                )
+            )
+        coin_ids = [make_hash(rng.randrange(num_items)) for _ in range(1000)]
+        mempool_info = MempoolInfo(
+            CLVMCost(uint64(30000000 * num_items)),
+            FeeRate(uint64(5)),
+            CLVMCost(uint64(DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM // 2)),
+        )
+
+        for backend in MempoolIndexBackend:
+            print(f"  {backend.value}")
+            fee_estimator = create_bitcoin_fee_estimator(mempool_info.max_block_clvm_cost)
+            mempool = Mempool(mempool_info, fee_estimator, backend)
+
+            start = monotonic()
+            for item in items:
+                mempool.add_to_pool(item)
+            stop = monotonic()
+            print(f"    add_to_pool():                      {(stop - start) / num_items * 1000000:0.2f}us per item")
+
+            start = monotonic()
+            for _ in range(10):
+                for _ in mempool.items_by_feerate():
+                    pass
+            stop = monotonic()
+            print(f"    items_by_feerate():                 {(stop - start) / 10 * 1000:0.2f}ms per call")
+
+            start = monotonic()
+            for coin_id in coin_ids:
+                mempool.get_items_by_coin_id(coin_id)
+            stop = monotonic()
+            print(f"    get_items_by_coin_id():             {(stop - start) / len(coin_ids) * 1000000:0.2f}us per call")
+
+            start = monotonic()
+            for _ in range(10):
+                mempool.create_bundle_from_mempool_items(lambda _: True)
+            stop = monotonic()
+            print(f"    create_bundle_from_mempool_items(): {(stop - start) / 10 * 1000:0.2f}ms per call")
+
+            start = monotonic()
+            for height in range(100, 10000, 100):
+                mempool.new_tx_block(uint32(height), uint64(1631794488 + height * 19))
+            stop = monotonic()
+            print(f"    new_tx_block():                     {(stop - start) / 99 * 1000:0.2f}ms per call")
+
+            to_remove = mempool.all_item_ids()
+            start = monotonic()
+            for batch in to_batches(to_remove, 1000):
+                mempool.remove_from_pool(batch.entries, MempoolRemoveReason.BLOCK_INCLUSION)
+            stop = monotonic()
+            print(
+                f"    remove_from_pool():                 {(stop - start) / len(to_remove) * 1000000:0.2f}us per item"
+            )
+
+
+def run_block_fill_benchmark() -> None:
+    """
+    Compares the block fill strategies on an adversarial mempool, where a few
+    large, high fee rate items sit at the top and leave most of the block
+    empty when filling stops at the first item that doesn't fit.
+    """
+    rng = Random(1337)
+    max_block_cost = DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM // 2
+    items: List[MempoolItem] = []
+    coin_idx = 0
+    # large items, each slightly more than a third of a block
+    for _ in range(10):
+        cost = max_block_cost // 3 + rng.randint(1, 1000000)
+        items.append(make_index_item(make_hash(coin_idx), cost, cost * rng.randint(50, 100), None))
+        coin_idx += 1
+    # many small items with lower fee rates
+    for _ in range(20000):
+        cost = rng.randint(6000000, 30000000)
+        items.append(make_index_item(make_hash(coin_idx), cost, cost * rng.randint(1, 49), None))
+        coin_idx += 1
+    rng.shuffle(items)
+
+    mempool_info = MempoolInfo(
+        CLVMCost(uint64(DEFAULT_CONSTANTS.MAX_BLOCK_COST_CLVM * 100)),
+        FeeRate(uint64(5)),
+        CLVMCost(uint64(max_block_cost)),
+    )
+    print("\n== Block fill strategies (adversarial mempool)")
+    for strategy in BlockFillStrategy:
+        fee_estimator = create_bitcoin_fee_estimator(mempool_info.max_block_clvm_cost)
+        mempool = Mempool(mempool_info, fee_estimator, MempoolIndexBackend.SORTED)
+        for item in items:
+            mempool.add_to_pool(item)
+        start = monotonic()
+        for _ in range(10):
+            mempool.create_bundle_from_mempool_items(lambda _: True, strategy)
+        stop = monotonic()
+        stats = mempool.last_block_assembly
+        assert stats is not None
+        print(f"  {strategy.value}")
+        print(f"    time:       {(stop - start) / 10 * 1000:0.2f}ms per block")
+        print(f"    fill ratio: {stats.fill_ratio:0.4f}")
+        print(f"    fees:       {stats.fees}")
+        print(f"    included:   {stats.items_included} skipped: {stats.items_skipped}")
+
+
 if __name__ == "__main__":
     import logging
 
     logger = logging.getLogger()
     logger.addHandler(logging.StreamHandler())
     logger.setLevel(logging.WARNING)
-    asyncio.run(run_mempool_benchmark())
+    if sys.argv[1:] == ["index"]:
+        run_mempool_index_benchmark()
+    elif sys.argv[1:] == ["fill"]:
+        run_block_fill_benchmark()
+    else:
+        asyncio.run(run_mempool_benchmark())
+        run_mempool_index_benchmark()
+        run_block_fill_benchmark()
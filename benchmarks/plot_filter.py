@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from pathlib import Path
+from random import Random
+from time import monotonic
+
+from chia.plotting.plot_id_index import PlotIdIndex
+from chia.types.blockchain_format.proof_of_space import passes_plot_filter
+from chia.types.blockchain_format.sized_bytes import bytes32
+
+# mainnet, before the first plot filter reduction
+PREFIX_BITS = 9
+
+
+def rand_hash(rng: Random) -> bytes32:
+    return bytes32(rng.getrandbits(256).to_bytes(32, "big"))
+
+
+def run_plot_filter_benchmark() -> None:
+    """
+    Compares evaluating the plot filter one plot at a time, the way the
+    harvester did, to the batched filter over a PlotIdIndex snapshot.
+    """
+    rng = Random(1337)
+    for num_plots in [10000, 100000, 500000]:
+        print(f"\n== Plot filter, {num_plots} plots")
+        plot_ids = {Path(f"/plots/plot-{i}.plot"): rand_hash(rng) for i in range(num_plots)}
+        challenges = [(rand_hash(rng), rand_hash(rng)) for _ in range(3)]
+
+        start = monotonic()
+        for challenge_hash, sp_hash in challenges:
+            passed = [
+                filename
+                for filename, plot_id in plot_ids.items()
+                if passes_plot_filter(PREFIX_BITS, plot_id, challenge_hash, sp_hash)
+            ]
+        stop = monotonic()
+        print(f"  passes_plot_filter() per plot:   {(stop - start) / len(challenges) * 1000:0.2f}ms per signage point")
+
+        index = PlotIdIndex()
+        start = monotonic()
+        for filename, plot_id in plot_ids.items():
+            index.add(filename, plot_id)
+        stop = monotonic()
+        print(f"  PlotIdIndex.add():               {(stop - start) / num_plots * 1000000:0.2f}us per plot")
+
+        start = monotonic()
+        snapshot = index.snapshot()
+        stop = monotonic()
+        print(f"  PlotIdIndex.snapshot():          {(stop - start) * 1000:0.2f}ms after a change")
+
+        start = monotonic()
+        for challenge_hash, sp_hash in challenges:
+            batched = index.snapshot().passing_plot_filter(PREFIX_BITS, challenge_hash, sp_hash)
+        stop = monotonic()
+        print(f"  passing_plot_filter() batched:   {(stop - start) / len(challenges) * 1000:0.2f}ms per signage point")
+        assert set(batched) == set(passed)
+        assert len(snapshot) == num_plots
+
+        to_remove = list(plot_ids.keys())[: num_plots // 10]
+        start = monotonic()
+        for filename in to_remove:
+            index.remove(filename)
+        stop = monotonic()
+        print(f"  PlotIdIndex.remove():            {(stop - start) / len(to_remove) * 1000000:0.2f}us per plot")
+
+
+if __name__ == "__main__":
+    run_plot_filter_benchmark()
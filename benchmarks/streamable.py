@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import io
 import json
 import sys
 from dataclasses import dataclass
@@ -9,11 +10,16 @@ from time import process_time as clock
 from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple, Type, Union
 
 import click
-from utils import EnumType, get_commit_hash, rand_bytes, rand_full_block, rand_hash
+from utils import EnumType, get_commit_hash, rand_bytes, rand_class_group_element, rand_full_block, rand_hash
 
+from chia.full_node.block_store import BlockRecordDB
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+from chia.server.outbound_message import Message
+from chia.types.blockchain_format.coin import Coin
 from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.blockchain_format.sub_epoch_summary import SubEpochSummary
 from chia.types.full_block import FullBlock
-from chia.util.ints import uint8, uint64
+from chia.util.ints import uint8, uint16, uint32, uint64, uint128
 from chia.util.streamable import Streamable, streamable
 
 _version = 1
@@ -71,6 +77,40 @@ def get_random_benchmark_object() -> BenchmarkClass:
     return BenchmarkClass(a, b, c, d, e)
 
 
+def get_random_block_record() -> BlockRecordDB:
+    return BlockRecordDB(
+        header_hash=rand_hash(),
+        prev_hash=rand_hash(),
+        height=uint32(1000000),
+        weight=uint128(10000000000),
+        total_iters=uint128(1000000000000),
+        signage_point_index=uint8(12),
+        challenge_vdf_output=rand_class_group_element(),
+        infused_challenge_vdf_output=rand_class_group_element(),
+        reward_infusion_new_challenge=rand_hash(),
+        challenge_block_info_hash=rand_hash(),
+        sub_slot_iters=uint64(147849216),
+        pool_puzzle_hash=rand_hash(),
+        farmer_puzzle_hash=rand_hash(),
+        required_iters=uint64(1000000),
+        deficit=uint8(0),
+        overflow=False,
+        prev_transaction_block_height=uint32(999999),
+        timestamp=uint64(1681000000),
+        prev_transaction_block_hash=rand_hash(),
+        fees=uint64(1000),
+        reward_claims_incorporated=[Coin(rand_hash(), rand_hash(), uint64(250000000)) for _ in range(4)],
+        finished_challenge_slot_hashes=[rand_hash()],
+        finished_infused_challenge_slot_hashes=[rand_hash()],
+        finished_reward_slot_hashes=[rand_hash()],
+        sub_epoch_summary_included=SubEpochSummary(rand_hash(), rand_hash(), uint8(1), None, None),
+    )
+
+
+def get_random_message() -> Message:
+    return Message(uint8(ProtocolMessageTypes.respond_block.value), uint16(4), rand_bytes(10000))
+
+
 def print_row(
     *,
     mode: str,
@@ -112,6 +152,8 @@ class Data(str, Enum):
     all = "all"
     benchmark = "benchmark"
     full_block = "full_block"
+    block_record = "block_record"
+    message = "message"
 
 
 # The strings in this Enum are by purpose. See benchmark.utils.EnumType.
@@ -120,6 +162,9 @@ class Mode(str, Enum):
     creation = "creation"
     to_bytes = "to_bytes"
     from_bytes = "from_bytes"
+    # stream() and parse(), which to_bytes and from_bytes used to go through, to compare them to
+    stream = "stream"
+    parse = "parse"
     to_json = "to_json"
     from_json = "from_json"
 
@@ -128,6 +173,16 @@ def to_bytes(obj: Any) -> bytes:
     return bytes(obj)
 
 
+def stream(obj: Any) -> bytes:
+    f = io.BytesIO()
+    obj.stream(f)
+    return f.getvalue()
+
+
+def parse(data_class: Type[Any]) -> Callable[[bytes], Any]:
+    return lambda blob: data_class.parse(io.BytesIO(blob))
+
+
 @dataclass
 class ModeParameter:
     conversion_cb: Callable[[Any], Any]
@@ -141,29 +196,23 @@ class BenchmarkParameter:
     mode_parameter: Dict[Mode, Optional[ModeParameter]]
 
 
+def streamable_modes(data_class: Type[Any]) -> Dict[Mode, Optional[ModeParameter]]:
+    return {
+        Mode.creation: None,
+        Mode.to_bytes: ModeParameter(to_bytes),
+        Mode.from_bytes: ModeParameter(data_class.from_bytes, to_bytes),
+        Mode.stream: ModeParameter(stream),
+        Mode.parse: ModeParameter(parse(data_class), to_bytes),
+        Mode.to_json: ModeParameter(data_class.to_json_dict),
+        Mode.from_json: ModeParameter(data_class.from_json_dict, data_class.to_json_dict),
+    }
+
+
 benchmark_parameter: Dict[Data, BenchmarkParameter] = {
-    Data.benchmark: BenchmarkParameter(
-        BenchmarkClass,
-        get_random_benchmark_object,
-        {
-            Mode.creation: None,
-            Mode.to_bytes: ModeParameter(to_bytes),
-            Mode.from_bytes: ModeParameter(BenchmarkClass.from_bytes, to_bytes),
-            Mode.to_json: ModeParameter(BenchmarkClass.to_json_dict),
-            Mode.from_json: ModeParameter(BenchmarkClass.from_json_dict, BenchmarkClass.to_json_dict),
-        },
-    ),
-    Data.full_block: BenchmarkParameter(
-        FullBlock,
-        rand_full_block,
-        {
-            Mode.creation: None,
-            Mode.to_bytes: ModeParameter(to_bytes),
-            Mode.from_bytes: ModeParameter(FullBlock.from_bytes, to_bytes),
-            Mode.to_json: ModeParameter(FullBlock.to_json_dict),
-            Mode.from_json: ModeParameter(FullBlock.from_json_dict, FullBlock.to_json_dict),
-        },
-    ),
+    Data.benchmark: BenchmarkParameter(BenchmarkClass, get_random_benchmark_object, streamable_modes(BenchmarkClass)),
+    Data.full_block: BenchmarkParameter(FullBlock, rand_full_block, streamable_modes(FullBlock)),
+    Data.block_record: BenchmarkParameter(BlockRecordDB, get_random_block_record, streamable_modes(BlockRecordDB)),
+    Data.message: BenchmarkParameter(Message, get_random_message, streamable_modes(Message)),
 }
 
 
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from random import Random
+from time import monotonic
+from typing import Callable, List
+
+from blspy import AugSchemeMPL
+from chia_rs import tree_hash
+
+from chia.types.blockchain_format.program import Program
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.blockchain_format.tree_hash import TREE_HASH_CACHE
+from chia.util.ints import uint16
+from chia.wallet.cat_wallet.cat_utils import CAT_MOD, construct_cat_puzzle
+from chia.wallet.nft_wallet.nft_puzzles import create_full_puzzle, create_ownership_layer_puzzle
+from chia.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle import puzzle_for_pk
+
+NUM_ASSETS = 2000
+
+
+def rand_hash(rng: Random) -> bytes32:
+    return bytes32(rng.getrandbits(256).to_bytes(32, "big"))
+
+
+def uncached_tree_hash(p: Program) -> bytes32:
+    # what Program.get_tree_hash() did before the cache
+    return bytes32(tree_hash(bytes(p)))
+
+
+def run(name: str, puzzles: List[Program], hash_fn: Callable[[Program], bytes32]) -> List[bytes32]:
+    start = monotonic()
+    hashes = [hash_fn(p) for p in puzzles]
+    print(f"  {name}: {(monotonic() - start) / len(puzzles) * 1000000:0.1f}us per puzzle")
+    return hashes
+
+
+def run_tree_hash_benchmark() -> None:
+    """
+    Computes the puzzle hashes of a wallet's CATs and NFTs, the way the wallet
+    does to match the coins it receives while syncing: curried over a few
+    shared mods, with the wallet's inner puzzles.
+    """
+    rng = Random(1337)
+    inner_puzzles = [
+        puzzle_for_pk(AugSchemeMPL.key_gen(rng.getrandbits(256).to_bytes(32, "big")).get_g1())
+        for _ in range(NUM_ASSETS // 10)
+    ]
+    tails = [rand_hash(rng) for _ in range(20)]
+    metadata = Program.to([("u", ["https://example.com/nft.png"]), ("h", rand_hash(rng))])
+    updater_hash = rand_hash(rng)
+
+    cats = [
+        construct_cat_puzzle(CAT_MOD, tails[i % len(tails)], inner_puzzles[i % len(inner_puzzles)])
+        for i in range(NUM_ASSETS)
+    ]
+    nfts = []
+    for i in range(NUM_ASSETS):
+        launcher_id = rand_hash(rng)
+        ownership = create_ownership_layer_puzzle(launcher_id, b"", inner_puzzles[i % len(inner_puzzles)], uint16(500))
+        nfts.append(create_full_puzzle(launcher_id, metadata, updater_hash, ownership))
+
+    for name, puzzles in [("CAT", cats), ("NFT", nfts)]:
+        print(f"\n== {NUM_ASSETS} {name} puzzle hashes")
+        expected = run("uncached", puzzles, uncached_tree_hash)
+        TREE_HASH_CACHE.clear()
+        assert run("cached, cold", puzzles, Program.get_tree_hash) == expected
+        assert run("cached, warm", puzzles, Program.get_tree_hash) == expected
+        info = TREE_HASH_CACHE.info()
+        print(
+            f"  hits: {info.hits} misses: {info.misses} sub-tree hits: {info.subtree_hits} "
+            f"size: {info.size}/{info.capacity}"
+        )
+
+
+if __name__ == "__main__":
+    run_tree_hash_benchmark()
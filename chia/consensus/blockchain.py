@@ -24,6 +24,7 @@ from chia.consensus.find_fork_point import find_fork_point_in_chain
 from chia.consensus.full_block_to_block_record import block_to_block_record
 from chia.consensus.multiprocess_validation import (
     PreValidationResult,
+    ValidationWorkerCache,
     _run_generator,
     pre_validate_blocks_multiprocessing,
 )
@@ -45,6 +46,7 @@ from chia.types.header_block import HeaderBlock
 from chia.types.unfinished_block import UnfinishedBlock
 from chia.types.unfinished_header_block import UnfinishedHeaderBlock
 from chia.types.weight_proof import SubEpochChallengeSegment
+from chia.util.db_wrapper import WriterPriority
 from chia.util.errors import ConsensusError, Err
 from chia.util.generator_tools import get_block_header, tx_removals_and_additions
 from chia.util.hash import std_hash
@@ -103,6 +105,8 @@ class Blockchain(BlockchainInterface):
     block_store: BlockStore
     # Used to verify blocks in parallel
     pool: Executor
+    # If set, the pool workers keep the recent block records between batches
+    validation_worker_cache: Optional[ValidationWorkerCache]
     # Set holding seen compact proofs, in order to avoid duplicates.
     _seen_compact_proofs: Set[Tuple[VDFInfo, uint32]]
 
@@ -123,6 +127,7 @@ class Blockchain(BlockchainInterface):
         multiprocessing_context: Optional[BaseContext] = None,
         *,
         single_threaded: bool = False,
+        validation_worker_cache: bool = False,
     ) -> "Blockchain":
         """
         Initializes a blockchain with the BlockRecords from disk, assuming they have all been
@@ -148,6 +153,7 @@ class Blockchain(BlockchainInterface):
                 initargs=(f"{getproctitle()}_worker",),
             )
             log.info(f"Started {num_workers} processes for block validation")
+        self.validation_worker_cache = ValidationWorkerCache() if validation_worker_cache else None
 
         self.constants = consensus_constants
         self.coin_store = coin_store
@@ -181,6 +187,38 @@ class Blockchain(BlockchainInterface):
         self._peak_height = self.block_record(peak).height
         assert self.__height_map.contains_height(self._peak_height)
         assert not self.__height_map.contains_height(uint32(self._peak_height + 1))
+        await self._replay_coin_store()
+
+    async def _replay_coin_store(self) -> None:
+        """
+        With the write-back cache, the coin store may not have been flushed before the node stopped. This re-applies
+        the coin changes of the blocks after the height it's complete up to.
+        """
+        checkpoint = self.coin_store.checkpoint_height()
+        if checkpoint is None:
+            return
+        assert self._peak_height is not None
+        if checkpoint < self._peak_height:
+            log.info(f"Re-applying the coin changes of blocks {checkpoint + 1} to {self._peak_height}")
+        for height in range(checkpoint + 1, self._peak_height + 1):
+            header_hash = self.height_to_hash(uint32(height))
+            assert header_hash is not None
+            block = await self.block_store.get_full_block(header_hash)
+            assert block is not None
+            if not block.is_transaction_block():
+                continue
+            tx_removals, tx_additions, _ = await self.get_tx_removals_and_additions(block)
+            assert block.foliage_transaction_block is not None
+            await self.coin_store.new_block(
+                block.height,
+                block.foliage_transaction_block.timestamp,
+                block.get_included_reward_coins(),
+                tx_additions,
+                tx_removals,
+            )
+            self.coin_store.commit_cache_changes()
+            await self.coin_store.maybe_flush_cache()
+        await self.coin_store.flush_cache()
 
     def get_peak(self) -> Optional[BlockRecord]:
         """
@@ -208,6 +246,7 @@ class Blockchain(BlockchainInterface):
         block: FullBlock,
         pre_validation_result: PreValidationResult,
         fork_point_with_peak: Optional[uint32] = None,
+        block_bytes: Optional[bytes] = None,
     ) -> Tuple[AddBlockResult, Optional[Err], Optional[StateChangeSummary]]:
         """
         This method must be called under the blockchain lock
@@ -220,6 +259,7 @@ class Blockchain(BlockchainInterface):
             block: The FullBlock to be validated.
             pre_validation_result: A result of successful pre validation
             fork_point_with_peak: The fork point, for efficiency reasons, if None, it will be recomputed
+            block_bytes: The serialized block, if it's at hand already, to store instead of serializing it again
 
         Returns:
             The result of adding the block to the blockchain (NEW_PEAK, ADDED_AS_ORPHAN, INVALID_BLOCK,
@@ -272,33 +312,39 @@ class Blockchain(BlockchainInterface):
             None,
         )
         # Always add the block to the database
-        async with self.block_store.db_wrapper.writer():
-            try:
-                header_hash: bytes32 = block.header_hash
-                # Perform the DB operations to update the state, and rollback if something goes wrong
-                await self.block_store.add_full_block(header_hash, block, block_record)
-                records, state_change_summary = await self._reconsider_peak(
-                    block_record, genesis, fork_point_with_peak, npc_result
-                )
+        try:
+            async with self.block_store.db_wrapper.writer(WriterPriority.high):
+                try:
+                    header_hash: bytes32 = block.header_hash
+                    # Perform the DB operations to update the state, and rollback if something goes wrong
+                    await self.block_store.add_full_block(header_hash, block, block_record, block_bytes)
+                    records, state_change_summary = await self._reconsider_peak(
+                        block_record, genesis, fork_point_with_peak, npc_result
+                    )
 
-                # Then update the memory cache. It is important that this is not cancelled and does not throw
-                # This is done after all async/DB operations, so there is a decreased chance of failure.
-                self.add_block_record(block_record)
-                if state_change_summary is not None:
-                    self.__height_map.rollback(state_change_summary.fork_height)
-                for fetched_block_record in records:
-                    self.__height_map.update_height(
-                        fetched_block_record.height,
-                        fetched_block_record.header_hash,
-                        fetched_block_record.sub_epoch_summary_included,
+                    # Then update the memory cache. It is important that this is not cancelled and does not throw
+                    # This is done after all async/DB operations, so there is a decreased chance of failure.
+                    self.add_block_record(block_record)
+                    if state_change_summary is not None:
+                        self.__height_map.rollback(state_change_summary.fork_height)
+                    for fetched_block_record in records:
+                        self.__height_map.update_height(
+                            fetched_block_record.height,
+                            fetched_block_record.header_hash,
+                            fetched_block_record.sub_epoch_summary_included,
+                        )
+                except BaseException as e:
+                    self.block_store.rollback_cache_block(header_hash)
+                    log.error(
+                        f"Error while adding block {block.header_hash} height {block.height},"
+                        f" rolling back: {traceback.format_exc()} {e}"
                     )
-            except BaseException as e:
-                self.block_store.rollback_cache_block(header_hash)
-                log.error(
-                    f"Error while adding block {block.header_hash} height {block.height},"
-                    f" rolling back: {traceback.format_exc()} {e}"
-                )
-                raise
+                    raise
+        except BaseException:
+            # The coin store cache changes are only valid if the transaction committed
+            self.coin_store.rollback_cache_changes()
+            raise
+        self.coin_store.commit_cache_changes()
 
         # make sure to update _peak_height after the transaction is committed,
         # otherwise other tasks may go look for this block before it's available
@@ -307,6 +353,7 @@ class Blockchain(BlockchainInterface):
 
         # This is done outside the try-except in case it fails, since we do not want to revert anything if it does
         await self.__height_map.maybe_flush()
+        await self.coin_store.maybe_flush_cache()
 
         if state_change_summary is not None:
             # new coin records added
@@ -647,6 +694,7 @@ class Blockchain(BlockchainInterface):
         wp_summaries: Optional[List[SubEpochSummary]] = None,
         *,
         validate_signatures: bool,
+        block_bytes: Optional[List[bytes]] = None,
     ) -> List[PreValidationResult]:
         return await pre_validate_blocks_multiprocessing(
             self.constants,
@@ -659,6 +707,8 @@ class Blockchain(BlockchainInterface):
             batch_size,
             wp_summaries,
             validate_signatures=validate_signatures,
+            worker_cache=self.validation_worker_cache,
+            block_bytes=block_bytes,
         )
 
     async def run_generator(self, unfinished_block: bytes, generator: BlockGenerator, height: uint32) -> NPCResult:
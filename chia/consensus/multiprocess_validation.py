@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
 import traceback
 from concurrent.futures import Executor
-from dataclasses import dataclass
-from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
 
 from blspy import AugSchemeMPL, G1Element
 
@@ -47,6 +48,20 @@ class PreValidationResult(Streamable):
     validated_signature: bool
 
 
+@dataclass
+class ValidationWorkerCache:
+    """
+    The parent side of batch_pre_validate_blocks_cached(). Remembers which block
+    records were sent to the validation workers by the previous call to
+    pre_validate_blocks_multiprocessing(), so only new ones are sent
+    """
+
+    sent: Set[bytes32] = field(default_factory=set)
+    # number of batches that had to be sent again, with all the block records,
+    # because the worker didn't have them
+    misses: int = 0
+
+
 def batch_pre_validate_blocks(
     constants: ConsensusConstants,
     blocks_pickled: Dict[bytes, bytes],
@@ -62,6 +77,82 @@ def batch_pre_validate_blocks(
     blocks: Dict[bytes32, BlockRecord] = {}
     for k, v in blocks_pickled.items():
         blocks[bytes32(k)] = BlockRecord.from_bytes(v)
+    return _pre_validate_batch(
+        constants,
+        blocks,
+        full_blocks_pickled,
+        header_blocks_pickled,
+        prev_transaction_generators,
+        npc_results,
+        check_filter,
+        expected_difficulty,
+        expected_sub_slot_iters,
+        validate_signatures,
+    )
+
+
+# the block records kept by each validation worker process, across calls to
+# batch_pre_validate_blocks_cached()
+_worker_block_records: Dict[bytes32, BlockRecord] = {}
+
+
+def batch_pre_validate_blocks_cached(
+    constants: ConsensusConstants,
+    window: List[bytes],
+    new_blocks_pickled: Dict[bytes, bytes],
+    full_blocks_pickled: Optional[List[bytes]],
+    header_blocks_pickled: Optional[List[bytes]],
+    prev_transaction_generators: List[Optional[bytes]],
+    npc_results: Dict[uint32, bytes],
+    check_filter: bool,
+    expected_difficulty: List[uint64],
+    expected_sub_slot_iters: List[uint64],
+    validate_signatures: bool,
+) -> Tuple[List[bytes], List[bytes]]:
+    """
+    Like batch_pre_validate_blocks(), but rather than all the recent block
+    records, only the header hashes of the records (window) and the records
+    that are new since the previous batch are passed in. The worker keeps the
+    records of the window between calls. If the worker is missing any of
+    them, nothing is validated and the missing header hashes are returned
+    (along with an empty list of results).
+    """
+    for k, v in new_blocks_pickled.items():
+        _worker_block_records[bytes32(k)] = BlockRecord.from_bytes(v)
+    missing: List[bytes] = [h for h in window if h not in _worker_block_records]
+    if len(missing) > 0:
+        return missing, []
+
+    blocks: Dict[bytes32, BlockRecord] = {bytes32(h): _worker_block_records[bytes32(h)] for h in window}
+    # the window only moves forward, anything that fell out of it won't be needed again
+    _worker_block_records.clear()
+    _worker_block_records.update(blocks)
+    return [], _pre_validate_batch(
+        constants,
+        blocks,
+        full_blocks_pickled,
+        header_blocks_pickled,
+        prev_transaction_generators,
+        npc_results,
+        check_filter,
+        expected_difficulty,
+        expected_sub_slot_iters,
+        validate_signatures,
+    )
+
+
+def _pre_validate_batch(
+    constants: ConsensusConstants,
+    blocks: Dict[bytes32, BlockRecord],
+    full_blocks_pickled: Optional[List[bytes]],
+    header_blocks_pickled: Optional[List[bytes]],
+    prev_transaction_generators: List[Optional[bytes]],
+    npc_results: Dict[uint32, bytes],
+    check_filter: bool,
+    expected_difficulty: List[uint64],
+    expected_sub_slot_iters: List[uint64],
+    validate_signatures: bool,
+) -> List[bytes]:
     results: List[PreValidationResult] = []
     if full_blocks_pickled is not None and header_blocks_pickled is not None:
         assert ValueError("Only one should be passed here")
@@ -175,6 +266,8 @@ async def pre_validate_blocks_multiprocessing(
     wp_summaries: Optional[List[SubEpochSummary]] = None,
     *,
     validate_signatures: bool = True,
+    worker_cache: Optional[ValidationWorkerCache] = None,
+    block_bytes: Optional[Sequence[bytes]] = None,
 ) -> List[PreValidationResult]:
     """
     This method must be called under the blockchain lock
@@ -190,6 +283,10 @@ async def pre_validate_blocks_multiprocessing(
         blocks: list of full blocks to validate (must be connected to current chain)
         npc_results
         get_block_generator
+        worker_cache: if set, the workers keep the recent block records between calls, and only the new ones are
+            sent to them
+        block_bytes: the serialized blocks, if they're at hand already, to send to the workers instead of
+            serializing the blocks again
     """
     prev_b: Optional[BlockRecord] = None
     # Collects all the recent blocks (up to the previous sub-epoch)
@@ -287,16 +384,21 @@ async def pre_validate_blocks_multiprocessing(
     npc_results_pickled = {}
     for k, v in npc_results.items():
         npc_results_pickled[k] = bytes(v)
-    futures = []
+    futures: List[Awaitable[List[bytes]]] = []
+    cached_futures: List[Awaitable[Tuple[int, List[bytes]]]] = []
     # Pool of workers to validate blocks concurrently
     recent_blocks_bytes = {bytes(k): bytes(v) for k, v in recent_blocks.items()}  # convert to bytes
+    if worker_cache is not None:
+        window: List[bytes] = list(recent_blocks_bytes.keys())
+        new_blocks_bytes = {k: v for k, v in recent_blocks_bytes.items() if k not in worker_cache.sent}
+        worker_cache.sent = set(recent_blocks.keys())
     for i in range(0, len(blocks), batch_size):
         end_i = min(i + batch_size, len(blocks))
         blocks_to_validate = blocks[i:end_i]
         b_pickled: Optional[List[bytes]] = None
         hb_pickled: Optional[List[bytes]] = None
         previous_generators: List[Optional[bytes]] = []
-        for block in blocks_to_validate:
+        for idx, block in enumerate(blocks_to_validate, i):
             # We ONLY add blocks which are in the past, based on header hashes (which are validated later) to the
             # prev blocks dict. This is important since these blocks are assumed to be valid and are used as previous
             # generator references
@@ -311,7 +413,7 @@ async def pre_validate_blocks_multiprocessing(
                 assert get_block_generator is not None
                 if b_pickled is None:
                     b_pickled = []
-                b_pickled.append(bytes(block))
+                b_pickled.append(bytes(block) if block_bytes is None else block_bytes[idx])
                 try:
                     block_generator: Optional[BlockGenerator] = await get_block_generator(block, prev_blocks_dict)
                 except ValueError:
@@ -329,22 +431,47 @@ async def pre_validate_blocks_multiprocessing(
                     hb_pickled = []
                 hb_pickled.append(bytes(block))
 
-        futures.append(
-            asyncio.get_running_loop().run_in_executor(
-                pool,
-                batch_pre_validate_blocks,
-                constants,
-                recent_blocks_bytes,
+        if worker_cache is None:
+            futures.append(
+                asyncio.get_running_loop().run_in_executor(
+                    pool,
+                    batch_pre_validate_blocks,
+                    constants,
+                    recent_blocks_bytes,
+                    b_pickled,
+                    hb_pickled,
+                    previous_generators,
+                    npc_results_pickled,
+                    check_filter,
+                    [diff_ssis[j][0] for j in range(i, end_i)],
+                    [diff_ssis[j][1] for j in range(i, end_i)],
+                    validate_signatures,
+                )
+            )
+        else:
+            # the workers only need the CLVM results for the blocks they validate
+            batch_npc_results = {
+                b.height: npc_results_pickled[b.height] for b in blocks_to_validate if b.height in npc_results_pickled
+            }
+            batch_args = (
                 b_pickled,
                 hb_pickled,
                 previous_generators,
-                npc_results_pickled,
+                batch_npc_results,
                 check_filter,
                 [diff_ssis[j][0] for j in range(i, end_i)],
                 [diff_ssis[j][1] for j in range(i, end_i)],
                 validate_signatures,
             )
-        )
+            cached_futures.append(
+                _pre_validate_cached(pool, constants, window, new_blocks_bytes, recent_blocks_bytes, batch_args)
+            )
+
+    if worker_cache is not None:
+        cached_results = await asyncio.gather(*cached_futures)
+        worker_cache.misses += sum(1 for misses, _ in cached_results if misses > 0)
+        return [PreValidationResult.from_bytes(result) for _, batch_result in cached_results for result in batch_result]
+
     # Collect all results into one flat list
     return [
         PreValidationResult.from_bytes(result)
@@ -353,6 +480,31 @@ async def pre_validate_blocks_multiprocessing(
     ]
 
 
+async def _pre_validate_cached(
+    pool: Executor,
+    constants: ConsensusConstants,
+    window: List[bytes],
+    new_blocks_bytes: Dict[bytes, bytes],
+    recent_blocks_bytes: Dict[bytes, bytes],
+    batch_args: Tuple[Any, ...],
+) -> Tuple[int, List[bytes]]:
+    """
+    Runs batch_pre_validate_blocks_cached() on the pool. If the worker that
+    picked up the batch doesn't have all the block records, it's run again
+    with all of them. Returns the number of misses and the results.
+    """
+    missing, results = await asyncio.get_running_loop().run_in_executor(
+        pool, functools.partial(batch_pre_validate_blocks_cached, constants, window, new_blocks_bytes, *batch_args)
+    )
+    if len(missing) == 0:
+        return 0, results
+    missing, results = await asyncio.get_running_loop().run_in_executor(
+        pool, functools.partial(batch_pre_validate_blocks_cached, constants, window, recent_blocks_bytes, *batch_args)
+    )
+    assert len(missing) == 0
+    return 1, results
+
+
 def _run_generator(
     constants: ConsensusConstants,
     unfinished_block_bytes: bytes,
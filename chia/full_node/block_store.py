@@ -17,7 +17,7 @@ from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.blockchain_format.sub_epoch_summary import SubEpochSummary
 from chia.types.full_block import FullBlock
 from chia.types.weight_proof import SubEpochChallengeSegment, SubEpochSegments
-from chia.util.db_wrapper import DBWrapper2, execute_fetchone
+from chia.util.db_wrapper import DBWrapper2, WriterPriority, execute_fetchone
 from chia.util.errors import Err
 from chia.util.full_block_utils import (
     GeneratorBlockInfo,
@@ -237,8 +237,8 @@ class BlockStore:
         else:
             return field.hex()
 
-    def compress(self, block: FullBlock) -> bytes:
-        ret: bytes = zstd.compress(bytes(block))
+    def compress(self, block: FullBlock, block_bytes: Optional[bytes] = None) -> bytes:
+        ret: bytes = zstd.compress(bytes(block) if block_bytes is None else block_bytes)
         return ret
 
     def maybe_decompress(self, block_bytes: bytes) -> FullBlock:
@@ -292,7 +292,9 @@ class BlockStore:
                 ),
             )
 
-    async def add_full_block(self, header_hash: bytes32, block: FullBlock, block_record: BlockRecord) -> None:
+    async def add_full_block(
+        self, header_hash: bytes32, block: FullBlock, block_record: BlockRecord, block_bytes: Optional[bytes] = None
+    ) -> None:
         self.block_cache.put(header_hash, block)
         block_record_db: BlockRecordDB = BlockRecordDB.from_block_record(block_record)
 
@@ -313,7 +315,7 @@ class BlockStore:
                         ses,
                         int(block.is_fully_compactified()),
                         False,  # in_main_chain
-                        self.compress(block),
+                        self.compress(block, block_bytes),
                         bytes(block_record_db),
                     ),
                 )
@@ -327,7 +329,7 @@ class BlockStore:
                         block.height,
                         int(block.is_transaction_block()),
                         int(block.is_fully_compactified()),
-                        bytes(block),
+                        bytes(block) if block_bytes is None else block_bytes,
                     ),
                 )
 
@@ -349,7 +351,7 @@ class BlockStore:
     async def persist_sub_epoch_challenge_segments(
         self, ses_block_hash: bytes32, segments: List[SubEpochChallengeSegment]
     ) -> None:
-        async with self.db_wrapper.writer_maybe_transaction() as conn:
+        async with self.db_wrapper.writer_maybe_transaction(WriterPriority.low) as conn:
             await conn.execute(
                 "INSERT OR REPLACE INTO sub_epoch_segments_v3 VALUES(?, ?)",
                 (self.maybe_to_hex(ses_block_hash), bytes(SubEpochSegments(segments))),
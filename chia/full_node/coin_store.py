@@ -30,10 +30,27 @@ class CoinStore:
 
     db_wrapper: DBWrapper2
     coins_added_at_height_cache: LRUCache[uint32, List[CoinRecord]]
+    # With the write-back cache enabled, new_block() only updates the cache, which is written to the DB every
+    # cache_flush_blocks blocks, or once it holds cache_max_records coin records. 0 writes every block through.
+    cache_flush_blocks: int = 0
+    cache_max_records: int = 0
+    # The current state of the coins added or spent since the last flush
+    _cache: Dict[bytes32, CoinRecord] = dataclasses.field(default_factory=dict)
+    _cache_blocks: int = 0
+    # The height of the last block applied by new_block()
+    _height: int = -1
+    # While the DB is behind the cache, coin_record is only complete up to this height. It's stored with the
+    # coin records so that the missing blocks can be re-applied after a crash, see Blockchain._replay_coin_store()
+    _checkpoint: Optional[int] = None
+    # The cache state before the block which is currently being added, for rollback_cache_changes()
+    _undo: Dict[bytes32, Optional[CoinRecord]] = dataclasses.field(default_factory=dict)
+    _undo_state: Optional[Tuple[int, int, Optional[int]]] = None
 
     @classmethod
-    async def create(cls, db_wrapper: DBWrapper2) -> CoinStore:
-        self = CoinStore(db_wrapper, LRUCache(100))
+    async def create(
+        cls, db_wrapper: DBWrapper2, *, cache_flush_blocks: int = 0, cache_max_records: int = 1000000
+    ) -> CoinStore:
+        self = CoinStore(db_wrapper, LRUCache(100), cache_flush_blocks, cache_max_records)
 
         async with self.db_wrapper.writer_maybe_transaction() as conn:
             log.info("DB: Creating coin store tables and indexes.")
@@ -83,9 +100,118 @@ class CoinStore:
             log.info("DB: Creating index coin_parent_index")
             await conn.execute("CREATE INDEX IF NOT EXISTS coin_parent_index on coin_record(coin_parent)")
 
+            await conn.execute("CREATE TABLE IF NOT EXISTS coin_record_checkpoint(id int PRIMARY KEY, height bigint)")
+            async with conn.execute("SELECT height FROM coin_record_checkpoint WHERE id=0") as cursor:
+                row = await cursor.fetchone()
+                if row is not None:
+                    self._checkpoint = row[0]
+
         return self
 
+    def checkpoint_height(self) -> Optional[int]:
+        """
+        Returns the height coin_record is complete up to, if it's behind the blocks that were applied, or None if it's
+        up to date.
+        """
+        return self._checkpoint
+
+    def _write_back(self) -> bool:
+        # Once the DB is behind, the changes have to go through the cache until it's flushed
+        return self.cache_flush_blocks > 0 or self._checkpoint is not None
+
+    async def _set_checkpoint(self, height: Optional[int]) -> None:
+        # The callers restore self._checkpoint if the transaction fails
+        async with self.db_wrapper.writer_maybe_transaction() as conn:
+            if height is None:
+                await conn.execute("DELETE FROM coin_record_checkpoint")
+            else:
+                await conn.execute("INSERT OR REPLACE INTO coin_record_checkpoint VALUES(0, ?)", (height,))
+        self._checkpoint = height
+
+    def _save_undo_state(self) -> None:
+        if self._undo_state is None:
+            self._undo_state = (self._cache_blocks, self._height, self._checkpoint)
+
+    def _cache_put(self, record: CoinRecord) -> None:
+        name = record.name
+        if name not in self._undo:
+            self._undo[name] = self._cache.get(name)
+        self._cache[name] = record
+
+    def _cache_pop(self, name: bytes32) -> None:
+        if name not in self._undo:
+            self._undo[name] = self._cache.get(name)
+        self._cache.pop(name, None)
+
+    def commit_cache_changes(self) -> None:
+        """
+        Makes the cache changes of the last blocks permanent, once their DB transaction committed.
+        """
+        self._undo.clear()
+        self._undo_state = None
+
+    def rollback_cache_changes(self) -> None:
+        """
+        Reverts the cache changes since commit_cache_changes(), when their DB transaction was rolled back.
+        """
+        for name, record in self._undo.items():
+            if record is None:
+                self._cache.pop(name, None)
+            else:
+                self._cache[name] = record
+        if self._undo_state is not None:
+            self._cache_blocks, self._height, self._checkpoint = self._undo_state
+        self.commit_cache_changes()
+
+    async def maybe_flush_cache(self) -> None:
+        if not self._write_back():
+            return
+        if self._cache_blocks >= self.cache_flush_blocks or len(self._cache) >= self.cache_max_records:
+            await self.flush_cache()
+
+    async def flush_cache(self) -> None:
+        """
+        Writes the cached coin records to the DB, in a single transaction
+        """
+        checkpoint = self._checkpoint
+        if checkpoint is None:
+            return
+        start = time.monotonic()
+        try:
+            async with self.db_wrapper.writer_maybe_transaction():
+                if self._undo_state is not None:
+                    # This task is in the middle of adding a block, so the changes aren't final yet
+                    return
+                # Everything up to the checkpoint is in the DB, so the coins confirmed after it are new
+                await self._add_coin_records([r for r in self._cache.values() if r.confirmed_block_index > checkpoint])
+                await self._update_spent_index(
+                    [r for r in self._cache.values() if r.confirmed_block_index <= checkpoint]
+                )
+                # Without the cache, the following blocks are written through again
+                await self._set_checkpoint(max(self._height, checkpoint) if self.cache_flush_blocks > 0 else None)
+        except BaseException:
+            self._checkpoint = checkpoint
+            raise
+        log.debug(
+            f"Flushed {len(self._cache)} coin records of {self._cache_blocks} blocks in "
+            f"{time.monotonic() - start:0.2f}s"
+        )
+        self._cache.clear()
+        self._cache_blocks = 0
+
+    def _get_cached(self, name: bytes32) -> Optional[CoinRecord]:
+        # Like with the DB, other tasks only see the changes of the block being added once its transaction committed
+        if len(self._undo) > 0 and name in self._undo and not self.db_wrapper.holds_writer():
+            return self._undo[name]
+        return self._cache.get(name)
+
+    async def _flush_for_query(self) -> None:
+        # Only the lookups by coin name know about the cache
+        if len(self._cache) > 0:
+            await self.flush_cache()
+
     async def num_unspent(self) -> int:
+        await self._flush_for_query()
         async with self.db_wrapper.reader_no_transaction() as conn:
             async with conn.execute("SELECT COUNT(*) FROM coin_record WHERE spent_index=0") as cursor:
                 row = await cursor.fetchone()
@@ -150,8 +276,19 @@ class CoinStore:
             )
             additions.append(reward_coin_r)
 
-        await self._add_coin_records(additions)
-        await self._set_spent(tx_removals, height)
+        if self._write_back():
+            self._save_undo_state()
+            if self._checkpoint is None:
+                # Everything before this block was written through
+                await self._set_checkpoint(height - 1)
+            for record in additions:
+                self._cache_put(record)
+            await self._cache_set_spent(tx_removals, height)
+            self._cache_blocks += 1
+        else:
+            await self._add_coin_records(additions)
+            await self._set_spent(tx_removals, height)
+        self._height = height
 
         end = time.monotonic()
         log.log(
@@ -165,6 +302,9 @@ class CoinStore:
 
     # Checks DB and DiffStores for CoinRecord with coin_name and returns it
     async def get_coin_record(self, coin_name: bytes32) -> Optional[CoinRecord]:
+        cached = self._get_cached(coin_name)
+        if cached is not None:
+            return cached
         async with self.db_wrapper.reader_no_transaction() as conn:
             async with conn.execute(
                 "SELECT confirmed_index, spent_index, coinbase, puzzle_hash, "
@@ -178,10 +318,19 @@ class CoinStore:
         return None
 
     async def get_coin_records(self, names: List[bytes32]) -> List[CoinRecord]:
-        if len(names) == 0:
-            return []
-
         coins: List[CoinRecord] = []
+        if len(self._cache) > 0:
+            missing: List[bytes32] = []
+            for name in names:
+                cached = self._get_cached(name)
+                if cached is None:
+                    missing.append(name)
+                else:
+                    coins.append(cached)
+            names = missing
+
+        if len(names) == 0:
+            return coins
 
         async with self.db_wrapper.reader_no_transaction() as conn:
             cursors: List[Cursor] = []
@@ -209,6 +358,7 @@ class CoinStore:
         return coins
 
     async def get_coins_added_at_height(self, height: uint32) -> List[CoinRecord]:
+        await self._flush_for_query()
         coins_added: Optional[List[CoinRecord]] = self.coins_added_at_height_cache.get(height)
         if coins_added is not None:
             return coins_added
@@ -228,6 +378,7 @@ class CoinStore:
                 return coins
 
     async def get_coins_removed_at_height(self, height: uint32) -> List[CoinRecord]:
+        await self._flush_for_query()
         # Special case to avoid querying all unspent coins (spent_index=0)
         if height == 0:
             return []
@@ -246,6 +397,7 @@ class CoinStore:
                 return coins
 
     async def get_all_coins(self, include_spent_coins: bool) -> List[CoinRecord]:
+        await self._flush_for_query()
         # WARNING: this should only be used for testing or in a simulation,
         # running it on a synced testnet or mainnet node will most likely result in an OOM error.
         coins = set()
@@ -270,6 +422,7 @@ class CoinStore:
         start_height: uint32 = uint32(0),
         end_height: uint32 = uint32((2**32) - 1),
     ) -> List[CoinRecord]:
+        await self._flush_for_query()
         coins = set()
 
         async with self.db_wrapper.reader_no_transaction() as conn:
@@ -292,6 +445,7 @@ class CoinStore:
         start_height: uint32 = uint32(0),
         end_height: uint32 = uint32((2**32) - 1),
     ) -> List[CoinRecord]:
+        await self._flush_for_query()
         if len(puzzle_hashes) == 0:
             return []
 
@@ -323,6 +477,7 @@ class CoinStore:
         start_height: uint32 = uint32(0),
         end_height: uint32 = uint32((2**32) - 1),
     ) -> List[CoinRecord]:
+        await self._flush_for_query()
         if len(names) == 0:
             return []
 
@@ -366,6 +521,7 @@ class CoinStore:
         *,
         max_items: int = 50000,
     ) -> Set[CoinState]:
+        await self._flush_for_query()
         if len(puzzle_hashes) == 0:
             return set()
 
@@ -402,6 +558,7 @@ class CoinStore:
         start_height: uint32 = uint32(0),
         end_height: uint32 = uint32((2**32) - 1),
     ) -> List[CoinRecord]:
+        await self._flush_for_query()
         if len(parent_ids) == 0:
             return []
 
@@ -435,6 +592,7 @@ class CoinStore:
         max_height: uint32 = uint32.MAXIMUM,
         max_items: int = 50000,
     ) -> List[CoinState]:
+        await self._flush_for_query()
         if len(coin_ids) == 0:
             return []
 
@@ -473,8 +631,25 @@ class CoinStore:
         """
 
         coin_changes: Dict[bytes32, CoinRecord] = {}
-        # Add coins that are confirmed in the reverted blocks to the list of updated coins.
         async with self.db_wrapper.writer_maybe_transaction() as conn:
+            if self._write_back():
+                self._save_undo_state()
+                for name, cached in list(self._cache.items()):
+                    if cached.confirmed_block_index > block_index:
+                        self._cache_pop(name)
+                        coin_changes[name] = CoinRecord(
+                            cached.coin, uint32(0), cached.spent_block_index, cached.coinbase, uint64(0)
+                        )
+                    elif cached.spent_block_index > block_index:
+                        self._cache_put(dataclasses.replace(cached, spent_block_index=uint32(0)))
+                        coin_changes[name] = CoinRecord(
+                            cached.coin, cached.confirmed_block_index, uint32(0), cached.coinbase, cached.timestamp
+                        )
+                self._height = min(self._height, block_index)
+                if self._checkpoint is not None and block_index < self._checkpoint:
+                    await self._set_checkpoint(block_index)
+
+            # Add coins that are confirmed in the reverted blocks to the list of updated coins.
             async with conn.execute(
                 "SELECT confirmed_index, spent_index, coinbase, puzzle_hash, "
                 "coin_parent, amount, timestamp FROM coin_record WHERE confirmed_index>?",
@@ -483,7 +658,8 @@ class CoinStore:
                 for row in await cursor.fetchall():
                     coin = self.row_to_coin(row)
                     record = CoinRecord(coin, uint32(0), row[1], row[2], uint64(0))
-                    coin_changes[record.name] = record
+                    if record.name not in coin_changes:
+                        coin_changes[record.name] = record
 
             # Delete reverted blocks from storage
             await conn.execute("DELETE FROM coin_record WHERE confirmed_index>?", (block_index,))
@@ -555,6 +731,31 @@ class CoinStore:
                         values,
                     )
 
+    async def _update_spent_index(self, records: List[CoinRecord]) -> None:
+        if len(records) == 0:
+            return
+        async with self.db_wrapper.writer_maybe_transaction() as conn:
+            if self.db_wrapper.db_version == 2:
+                await conn.executemany(
+                    "UPDATE coin_record SET spent_index=? WHERE coin_name=?",
+                    [(record.spent_block_index, record.name) for record in records],
+                )
+            else:
+                await conn.executemany(
+                    "UPDATE coin_record SET spent=?, spent_index=? WHERE coin_name=?",
+                    [(int(record.spent), record.spent_block_index, record.name.hex()) for record in records],
+                )
+
+    # Update the cached coin records to be spent
+    async def _cache_set_spent(self, coin_names: List[bytes32], index: uint32) -> None:
+        assert len(coin_names) == 0 or index > 0
+
+        records = [record for record in await self.get_coin_records(coin_names) if record.spent_block_index == 0]
+        if len(records) != len(coin_names):
+            raise ValueError(f"Invalid operation to set spent, total updates {len(records)} expected {len(coin_names)}")
+        for record in records:
+            self._cache_put(dataclasses.replace(record, spent_block_index=index))
+
     # Update coin_record to be spent in DB
     async def _set_spent(self, coin_names: List[bytes32], index: uint32) -> None:
         assert len(coin_names) == 0 or index > 0
@@ -11,7 +11,7 @@ import time
 import traceback
 from multiprocessing.context import BaseContext
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
 
 from blspy import AugSchemeMPL
 
@@ -32,16 +32,19 @@ from chia.full_node.full_node_api import FullNodeAPI
 from chia.full_node.full_node_store import FullNodeStore, FullNodeStorePeakResult
 from chia.full_node.hint_management import get_hints_and_subscription_coin_ids
 from chia.full_node.hint_store import HintStore
+from chia.full_node.mempool import BlockFillStrategy
+from chia.full_node.mempool_index import MempoolIndexBackend
 from chia.full_node.mempool_manager import MempoolManager
 from chia.full_node.signage_point import SignagePoint
 from chia.full_node.subscriptions import PeerSubscriptions
+from chia.full_node.sync_scheduler import SyncScheduler
 from chia.full_node.sync_store import SyncStore
 from chia.full_node.tx_processing_queue import TransactionQueue
+from chia.full_node.wallet_update_dispatcher import WalletUpdateDispatcher
 from chia.full_node.weight_proof import WeightProofHandler
 from chia.protocols import farmer_protocol, full_node_protocol, timelord_protocol, wallet_protocol
-from chia.protocols.full_node_protocol import RequestBlocks, RespondBlock, RespondBlocks, RespondSignagePoint
+from chia.protocols.full_node_protocol import RequestBlocks, RespondBlock, RespondSignagePoint
 from chia.protocols.protocol_message_types import ProtocolMessageTypes
-from chia.protocols.wallet_protocol import CoinState, CoinStateUpdate
 from chia.rpc.rpc_server import StateChangedProtocol
 from chia.server.node_discovery import FullNodePeers
 from chia.server.outbound_message import Message, NodeType, make_msg
@@ -69,8 +72,9 @@ from chia.util.condition_tools import pkm_pairs
 from chia.util.config import PEER_DB_PATH_KEY_DEPRECATED, process_config_start_method
 from chia.util.db_synchronous import db_synchronous_on
 from chia.util.db_version import lookup_db_version, set_db_version_async
-from chia.util.db_wrapper import DBWrapper2, manage_connection
+from chia.util.db_wrapper import DBWrapper2, WriterPriority, manage_connection
 from chia.util.errors import ConsensusError, Err, ValidationError
+from chia.util.full_block_utils import FullBlockView, full_blocks_from_respond_blocks
 from chia.util.ints import uint8, uint32, uint64, uint128
 from chia.util.limited_semaphore import LimitedSemaphore
 from chia.util.path import path_from_root
@@ -108,6 +112,7 @@ class FullNode:
     _ui_tasks: Set[asyncio.Task[None]]
     db_path: Path
     subscriptions: PeerSubscriptions
+    wallet_updates: WalletUpdateDispatcher
     _transaction_queue_task: Optional[asyncio.Task[None]]
     simulator_transaction_callback: Optional[Callable[[bytes32], Awaitable[None]]]
     _sync_task: Optional[asyncio.Task[None]]
@@ -168,6 +173,7 @@ class FullNode:
         db_path_replaced: str = config["database_path"].replace("CHALLENGE", config["selected_network"])
         self.db_path = path_from_root(root_path, db_path_replaced)
         self.subscriptions = PeerSubscriptions()
+        self.wallet_updates = WalletUpdateDispatcher(self.subscriptions)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._transaction_queue_task = None
         self.simulator_transaction_callback = None
@@ -271,6 +277,7 @@ class FullNode:
                 "bytes_read": con.bytes_read,
                 "bytes_written": con.bytes_written,
                 "last_message_time": con.last_message_time,
+                "compression": con.get_compression_stats(),
                 "peak_height": peak_height,
                 "peak_weight": peak_weight,
                 "peak_hash": peak_hash,
@@ -310,7 +317,7 @@ class FullNode:
         self._db_wrapper = await DBWrapper2.create(
             self.db_path,
             db_version=db_version,
-            reader_count=4,
+            reader_count=self.config.get("db_readers", 4),
             log_path=sql_log_path,
             synchronous=db_sync,
         )
@@ -333,8 +340,16 @@ class FullNode:
                             pass
 
         self._block_store = await BlockStore.create(self.db_wrapper)
-        self._hint_store = await HintStore.create(self.db_wrapper)
-        self._coin_store = await CoinStore.create(self.db_wrapper)
+        self._hint_store = await HintStore.create(
+            self.db_wrapper,
+            use_filter=self.config.get("hint_filter", True),
+            filter_path=self.db_path.with_name(self.db_path.stem + "_hint_filter.dat"),
+        )
+        self._coin_store = await CoinStore.create(
+            self.db_wrapper,
+            cache_flush_blocks=self.config.get("coin_store_cache_flush_blocks", 0),
+            cache_max_records=self.config.get("coin_store_cache_max_records", 1000000),
+        )
         self.log.info("Initializing blockchain from disk")
         start_time = time.time()
         reserved_cores = self.config.get("reserved_cores", 0)
@@ -349,13 +364,17 @@ class FullNode:
             reserved_cores=reserved_cores,
             multiprocessing_context=self.multiprocessing_context,
             single_threaded=single_threaded,
+            validation_worker_cache=self.config.get("validation_worker_cache", False),
         )
 
         self._mempool_manager = MempoolManager(
             get_coin_record=self.coin_store.get_coin_record,
+            get_coin_records=self.coin_store.get_coin_records,
             consensus_constants=self.constants,
             multiprocessing_context=self.multiprocessing_context,
             single_threaded=single_threaded,
+            mempool_index_backend=MempoolIndexBackend(self.config.get("mempool_index_backend", "sqlite")),
+            block_fill_strategy=BlockFillStrategy(self.config.get("block_fill_strategy", "greedy")),
         )
 
         # Transactions go into this queue from the server, and get sent to respond_transaction
@@ -872,10 +891,22 @@ class FullNode:
         if self._transaction_queue_task is not None:
             self._transaction_queue_task.cancel()
         cancel_task_safe(task=self._sync_task, log=self.log)
+        self.wallet_updates.close()
 
     async def _await_closed(self) -> None:
         for task_id, task in list(self.full_node_store.tx_fetch_tasks.items()):
             cancel_task_safe(task, self.log)
+        if self._coin_store is not None:
+            try:
+                await self.coin_store.flush_cache()
+            except Exception as e:
+                # The next start re-applies the blocks that weren't flushed
+                self.log.error(f"Failed to flush the coin store cache: {e}")
+        if self._hint_store is not None:
+            try:
+                await self.hint_store.save_filter()
+            except Exception as e:
+                self.log.error(f"Failed to save the hint filter: {e}")
         await self.db_wrapper.close()
         if self._init_weight_proof is not None:
             await asyncio.wait([self._init_weight_proof])
@@ -1036,55 +1067,148 @@ class FullNode:
         fork_point_height = await check_fork_next_block(
             self.blockchain, fork_point_height, peers_with_peak, node_next_block_check
         )
-        batch_size = self.constants.MAX_BLOCK_COUNT_PER_REQUESTS
+        # end_height is inclusive
+        scheduler = SyncScheduler(
+            start_height=fork_point_height,
+            end_height=target_peak_sb_height,
+            max_batch_size=self.constants.MAX_BLOCK_COUNT_PER_REQUESTS,
+            max_in_flight_per_peer=self.config.get("sync_requests_per_peer", 3),
+        )
+        self.sync_store.sync_scheduler = scheduler
+        # set (and replaced) whenever the scheduler state changes, to wake up
+        # idle fetchers
+        state_changed = asyncio.Event()
+
+        def notify_state_changed() -> None:
+            nonlocal state_changed
+            state_changed.set()
+            state_changed = asyncio.Event()
+
+        async def wait_for_state_change() -> None:
+            try:
+                await asyncio.wait_for(state_changed.wait(), timeout=1)
+            except asyncio.TimeoutError:
+                pass
+
+        async def fetch_from_peer(peer: WSChiaConnection) -> None:
+            peer_id = peer.peer_node_id
+            while not peer.closed and not scheduler.done():
+                block_range = scheduler.next_range(peer_id)
+                if block_range is None:
+                    await wait_for_state_change()
+                    continue
+                start_height, end_height = block_range
+                request = RequestBlocks(uint32(start_height), uint32(end_height), True)
+                try:
+                    # the blocks are kept serialized, and only parsed when they're validated
+                    response = await peer.call_api(FullNodeAPI.request_blocks, request, timeout=30, raw_response=True)
+                except BaseException:
+                    # the range must never be lost, even if we're cancelled
+                    scheduler.range_failed(start_height)
+                    notify_state_changed()
+                    raise
+                blocks: Optional[List[FullBlockView]] = None
+                if isinstance(response, Message) and response.type == ProtocolMessageTypes.respond_blocks.value:
+                    try:
+                        blocks = full_blocks_from_respond_blocks(memoryview(response.data))
+                    except ValueError:
+                        blocks = []
+                    if len(blocks) == end_height - start_height + 1 and blocks[0].height == start_height:
+                        scheduler.range_fetched(start_height, blocks)
+                        notify_state_changed()
+                        continue
+
+                scheduler.range_failed(start_height, timed_out=response is None)
+                notify_state_changed()
+                if response is None:
+                    self.log.info(f"timed out fetching {start_height} to {end_height} from {peer.peer_info.host}")
+                    await peer.close()
+                elif blocks is not None:
+                    self.log.info(f"peer {peer.peer_info.host} sent wrong blocks for {start_height} to {end_height}")
+                    await peer.close()
+                else:
+                    # the peer doesn't have the blocks, leave them to the other peers
+                    self.log.info(f"peer {peer.peer_info.host} rejected blocks {start_height} to {end_height}")
+                return
+
+        async def stop_fetchers(peer_id: bytes32, tasks: List[asyncio.Task[None]]) -> None:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # the cancelled fetchers hand back their ranges, this catches any leftovers
+            scheduler.remove_peer(peer_id)
 
         async def fetch_block_batches(
-            batch_queue: asyncio.Queue[Optional[Tuple[WSChiaConnection, List[FullBlock]]]]
+            batch_queue: asyncio.Queue[Optional[Tuple[WSChiaConnection, List[FullBlockView]]]]
         ) -> None:
-            start_height, end_height = 0, 0
+            fetchers: Dict[bytes32, List[asyncio.Task[None]]] = {}
+            # the connection each fetched batch came from, kept after the
+            # fetchers are gone, for the batches still waiting for validation
+            connections: Dict[bytes32, WSChiaConnection] = {}
             new_peers_with_peak: List[WSChiaConnection] = peers_with_peak[:]
             try:
-                for start_height in range(fork_point_height, target_peak_sb_height, batch_size):
-                    end_height = min(target_peak_sb_height, start_height + batch_size)
-                    request = RequestBlocks(uint32(start_height), uint32(end_height), True)
-                    fetched = False
-                    for peer in random.sample(new_peers_with_peak, len(new_peers_with_peak)):
-                        if peer.closed:
+                while not scheduler.done():
+                    for peer in new_peers_with_peak:
+                        if peer.closed or peer.peer_node_id in fetchers:
                             continue
-                        response = await peer.call_api(FullNodeAPI.request_blocks, request, timeout=30)
-                        if response is None:
-                            await peer.close()
-                        elif isinstance(response, RespondBlocks):
-                            await batch_queue.put((peer, response.blocks))
-                            fetched = True
-                            break
-                    if fetched is False:
-                        self.log.error(f"failed fetching {start_height} to {end_height} from peers")
+                        scheduler.add_peer(peer.peer_node_id, peer.peer_info.host)
+                        connections[peer.peer_node_id] = peer
+                        fetchers[peer.peer_node_id] = [
+                            asyncio.create_task(fetch_from_peer(peer)) for _ in range(scheduler.max_in_flight_per_peer)
+                        ]
+                    new_peers_with_peak = []
+
+                    for peer_id, blocks in scheduler.pop_ready():
+                        await batch_queue.put((connections[peer_id], blocks))
+
+                    if scheduler.done():
+                        break
+                    # forget the peers whose fetchers all exited, so they get
+                    # new ones if they show up with the peak again
+                    for peer_id in [peer_id for peer_id, tasks in fetchers.items() if all(t.done() for t in tasks)]:
+                        await stop_fetchers(peer_id, fetchers.pop(peer_id))
+                    if len(fetchers) == 0:
+                        stats = scheduler.get_stats()
+                        self.log.error(
+                            f"failed fetching blocks from {stats['delivered_height'] + 1} to "
+                            f"{target_peak_sb_height}, no peers left"
+                        )
                         return
+
                     if self.sync_store.peers_changed.is_set():
-                        new_peers_with_peak = self.get_peers_with_peak(peak_hash)
                         self.sync_store.peers_changed.clear()
+                        # hand the ranges of disconnected peers to the others
+                        # right away, rather than waiting for the request timeout
+                        for peer_id in [peer_id for peer_id in fetchers if connections[peer_id].closed]:
+                            await stop_fetchers(peer_id, fetchers.pop(peer_id))
+                        new_peers_with_peak = self.get_peers_with_peak(peak_hash)
+                    elif not scheduler.done():
+                        await wait_for_state_change()
             except Exception as e:
-                self.log.error(f"Exception fetching {start_height} to {end_height} from peer {e}")
+                self.log.error(f"Exception fetching blocks from peers {e}")
             finally:
+                for peer_id, tasks in fetchers.items():
+                    await stop_fetchers(peer_id, tasks)
                 # finished signal with None
                 await batch_queue.put(None)
 
         async def validate_block_batches(
-            inner_batch_queue: asyncio.Queue[Optional[Tuple[WSChiaConnection, List[FullBlock]]]]
+            inner_batch_queue: asyncio.Queue[Optional[Tuple[WSChiaConnection, List[FullBlockView]]]]
         ) -> None:
             advanced_peak: bool = False
             while True:
-                res: Optional[Tuple[WSChiaConnection, List[FullBlock]]] = await inner_batch_queue.get()
+                res: Optional[Tuple[WSChiaConnection, List[FullBlockView]]] = await inner_batch_queue.get()
                 if res is None:
                     self.log.debug("done fetching blocks")
                     return None
                 peer, blocks = res
                 start_height = blocks[0].height
                 end_height = blocks[-1].height
+                validation_start = time.monotonic()
                 success, state_change_summary = await self.add_block_batch(
                     blocks, peer, None if advanced_peak else uint32(fork_point_height), summaries
                 )
+                scheduler.record_validation(len(blocks), time.monotonic() - validation_start)
                 if success is False:
                     await peer.close(600)
                     raise ValueError(f"Failed to validate block batch {start_height} to {end_height}")
@@ -1104,7 +1228,7 @@ class FullNode:
                 await self.send_peak_to_wallets()
                 self.blockchain.clean_block_record(end_height - self.constants.BLOCKS_CACHE_SIZE)
 
-        batch_queue_input: asyncio.Queue[Optional[Tuple[WSChiaConnection, List[FullBlock]]]] = asyncio.Queue(
+        batch_queue_input: asyncio.Queue[Optional[Tuple[WSChiaConnection, List[FullBlockView]]]] = asyncio.Queue(
             maxsize=buffer_size
         )
         fetch_task = asyncio.Task(fetch_block_batches(batch_queue_input))
@@ -1119,13 +1243,18 @@ class FullNode:
     async def send_peak_to_wallets(self) -> None:
         peak = self.blockchain.get_peak()
         assert peak is not None
-        msg = make_msg(
-            ProtocolMessageTypes.new_peak_wallet,
-            wallet_protocol.NewPeakWallet(
-                peak.header_hash, peak.height, peak.weight, uint32(max(peak.height - 1, uint32(0)))
-            ),
+        new_peak = wallet_protocol.NewPeakWallet(
+            peak.header_hash, peak.height, peak.weight, uint32(max(peak.height - 1, uint32(0)))
+        )
+        self.wallet_updates.add_peak(
+            self.server.all_connections,
+            peak.height,
+            new_peak.fork_point_with_previous_peak,
+            peak.header_hash,
+            [],
+            {},
+            new_peak,
         )
-        await self.server.send_to_all([msg], NodeType.WALLET)
 
     def get_peers_with_peak(self, peak_hash: bytes32) -> List[WSChiaConnection]:
         peer_ids: Set[bytes32] = self.sync_store.get_peers_that_have_peak([peak_hash])
@@ -1139,6 +1268,7 @@ class FullNode:
         state_change_summary: StateChangeSummary,
         hints: List[Tuple[bytes32, bytes]],
         lookup_coin_ids: List[bytes32],
+        new_peak: Optional[wallet_protocol.NewPeakWallet] = None,
     ) -> None:
         # Looks up coin records in DB for the coins that wallets are interested in
         new_states: List[CoinRecord] = await self.coin_store.get_coin_records(lookup_coin_ids)
@@ -1148,42 +1278,20 @@ class FullNode:
             coin_id: bytes32(hint) for coin_id, hint in hints if len(hint) == 32
         }
 
-        changes_for_peer: Dict[bytes32, Set[CoinState]] = {}
-        for coin_record in state_change_summary.rolled_back_records + new_states:
-            cr_name: bytes32 = coin_record.name
-
-            for peer in self.subscriptions.peers_for_coin_id(cr_name):
-                if peer not in changes_for_peer:
-                    changes_for_peer[peer] = set()
-                changes_for_peer[peer].add(coin_record.coin_state)
-
-            for peer in self.subscriptions.peers_for_puzzle_hash(coin_record.coin.puzzle_hash):
-                if peer not in changes_for_peer:
-                    changes_for_peer[peer] = set()
-                changes_for_peer[peer].add(coin_record.coin_state)
-
-            if cr_name in coin_id_to_ph_hint:
-                for peer in self.subscriptions.peers_for_puzzle_hash(coin_id_to_ph_hint[cr_name]):
-                    if peer not in changes_for_peer:
-                        changes_for_peer[peer] = set()
-                    changes_for_peer[peer].add(coin_record.coin_state)
-
-        for peer, changes in changes_for_peer.items():
-            if peer not in self.server.all_connections:
-                continue
-            ws_peer: WSChiaConnection = self.server.all_connections[peer]
-            state = CoinStateUpdate(
-                state_change_summary.peak.height,
-                state_change_summary.fork_height,
-                state_change_summary.peak.header_hash,
-                list(changes),
-            )
-            msg = make_msg(ProtocolMessageTypes.coin_state_update, state)
-            await ws_peer.send_message(msg)
+        # The wallets get the updates (and the new peak, so that it arrives after them) from the dispatcher
+        self.wallet_updates.add_peak(
+            self.server.all_connections,
+            state_change_summary.peak.height,
+            state_change_summary.fork_height,
+            state_change_summary.peak.header_hash,
+            state_change_summary.rolled_back_records + new_states,
+            coin_id_to_ph_hint,
+            new_peak,
+        )
 
     async def add_block_batch(
         self,
-        all_blocks: List[FullBlock],
+        all_blocks: Sequence[Union[FullBlock, FullBlockView]],
         peer: WSChiaConnection,
         fork_point: Optional[uint32],
         wp_summaries: Optional[List[SubEpochSummary]] = None,
@@ -1191,19 +1299,34 @@ class FullNode:
         # Precondition: All blocks must be contiguous blocks, index i+1 must be the parent of index i
         # Returns a bool for success, as well as a StateChangeSummary if the peak was advanced
 
-        blocks_to_validate: List[FullBlock] = []
+        new_blocks: Sequence[Union[FullBlock, FullBlockView]] = []
         for i, block in enumerate(all_blocks):
             if not self.blockchain.contains_block(block.header_hash):
-                blocks_to_validate = all_blocks[i:]
+                new_blocks = all_blocks[i:]
                 break
-        if len(blocks_to_validate) == 0:
+        if len(new_blocks) == 0:
             return True, None
 
+        # the blocks we already have are never parsed, and the serialized blocks we got from the peer are sent to
+        # the validation workers and stored as they are
+        blocks_to_validate: List[FullBlock] = []
+        blocks_bytes: List[bytes] = []
+        for block in new_blocks:
+            if isinstance(block, FullBlockView):
+                try:
+                    blocks_to_validate.append(block.block)
+                except Exception as e:
+                    self.log.error(f"Invalid block from peer: {peer.get_peer_logging()} {e}")
+                    return False, None
+            else:
+                blocks_to_validate.append(block)
+            blocks_bytes.append(bytes(block))
+
         # Validates signatures in multiprocessing since they take a while, and we don't have cached transactions
         # for these blocks (unlike during normal operation where we validate one at a time)
         pre_validate_start = time.monotonic()
         pre_validation_results: List[PreValidationResult] = await self.blockchain.pre_validate_blocks_multiprocessing(
-            blocks_to_validate, {}, wp_summaries=wp_summaries, validate_signatures=True
+            blocks_to_validate, {}, wp_summaries=wp_summaries, validate_signatures=True, block_bytes=blocks_bytes
         )
         pre_validate_end = time.monotonic()
         pre_validate_time = pre_validate_end - pre_validate_start
@@ -1227,7 +1350,7 @@ class FullNode:
             state_change_summary: Optional[StateChangeSummary]
             advanced_peak = agg_state_change_summary is not None
             result, error, state_change_summary = await self.blockchain.add_block(
-                block, pre_validation_results[i], None if advanced_peak else fork_point
+                block, pre_validation_results[i], None if advanced_peak else fork_point, blocks_bytes[i]
             )
 
             if result == AddBlockResult.NEW_PEAK:
@@ -1287,7 +1410,7 @@ class FullNode:
                 await self.peak_post_processing_2(peak_fb, None, state_change_summary, ppp_result)
 
         if peak is not None and self.weight_proof_handler is not None:
-            await self.weight_proof_handler.get_proof_of_weight(peak.header_hash)
+            await self.weight_proof_handler.get_proof_of_weight_bytes(peak.header_hash)
             self._state_changed("block")
 
     def has_valid_pool_sig(self, block: Union[UnfinishedBlock, FullBlock]) -> bool:
@@ -1401,6 +1524,9 @@ class FullNode:
         ):
             self.full_node_store.previous_generator = None
 
+        if self.weight_proof_handler is not None:
+            self.weight_proof_handler.add_recent_block(block)
+
         hints_to_add, lookup_coin_ids = get_hints_and_subscription_coin_ids(
             state_change_summary,
             self.subscriptions.has_coin_subscription,
@@ -1463,8 +1589,16 @@ class FullNode:
 
         # Update the mempool (returns successful pending transactions added to the mempool)
         new_npc_results: List[NPCResult] = state_change_summary.new_npc_results
+        # the summaries made up after a sync, or at startup, don't list the
+        # coins that changed, so the mempool has to be rebuilt from scratch
+        touched_coin_ids: Optional[Set[bytes32]] = None
+        if len(state_change_summary.rolled_back_records) > 0 or len(new_npc_results) > 0:
+            touched_coin_ids = {record.name for record in state_change_summary.rolled_back_records}
+            for npc_result in new_npc_results:
+                if npc_result.conds is not None:
+                    touched_coin_ids.update(bytes32(spend.coin_id) for spend in npc_result.conds.spends)
         mempool_new_peak_result: List[Tuple[SpendBundle, NPCResult, bytes32]] = await self.mempool_manager.new_peak(
-            self.blockchain.get_peak(), new_npc_results[-1] if len(new_npc_results) > 0 else None
+            self.blockchain.get_peak(), new_npc_results[-1] if len(new_npc_results) > 0 else None, touched_coin_ids
         )
 
         # Check if we detected a spent transaction, to load up our generator cache
@@ -1541,17 +1675,13 @@ class FullNode:
                 await self.server.send_to_all([msg], NodeType.FULL_NODE)
 
         # Tell wallets about the new peak
-        msg = make_msg(
-            ProtocolMessageTypes.new_peak_wallet,
-            wallet_protocol.NewPeakWallet(
-                record.header_hash,
-                record.height,
-                record.weight,
-                state_change_summary.fork_height,
-            ),
+        new_peak = wallet_protocol.NewPeakWallet(
+            record.header_hash,
+            record.height,
+            record.weight,
+            state_change_summary.fork_height,
         )
-        await self.update_wallets(state_change_summary, ppp_result.hints, ppp_result.lookup_coin_ids)
-        await self.server.send_to_all([msg], NodeType.WALLET)
+        await self.update_wallets(state_change_summary, ppp_result.hints, ppp_result.lookup_coin_ids, new_peak)
         self._state_changed("new_peak")
 
     async def add_block(
@@ -2363,7 +2493,7 @@ class FullNode:
                 new_block = dataclasses.replace(block, challenge_chain_ip_proof=vdf_proof)
         if new_block is None:
             return False
-        async with self.db_wrapper.writer():
+        async with self.db_wrapper.writer(WriterPriority.low):
             try:
                 await self.block_store.replace_proof(header_hash, new_block)
                 return True
@@ -55,11 +55,12 @@ from chia.types.spend_bundle import SpendBundle
 from chia.types.transaction_queue_entry import TransactionQueueEntry
 from chia.types.unfinished_block import UnfinishedBlock
 from chia.util.api_decorators import api_request
-from chia.util.full_block_utils import header_block_from_block
+from chia.util.full_block_utils import block_without_generator, header_block_from_block
 from chia.util.generator_tools import get_block_header, tx_removals_and_additions
 from chia.util.hash import std_hash
 from chia.util.ints import uint8, uint32, uint64, uint128
 from chia.util.limited_semaphore import LimitedSemaphoreFullError
+from chia.util.lru_cache import BytesLRUCache
 from chia.util.merkle_set import MerkleSet
 
 if TYPE_CHECKING:
@@ -67,16 +68,22 @@ if TYPE_CHECKING:
 else:
     FullNode = object
 
+# total size of the recent RespondBlocks payloads to keep around. Syncing peers
+# tend to request the same ranges near the peak
+RESPOND_BLOCKS_CACHE_BYTES = 32 * 1024 * 1024
+
 
 class FullNodeAPI:
     log: logging.Logger
     full_node: FullNode
     executor: ThreadPoolExecutor
+    respond_blocks_cache: BytesLRUCache[Tuple[uint32, uint32, bool, bytes32]]
 
     def __init__(self, full_node: FullNode) -> None:
         self.log = logging.getLogger(__name__)
         self.full_node = full_node
         self.executor = ThreadPoolExecutor(max_workers=1)
+        self.respond_blocks_cache = BytesLRUCache(RESPOND_BLOCKS_CACHE_BYTES)
 
     @property
     def server(self) -> ChiaServer:
@@ -271,11 +278,11 @@ class FullNodeAPI:
         if request.tip in self.full_node.pow_creation:
             event = self.full_node.pow_creation[request.tip]
             await event.wait()
-            wp = await self.full_node.weight_proof_handler.get_proof_of_weight(request.tip)
+            wp_bytes = await self.full_node.weight_proof_handler.get_proof_of_weight_bytes(request.tip)
         else:
             event = asyncio.Event()
             self.full_node.pow_creation[request.tip] = event
-            wp = await self.full_node.weight_proof_handler.get_proof_of_weight(request.tip)
+            wp_bytes = await self.full_node.weight_proof_handler.get_proof_of_weight_bytes(request.tip)
             event.set()
         tips = list(self.full_node.pow_creation.keys())
 
@@ -284,19 +291,17 @@ class FullNodeAPI:
             for i in range(0, 4):
                 self.full_node.pow_creation.pop(tips[i])
 
-        if wp is None:
+        if wp_bytes is None:
             self.log.error(f"failed creating weight proof for peak {request.tip}")
             return None
 
-        # Serialization of wp is slow
         if (
             self.full_node.full_node_store.serialized_wp_message_tip is not None
             and self.full_node.full_node_store.serialized_wp_message_tip == request.tip
         ):
             return self.full_node.full_node_store.serialized_wp_message
-        message = make_msg(
-            ProtocolMessageTypes.respond_proof_of_weight, full_node_protocol.RespondProofOfWeight(wp, request.tip)
-        )
+        # this is the serialization of RespondProofOfWeight(wp, request.tip)
+        message = make_msg(ProtocolMessageTypes.respond_proof_of_weight, wp_bytes + request.tip)
         self.full_node.full_node_store.serialized_wp_message_tip = request.tip
         self.full_node.full_node_store.serialized_wp_message = message
         return message
@@ -338,47 +343,40 @@ class FullNodeAPI:
                 msg = make_msg(ProtocolMessageTypes.reject_blocks, reject)
                 return msg
 
+        header_hashes: List[bytes32] = []
+        for i in range(request.start_height, request.end_height + 1):
+            header_hash_i: Optional[bytes32] = self.full_node.blockchain.height_to_hash(uint32(i))
+            if header_hash_i is None:
+                reject = RejectBlocks(request.start_height, request.end_height)
+                return make_msg(ProtocolMessageTypes.reject_blocks, reject)
+            header_hashes.append(header_hash_i)
+
+        # the hash of the last block commits to the whole range, so a reorg
+        # naturally invalidates any cached response for these heights
+        cache_key = (request.start_height, request.end_height, request.include_transaction_block, header_hashes[-1])
+        cached: Optional[bytes] = self.respond_blocks_cache.get(cache_key)
+        if cached is not None:
+            return make_msg(ProtocolMessageTypes.respond_blocks, cached)
+
+        try:
+            blocks_bytes: List[bytes] = await self.full_node.block_store.get_block_bytes_by_hash(header_hashes)
+        except ValueError:
+            reject = RejectBlocks(request.start_height, request.end_height)
+            return make_msg(ProtocolMessageTypes.reject_blocks, reject)
+
         if not request.include_transaction_block:
-            blocks: List[FullBlock] = []
-            for i in range(request.start_height, request.end_height + 1):
-                header_hash_i: Optional[bytes32] = self.full_node.blockchain.height_to_hash(uint32(i))
-                if header_hash_i is None:
-                    reject = RejectBlocks(request.start_height, request.end_height)
-                    return make_msg(ProtocolMessageTypes.reject_blocks, reject)
-
-                block: Optional[FullBlock] = await self.full_node.block_store.get_full_block(header_hash_i)
-                if block is None:
-                    reject = RejectBlocks(request.start_height, request.end_height)
-                    return make_msg(ProtocolMessageTypes.reject_blocks, reject)
-                block = dataclasses.replace(block, transactions_generator=None)
-                blocks.append(block)
-            msg = make_msg(
-                ProtocolMessageTypes.respond_blocks,
-                full_node_protocol.RespondBlocks(request.start_height, request.end_height, blocks),
-            )
-        else:
-            blocks_bytes: List[bytes] = []
-            for i in range(request.start_height, request.end_height + 1):
-                header_hash_i = self.full_node.blockchain.height_to_hash(uint32(i))
-                if header_hash_i is None:
-                    reject = RejectBlocks(request.start_height, request.end_height)
-                    return make_msg(ProtocolMessageTypes.reject_blocks, reject)
-                block_bytes: Optional[bytes] = await self.full_node.block_store.get_full_block_bytes(header_hash_i)
-                if block_bytes is None:
-                    reject = RejectBlocks(request.start_height, request.end_height)
-                    msg = make_msg(ProtocolMessageTypes.reject_blocks, reject)
-                    return msg
-
-                blocks_bytes.append(block_bytes)
-
-            respond_blocks_manually_streamed: bytes = (
-                bytes(uint32(request.start_height))
-                + bytes(uint32(request.end_height))
-                + len(blocks_bytes).to_bytes(4, "big", signed=False)
-            )
-            for block_bytes in blocks_bytes:
-                respond_blocks_manually_streamed += block_bytes
-            msg = make_msg(ProtocolMessageTypes.respond_blocks, respond_blocks_manually_streamed)
+            blocks_bytes = [block_without_generator(memoryview(block_bytes)) for block_bytes in blocks_bytes]
+
+        respond_blocks_manually_streamed: bytes = b"".join(
+            [
+                bytes(uint32(request.start_height)),
+                bytes(uint32(request.end_height)),
+                len(blocks_bytes).to_bytes(4, "big", signed=False),
+                *blocks_bytes,
+            ]
+        )
+        self.respond_blocks_cache.put(cache_key, respond_blocks_manually_streamed)
+        msg = make_msg(ProtocolMessageTypes.respond_blocks, respond_blocks_manually_streamed)
 
         return msg
 
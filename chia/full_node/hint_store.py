@@ -2,24 +2,51 @@ from __future__ import annotations
 
 import dataclasses
 import logging
-from typing import List, Tuple
+import os
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
 
 import typing_extensions
 
 from chia.types.blockchain_format.sized_bytes import bytes32
-from chia.util.db_wrapper import DBWrapper2
+from chia.util.bloom_filter import ScalableBloomFilter, ScalableBloomFilterData
+from chia.util.db_wrapper import DBWrapper2, WriterPriority
+from chia.util.ints import uint16, uint64
+from chia.util.streamable import Streamable, streamable
 
 log = logging.getLogger(__name__)
 
+HINT_FILTER_VERSION = 1
+HINT_FILTER_INITIAL_CAPACITY = 1000000
+HINT_FILTER_ERROR_RATE = 0.001
+
+
+@streamable
+@dataclasses.dataclass(frozen=True)
+class HintFilterData(Streamable):
+    version: uint16
+    # the filter holds all the hints up to this rowid
+    max_rowid: uint64
+    # the hint at max_rowid, to tell whether the file belongs to the DB
+    last_hint: bytes
+    filter: ScalableBloomFilterData
+
 
 @typing_extensions.final
 @dataclasses.dataclass
 class HintStore:
     db_wrapper: DBWrapper2
+    # Most wallets subscribe to many puzzle hashes which were never used as a hint. The filter holds all the hints in
+    # the DB, so that get_coin_ids() can answer those without a query. It's saved to filter_path on shutdown.
+    filter_path: Optional[Path] = None
+    _filter: Optional[ScalableBloomFilter] = None
 
     @classmethod
-    async def create(cls, db_wrapper: DBWrapper2) -> HintStore:
-        self = HintStore(db_wrapper)
+    async def create(
+        cls, db_wrapper: DBWrapper2, *, use_filter: bool = True, filter_path: Optional[Path] = None
+    ) -> HintStore:
+        self = HintStore(db_wrapper, filter_path)
 
         async with self.db_wrapper.writer_maybe_transaction() as conn:
             log.info("DB: Creating hint store tables and indexes.")
@@ -31,9 +58,69 @@ class HintStore:
                 )
             log.info("DB: Creating index hint_index")
             await conn.execute("CREATE INDEX IF NOT EXISTS hint_index on hints(hint)")
+        if use_filter:
+            await self._load_filter()
         return self
 
+    async def _get_last_hint(self) -> Tuple[int, bytes]:
+        async with self.db_wrapper.reader_no_transaction() as conn:
+            async with conn.execute("SELECT rowid, hint FROM hints ORDER BY rowid DESC LIMIT 1") as cursor:
+                row = await cursor.fetchone()
+        if row is None:
+            return 0, b""
+        return row[0], row[1]
+
+    async def _load_filter(self) -> None:
+        start = time.monotonic()
+        max_rowid, _ = await self._get_last_hint()
+        data: Optional[HintFilterData] = None
+        if self.filter_path is not None:
+            try:
+                data = HintFilterData.from_bytes(self.filter_path.read_bytes())
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                log.warning(f"Failed to load the hint filter from {self.filter_path}: {type(e).__name__} {e}")
+
+        hint_filter: Optional[ScalableBloomFilter] = None
+        from_rowid = 0
+        if data is not None and data.version == HINT_FILTER_VERSION and data.max_rowid <= max_rowid:
+            async with self.db_wrapper.reader_no_transaction() as conn:
+                async with conn.execute("SELECT hint FROM hints WHERE rowid=?", (data.max_rowid,)) as cursor:
+                    row = await cursor.fetchone()
+            if (b"" if row is None else row[0]) == data.last_hint:
+                hint_filter = ScalableBloomFilter.from_data(data.filter)
+                from_rowid = data.max_rowid
+        if hint_filter is None:
+            log.info("Building the hint filter")
+            hint_filter = ScalableBloomFilter(HINT_FILTER_INITIAL_CAPACITY, HINT_FILTER_ERROR_RATE)
+
+        # Add the hints which were added since the filter was saved
+        async with self.db_wrapper.reader_no_transaction() as conn:
+            async with conn.execute("SELECT hint FROM hints WHERE rowid>?", (from_rowid,)) as cursor:
+                async for row in cursor:
+                    if row[0] not in hint_filter:
+                        hint_filter.add(row[0])
+        self._filter = hint_filter
+        log.info(f"Loaded the hint filter with {len(hint_filter)} hints in {time.monotonic() - start:0.2f}s")
+        if from_rowid < max_rowid:
+            await self.save_filter()
+
+    async def save_filter(self) -> None:
+        """
+        Saves the hint filter, so that it doesn't need to be built from the whole hints table on the next start
+        """
+        if self._filter is None or self.filter_path is None:
+            return
+        max_rowid, last_hint = await self._get_last_hint()
+        data = HintFilterData(uint16(HINT_FILTER_VERSION), uint64(max_rowid), last_hint, self._filter.to_data())
+        tmp_path = self.filter_path.with_name(self.filter_path.name + ".tmp")
+        tmp_path.write_bytes(bytes(data))
+        os.replace(tmp_path, self.filter_path)
+
     async def get_coin_ids(self, hint: bytes, *, max_items: int = 50000) -> List[bytes32]:
+        if self._filter is not None and hint not in self._filter:
+            return []
         async with self.db_wrapper.reader_no_transaction() as conn:
             cursor = await conn.execute("SELECT coin_id from hints WHERE hint=? LIMIT ?", (hint, max_items))
             rows = await cursor.fetchall()
@@ -44,7 +131,13 @@ class HintStore:
         if len(coin_hint_list) == 0:
             return None
 
-        async with self.db_wrapper.writer_maybe_transaction() as conn:
+        # Adding them to the filter even if the transaction is rolled back only costs a false positive
+        if self._filter is not None:
+            for _, hint in coin_hint_list:
+                if hint not in self._filter:
+                    self._filter.add(hint)
+
+        async with self.db_wrapper.writer_maybe_transaction(WriterPriority.low) as conn:
             if self.db_wrapper.db_version == 2:
                 cursor = await conn.executemany(
                     "INSERT OR IGNORE INTO hints VALUES(?, ?)",
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import logging
-import sqlite3
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from typing import Callable, Dict, Iterator, List, Optional, Tuple
@@ -12,6 +12,12 @@ from chia_rs import Coin
 from chia.consensus.default_constants import DEFAULT_CONSTANTS
 from chia.full_node.fee_estimation import FeeMempoolInfo, MempoolInfo, MempoolItemInfo
 from chia.full_node.fee_estimator_interface import FeeEstimatorInterface
+from chia.full_node.mempool_index import (
+    MempoolIndex,
+    MempoolIndexBackend,
+    MempoolIndexEntry,
+    create_mempool_index,
+)
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.clvm_cost import CLVMCost
 from chia.types.coin_spend import CoinSpend
@@ -19,10 +25,8 @@ from chia.types.eligible_coin_spends import EligibleCoinSpends
 from chia.types.internal_mempool_item import InternalMempoolItem
 from chia.types.mempool_item import MempoolItem
 from chia.types.spend_bundle import SpendBundle
-from chia.util.db_wrapper import SQLITE_MAX_VARIABLE_NUMBER
 from chia.util.errors import Err
 from chia.util.ints import uint32, uint64
-from chia.util.misc import to_batches
 
 log = logging.getLogger(__name__)
 
@@ -32,6 +36,34 @@ log = logging.getLogger(__name__)
 MEMPOOL_ITEM_FEE_LIMIT = 2**50
 
 
+# When filling a block with the skip strategy, these bound how much of the
+# mempool we keep scanning after the first item that doesn't fit
+MAX_SKIPPED_ITEMS = 100
+MIN_COST_THRESHOLD = 6_000_000
+
+
+class BlockFillStrategy(Enum):
+    # stop at the first item that doesn't fit in the block
+    GREEDY = "greedy"
+    # skip items that don't fit and keep packing the remaining cost budget
+    # with lower fee rate items
+    GREEDY_WITH_SKIP = "greedy_with_skip"
+
+
+@dataclass(frozen=True)
+class BlockAssemblyStats:
+    strategy: BlockFillStrategy
+    items_included: int
+    items_skipped: int
+    cost: int
+    max_cost: int
+    fees: int
+
+    @property
+    def fill_ratio(self) -> float:
+        return self.cost / self.max_cost
+
+
 class MempoolRemoveReason(Enum):
     CONFLICT = 1
     BLOCK_INCLUSION = 2
@@ -40,7 +72,7 @@ class MempoolRemoveReason(Enum):
 
 
 class Mempool:
-    _db_conn: sqlite3.Connection
+    _index: MempoolIndex
     # it's expensive to serialize and deserialize G2Element, so we keep those in
     # this separate dictionary
     _items: Dict[bytes32, InternalMempoolItem]
@@ -49,141 +81,76 @@ class Mempool:
     _block_height: uint32
     _timestamp: uint64
 
-    def __init__(self, mempool_info: MempoolInfo, fee_estimator: FeeEstimatorInterface):
-        self._db_conn = sqlite3.connect(":memory:")
+    def __init__(
+        self,
+        mempool_info: MempoolInfo,
+        fee_estimator: FeeEstimatorInterface,
+        index_backend: MempoolIndexBackend = MempoolIndexBackend.SQLITE,
+    ):
+        self._index = create_mempool_index(index_backend)
+        self._index_backend = index_backend
         self._items = {}
         self._block_height = uint32(0)
         self._timestamp = uint64(0)
 
-        with self._db_conn:
-            # name means SpendBundle hash
-            # assert_height may be NIL
-            # the seq field indicates the order of items being added to the
-            # mempool. It's used as a tie-breaker for items with the same fee
-            # rate
-            # TODO: In the future, for the "fee_per_cost" field, opt for
-            # "GENERATED ALWAYS AS (CAST(fee AS REAL) / cost) VIRTUAL"
-            self._db_conn.execute(
-                """CREATE TABLE tx(
-                name BLOB,
-                cost INT NOT NULL,
-                fee INT NOT NULL,
-                assert_height INT,
-                assert_before_height INT,
-                assert_before_seconds INT,
-                fee_per_cost REAL,
-                seq INTEGER PRIMARY KEY AUTOINCREMENT)
-                """
-            )
-            self._db_conn.execute("CREATE INDEX name_idx ON tx(name)")
-            self._db_conn.execute("CREATE INDEX fee_sum ON tx(fee)")
-            self._db_conn.execute("CREATE INDEX cost_sum ON tx(cost)")
-            self._db_conn.execute("CREATE INDEX feerate ON tx(fee_per_cost)")
-            self._db_conn.execute(
-                "CREATE INDEX assert_before ON tx(assert_before_height, assert_before_seconds) "
-                "WHERE assert_before_height IS NOT NULL OR assert_before_seconds IS NOT NULL"
-            )
-
-            # This table maps coin IDs to spend bundles hashes
-            self._db_conn.execute(
-                """CREATE TABLE spends(
-                coin_id BLOB NOT NULL,
-                tx BLOB NOT NULL,
-                UNIQUE(coin_id, tx))
-                """
-            )
-            self._db_conn.execute("CREATE INDEX spend_by_coin ON spends(coin_id)")
-            self._db_conn.execute("CREATE INDEX spend_by_bundle ON spends(tx)")
-
         self.mempool_info: MempoolInfo = mempool_info
         self.fee_estimator: FeeEstimatorInterface = fee_estimator
+        # statistics of the most recent call to create_bundle_from_mempool_items()
+        self.last_block_assembly: Optional[BlockAssemblyStats] = None
 
     def __del__(self) -> None:
-        self._db_conn.close()
+        self._index.close()
 
-    def _row_to_item(self, row: sqlite3.Row) -> MempoolItem:
-        name = bytes32(row[0])
-        fee = int(row[2])
-        assert_height = row[3]
-        assert_before_height = row[4]
-        assert_before_seconds = row[5]
-        item = self._items[name]
+    @property
+    def index_backend(self) -> MempoolIndexBackend:
+        return self._index_backend
+
+    def _entry_to_item(self, entry: MempoolIndexEntry) -> MempoolItem:
+        item = self._items[entry.name]
 
         return MempoolItem(
             item.spend_bundle,
-            uint64(fee),
+            uint64(entry.fee),
             item.npc_result,
-            name,
+            entry.name,
             uint32(item.height_added_to_mempool),
-            assert_height,
-            assert_before_height,
-            assert_before_seconds,
+            entry.assert_height,
+            entry.assert_before_height,
+            entry.assert_before_seconds,
             bundle_coin_spends=item.bundle_coin_spends,
         )
 
     def total_mempool_fees(self) -> int:
-        with self._db_conn:
-            cursor = self._db_conn.execute("SELECT SUM(fee) FROM tx")
-            val = cursor.fetchone()[0]
-            return uint64(0) if val is None else uint64(val)
+        return uint64(self._index.total_fee())
 
     def total_mempool_cost(self) -> CLVMCost:
-        with self._db_conn:
-            cursor = self._db_conn.execute("SELECT SUM(cost) FROM tx")
-            val = cursor.fetchone()[0]
-            return CLVMCost(uint64(0) if val is None else uint64(val))
+        return CLVMCost(uint64(self._index.total_cost()))
 
     def all_items(self) -> Iterator[MempoolItem]:
-        with self._db_conn:
-            cursor = self._db_conn.execute("SELECT * FROM tx")
-            for row in cursor:
-                yield self._row_to_item(row)
+        for entry in self._index.all_entries():
+            yield self._entry_to_item(entry)
 
     def all_item_ids(self) -> List[bytes32]:
-        with self._db_conn:
-            cursor = self._db_conn.execute("SELECT name FROM tx")
-            return [bytes32(row[0]) for row in cursor]
+        return self._index.all_names()
 
     # TODO: move "process_mempool_items()" into this class in order to do this a
     # bit more efficiently
     def items_by_feerate(self) -> Iterator[MempoolItem]:
-        with self._db_conn:
-            cursor = self._db_conn.execute("SELECT * FROM tx ORDER BY fee_per_cost DESC, seq ASC")
-            for row in cursor:
-                yield self._row_to_item(row)
+        for entry in self._index.by_feerate():
+            yield self._entry_to_item(entry)
 
     def size(self) -> int:
-        with self._db_conn:
-            cursor = self._db_conn.execute("SELECT Count(name) FROM tx")
-            val = cursor.fetchone()
-            return 0 if val is None else int(val[0])
+        return self._index.size()
 
     def get_item_by_id(self, item_id: bytes32) -> Optional[MempoolItem]:
-        with self._db_conn:
-            cursor = self._db_conn.execute("SELECT * FROM tx WHERE name=?", (item_id,))
-            row = cursor.fetchone()
-            return None if row is None else self._row_to_item(row)
+        entry = self._index.get(item_id)
+        return None if entry is None else self._entry_to_item(entry)
 
-    # TODO: we need a bulk lookup function like this too
     def get_items_by_coin_id(self, spent_coin_id: bytes32) -> List[MempoolItem]:
-        with self._db_conn:
-            cursor = self._db_conn.execute(
-                "SELECT * FROM tx WHERE name in (SELECT tx FROM spends WHERE coin_id=?)",
-                (spent_coin_id,),
-            )
-            return [self._row_to_item(row) for row in cursor]
+        return [self._entry_to_item(entry) for entry in self._index.get_by_coin_ids([spent_coin_id])]
 
     def get_items_by_coin_ids(self, spent_coin_ids: List[bytes32]) -> List[MempoolItem]:
-        items: List[MempoolItem] = []
-        for batch in to_batches(spent_coin_ids, SQLITE_MAX_VARIABLE_NUMBER):
-            args = ",".join(["?"] * len(batch.entries))
-            with self._db_conn:
-                cursor = self._db_conn.execute(
-                    f"SELECT * FROM tx WHERE name IN (SELECT tx FROM spends WHERE coin_id IN ({args}))",
-                    tuple(batch.entries),
-                )
-                items.extend(self._row_to_item(row) for row in cursor)
-        return items
+        return [self._entry_to_item(entry) for entry in self._index.get_by_coin_ids(spent_coin_ids)]
 
     def get_min_fee_rate(self, cost: int) -> float:
         """
@@ -195,16 +162,11 @@ class Mempool:
             current_cost = int(self.total_mempool_cost())
 
             # Iterates through all spends in increasing fee per cost
-            with self._db_conn:
-                cursor = self._db_conn.execute("SELECT cost,fee_per_cost FROM tx ORDER BY fee_per_cost ASC, seq DESC")
-
-                item_cost: int
-                fee_per_cost: float
-                for item_cost, fee_per_cost in cursor:
-                    current_cost -= item_cost
-                    # Removing one at a time, until our transaction of size cost fits
-                    if current_cost + cost <= self.mempool_info.max_size_in_cost:
-                        return fee_per_cost
+            for entry in self._index.by_feerate(descending=False):
+                current_cost -= entry.cost
+                # Removing one at a time, until our transaction of size cost fits
+                if current_cost + cost <= self.mempool_info.max_size_in_cost:
+                    return entry.fee_per_cost
 
             raise ValueError(
                 f"Transaction with cost {cost} does not fit in mempool of max cost {self.mempool_info.max_size_in_cost}"
@@ -218,13 +180,7 @@ class Mempool:
         timestamp. (we don't know about which coins were spent in this new block
         here, so those are handled separately)
         """
-        with self._db_conn:
-            cursor = self._db_conn.execute(
-                "SELECT name FROM tx WHERE assert_before_seconds <= ? OR assert_before_height <= ?",
-                (timestamp, block_height),
-            )
-            to_remove = [bytes32(row[0]) for row in cursor]
-
+        to_remove = self._index.expired(block_height, timestamp)
         self.remove_from_pool(to_remove, MempoolRemoveReason.EXPIRED)
         self._block_height = block_height
         self._timestamp = timestamp
@@ -238,26 +194,15 @@ class Mempool:
 
         removed_items: List[MempoolItemInfo] = []
         if reason != MempoolRemoveReason.BLOCK_INCLUSION:
-            for batch in to_batches(items, SQLITE_MAX_VARIABLE_NUMBER):
-                args = ",".join(["?"] * len(batch.entries))
-                with self._db_conn:
-                    cursor = self._db_conn.execute(
-                        f"SELECT name, cost, fee FROM tx WHERE name in ({args})", batch.entries
-                    )
-                    for row in cursor:
-                        name = bytes32(row[0])
-                        internal_item = self._items[name]
-                        item = MempoolItemInfo(int(row[1]), int(row[2]), internal_item.height_added_to_mempool)
-                        removed_items.append(item)
+            for entry in self._index.get_many(items):
+                internal_item = self._items[entry.name]
+                item = MempoolItemInfo(entry.cost, entry.fee, internal_item.height_added_to_mempool)
+                removed_items.append(item)
 
         for name in items:
             self._items.pop(name)
 
-        for batch in to_batches(items, SQLITE_MAX_VARIABLE_NUMBER):
-            args = ",".join(["?"] * len(batch.entries))
-            with self._db_conn:
-                self._db_conn.execute(f"DELETE FROM tx WHERE name in ({args})", batch.entries)
-                self._db_conn.execute(f"DELETE FROM spends WHERE tx in ({args})", batch.entries)
+        self._index.remove(items)
 
         if reason != MempoolRemoveReason.BLOCK_INCLUSION:
             info = FeeMempoolInfo(
@@ -275,85 +220,40 @@ class Mempool:
         assert item.npc_result.conds is not None
         assert item.cost <= self.mempool_info.max_block_clvm_cost
 
-        with self._db_conn:
-            # we have certain limits on transactions that will expire soon
-            # (in the next 15 minutes)
-            block_cutoff = self._block_height + 48
-            time_cutoff = self._timestamp + 900
-            if (item.assert_before_height is not None and item.assert_before_height < block_cutoff) or (
-                item.assert_before_seconds is not None and item.assert_before_seconds < time_cutoff
-            ):
-                # this lists only transactions that expire soon, in order of
-                # lowest fee rate along with the cumulative cost of such
-                # transactions counting from highest to lowest fee rate
-                cursor = self._db_conn.execute(
-                    """
-                    SELECT name,
-                        fee_per_cost,
-                        SUM(cost) OVER (ORDER BY fee_per_cost DESC, seq ASC) AS cumulative_cost
-                    FROM tx
-                    WHERE assert_before_seconds IS NOT NULL AND assert_before_seconds < ?
-                        OR assert_before_height IS NOT NULL AND assert_before_height < ?
-                    ORDER BY cumulative_cost DESC
-                    """,
-                    (time_cutoff, block_cutoff),
-                )
-                to_remove: List[bytes32] = []
-                for row in cursor:
-                    name, fee_per_cost, cumulative_cost = row
-
-                    # there's space for us, stop pruning
-                    if cumulative_cost + item.cost <= self.mempool_info.max_block_clvm_cost:
-                        break
-
-                    # we can't evict any more transactions, abort (and don't
-                    # evict what we put aside in "to_remove" list)
-                    if fee_per_cost > item.fee_per_cost:
-                        return Err.INVALID_FEE_LOW_FEE
-                    to_remove.append(name)
-                self.remove_from_pool(to_remove, MempoolRemoveReason.EXPIRED)
-                # if we don't find any entries, it's OK to add this entry
-
-            total_cost = int(self.total_mempool_cost())
-            if total_cost + item.cost > self.mempool_info.max_size_in_cost:
-                # pick the items with the lowest fee per cost to remove
-                cursor = self._db_conn.execute(
-                    """SELECT name FROM tx
-                    WHERE name NOT IN (
-                        SELECT name FROM (
-                            SELECT name,
-                            SUM(cost) OVER (ORDER BY fee_per_cost DESC, seq ASC) AS total_cost
-                            FROM tx) AS tx_with_cost
-                        WHERE total_cost <= ?)
-                    """,
-                    (self.mempool_info.max_size_in_cost - item.cost,),
-                )
-                to_remove = [bytes32(row[0]) for row in cursor]
-                self.remove_from_pool(to_remove, MempoolRemoveReason.POOL_FULL)
-
-            # TODO: In the future, for the "fee_per_cost" field, opt for
-            # "GENERATED ALWAYS AS (CAST(fee AS REAL) / cost) VIRTUAL"
-            self._db_conn.execute(
-                "INSERT INTO "
-                "tx(name,cost,fee,assert_height,assert_before_height,assert_before_seconds,fee_per_cost) "
-                "VALUES(?, ?, ?, ?, ?, ?, ?)",
-                (
-                    item.name,
-                    item.cost,
-                    item.fee,
-                    item.assert_height,
-                    item.assert_before_height,
-                    item.assert_before_seconds,
-                    item.fee / item.cost,
-                ),
-            )
-
-            all_coin_spends = [(s.coin_id, item.name) for s in item.npc_result.conds.spends]
-            self._db_conn.executemany("INSERT INTO spends VALUES(?, ?)", all_coin_spends)
+        # we have certain limits on transactions that will expire soon
+        # (in the next 15 minutes)
+        block_cutoff = self._block_height + 48
+        time_cutoff = self._timestamp + 900
+        if (item.assert_before_height is not None and item.assert_before_height < block_cutoff) or (
+            item.assert_before_seconds is not None and item.assert_before_seconds < time_cutoff
+        ):
+            # this lists only transactions that expire soon, in order of
+            # lowest fee rate along with the cumulative cost of such
+            # transactions counting from highest to lowest fee rate
+            to_remove: List[bytes32] = []
+            for entry, cumulative_cost in self._index.expiring_before(block_cutoff, time_cutoff):
+                # there's space for us, stop pruning
+                if cumulative_cost + item.cost <= self.mempool_info.max_block_clvm_cost:
+                    break
 
-            self._items[item.name] = InternalMempoolItem(
-                item.spend_bundle, item.npc_result, item.height_added_to_mempool, item.bundle_coin_spends
-            )
+                # we can't evict any more transactions, abort (and don't
+                # evict what we put aside in "to_remove" list)
+                if entry.fee_per_cost > item.fee_per_cost:
+                    return Err.INVALID_FEE_LOW_FEE
+                to_remove.append(entry.name)
+            self.remove_from_pool(to_remove, MempoolRemoveReason.EXPIRED)
+            # if we don't find any entries, it's OK to add this entry
+
+        total_cost = int(self.total_mempool_cost())
+        if total_cost + item.cost > self.mempool_info.max_size_in_cost:
+            # pick the items with the lowest fee per cost to remove
+            to_remove = self._index.evict_to_fit(self.mempool_info.max_size_in_cost - item.cost)
+            self.remove_from_pool(to_remove, MempoolRemoveReason.POOL_FULL)
+
+        self._index.add(item)
+        self._items[item.name] = InternalMempoolItem(
+            item.spend_bundle, item.npc_result, item.height_added_to_mempool, item.bundle_coin_spends
+        )
 
         info = FeeMempoolInfo(self.mempool_info, self.total_mempool_cost(), self.total_mempool_fees(), datetime.now())
         self.fee_estimator.add_mempool_item(info, MempoolItemInfo(item.cost, item.fee, item.height_added_to_mempool))
@@ -367,11 +267,15 @@ class Mempool:
         return self.total_mempool_cost() + cost > self.mempool_info.max_size_in_cost
 
     def create_bundle_from_mempool_items(
-        self, item_inclusion_filter: Callable[[bytes32], bool]
+        self,
+        item_inclusion_filter: Callable[[bytes32], bool],
+        strategy: BlockFillStrategy = BlockFillStrategy.GREEDY,
     ) -> Optional[Tuple[SpendBundle, List[Coin]]]:
         cost_sum = 0  # Checks that total cost does not exceed block maximum
         fee_sum = 0  # Checks that total fees don't exceed 64 bits
         processed_spend_bundles = 0
+        skipped_items = 0
+        max_cost = self.mempool_info.max_block_clvm_cost
         additions: List[Coin] = []
         # This contains a map of coin ID to a coin spend solution and its isolated cost
         # We reconstruct it for every bundle we create from mempool items because we
@@ -380,26 +284,41 @@ class Mempool:
         eligible_coin_spends = EligibleCoinSpends()
         coin_spends: List[CoinSpend] = []
         sigs: List[G2Element] = []
-        log.info(f"Starting to make block, max cost: {self.mempool_info.max_block_clvm_cost}")
-        with self._db_conn:
-            cursor = self._db_conn.execute("SELECT name, fee FROM tx ORDER BY fee_per_cost DESC, seq ASC")
-        for row in cursor:
-            name = bytes32(row[0])
-            fee = int(row[1])
+        log.info(f"Starting to make block, max cost: {max_cost}, strategy: {strategy.value}")
+        for entry in self._index.by_feerate():
+            name = entry.name
+            fee = entry.fee
             item = self._items[name]
             if not item_inclusion_filter(name):
                 continue
+            # get_deduplication_info() records the solutions of this item's
+            # eligible coins. If we end up skipping the item, those need to be
+            # restored so they don't affect the items we include after it
+            previous_eligible_spends = {
+                coin_id: eligible_coin_spends.eligible_spends.get(coin_id)
+                for coin_id, spend_data in item.bundle_coin_spends.items()
+                if spend_data.eligible_for_dedup
+            }
             try:
                 unique_coin_spends, cost_saving, unique_additions = eligible_coin_spends.get_deduplication_info(
                     bundle_coin_spends=item.bundle_coin_spends, max_cost=item.npc_result.cost
                 )
                 item_cost = item.npc_result.cost - cost_saving
                 log.info("Cumulative cost: %d, fee per cost: %0.4f", cost_sum, fee / item_cost)
-                if (
-                    item_cost + cost_sum > self.mempool_info.max_block_clvm_cost
-                    or fee + fee_sum > DEFAULT_CONSTANTS.MAX_COIN_AMOUNT
-                ):
-                    break
+                if item_cost + cost_sum > max_cost or fee + fee_sum > DEFAULT_CONSTANTS.MAX_COIN_AMOUNT:
+                    if strategy == BlockFillStrategy.GREEDY:
+                        break
+                    for coin_id, dedup_coin_spend in previous_eligible_spends.items():
+                        if dedup_coin_spend is None:
+                            eligible_coin_spends.eligible_spends.pop(coin_id, None)
+                        else:
+                            eligible_coin_spends.eligible_spends[coin_id] = dedup_coin_spend
+                    skipped_items += 1
+                    # give up once we've skipped too many items or when
+                    # there's not enough room left for any reasonable item
+                    if skipped_items >= MAX_SKIPPED_ITEMS or max_cost - cost_sum < MIN_COST_THRESHOLD:
+                        break
+                    continue
                 coin_spends.extend(unique_coin_spends)
                 additions.extend(unique_additions)
                 sigs.append(item.spend_bundle.aggregated_signature)
@@ -409,11 +328,15 @@ class Mempool:
             except Exception as e:
                 log.debug(f"Exception while checking a mempool item for deduplication: {e}")
                 continue
+        self.last_block_assembly = BlockAssemblyStats(
+            strategy, processed_spend_bundles, skipped_items, cost_sum, max_cost, fee_sum
+        )
         if processed_spend_bundles == 0:
             return None
         log.info(
             f"Cumulative cost of block (real cost should be less) {cost_sum}. Proportion "
-            f"full: {cost_sum / self.mempool_info.max_block_clvm_cost}"
+            f"full: {self.last_block_assembly.fill_ratio}, fees: {fee_sum}, "
+            f"items: {processed_spend_bundles}, skipped: {skipped_items}"
         )
         aggregated_signature = AugSchemeMPL.aggregate(sigs)
         agg = SpendBundle(coin_spends, aggregated_signature)
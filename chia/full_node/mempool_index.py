@@ -0,0 +1,473 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sortedcontainers import SortedDict, SortedList
+from typing_extensions import Protocol
+
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.mempool_item import MempoolItem
+from chia.util.db_wrapper import SQLITE_MAX_VARIABLE_NUMBER
+from chia.util.ints import uint32, uint64
+from chia.util.misc import to_batches
+
+
+class MempoolIndexBackend(Enum):
+    # the original in-memory SQLite database
+    SQLITE = "sqlite"
+    # pure-python sorted containers and dictionaries
+    SORTED = "sorted"
+
+
+@dataclass(frozen=True)
+class MempoolIndexEntry:
+    """
+    The subset of a MempoolItem the mempool index needs for ordering, eviction
+    and expiry. The "seq" field indicates the order of items being added to the
+    mempool. It's used as a tie-breaker for items with the same fee rate
+    """
+
+    name: bytes32
+    cost: int
+    fee: int
+    assert_height: Optional[uint32]
+    assert_before_height: Optional[uint32]
+    assert_before_seconds: Optional[uint64]
+    fee_per_cost: float
+    seq: int
+
+
+class MempoolIndex(Protocol):
+    """
+    The index over the items in the mempool. The Mempool class owns the actual
+    items, the index only orders them by fee rate and keeps track of which
+    coins they spend and when they expire.
+    """
+
+    def add(self, item: MempoolItem) -> None:
+        """Adds an item to the index. The item must not already be in it"""
+        ...
+
+    def remove(self, names: List[bytes32]) -> None:
+        """Removes the specified items (and their spends) from the index"""
+        ...
+
+    def get(self, name: bytes32) -> Optional[MempoolIndexEntry]:
+        ...
+
+    def get_many(self, names: List[bytes32]) -> List[MempoolIndexEntry]:
+        """Returns the entries for the specified names that are in the index"""
+        ...
+
+    def get_by_coin_ids(self, coin_ids: List[bytes32]) -> List[MempoolIndexEntry]:
+        """Returns the entries spending any of the specified coins"""
+        ...
+
+    def all_entries(self) -> Iterator[MempoolIndexEntry]:
+        ...
+
+    def all_names(self) -> List[bytes32]:
+        ...
+
+    def by_feerate(self, *, descending: bool = True) -> Iterator[MempoolIndexEntry]:
+        """
+        Iterates the entries ordered by fee per cost, ties broken by insertion
+        order (earlier items first when descending). The index must not be
+        modified while iterating
+        """
+        ...
+
+    def expired(self, block_height: uint32, timestamp: uint64) -> List[bytes32]:
+        """Returns the names of all items that are no longer valid at this height or timestamp"""
+        ...
+
+    def expiring_before(self, block_cutoff: int, time_cutoff: int) -> Iterator[Tuple[MempoolIndexEntry, int]]:
+        """
+        Iterates the items expiring before the specified height or timestamp,
+        lowest fee rate first, along with the cumulative cost of such items
+        counting from highest to lowest fee rate
+        """
+        ...
+
+    def evict_to_fit(self, max_cost: int) -> List[bytes32]:
+        """
+        Returns the names of the items with the lowest fee rate that need to be
+        removed for the remaining items to fit in max_cost
+        """
+        ...
+
+    def size(self) -> int:
+        ...
+
+    def total_fee(self) -> int:
+        ...
+
+    def total_cost(self) -> int:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class SQLiteMempoolIndex:
+    _db_conn: sqlite3.Connection
+
+    def __init__(self) -> None:
+        self._db_conn = sqlite3.connect(":memory:")
+
+        with self._db_conn:
+            # name means SpendBundle hash
+            # assert_height may be NIL
+            # the seq field indicates the order of items being added to the
+            # mempool. It's used as a tie-breaker for items with the same fee
+            # rate
+            # TODO: In the future, for the "fee_per_cost" field, opt for
+            # "GENERATED ALWAYS AS (CAST(fee AS REAL) / cost) VIRTUAL"
+            self._db_conn.execute(
+                """CREATE TABLE tx(
+                name BLOB,
+                cost INT NOT NULL,
+                fee INT NOT NULL,
+                assert_height INT,
+                assert_before_height INT,
+                assert_before_seconds INT,
+                fee_per_cost REAL,
+                seq INTEGER PRIMARY KEY AUTOINCREMENT)
+                """
+            )
+            self._db_conn.execute("CREATE INDEX name_idx ON tx(name)")
+            self._db_conn.execute("CREATE INDEX fee_sum ON tx(fee)")
+            self._db_conn.execute("CREATE INDEX cost_sum ON tx(cost)")
+            self._db_conn.execute("CREATE INDEX feerate ON tx(fee_per_cost)")
+            self._db_conn.execute(
+                "CREATE INDEX assert_before ON tx(assert_before_height, assert_before_seconds) "
+                "WHERE assert_before_height IS NOT NULL OR assert_before_seconds IS NOT NULL"
+            )
+
+            # This table maps coin IDs to spend bundles hashes
+            self._db_conn.execute(
+                """CREATE TABLE spends(
+                coin_id BLOB NOT NULL,
+                tx BLOB NOT NULL,
+                UNIQUE(coin_id, tx))
+                """
+            )
+            self._db_conn.execute("CREATE INDEX spend_by_coin ON spends(coin_id)")
+            self._db_conn.execute("CREATE INDEX spend_by_bundle ON spends(tx)")
+
+    def close(self) -> None:
+        self._db_conn.close()
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> MempoolIndexEntry:
+        return MempoolIndexEntry(
+            name=bytes32(row[0]),
+            cost=int(row[1]),
+            fee=int(row[2]),
+            assert_height=row[3],
+            assert_before_height=row[4],
+            assert_before_seconds=row[5],
+            fee_per_cost=row[6],
+            seq=row[7],
+        )
+
+    def add(self, item: MempoolItem) -> None:
+        assert item.npc_result.conds is not None
+        with self._db_conn:
+            # TODO: In the future, for the "fee_per_cost" field, opt for
+            # "GENERATED ALWAYS AS (CAST(fee AS REAL) / cost) VIRTUAL"
+            self._db_conn.execute(
+                "INSERT INTO "
+                "tx(name,cost,fee,assert_height,assert_before_height,assert_before_seconds,fee_per_cost) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?)",
+                (
+                    item.name,
+                    item.cost,
+                    item.fee,
+                    item.assert_height,
+                    item.assert_before_height,
+                    item.assert_before_seconds,
+                    item.fee / item.cost,
+                ),
+            )
+
+            all_coin_spends = [(s.coin_id, item.name) for s in item.npc_result.conds.spends]
+            self._db_conn.executemany("INSERT INTO spends VALUES(?, ?)", all_coin_spends)
+
+    def remove(self, names: List[bytes32]) -> None:
+        for batch in to_batches(names, SQLITE_MAX_VARIABLE_NUMBER):
+            args = ",".join(["?"] * len(batch.entries))
+            with self._db_conn:
+                self._db_conn.execute(f"DELETE FROM tx WHERE name in ({args})", batch.entries)
+                self._db_conn.execute(f"DELETE FROM spends WHERE tx in ({args})", batch.entries)
+
+    def get(self, name: bytes32) -> Optional[MempoolIndexEntry]:
+        with self._db_conn:
+            cursor = self._db_conn.execute("SELECT * FROM tx WHERE name=?", (name,))
+            row = cursor.fetchone()
+            return None if row is None else self._row_to_entry(row)
+
+    def get_many(self, names: List[bytes32]) -> List[MempoolIndexEntry]:
+        entries: List[MempoolIndexEntry] = []
+        for batch in to_batches(names, SQLITE_MAX_VARIABLE_NUMBER):
+            args = ",".join(["?"] * len(batch.entries))
+            with self._db_conn:
+                cursor = self._db_conn.execute(f"SELECT * FROM tx WHERE name in ({args})", batch.entries)
+                entries.extend(self._row_to_entry(row) for row in cursor)
+        return entries
+
+    def get_by_coin_ids(self, coin_ids: List[bytes32]) -> List[MempoolIndexEntry]:
+        entries: List[MempoolIndexEntry] = []
+        for batch in to_batches(coin_ids, SQLITE_MAX_VARIABLE_NUMBER):
+            args = ",".join(["?"] * len(batch.entries))
+            with self._db_conn:
+                cursor = self._db_conn.execute(
+                    f"SELECT * FROM tx WHERE name IN (SELECT tx FROM spends WHERE coin_id IN ({args}))",
+                    tuple(batch.entries),
+                )
+                entries.extend(self._row_to_entry(row) for row in cursor)
+        return entries
+
+    def all_entries(self) -> Iterator[MempoolIndexEntry]:
+        with self._db_conn:
+            cursor = self._db_conn.execute("SELECT * FROM tx")
+            for row in cursor:
+                yield self._row_to_entry(row)
+
+    def all_names(self) -> List[bytes32]:
+        with self._db_conn:
+            cursor = self._db_conn.execute("SELECT name FROM tx")
+            return [bytes32(row[0]) for row in cursor]
+
+    def by_feerate(self, *, descending: bool = True) -> Iterator[MempoolIndexEntry]:
+        if descending:
+            query = "SELECT * FROM tx ORDER BY fee_per_cost DESC, seq ASC"
+        else:
+            query = "SELECT * FROM tx ORDER BY fee_per_cost ASC, seq DESC"
+        with self._db_conn:
+            cursor = self._db_conn.execute(query)
+            for row in cursor:
+                yield self._row_to_entry(row)
+
+    def expired(self, block_height: uint32, timestamp: uint64) -> List[bytes32]:
+        with self._db_conn:
+            cursor = self._db_conn.execute(
+                "SELECT name FROM tx WHERE assert_before_seconds <= ? OR assert_before_height <= ?",
+                (timestamp, block_height),
+            )
+            return [bytes32(row[0]) for row in cursor]
+
+    def expiring_before(self, block_cutoff: int, time_cutoff: int) -> Iterator[Tuple[MempoolIndexEntry, int]]:
+        with self._db_conn:
+            cursor = self._db_conn.execute(
+                """
+                SELECT *,
+                    SUM(cost) OVER (ORDER BY fee_per_cost DESC, seq ASC) AS cumulative_cost
+                FROM tx
+                WHERE assert_before_seconds IS NOT NULL AND assert_before_seconds < ?
+                    OR assert_before_height IS NOT NULL AND assert_before_height < ?
+                ORDER BY cumulative_cost DESC
+                """,
+                (time_cutoff, block_cutoff),
+            )
+            for row in cursor:
+                yield self._row_to_entry(row), int(row[8])
+
+    def evict_to_fit(self, max_cost: int) -> List[bytes32]:
+        with self._db_conn:
+            cursor = self._db_conn.execute(
+                """SELECT name FROM tx
+                WHERE name NOT IN (
+                    SELECT name FROM (
+                        SELECT name,
+                        SUM(cost) OVER (ORDER BY fee_per_cost DESC, seq ASC) AS total_cost
+                        FROM tx) AS tx_with_cost
+                    WHERE total_cost <= ?)
+                """,
+                (max_cost,),
+            )
+            return [bytes32(row[0]) for row in cursor]
+
+    def size(self) -> int:
+        with self._db_conn:
+            cursor = self._db_conn.execute("SELECT Count(name) FROM tx")
+            val = cursor.fetchone()
+            return 0 if val is None else int(val[0])
+
+    def total_fee(self) -> int:
+        with self._db_conn:
+            cursor = self._db_conn.execute("SELECT SUM(fee) FROM tx")
+            val = cursor.fetchone()[0]
+            return 0 if val is None else int(val)
+
+    def total_cost(self) -> int:
+        with self._db_conn:
+            cursor = self._db_conn.execute("SELECT SUM(cost) FROM tx")
+            val = cursor.fetchone()[0]
+            return 0 if val is None else int(val)
+
+
+# entries are ordered by fee per cost descending, then by seq ascending
+_FeerateKey = Tuple[float, int]
+# expiry index entries are ordered by the height or timestamp they expire at
+_ExpiryKey = Tuple[int, int]
+
+
+@dataclass
+class SortedMempoolIndex:
+    """
+    A pure-python mempool index. Items are kept in a sorted dictionary keyed
+    by (negated) fee rate and sequence number, with a coin ID -> items multimap
+    and separate expiry indices for assert_before_height and
+    assert_before_seconds. Every operation is logarithmic (or linear in the
+    number of affected items), and never leaves the python interpreter.
+    """
+
+    _next_seq: int = field(default=1, init=False)
+    _entries: Dict[bytes32, MempoolIndexEntry] = field(default_factory=dict, init=False)
+    _by_feerate: SortedDict[_FeerateKey, MempoolIndexEntry] = field(default_factory=SortedDict, init=False)
+    _spends: Dict[bytes32, Set[bytes32]] = field(default_factory=dict, init=False)
+    _spent_by: Dict[bytes32, List[bytes32]] = field(default_factory=dict, init=False)
+    _expiry_height: SortedList[_ExpiryKey] = field(default_factory=SortedList, init=False)
+    _expiry_seconds: SortedList[_ExpiryKey] = field(default_factory=SortedList, init=False)
+    _seq_to_name: Dict[int, bytes32] = field(default_factory=dict, init=False)
+    _total_fee: int = field(default=0, init=False)
+    _total_cost: int = field(default=0, init=False)
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def _key(entry: MempoolIndexEntry) -> _FeerateKey:
+        return (-entry.fee_per_cost, entry.seq)
+
+    def add(self, item: MempoolItem) -> None:
+        assert item.npc_result.conds is not None
+        assert item.name not in self._entries
+        entry = MempoolIndexEntry(
+            name=item.name,
+            cost=int(item.cost),
+            fee=int(item.fee),
+            assert_height=item.assert_height,
+            assert_before_height=item.assert_before_height,
+            assert_before_seconds=item.assert_before_seconds,
+            fee_per_cost=item.fee / item.cost,
+            seq=self._next_seq,
+        )
+        self._next_seq += 1
+
+        self._entries[entry.name] = entry
+        self._seq_to_name[entry.seq] = entry.name
+        self._by_feerate[self._key(entry)] = entry
+        if entry.assert_before_height is not None:
+            self._expiry_height.add((entry.assert_before_height, entry.seq))
+        if entry.assert_before_seconds is not None:
+            self._expiry_seconds.add((entry.assert_before_seconds, entry.seq))
+
+        coin_ids: List[bytes32] = []
+        for spend in item.npc_result.conds.spends:
+            coin_id = bytes32(spend.coin_id)
+            self._spends.setdefault(coin_id, set()).add(entry.name)
+            coin_ids.append(coin_id)
+        self._spent_by[entry.name] = coin_ids
+
+        self._total_fee += entry.fee
+        self._total_cost += entry.cost
+
+    def remove(self, names: List[bytes32]) -> None:
+        for name in names:
+            entry = self._entries.pop(name, None)
+            if entry is None:
+                continue
+            del self._seq_to_name[entry.seq]
+            del self._by_feerate[self._key(entry)]
+            if entry.assert_before_height is not None:
+                self._expiry_height.remove((entry.assert_before_height, entry.seq))
+            if entry.assert_before_seconds is not None:
+                self._expiry_seconds.remove((entry.assert_before_seconds, entry.seq))
+            for coin_id in self._spent_by.pop(name):
+                spenders = self._spends[coin_id]
+                spenders.discard(name)
+                if len(spenders) == 0:
+                    del self._spends[coin_id]
+            self._total_fee -= entry.fee
+            self._total_cost -= entry.cost
+
+    def get(self, name: bytes32) -> Optional[MempoolIndexEntry]:
+        return self._entries.get(name)
+
+    def get_many(self, names: List[bytes32]) -> List[MempoolIndexEntry]:
+        return [self._entries[name] for name in names if name in self._entries]
+
+    def get_by_coin_ids(self, coin_ids: List[bytes32]) -> List[MempoolIndexEntry]:
+        names: Set[bytes32] = set()
+        for coin_id in coin_ids:
+            names.update(self._spends.get(coin_id, ()))
+        return sorted((self._entries[name] for name in names), key=lambda e: e.seq)
+
+    def all_entries(self) -> Iterator[MempoolIndexEntry]:
+        return iter(list(self._entries.values()))
+
+    def all_names(self) -> List[bytes32]:
+        return list(self._entries.keys())
+
+    def by_feerate(self, *, descending: bool = True) -> Iterator[MempoolIndexEntry]:
+        if descending:
+            return iter(self._by_feerate.values())
+        return reversed(self._by_feerate.values())
+
+    def _expiring(self, block_limit: int, time_limit: int, *, inclusive: bool) -> Set[int]:
+        seqs: Set[int] = set()
+        for index, limit in ((self._expiry_height, block_limit), (self._expiry_seconds, time_limit)):
+            # sequence numbers start at 1, so (bound, 0) sorts before every
+            # key expiring at bound
+            bound = limit + 1 if inclusive else limit
+            for _, seq in index.irange(maximum=(bound, 0), inclusive=(True, False)):
+                seqs.add(seq)
+        return seqs
+
+    def expired(self, block_height: uint32, timestamp: uint64) -> List[bytes32]:
+        seqs = self._expiring(block_height, timestamp, inclusive=True)
+        return [self._seq_to_name[seq] for seq in sorted(seqs)]
+
+    def expiring_before(self, block_cutoff: int, time_cutoff: int) -> Iterator[Tuple[MempoolIndexEntry, int]]:
+        seqs = self._expiring(block_cutoff, time_cutoff, inclusive=False)
+        entries = sorted((self._entries[self._seq_to_name[seq]] for seq in seqs), key=self._key)
+        cumulative: List[Tuple[MempoolIndexEntry, int]] = []
+        cumulative_cost = 0
+        for entry in entries:
+            cumulative_cost += entry.cost
+            cumulative.append((entry, cumulative_cost))
+        return reversed(cumulative)
+
+    def evict_to_fit(self, max_cost: int) -> List[bytes32]:
+        # the items we keep are always a prefix of the fee rate order, so we
+        # remove items from the lowest fee rate end until the rest fits
+        to_remove: List[bytes32] = []
+        remaining_cost = self._total_cost
+        for entry in reversed(self._by_feerate.values()):
+            if remaining_cost <= max_cost:
+                break
+            to_remove.append(entry.name)
+            remaining_cost -= entry.cost
+        return to_remove
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def total_fee(self) -> int:
+        return self._total_fee
+
+    def total_cost(self) -> int:
+        return self._total_cost
+
+
+def create_mempool_index(backend: MempoolIndexBackend) -> MempoolIndex:
+    if backend == MempoolIndexBackend.SQLITE:
+        return SQLiteMempoolIndex()
+    if backend == MempoolIndexBackend.SORTED:
+        return SortedMempoolIndex()
+    raise ValueError(f"Unknown mempool index backend: {backend}")
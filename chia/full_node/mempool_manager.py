@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import dataclasses
 import logging
 import time
 from concurrent.futures import Executor
@@ -20,8 +21,9 @@ from chia.full_node.bitcoin_fee_estimator import create_bitcoin_fee_estimator
 from chia.full_node.bundle_tools import simple_solution_generator
 from chia.full_node.fee_estimation import FeeBlockInfo, MempoolInfo, MempoolItemInfo
 from chia.full_node.fee_estimator_interface import FeeEstimatorInterface
-from chia.full_node.mempool import MEMPOOL_ITEM_FEE_LIMIT, Mempool, MempoolRemoveReason
+from chia.full_node.mempool import MEMPOOL_ITEM_FEE_LIMIT, BlockFillStrategy, Mempool, MempoolRemoveReason
 from chia.full_node.mempool_check_conditions import get_name_puzzle_conditions, mempool_check_time_locks
+from chia.full_node.mempool_index import MempoolIndexBackend
 from chia.full_node.pending_tx_cache import ConflictTxCache, PendingTxCache
 from chia.types.blockchain_format.coin import Coin
 from chia.types.blockchain_format.sized_bytes import bytes32, bytes48
@@ -148,6 +150,7 @@ class MempoolManager:
     constants: ConsensusConstants
     seen_bundle_hashes: Dict[bytes32, bytes32]
     get_coin_record: Callable[[bytes32], Awaitable[Optional[CoinRecord]]]
+    _get_coin_records: Optional[Callable[[List[bytes32]], Awaitable[List[CoinRecord]]]]
     nonzero_fee_minimum_fpc: int
     mempool_max_total_cost: int
     # a cache of MempoolItems that conflict with existing items in the pool
@@ -164,7 +167,10 @@ class MempoolManager:
         consensus_constants: ConsensusConstants,
         multiprocessing_context: Optional[BaseContext] = None,
         *,
+        get_coin_records: Optional[Callable[[List[bytes32]], Awaitable[List[CoinRecord]]]] = None,
         single_threaded: bool = False,
+        mempool_index_backend: MempoolIndexBackend = MempoolIndexBackend.SQLITE,
+        block_fill_strategy: BlockFillStrategy = BlockFillStrategy.GREEDY,
     ):
         self.constants: ConsensusConstants = consensus_constants
 
@@ -172,6 +178,7 @@ class MempoolManager:
         self.seen_bundle_hashes: Dict[bytes32, bytes32] = {}
 
         self.get_coin_record = get_coin_record
+        self._get_coin_records = get_coin_records
 
         # The fee per cost must be above this amount to consider the fee "nonzero", and thus able to kick out other
         # transactions. This prevents spam. This is equivalent to 0.055 XCH per block, or about 0.00005 XCH for two
@@ -186,6 +193,7 @@ class MempoolManager:
         self._conflict_cache = ConflictTxCache(self.constants.MAX_BLOCK_COST_CLVM * 1, 1000)
         self._pending_cache = PendingTxCache(self.constants.MAX_BLOCK_COST_CLVM * 1, 1000)
         self.seen_cache_size = 10000
+        self.block_fill_strategy = block_fill_strategy
         if single_threaded:
             self.pool = InlineExecutor()
         else:
@@ -198,13 +206,16 @@ class MempoolManager:
 
         # The mempool will correspond to a certain peak
         self.peak: Optional[BlockRecordProtocol] = None
+        # coins touched by the non-transaction peaks since self.peak, None if
+        # any of them didn't say which coins it touched
+        self._touched_coin_ids_since_peak: Optional[Set[bytes32]] = set()
         self.fee_estimator: FeeEstimatorInterface = create_bitcoin_fee_estimator(self.max_block_clvm_cost)
         mempool_info = MempoolInfo(
             CLVMCost(uint64(self.mempool_max_total_cost)),
             FeeRate(uint64(self.nonzero_fee_minimum_fpc)),
             CLVMCost(uint64(self.max_block_clvm_cost)),
         )
-        self.mempool: Mempool = Mempool(mempool_info, self.fee_estimator)
+        self.mempool: Mempool = Mempool(mempool_info, self.fee_estimator, mempool_index_backend)
 
     def shut_down(self) -> None:
         self.pool.shutdown(wait=True)
@@ -224,7 +235,7 @@ class MempoolManager:
                 return True
 
             item_inclusion_filter = always
-        return self.mempool.create_bundle_from_mempool_items(item_inclusion_filter)
+        return self.mempool.create_bundle_from_mempool_items(item_inclusion_filter, self.block_fill_strategy)
 
     def get_filter(self) -> bytes:
         all_transactions: Set[bytes32] = set()
@@ -578,27 +589,162 @@ class MempoolManager:
 
         return item
 
+    async def get_coin_records(self, coin_ids: List[bytes32]) -> List[CoinRecord]:
+        if self._get_coin_records is not None:
+            return await self._get_coin_records(coin_ids)
+        records: List[CoinRecord] = []
+        for coin_id in coin_ids:
+            record = await self.get_coin_record(coin_id)
+            if record is not None:
+                records.append(record)
+        return records
+
+    async def revalidate_items_for_reorg(self, touched_coin_ids: Set[bytes32]) -> List[MempoolItemInfo]:
+        """
+        Re-checks only the mempool items spending coins whose records changed in
+        a reorg, i.e. coins created or spent in the rolled back or the added
+        blocks. Every other item is still valid, as long as the new peak isn't
+        below the previous one (in height and timestamp).
+        Returns the items that were included in the added blocks.
+        """
+        assert self.peak is not None
+        assert self.peak.timestamp is not None
+        items: Dict[bytes32, MempoolItem] = {
+            item.name: item for item in self.mempool.get_items_by_coin_ids(list(touched_coin_ids))
+        }
+        if len(items) == 0:
+            return []
+
+        coin_ids: Set[bytes32] = set()
+        for item in items.values():
+            assert item.npc_result.conds is not None
+            coin_ids.update(bytes32(spend.coin_id) for spend in item.npc_result.conds.spends)
+        coin_records: Dict[bytes32, CoinRecord] = {
+            record.name: record for record in await self.get_coin_records(list(coin_ids))
+        }
+
+        included_items: List[MempoolItemInfo] = []
+        spent_items: List[bytes32] = []
+        invalid_items: List[bytes32] = []
+        updated_items: List[MempoolItem] = []
+        for item in items.values():
+            assert item.npc_result.conds is not None
+            additions = {coin.name(): coin for coin in item.additions}
+            removal_record_dict: Dict[bytes32, CoinRecord] = {}
+            err: Optional[Err] = None
+            for spend in item.npc_result.conds.spends:
+                coin_id = bytes32(spend.coin_id)
+                removal_record = coin_records.get(coin_id)
+                if removal_record is None:
+                    if coin_id not in additions:
+                        err = Err.UNKNOWN_UNSPENT
+                        break
+                    # ephemeral coins are treated like in validate_spend_bundle()
+                    removal_record = CoinRecord(
+                        additions[coin_id], uint32(self.peak.height + 1), uint32(0), False, self.peak.timestamp
+                    )
+                elif removal_record.spent:
+                    err = Err.DOUBLE_SPEND
+                    break
+                removal_record_dict[coin_id] = removal_record
+
+            if err is Err.DOUBLE_SPEND:
+                # Item is most likely included in the block.
+                included_items.append(MempoolItemInfo(item.cost, item.fee, item.height_added_to_mempool))
+                spent_items.append(item.name)
+                continue
+            if err is not None:
+                invalid_items.append(item.name)
+                continue
+
+            # the coins may have been confirmed at a different height in the
+            # new chain, which affects relative time locks
+            tl_error = mempool_check_time_locks(
+                removal_record_dict, item.npc_result.conds, self.peak.height, self.peak.timestamp
+            )
+            timelocks = compute_assert_height(removal_record_dict, item.npc_result.conds)
+            if tl_error is None and (
+                timelocks.assert_height,
+                timelocks.assert_before_height,
+                timelocks.assert_before_seconds,
+            ) == (item.assert_height, item.assert_before_height, item.assert_before_seconds):
+                continue
+
+            invalid_items.append(item.name)
+            if tl_error is None or tl_error in {Err.ASSERT_HEIGHT_ABSOLUTE_FAILED, Err.ASSERT_HEIGHT_RELATIVE_FAILED}:
+                updated_item = dataclasses.replace(
+                    item,
+                    assert_height=timelocks.assert_height,
+                    assert_before_height=timelocks.assert_before_height,
+                    assert_before_seconds=timelocks.assert_before_seconds,
+                )
+                if tl_error is None:
+                    updated_items.append(updated_item)
+                else:
+                    self._pending_cache.add(updated_item)
+
+        for name in spent_items + invalid_items:
+            self.remove_seen(name)
+        self.mempool.remove_from_pool(spent_items, MempoolRemoveReason.BLOCK_INCLUSION)
+        self.mempool.remove_from_pool(invalid_items, MempoolRemoveReason.CONFLICT)
+        for updated_item in updated_items:
+            if self.mempool.add_to_pool(updated_item) is None:
+                self.add_and_maybe_pop_seen(updated_item.name)
+        return included_items
+
     async def new_peak(
-        self, new_peak: Optional[BlockRecordProtocol], last_npc_result: Optional[NPCResult]
+        self,
+        new_peak: Optional[BlockRecordProtocol],
+        last_npc_result: Optional[NPCResult],
+        touched_coin_ids: Optional[Set[bytes32]] = None,
     ) -> List[Tuple[SpendBundle, NPCResult, bytes32]]:
         """
         Called when a new peak is available, we try to recreate a mempool for the new tip.
+        touched_coin_ids are the coins created or spent in the blocks rolled
+        back or added since the previous peak. If known, a reorg only
+        re-validates the items spending those coins, instead of rebuilding
+        the whole mempool. A peak that doesn't extend the previous one always
+        touches some coins, so an empty set is treated as unknown.
         """
         if new_peak is None:
             return []
-        # we're only interested in transaction blocks
+        # we're only interested in transaction blocks, but a reorg to a
+        # non-transaction block may still have rolled back coins
         if new_peak.is_transaction_block is False:
+            if touched_coin_ids is None or self._touched_coin_ids_since_peak is None:
+                self._touched_coin_ids_since_peak = None
+            else:
+                self._touched_coin_ids_since_peak.update(touched_coin_ids)
             return []
         if self.peak == new_peak:
             return []
+        if touched_coin_ids is not None and self._touched_coin_ids_since_peak is not None:
+            touched_coin_ids = touched_coin_ids | self._touched_coin_ids_since_peak
+        else:
+            touched_coin_ids = None
+        self._touched_coin_ids_since_peak = set()
         assert new_peak.timestamp is not None
+        start_time = time.monotonic()
         self.fee_estimator.new_block_height(new_peak.height)
         included_items: List[MempoolItemInfo] = []
 
         self.mempool.new_tx_block(new_peak.height, new_peak.timestamp)
 
+        old_peak = self.peak
         use_optimization: bool = self.peak is not None and new_peak.prev_transaction_block_hash == self.peak.header_hash
+        # time locks that were satisfied at the previous peak remain satisfied
+        # as long as the new peak isn't lower, so only the items spending
+        # touched coins need to be looked at again
+        use_incremental_reorg: bool = (
+            touched_coin_ids is not None
+            and len(touched_coin_ids) > 0
+            and old_peak is not None
+            and old_peak.timestamp is not None
+            and new_peak.height >= old_peak.height
+            and new_peak.timestamp >= old_peak.timestamp
+        )
         self.peak = new_peak
+        reorg_mode = "none"
 
         if use_optimization and last_npc_result is not None:
             # We don't reinitialize a mempool, just kick removed items
@@ -615,9 +761,14 @@ class MempoolManager:
                         self.remove_seen(item.name)
                         spendbundle_ids_to_remove.add(item.name)
                 self.mempool.remove_from_pool(list(spendbundle_ids_to_remove), MempoolRemoveReason.BLOCK_INCLUSION)
+        elif use_incremental_reorg:
+            assert touched_coin_ids is not None
+            reorg_mode = "incremental"
+            included_items = await self.revalidate_items_for_reorg(touched_coin_ids)
         else:
+            reorg_mode = "full"
             old_pool = self.mempool
-            self.mempool = Mempool(old_pool.mempool_info, old_pool.fee_estimator)
+            self.mempool = Mempool(old_pool.mempool_info, old_pool.fee_estimator, old_pool.index_backend)
             self.seen_bundle_hashes = {}
             for item in old_pool.all_items():
                 _, result, err = await self.add_spend_bundle(
@@ -642,10 +793,12 @@ class MempoolManager:
             )
             if status == MempoolInclusionStatus.SUCCESS:
                 txs_added.append((item.spend_bundle, item.npc_result, item.spend_bundle_name))
+        duration = time.monotonic() - start_time
         log.info(
             f"Size of mempool: {self.mempool.size()} spends, "
             f"cost: {self.mempool.total_mempool_cost()} "
-            f"minimum fee rate (in FPC) to get in for 5M cost tx: {self.mempool.get_min_fee_rate(5000000)}"
+            f"minimum fee rate (in FPC) to get in for 5M cost tx: {self.mempool.get_min_fee_rate(5000000)} "
+            f"reorg: {reorg_mode} new_peak took {duration:0.3f} seconds"
         )
         self.mempool.fee_estimator.new_block(FeeBlockInfo(new_peak.height, included_items))
         return txs_added
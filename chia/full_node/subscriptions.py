@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass, field
-from typing import Dict, List, Set
+from typing import AbstractSet, Dict, List, Set
 
 from chia.types.blockchain_format.sized_bytes import bytes32
 
@@ -142,3 +142,17 @@ class PeerSubscriptions:
 
     def peers_for_puzzle_hash(self, puzzle_hash: bytes32) -> Set[bytes32]:
         return self._ph_subscriptions.get(puzzle_hash, set())
+
+    def peers_for_coin_ids(self, coin_ids: AbstractSet[bytes32]) -> Dict[bytes32, Set[bytes32]]:
+        """
+        returns the peers subscribed to each of the coin ids, leaving out the
+        ones nobody is subscribed to
+        """
+        return {coin_id: self._coin_subscriptions[coin_id] for coin_id in self._coin_subscriptions.keys() & coin_ids}
+
+    def peers_for_puzzle_hashes(self, puzzle_hashes: AbstractSet[bytes32]) -> Dict[bytes32, Set[bytes32]]:
+        """
+        returns the peers subscribed to each of the puzzle hashes, leaving out
+        the ones nobody is subscribed to
+        """
+        return {ph: self._ph_subscriptions[ph] for ph in self._ph_subscriptions.keys() & puzzle_hashes}
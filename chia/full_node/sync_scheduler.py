@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util.full_block_utils import FullBlockView
+
+# a batch should take roughly this long to fetch from a peer. Shorter requests
+# mean a slow peer holds up less of the validation pipeline, longer requests
+# amortize the round trip
+TARGET_REQUEST_SECONDS = 2.0
+
+# weight of the most recent sample in the throughput moving averages
+EWMA_ALPHA = 0.3
+
+
+@dataclass
+class PeerSyncStats:
+    peer_id: bytes32
+    peer_host: str
+    batch_size: int
+    in_flight: int = 0
+    requests: int = 0
+    blocks_fetched: int = 0
+    fetch_seconds: float = 0.0
+    timeouts: int = 0
+    failures: int = 0
+    # exponential moving average of blocks per second
+    throughput: Optional[float] = None
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "peer_id": self.peer_id.hex(),
+            "peer_host": self.peer_host,
+            "batch_size": self.batch_size,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "blocks_fetched": self.blocks_fetched,
+            "fetch_seconds": self.fetch_seconds,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "throughput": self.throughput,
+        }
+
+
+@dataclass(frozen=True)
+class _InFlight:
+    peer_id: bytes32
+    end_height: int
+    started: float
+
+
+@dataclass
+class SyncScheduler:
+    """
+    Hands out block height ranges to the peers we are syncing from and
+    reassembles their responses in height order. Ranges from failed or timed
+    out requests are handed out again (lowest height first), and each peer's
+    batch size follows its measured throughput. The scheduler does no I/O
+    itself, the caller reports the outcome of every range it was given.
+    """
+
+    start_height: int
+    # inclusive
+    end_height: int
+    max_batch_size: int
+    max_in_flight_per_peer: int = 3
+    # stop handing out new ranges when this many blocks are fetched or
+    # in flight but not yet delivered to validation
+    max_buffered_blocks: int = 1000
+    min_batch_size: int = 1
+    target_request_seconds: float = TARGET_REQUEST_SECONDS
+
+    peers: Dict[bytes32, PeerSyncStats] = field(default_factory=dict)
+    # exponential moving average of blocks validated per second
+    validation_throughput: Optional[float] = None
+    blocks_validated: int = 0
+    _next_height: int = field(init=False)
+    _next_to_deliver: int = field(init=False)
+    # min-heap of (start, end) ranges to fetch again
+    _retry: List[Tuple[int, int]] = field(default_factory=list)
+    _in_flight: Dict[int, _InFlight] = field(default_factory=dict)
+    # start height -> (peer_id, end_height, blocks)
+    _fetched: Dict[int, Tuple[bytes32, int, List[FullBlockView]]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self._next_height = self.start_height
+        self._next_to_deliver = self.start_height
+
+    def add_peer(self, peer_id: bytes32, peer_host: str) -> None:
+        if peer_id not in self.peers:
+            self.peers[peer_id] = PeerSyncStats(peer_id, peer_host, self.max_batch_size)
+
+    def done(self) -> bool:
+        """
+        True once every block up to end_height has been handed out by pop_ready()
+        """
+        return self._next_to_deliver > self.end_height
+
+    def buffered_blocks(self) -> int:
+        return self._next_height - self._next_to_deliver
+
+    def next_range(self, peer_id: bytes32, now: Optional[float] = None) -> Optional[Tuple[int, int]]:
+        """
+        Returns the next (start, end) height range, inclusive, that the peer
+        should fetch, or None if there's nothing for it to do right now.
+        """
+        stats = self.peers[peer_id]
+        if stats.in_flight >= self.max_in_flight_per_peer:
+            return None
+        if now is None:
+            now = time.monotonic()
+
+        if len(self._retry) > 0:
+            # these are holes below blocks we already have, always fill them
+            # first, even when the buffer is full
+            start, end = heapq.heappop(self._retry)
+            if end - start + 1 > stats.batch_size:
+                heapq.heappush(self._retry, (start + stats.batch_size, end))
+                end = start + stats.batch_size - 1
+        elif self._next_height > self.end_height or self.buffered_blocks() >= self.max_buffered_blocks:
+            return None
+        else:
+            start = self._next_height
+            end = min(start + stats.batch_size - 1, self.end_height)
+            self._next_height = end + 1
+
+        self._in_flight[start] = _InFlight(peer_id, end, now)
+        stats.in_flight += 1
+        stats.requests += 1
+        return start, end
+
+    def range_fetched(self, start: int, blocks: List[FullBlockView], now: Optional[float] = None) -> None:
+        if now is None:
+            now = time.monotonic()
+        request = self._in_flight.pop(start)
+        stats = self.peers[request.peer_id]
+        stats.in_flight -= 1
+        duration = max(now - request.started, 1e-6)
+        stats.blocks_fetched += len(blocks)
+        stats.fetch_seconds += duration
+        stats.throughput = _ewma(stats.throughput, len(blocks) / duration)
+        stats.batch_size = self._target_batch_size(stats.throughput)
+        self._fetched[start] = (request.peer_id, request.end_height, blocks)
+
+    def range_failed(self, start: int, timed_out: bool = False) -> None:
+        request = self._in_flight.pop(start)
+        stats = self.peers[request.peer_id]
+        stats.in_flight -= 1
+        if timed_out:
+            stats.timeouts += 1
+        else:
+            stats.failures += 1
+        # back off, this peer is struggling with the current size
+        stats.batch_size = max(self.min_batch_size, stats.batch_size // 2)
+        heapq.heappush(self._retry, (start, request.end_height))
+
+    def remove_peer(self, peer_id: bytes32) -> None:
+        """
+        Hands all ranges in flight on this peer back to the other peers
+        """
+        for start in [start for start, request in self._in_flight.items() if request.peer_id == peer_id]:
+            self.range_failed(start)
+
+    def pop_ready(self) -> List[Tuple[bytes32, List[FullBlockView]]]:
+        """
+        Returns the fetched batches that are contiguous with what was already
+        delivered, in height order, along with the peer they came from.
+        """
+        ret: List[Tuple[bytes32, List[FullBlockView]]] = []
+        while self._next_to_deliver in self._fetched:
+            peer_id, end, blocks = self._fetched.pop(self._next_to_deliver)
+            ret.append((peer_id, blocks))
+            self._next_to_deliver = end + 1
+        return ret
+
+    def record_validation(self, num_blocks: int, duration: float) -> None:
+        self.blocks_validated += num_blocks
+        self.validation_throughput = _ewma(self.validation_throughput, num_blocks / max(duration, 1e-6))
+
+    def _target_batch_size(self, throughput: float) -> int:
+        # there's no point in fetching a batch faster than we can validate a
+        # full-sized one, so when validation is the bottleneck, aim for larger
+        # (cheaper) requests
+        target_seconds = self.target_request_seconds
+        if self.validation_throughput is not None:
+            target_seconds = max(target_seconds, self.max_batch_size / self.validation_throughput)
+        return max(self.min_batch_size, min(self.max_batch_size, int(throughput * target_seconds)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "start_height": self.start_height,
+            "end_height": self.end_height,
+            "next_height": self._next_height,
+            "delivered_height": self._next_to_deliver - 1,
+            "in_flight_requests": len(self._in_flight),
+            "retry_queue": len(self._retry),
+            "buffered_blocks": self.buffered_blocks(),
+            "fetched_batches": len(self._fetched),
+            "blocks_validated": self.blocks_validated,
+            "validation_throughput": self.validation_throughput,
+            "peers": [stats.to_json_dict() for stats in self.peers.values()],
+        }
+
+
+def _ewma(average: Optional[float], sample: float) -> float:
+    if average is None:
+        return sample
+    return EWMA_ALPHA * sample + (1 - EWMA_ALPHA) * average
@@ -8,6 +8,7 @@ from typing import Dict, List, Optional, OrderedDict, Set
 
 import typing_extensions
 
+from chia.full_node.sync_scheduler import SyncScheduler
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.ints import uint32, uint128
 
@@ -38,6 +39,8 @@ class SyncStore:
     batch_syncing: Set[bytes32] = field(default_factory=set)
     # Set of nodes which we are backtrack syncing from, and how many threads
     backtrack_syncing: Dict[bytes32, int] = field(default_factory=dict)
+    # Scheduler of the current (or most recent) long sync
+    sync_scheduler: Optional[SyncScheduler] = None
 
     def set_sync_mode(self, sync_mode: bool) -> None:
         self.sync_mode = sync_mode
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+from typing import Dict, FrozenSet, List, Optional, Set
+
+from chia.full_node.subscriptions import PeerSubscriptions
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+from chia.protocols.wallet_protocol import CoinState, CoinStateUpdate, NewPeakWallet
+from chia.server.outbound_message import Message, NodeType, make_msg
+from chia.server.ws_connection import WSChiaConnection
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.coin_record import CoinRecord
+from chia.util.ints import uint32
+
+log = logging.getLogger(__name__)
+
+# How often a sender checks whether its wallet received the previous update
+DRAIN_POLL_SECONDS = 0.05
+
+
+@dataclasses.dataclass
+class PendingWalletUpdate:
+    peak_height: uint32
+    fork_height: uint32
+    peak_hash: bytes32
+    coin_states: Dict[bytes32, CoinState]
+    new_peak: Optional[NewPeakWallet]
+    # The serialized messages, shared between all the wallets which get the same update. They're rebuilt from the
+    # fields above once the update was merged with another one.
+    coin_state_message: Optional[Message] = None
+    new_peak_message: Optional[Message] = None
+
+    def merge(self, newer: PendingWalletUpdate) -> None:
+        """
+        Folds the update for a later peak into this one, as if the wallet only learned about the later peak
+        """
+        self.fork_height = uint32(min(self.fork_height, newer.fork_height))
+        self.peak_height = newer.peak_height
+        self.peak_hash = newer.peak_hash
+        self.coin_states.update(newer.coin_states)
+        self.coin_state_message = None
+        if newer.new_peak is not None:
+            fork_point = newer.new_peak.fork_point_with_previous_peak
+            if self.new_peak is not None:
+                fork_point = uint32(min(fork_point, self.new_peak.fork_point_with_previous_peak))
+            self.new_peak = dataclasses.replace(newer.new_peak, fork_point_with_previous_peak=fork_point)
+            self.new_peak_message = None
+
+    def messages(self) -> List[Message]:
+        messages: List[Message] = []
+        if len(self.coin_states) > 0:
+            if self.coin_state_message is None:
+                self.coin_state_message = make_msg(
+                    ProtocolMessageTypes.coin_state_update,
+                    CoinStateUpdate(
+                        self.peak_height, self.fork_height, self.peak_hash, list(self.coin_states.values())
+                    ),
+                )
+            messages.append(self.coin_state_message)
+        if self.new_peak is not None:
+            if self.new_peak_message is None:
+                self.new_peak_message = make_msg(ProtocolMessageTypes.new_peak_wallet, self.new_peak)
+            messages.append(self.new_peak_message)
+        return messages
+
+
+class WalletUpdateDispatcher:
+    """
+    Sends the coin state updates and new peaks to the wallets, outside of the peak post-processing. Every wallet
+    has its own sender task, so they're sent to all of them concurrently. A wallet which hasn't received the
+    previous update yet gets the following peaks merged into a single one.
+    """
+
+    _subscriptions: PeerSubscriptions
+    _pending: Dict[bytes32, PendingWalletUpdate]
+    _senders: Dict[bytes32, asyncio.Task[None]]
+
+    def __init__(self, subscriptions: PeerSubscriptions) -> None:
+        self._subscriptions = subscriptions
+        self._pending = {}
+        self._senders = {}
+
+    def add_peak(
+        self,
+        connections: Dict[bytes32, WSChiaConnection],
+        peak_height: uint32,
+        fork_height: uint32,
+        peak_hash: bytes32,
+        coin_records: List[CoinRecord],
+        coin_id_to_ph_hint: Dict[bytes32, bytes32],
+        new_peak: Optional[NewPeakWallet],
+    ) -> None:
+        """
+        Queues the changes of the coin records for the wallets subscribed to them, along with the new peak, if
+        any, for all the wallets
+        """
+        coin_states: Dict[bytes32, CoinState] = {}
+        coin_ids_for_ph: Dict[bytes32, Set[bytes32]] = {}
+        for coin_record in coin_records:
+            name = coin_record.name
+            coin_states[name] = coin_record.coin_state
+            coin_ids_for_ph.setdefault(coin_record.coin.puzzle_hash, set()).add(name)
+            hint = coin_id_to_ph_hint.get(name)
+            if hint is not None:
+                coin_ids_for_ph.setdefault(hint, set()).add(name)
+
+        changes_for_peer: Dict[bytes32, Set[bytes32]] = {}
+        for coin_id, peers in self._subscriptions.peers_for_coin_ids(coin_states.keys()).items():
+            for peer in peers:
+                changes_for_peer.setdefault(peer, set()).add(coin_id)
+        for ph, peers in self._subscriptions.peers_for_puzzle_hashes(coin_ids_for_ph.keys()).items():
+            for peer in peers:
+                changes_for_peer.setdefault(peer, set()).update(coin_ids_for_ph[ph])
+
+        new_peak_message = None if new_peak is None else make_msg(ProtocolMessageTypes.new_peak_wallet, new_peak)
+        coin_state_messages: Dict[FrozenSet[bytes32], Message] = {}
+        for peer_id, connection in connections.items():
+            coin_ids = changes_for_peer.get(peer_id)
+            if coin_ids is None and (new_peak is None or connection.connection_type is not NodeType.WALLET):
+                continue
+            update = PendingWalletUpdate(peak_height, fork_height, peak_hash, {}, new_peak, None, new_peak_message)
+            if coin_ids is not None:
+                update.coin_states = {coin_id: coin_states[coin_id] for coin_id in coin_ids}
+                # Most wallets are subscribed to different coins, but the ones that aren't share the message
+                key = frozenset(coin_ids)
+                update.coin_state_message = coin_state_messages.get(key)
+                if update.coin_state_message is None:
+                    update.messages()
+                    assert update.coin_state_message is not None
+                    coin_state_messages[key] = update.coin_state_message
+
+            pending = self._pending.get(peer_id)
+            if pending is None:
+                self._pending[peer_id] = update
+            else:
+                pending.merge(update)
+            if peer_id not in self._senders:
+                self._senders[peer_id] = asyncio.create_task(self._send_updates(connection))
+
+    async def _send_updates(self, connection: WSChiaConnection) -> None:
+        peer_id = connection.peer_node_id
+        try:
+            while not connection.closed:
+                update = self._pending.pop(peer_id, None)
+                if update is None:
+                    break
+                for message in update.messages():
+                    await connection.send_message(message)
+                # Sending only queues the messages, so wait for the connection to actually send them before taking
+                # the next update. Any peaks that come in until then are merged into it.
+                while not connection.closed and not connection.outgoing_queue.empty():
+                    await asyncio.sleep(DRAIN_POLL_SECONDS)
+        except Exception as e:
+            log.error(f"Failed to send wallet updates to {connection.get_peer_logging()}: {type(e).__name__} {e}")
+        finally:
+            self._senders.pop(peer_id, None)
+            if connection.closed:
+                self._pending.pop(peer_id, None)
+
+    def close(self) -> None:
+        for task in self._senders.values():
+            task.cancel()
+        self._senders.clear()
+        self._pending.clear()
@@ -31,6 +31,7 @@ from chia.types.blockchain_format.slots import ChallengeChainSubSlot, RewardChai
 from chia.types.blockchain_format.sub_epoch_summary import SubEpochSummary
 from chia.types.blockchain_format.vdf import VDFInfo, VDFProof
 from chia.types.end_of_slot_bundle import EndOfSubSlotBundle
+from chia.types.full_block import FullBlock
 from chia.types.header_block import HeaderBlock
 from chia.types.weight_proof import (
     RecentChainData,
@@ -41,8 +42,10 @@ from chia.types.weight_proof import (
     WeightProof,
 )
 from chia.util.block_cache import BlockCache
+from chia.util.generator_tools import get_block_header
 from chia.util.hash import std_hash
 from chia.util.ints import uint8, uint32, uint64, uint128
+from chia.util.lru_cache import BytesLRUCache
 from chia.util.misc import to_batches
 from chia.util.setproctitle import getproctitle, setproctitle
 
@@ -57,6 +60,7 @@ class WeightProofHandler:
     LAMBDA_L = 100
     C = 0.5
     MAX_SAMPLES = 20
+    SEGMENTS_CACHE_BYTES = 100 * 1024 * 1024
 
     def __init__(
         self,
@@ -65,7 +69,13 @@ class WeightProofHandler:
         multiprocessing_context: Optional[BaseContext] = None,
     ):
         self.tip: Optional[bytes32] = None
-        self.proof: Optional[WeightProof] = None
+        # the serialized proof for tip
+        self.proof_bytes: Optional[bytes] = None
+        # serialized HeaderBlocks (without transactions filter) of the recent chain, by header hash, along with
+        # their heights. Kept up to date by add_recent_block(), the ones that are missing are loaded when needed
+        self._recent_chain: Dict[bytes32, Tuple[uint32, bytes]] = {}
+        # serialized SubEpochSegments, by the header hash of the block including the sub epoch summary
+        self._segments: BytesLRUCache[bytes32] = BytesLRUCache(self.SEGMENTS_CACHE_BYTES)
         self.constants = constants
         self.blockchain = blockchain
         self.lock = asyncio.Lock()
@@ -73,6 +83,16 @@ class WeightProofHandler:
         self.multiprocessing_context = multiprocessing_context
 
     async def get_proof_of_weight(self, tip: bytes32) -> Optional[WeightProof]:
+        wp_bytes = await self.get_proof_of_weight_bytes(tip)
+        if wp_bytes is None:
+            return None
+        return WeightProof.from_bytes(wp_bytes)
+
+    async def get_proof_of_weight_bytes(self, tip: bytes32) -> Optional[bytes]:
+        """
+        Returns the serialized WeightProof for tip, which is assembled from serialized sub epoch segments and
+        header blocks, without ever creating the WeightProof object
+        """
         tip_rec = self.blockchain.try_block_record(tip)
         if tip_rec is None:
             log.error("unknown tip")
@@ -83,15 +103,14 @@ class WeightProofHandler:
             return None
 
         async with self.lock:
-            if self.proof is not None:
-                if self.proof.recent_chain_data[-1].header_hash == tip:
-                    return self.proof
-            wp = await self._create_proof_of_weight(tip)
-            if wp is None:
+            if self.proof_bytes is not None and self.tip == tip:
+                return self.proof_bytes
+            wp_bytes = await self._create_proof_of_weight_bytes(tip)
+            if wp_bytes is None:
                 return None
-            self.proof = wp
+            self.proof_bytes = wp_bytes
             self.tip = tip
-            return wp
+            return wp_bytes
 
     def get_sub_epoch_data(self, tip_height: uint32, summary_heights: List[uint32]) -> List[SubEpochData]:
         sub_epoch_data: List[SubEpochData] = []
@@ -107,8 +126,18 @@ class WeightProofHandler:
         """
         Creates a weight proof object
         """
+        wp_bytes = await self._create_proof_of_weight_bytes(tip)
+        if wp_bytes is None:
+            return None
+        return WeightProof.from_bytes(wp_bytes)
+
+    async def _create_proof_of_weight_bytes(self, tip: bytes32) -> Optional[bytes]:
+        """
+        Creates a serialized weight proof
+        """
         assert self.blockchain is not None
-        sub_epoch_segments: List[SubEpochChallengeSegment] = []
+        # the serialized segments of the sampled sub epochs, each prefixed by the number of segments
+        sub_epoch_segments: List[bytes] = []
         tip_rec = self.blockchain.try_block_record(tip)
         if tip_rec is None:
             log.error("failed not tip in cache")
@@ -128,7 +157,10 @@ class WeightProofHandler:
         # use second to last ses as seed
         seed = self.get_seed_for_proof(summary_heights, tip_rec.height)
         rng = random.Random(seed)
-        weight_to_check = _get_weights_for_sampling(rng, tip_rec.weight, recent_chain)
+        # only the first and the last blocks of the recent chain are used for sampling
+        weight_to_check = _get_weights_for_sampling(
+            rng, tip_rec.weight, [HeaderBlock.from_bytes(recent_chain[0]), HeaderBlock.from_bytes(recent_chain[-1])]
+        )
         sample_n = 0
         ses_blocks = await self.blockchain.get_block_records_at(summary_heights)
         if ses_blocks is None:
@@ -151,19 +183,38 @@ class WeightProofHandler:
 
             if _sample_sub_epoch(prev_ses_block.weight, ses_block.weight, weight_to_check):
                 sample_n += 1
-                segments = await self.blockchain.get_sub_epoch_challenge_segments(ses_block.header_hash)
-                if segments is None:
-                    segments = await self.__create_sub_epoch_segments(ses_block, prev_ses_block, uint32(sub_epoch_n))
+                segments_bytes = self._segments.get(ses_block.header_hash)
+                if segments_bytes is None:
+                    segments = await self.blockchain.get_sub_epoch_challenge_segments(ses_block.header_hash)
                     if segments is None:
-                        log.error(
-                            f"failed while building segments for sub epoch {sub_epoch_n}, ses height {ses_height} "
+                        segments = await self.__create_sub_epoch_segments(
+                            ses_block, prev_ses_block, uint32(sub_epoch_n)
                         )
-                        return None
-                    await self.blockchain.persist_sub_epoch_challenge_segments(ses_block.header_hash, segments)
-                sub_epoch_segments.extend(segments)
+                        if segments is None:
+                            log.error(
+                                f"failed while building segments for sub epoch {sub_epoch_n}, "
+                                f"ses height {ses_height} "
+                            )
+                            return None
+                        await self.blockchain.persist_sub_epoch_challenge_segments(ses_block.header_hash, segments)
+                    segments_bytes = bytes(SubEpochSegments(segments))
+                    self._segments.put(ses_block.header_hash, segments_bytes)
+                sub_epoch_segments.append(segments_bytes)
             prev_ses_block = ses_block
         log.debug(f"sub_epochs: {len(sub_epoch_data)}")
-        return WeightProof(sub_epoch_data, sub_epoch_segments, recent_chain)
+
+        # this is the serialization of WeightProof(sub_epoch_data, sub_epoch_segments, recent_chain)
+        num_segments = sum(int.from_bytes(segments_bytes[:4], "big") for segments_bytes in sub_epoch_segments)
+        return b"".join(
+            [
+                len(sub_epoch_data).to_bytes(4, "big"),
+                *(bytes(data) for data in sub_epoch_data),
+                num_segments.to_bytes(4, "big"),
+                *(segments_bytes[4:] for segments_bytes in sub_epoch_segments),
+                len(recent_chain).to_bytes(4, "big"),
+                *recent_chain,
+            ]
+        )
 
     def get_seed_for_proof(self, summary_heights: List[uint32], tip_height: uint32) -> bytes32:
         count = 0
@@ -178,50 +229,57 @@ class WeightProofHandler:
         seed = ses.get_hash()
         return seed
 
-    async def _get_recent_chain(self, tip_height: uint32) -> Optional[List[HeaderBlock]]:
-        recent_chain: List[HeaderBlock] = []
-        ses_heights = self.blockchain.get_ses_heights()
-        min_height = 0
+    def _recent_chain_start(self, tip_height: uint32) -> uint32:
+        # the recent chain goes back to the block before the second to last sub epoch summary
         count_ses = 0
-        for ses_height in reversed(ses_heights):
+        for ses_height in reversed(self.blockchain.get_ses_heights()):
             if ses_height <= tip_height:
                 count_ses += 1
             if count_ses == 2:
-                min_height = ses_height - 1
-                break
-        log.debug(f"start {min_height} end {tip_height}")
-        headers = await self.blockchain.get_header_blocks_in_range(min_height, tip_height, tx_filter=False)
-        blocks = await self.blockchain.get_block_records_in_range(min_height, tip_height)
-        ses_count = 0
-        curr_height = tip_height
-        blocks_n = 0
-        while ses_count < 2:
-            if curr_height == 0:
-                break
-            # add to needed reward chain recent blocks
-            header_hash = self.blockchain.height_to_hash(curr_height)
-            assert header_hash is not None
-            header_block = headers[header_hash]
-            block_rec = blocks[header_block.header_hash]
-            if header_block is None:
+                return uint32(max(ses_height - 1, 0))
+        return uint32(0)
+
+    def add_recent_block(self, block: FullBlock) -> None:
+        """
+        Called with every new peak, to keep the serialized recent chain up to date. Blocks which aren't in the
+        recent chain of the peak anymore are dropped
+        """
+        header_block = get_block_header(block, [], [])
+        self._recent_chain[block.header_hash] = (block.height, bytes(header_block))
+        start = self._recent_chain_start(block.height)
+        for header_hash in [h for h, (height, _) in self._recent_chain.items() if height < start]:
+            del self._recent_chain[header_hash]
+
+    async def _get_recent_chain(self, tip_height: uint32) -> Optional[List[bytes]]:
+        """
+        Returns the serialized header blocks (without transactions filter) of the recent chain of the block at
+        tip_height
+        """
+        start = self._recent_chain_start(tip_height)
+        header_hashes: List[bytes32] = []
+        for height in range(start, tip_height + 1):
+            header_hash = self.blockchain.height_to_hash(uint32(height))
+            if header_hash is None:
                 log.error("creating recent chain failed")
                 return None
-            recent_chain.insert(0, header_block)
-            if block_rec.sub_epoch_summary_included:
-                ses_count += 1
-            curr_height = uint32(curr_height - 1)
-            blocks_n += 1
-
-        header_hash = self.blockchain.height_to_hash(curr_height)
-        assert header_hash is not None
-        header_block = headers[header_hash]
-        recent_chain.insert(0, header_block)
+            header_hashes.append(header_hash)
+
+        missing = [height for height, h in enumerate(header_hashes, start) if h not in self._recent_chain]
+        if len(missing) > 0:
+            log.debug(f"loading recent chain blocks {missing[0]} to {missing[-1]}")
+            headers = await self.blockchain.get_header_blocks_in_range(missing[0], missing[-1], tx_filter=False)
+            for header_block in headers.values():
+                self._recent_chain[header_block.header_hash] = (header_block.height, bytes(header_block))
+
+        recent_chain: List[bytes] = []
+        for header_hash in header_hashes:
+            entry = self._recent_chain.get(header_hash)
+            if entry is None:
+                log.error("creating recent chain failed")
+                return None
+            recent_chain.append(entry[1])
 
-        log.info(
-            f"recent chain, "
-            f"start: {recent_chain[0].reward_chain_block.height} "
-            f"end:  {recent_chain[-1].reward_chain_block.height} "
-        )
+        log.info(f"recent chain, start: {start} end:  {tip_height} ")
         return recent_chain
 
     async def create_prev_sub_epoch_segments(self) -> None:
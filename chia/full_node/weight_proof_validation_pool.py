@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures.process import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from chia.consensus.constants import ConsensusConstants
+from chia.types.blockchain_format.classgroup import ClassgroupElement
+from chia.types.blockchain_format.vdf import VDFInfo, VDFProof
+from chia.util.misc import to_batches
+from chia.util.setproctitle import getproctitle, setproctitle
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# VDFs are handed to the workers in batches this small, so the work stays
+# balanced across them, and a failed or cancelled validation leaves little work
+# behind
+VDF_BATCH_SIZE = 8
+
+# set in the worker processes, when the pool is closed
+_shutdown_event: Any = None
+
+
+def _worker_initializer(process_title: str, shutdown_event: Any) -> None:
+    global _shutdown_event
+    setproctitle(process_title)
+    _shutdown_event = shutdown_event
+
+
+def shutdown_requested() -> bool:
+    """
+    True in a worker process of a pool which is being closed. Long running functions check this regularly, and
+    give up.
+    """
+    return _shutdown_event is not None and bool(_shutdown_event.is_set())
+
+
+def validate_vdf_batch(constants: ConsensusConstants, vdf_list: List[Tuple[bytes, bytes, bytes]]) -> bool:
+    for vdf_proof_bytes, class_group_bytes, info in vdf_list:
+        vdf = VDFProof.from_bytes(vdf_proof_bytes)
+        class_group = ClassgroupElement.from_bytes(class_group_bytes)
+        vdf_info = VDFInfo.from_bytes(info)
+        if not vdf.is_valid(constants, class_group, vdf_info):
+            return False
+
+        if shutdown_requested():
+            log.info("cancelling VDF validation, shutdown requested")
+            return False
+
+    return True
+
+
+@dataclass
+class ValidationProgress:
+    vdfs: int = 0
+    vdfs_validated: int = 0
+    started: float = 0.0
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "vdfs": self.vdfs,
+            "vdfs_validated": self.vdfs_validated,
+            "seconds": time.monotonic() - self.started,
+        }
+
+
+class WeightProofValidationPool:
+    """
+    A long lived pool of processes validating weight proofs, shared by everything
+    in a service that validates them. The processes are started on first use
+    and stay around until the pool is closed.
+    """
+
+    _num_processes: int
+    _multiprocessing_context: Optional[BaseContext]
+    _executor: Optional[ProcessPoolExecutor]
+    _shutdown_event: Any
+    _closed: bool
+    # the VDF validations in progress
+    _progress: List[ValidationProgress]
+
+    def __init__(self, num_processes: int = 4, multiprocessing_context: Optional[BaseContext] = None) -> None:
+        self._num_processes = num_processes
+        self._multiprocessing_context = multiprocessing_context
+        self._executor = None
+        self._shutdown_event = None
+        self._closed = False
+        self._progress = []
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._closed:
+            raise RuntimeError("the weight proof validation pool is closed")
+        if self._executor is None:
+            context = self._multiprocessing_context
+            if context is None:
+                context = multiprocessing.get_context()
+            self._shutdown_event = context.Event()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._num_processes,
+                mp_context=context,
+                initializer=_worker_initializer,
+                initargs=(f"{getproctitle()}_worker", self._shutdown_event),
+            )
+        return self._executor
+
+    async def run(self, function: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), function, *args)
+
+    async def validate_vdfs(
+        self, constants: ConsensusConstants, vdfs: List[Tuple[VDFProof, ClassgroupElement, VDFInfo]]
+    ) -> bool:
+        """
+        Validates the VDFs in small batches, which the workers take from a
+        shared queue as soon as they're idle. Returns False as soon as one of
+        them is invalid, dropping the batches that haven't started. Cancelling
+        this drops them as well.
+        """
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        progress = ValidationProgress(len(vdfs), 0, time.monotonic())
+        self._progress.append(progress)
+
+        async def validate_batch(batch: List[Tuple[bytes, bytes, bytes]]) -> bool:
+            valid = await loop.run_in_executor(executor, validate_vdf_batch, constants, batch)
+            progress.vdfs_validated += len(batch)
+            return valid
+
+        tasks: List[asyncio.Task[bool]] = []
+        try:
+            for batch in to_batches(vdfs, VDF_BATCH_SIZE):
+                byte_chunks = [
+                    (bytes(vdf_proof), bytes(classgroup), bytes(vdf_info))
+                    for vdf_proof, classgroup, vdf_info in batch.entries
+                ]
+                tasks.append(asyncio.create_task(validate_batch(byte_chunks)))
+                # give other stuff a turn
+                await asyncio.sleep(0)
+
+            for task in asyncio.as_completed(tasks):
+                if not await task:
+                    return False
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._progress.remove(progress)
+            log.info(
+                f"validated {progress.vdfs_validated} of {progress.vdfs} VDFs in "
+                f"{time.monotonic() - progress.started:0.2f} seconds"
+            )
+        return True
+
+    def get_progress(self) -> Dict[str, Any]:
+        return {
+            "processes": self._num_processes,
+            "running": self._executor is not None,
+            "validations": [progress.to_json_dict() for progress in self._progress],
+        }
+
+    def close(self) -> None:
+        """
+        Asks the workers to give up on what they're doing, and waits for them to exit
+        """
+        self._closed = True
+        if self._executor is not None:
+            self._shutdown_event.set()
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -12,6 +12,7 @@ from typing import Any, Dict, List, Optional, Tuple
 from typing_extensions import Literal
 
 from chia.consensus.constants import ConsensusConstants
+from chia.harvester.lookup_scheduler import LookupScheduler
 from chia.plot_sync.sender import Sender
 from chia.plotting.manager import PlotManager
 from chia.plotting.util import (
@@ -37,6 +38,8 @@ class Harvester:
     root_path: Path
     _shut_down: bool
     executor: ThreadPoolExecutor
+    lookup_scheduler: LookupScheduler
+    lookup_deadline_seconds: float
     state_changed_callback: Optional[StateChangedProtocol] = None
     constants: ConsensusConstants
     _refresh_lock: asyncio.Lock
@@ -76,6 +79,8 @@ class Harvester:
         self.plot_sync_sender = Sender(self.plot_manager)
         self._shut_down = False
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=config["num_threads"])
+        self.lookup_scheduler = LookupScheduler(self.executor, config.get("max_concurrent_lookups_per_disk", 4))
+        self.lookup_deadline_seconds = config.get("lookup_deadline_seconds", 5)
         self._server = None
         self.constants = constants
         self.state_changed_callback: Optional[StateChangedProtocol] = None
@@ -142,8 +147,13 @@ class Harvester:
             f"total plots: {len(self.plot_manager.plots)}"
         )
         if event == PlotRefreshEvents.started:
-            self.plot_sync_sender.sync_start(update_result.remaining, self.plot_manager.initial_refresh())
+            # `remaining` only covers the changed files if the refresh was triggered by the directory watcher
+            self.plot_sync_sender.sync_start(self.plot_manager.plot_file_count(), self.plot_manager.initial_refresh())
         if event == PlotRefreshEvents.batch_processed:
+            # this runs on the refresh thread, so it's fine to stat the plot directories here
+            self.lookup_scheduler.resolve_disks(
+                Path(plot_info.prover.get_filename()) for plot_info in update_result.loaded
+            )
             self.plot_sync_sender.process_batch(update_result.loaded, update_result.remaining)
         if event == PlotRefreshEvents.done:
             self.plot_sync_sender.sync_done(update_result.removed, update_result.duration)
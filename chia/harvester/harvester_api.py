@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
 import time
 from pathlib import Path
@@ -10,6 +11,7 @@ from blspy import AugSchemeMPL, G1Element, G2Element
 
 from chia.consensus.pot_iterations import calculate_iterations_quality, calculate_sp_interval_iters
 from chia.harvester.harvester import Harvester
+from chia.harvester.lookup_scheduler import LookupPriority, LookupSkipped
 from chia.plotting.util import PlotInfo, parse_plot_info
 from chia.protocols import harvester_protocol
 from chia.protocols.farmer_protocol import FarmingInfo
@@ -21,7 +23,6 @@ from chia.types.blockchain_format.proof_of_space import (
     ProofOfSpace,
     calculate_pos_challenge,
     generate_plot_public_key,
-    passes_plot_filter,
 )
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.api_decorators import api_request
@@ -85,139 +86,156 @@ class HarvesterAPI:
         start = time.time()
         assert len(new_challenge.challenge_hash) == 32
 
-        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.harvester.lookup_deadline_seconds
+        scheduler = self.harvester.lookup_scheduler
 
-        def blocking_lookup(filename: Path, plot_info: PlotInfo) -> List[Tuple[bytes32, ProofOfSpace]]:
+        def blocking_lookup_qualities(filename: Path, plot_info: PlotInfo) -> Tuple[bytes32, List[Tuple[int, bytes32]]]:
             # Uses the DiskProver object to lookup qualities. This is a blocking call,
+            # so it should be run in a thread pool. Returns the sp challenge hash and
+            # the qualities good enough to fetch the full proof for.
+            plot_id = plot_info.prover.get_id()
+            sp_challenge_hash = calculate_pos_challenge(
+                plot_id,
+                new_challenge.challenge_hash,
+                new_challenge.sp_hash,
+            )
+            try:
+                quality_strings = plot_info.prover.get_qualities_for_challenge(sp_challenge_hash)
+            except Exception as e:
+                self.harvester.log.error(f"Error using prover object {e}")
+                self.harvester.log.error(
+                    f"File: {filename} Plot ID: {plot_id.hex()}, "
+                    f"challenge: {sp_challenge_hash}, plot_info: {plot_info}"
+                )
+                return sp_challenge_hash, []
+
+            good_qualities: List[Tuple[int, bytes32]] = []
+            if quality_strings is not None:
+                difficulty = new_challenge.difficulty
+                sub_slot_iters = new_challenge.sub_slot_iters
+                if plot_info.pool_contract_puzzle_hash is not None:
+                    # If we are pooling, override the difficulty and sub slot iters with the pool threshold info.
+                    # This will mean more proofs actually get found, but they are only submitted to the pool,
+                    # not the blockchain
+                    for pool_difficulty in new_challenge.pool_difficulties:
+                        if pool_difficulty.pool_contract_puzzle_hash == plot_info.pool_contract_puzzle_hash:
+                            difficulty = pool_difficulty.difficulty
+                            sub_slot_iters = pool_difficulty.sub_slot_iters
+
+                # Found proofs of space (on average 1 is expected per plot)
+                for index, quality_str in enumerate(quality_strings):
+                    required_iters: uint64 = calculate_iterations_quality(
+                        self.harvester.constants.DIFFICULTY_CONSTANT_FACTOR,
+                        quality_str,
+                        plot_info.prover.get_size(),
+                        difficulty,
+                        new_challenge.sp_hash,
+                    )
+                    sp_interval_iters = calculate_sp_interval_iters(self.harvester.constants, sub_slot_iters)
+                    if required_iters < sp_interval_iters:
+                        # Found a very good proof of space! will fetch the whole proof from disk,
+                        # then send to farmer
+                        good_qualities.append((index, quality_str))
+            return sp_challenge_hash, good_qualities
+
+        def blocking_lookup_full_proof(
+            filename: Path, plot_info: PlotInfo, sp_challenge_hash: bytes32, index: int
+        ) -> Optional[bytes]:
+            # Fetches the whole proof from disk, approximately 64 reads. This is a blocking call,
             # so it should be run in a thread pool.
+            plot_id = plot_info.prover.get_id()
             try:
-                plot_id = plot_info.prover.get_id()
-                sp_challenge_hash = calculate_pos_challenge(
-                    plot_id,
-                    new_challenge.challenge_hash,
-                    new_challenge.sp_hash,
+                proof_xs: bytes = plot_info.prover.get_full_proof(
+                    sp_challenge_hash, index, self.harvester.parallel_read
                 )
-                try:
-                    quality_strings = plot_info.prover.get_qualities_for_challenge(sp_challenge_hash)
-                except Exception as e:
-                    self.harvester.log.error(f"Error using prover object {e}")
+                return proof_xs
+            except RuntimeError as e:
+                if str(e) == "GRResult_NoProof received":
+                    self.harvester.log.info(f"Proof dropped due to line point compression for {filename}")
+                    self.harvester.log.info(
+                        f"File: {filename} Plot ID: {plot_id.hex()}, challenge: {sp_challenge_hash}, "
+                        f"plot_info: {plot_info}"
+                    )
+                else:
+                    self.harvester.log.error(f"Exception fetching full proof for {filename}. {e}")
                     self.harvester.log.error(
-                        f"File: {filename} Plot ID: {plot_id.hex()}, "
-                        f"challenge: {sp_challenge_hash}, plot_info: {plot_info}"
+                        f"File: {filename} Plot ID: {plot_id.hex()}, challenge: {sp_challenge_hash}, "
+                        f"plot_info: {plot_info}"
                     )
-                    return []
-
-                responses: List[Tuple[bytes32, ProofOfSpace]] = []
-                if quality_strings is not None:
-                    difficulty = new_challenge.difficulty
-                    sub_slot_iters = new_challenge.sub_slot_iters
-                    if plot_info.pool_contract_puzzle_hash is not None:
-                        # If we are pooling, override the difficulty and sub slot iters with the pool threshold info.
-                        # This will mean more proofs actually get found, but they are only submitted to the pool,
-                        # not the blockchain
-                        for pool_difficulty in new_challenge.pool_difficulties:
-                            if pool_difficulty.pool_contract_puzzle_hash == plot_info.pool_contract_puzzle_hash:
-                                difficulty = pool_difficulty.difficulty
-                                sub_slot_iters = pool_difficulty.sub_slot_iters
-
-                    # Found proofs of space (on average 1 is expected per plot)
-                    for index, quality_str in enumerate(quality_strings):
-                        required_iters: uint64 = calculate_iterations_quality(
-                            self.harvester.constants.DIFFICULTY_CONSTANT_FACTOR,
-                            quality_str,
-                            plot_info.prover.get_size(),
-                            difficulty,
-                            new_challenge.sp_hash,
-                        )
-                        sp_interval_iters = calculate_sp_interval_iters(self.harvester.constants, sub_slot_iters)
-                        if required_iters < sp_interval_iters:
-                            # Found a very good proof of space! will fetch the whole proof from disk,
-                            # then send to farmer
-                            try:
-                                proof_xs = plot_info.prover.get_full_proof(
-                                    sp_challenge_hash, index, self.harvester.parallel_read
-                                )
-                            except RuntimeError as e:
-                                if str(e) == "GRResult_NoProof received":
-                                    self.harvester.log.info(
-                                        f"Proof dropped due to line point compression for {filename}"
-                                    )
-                                    self.harvester.log.info(
-                                        f"File: {filename} Plot ID: {plot_id.hex()}, challenge: {sp_challenge_hash}, "
-                                        f"plot_info: {plot_info}"
-                                    )
-                                else:
-                                    self.harvester.log.error(f"Exception fetching full proof for {filename}. {e}")
-                                    self.harvester.log.error(
-                                        f"File: {filename} Plot ID: {plot_id.hex()}, challenge: {sp_challenge_hash}, "
-                                        f"plot_info: {plot_info}"
-                                    )
-                                continue
-                            except Exception as e:
-                                self.harvester.log.error(f"Exception fetching full proof for {filename}. {e}")
-                                self.harvester.log.error(
-                                    f"File: {filename} Plot ID: {plot_id.hex()}, challenge: {sp_challenge_hash}, "
-                                    f"plot_info: {plot_info}"
-                                )
-                                continue
-
-                            responses.append(
-                                (
-                                    quality_str,
-                                    ProofOfSpace(
-                                        sp_challenge_hash,
-                                        plot_info.pool_public_key,
-                                        plot_info.pool_contract_puzzle_hash,
-                                        plot_info.plot_public_key,
-                                        uint8(plot_info.prover.get_size()),
-                                        proof_xs,
-                                    ),
-                                )
-                            )
-                return responses
             except Exception as e:
-                self.harvester.log.error(f"Unknown error: {e}")
-                return []
+                self.harvester.log.error(f"Exception fetching full proof for {filename}. {e}")
+                self.harvester.log.error(
+                    f"File: {filename} Plot ID: {plot_id.hex()}, challenge: {sp_challenge_hash}, "
+                    f"plot_info: {plot_info}"
+                )
+            return None
 
         async def lookup_challenge(
             filename: Path, plot_info: PlotInfo
         ) -> Tuple[Path, List[harvester_protocol.NewProofOfSpace]]:
-            # Executes a DiskProverLookup in a thread pool, and returns responses
+            # Executes a DiskProverLookup in a thread pool, with bounded concurrency per disk,
+            # and returns responses
             all_responses: List[harvester_protocol.NewProofOfSpace] = []
             if self.harvester._shut_down:
                 return filename, []
-            proofs_of_space_and_q: List[Tuple[bytes32, ProofOfSpace]] = await loop.run_in_executor(
-                self.harvester.executor, blocking_lookup, filename, plot_info
-            )
-            for quality_str, proof_of_space in proofs_of_space_and_q:
-                all_responses.append(
-                    harvester_protocol.NewProofOfSpace(
-                        new_challenge.challenge_hash,
-                        new_challenge.sp_hash,
-                        quality_str.hex() + str(filename.resolve()),
-                        proof_of_space,
-                        new_challenge.signage_point_index,
-                    )
+            try:
+                sp_challenge_hash, qualities = await scheduler.run(
+                    filename,
+                    LookupPriority.QUALITIES,
+                    deadline,
+                    functools.partial(blocking_lookup_qualities, filename, plot_info),
                 )
+                for index, quality_str in qualities:
+                    proof_xs = await scheduler.run(
+                        filename,
+                        LookupPriority.FULL_PROOF,
+                        deadline,
+                        functools.partial(blocking_lookup_full_proof, filename, plot_info, sp_challenge_hash, index),
+                    )
+                    if proof_xs is None:
+                        continue
+                    proof_of_space = ProofOfSpace(
+                        sp_challenge_hash,
+                        plot_info.pool_public_key,
+                        plot_info.pool_contract_puzzle_hash,
+                        plot_info.plot_public_key,
+                        uint8(plot_info.prover.get_size()),
+                        proof_xs,
+                    )
+                    all_responses.append(
+                        harvester_protocol.NewProofOfSpace(
+                            new_challenge.challenge_hash,
+                            new_challenge.sp_hash,
+                            quality_str.hex() + str(filename.resolve()),
+                            proof_of_space,
+                            new_challenge.signage_point_index,
+                        )
+                    )
+            except LookupSkipped as e:
+                self.harvester.log.warning(f"Skipped looking up {filename}: {e}")
+            except Exception as e:
+                self.harvester.log.error(f"Unknown error: {e}")
             return filename, all_responses
 
+        # Passes the plot filter (does not check sp filter yet though, since we have not reached sp)
+        # This is being executed at the beginning of the slot. The filter runs on a snapshot of the
+        # plot ids, the lock is only needed to get the plots that passed
+        plot_ids = self.harvester.plot_manager.plot_id_index.snapshot()
+        total = len(plot_ids)
+        passed_filenames = plot_ids.passing_plot_filter(
+            new_challenge.filter_prefix_bits, new_challenge.challenge_hash, new_challenge.sp_hash
+        )
         awaitables = []
         passed = 0
-        total = 0
         with self.harvester.plot_manager:
             self.harvester.log.debug("new_signage_point_harvester lock acquired")
-            for try_plot_filename, try_plot_info in self.harvester.plot_manager.plots.items():
-                # Passes the plot filter (does not check sp filter yet though, since we have not reached sp)
-                # This is being executed at the beginning of the slot
-                total += 1
-                if passes_plot_filter(
-                    new_challenge.filter_prefix_bits,
-                    try_plot_info.prover.get_id(),
-                    new_challenge.challenge_hash,
-                    new_challenge.sp_hash,
-                ):
-                    passed += 1
-                    awaitables.append(lookup_challenge(try_plot_filename, try_plot_info))
+            for try_plot_filename in passed_filenames:
+                try_plot_info = self.harvester.plot_manager.plots.get(try_plot_filename)
+                if try_plot_info is None:
+                    # removed since the snapshot was taken
+                    continue
+                passed += 1
+                awaitables.append(lookup_challenge(try_plot_filename, try_plot_info))
             self.harvester.log.debug(f"new_signage_point_harvester {passed} plots passed the plot filter")
 
         # Concurrently executes all lookups on disk, to take advantage of multiple disk parallelism
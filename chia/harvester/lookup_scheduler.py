@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import heapq
+import itertools
+import os
+import time
+from bisect import bisect_left
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# upper bounds of the latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# weight of the most recent sample in the recent latency estimate. Disks spin
+# down and up again, so the deadline check follows recent lookups rather than
+# the lifetime mean
+LATENCY_EWMA_ALPHA = 0.3
+
+
+class LookupPriority(IntEnum):
+    # lower values are scheduled first. Every eligible plot needs a quality
+    # lookup, while only a few need a full proof, so the qualities go first
+    QUALITIES = 0
+    FULL_PROOF = 1
+
+
+class LookupSkipped(Exception):
+    """
+    Raised when a lookup can't complete before its deadline, so it wasn't run
+    """
+
+
+@dataclass
+class LatencyHistogram:
+    counts: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    count: int = 0
+    total_seconds: float = 0.0
+    # exponential moving average of the latency
+    recent_seconds: Optional[float] = None
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        if self.recent_seconds is None:
+            self.recent_seconds = seconds
+        else:
+            self.recent_seconds = LATENCY_EWMA_ALPHA * seconds + (1 - LATENCY_EWMA_ALPHA) * self.recent_seconds
+
+    def mean(self) -> Optional[float]:
+        if self.count == 0:
+            return None
+        return self.total_seconds / self.count
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets_ms": list(LATENCY_BUCKETS_MS),
+            "counts": list(self.counts),
+            "count": self.count,
+            "mean_seconds": self.mean(),
+            "recent_seconds": self.recent_seconds,
+        }
+
+
+@dataclass(frozen=True)
+class _Job:
+    priority: LookupPriority
+    deadline: float
+    function: Callable[[], Any]
+    future: asyncio.Future[Any]
+
+
+@dataclass
+class DiskLookups:
+    disk: str
+    directories: Set[str] = field(default_factory=set)
+    running: int = 0
+    # (priority, sequence number, job)
+    queue: List[Tuple[int, int, _Job]] = field(default_factory=list)
+    skipped: int = 0
+    latencies: Dict[LookupPriority, LatencyHistogram] = field(
+        default_factory=lambda: {priority: LatencyHistogram() for priority in LookupPriority}
+    )
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "disk": self.disk,
+            "directories": sorted(self.directories),
+            "running": self.running,
+            "queued": len(self.queue),
+            "skipped": self.skipped,
+            "latency": {priority.name.lower(): hist.to_json_dict() for priority, hist in self.latencies.items()},
+        }
+
+
+class LookupScheduler:
+    """
+    Runs the blocking plot lookups of the harvester on the executor, with a
+    bounded number of concurrent lookups per disk. This keeps a slow (or
+    spun-down) disk from occupying all the executor threads. Queued lookups
+    are run by priority, and lookups that can't finish before their deadline
+    (based on the disk's recent latency) are skipped.
+
+    Disks are told apart by device id. Looking that up means a stat() of the
+    plot directory, which can block for seconds on a spun-down disk, so it's
+    done by resolve_disks() from the plot refresh thread. Until then, the
+    directory stands in for its disk.
+    """
+
+    executor: Executor
+    max_concurrency_per_disk: int
+    _disks: Dict[str, DiskLookups]
+    _disk_of_directory: Dict[Path, str]
+
+    def __init__(self, executor: Executor, max_concurrency_per_disk: int) -> None:
+        self.executor = executor
+        self.max_concurrency_per_disk = max_concurrency_per_disk
+        self._disks = {}
+        self._disk_of_directory = {}
+        self._seq = itertools.count()
+
+    def resolve_disks(self, filenames: Iterable[Path]) -> None:
+        """
+        Looks up the device of the directories holding these files. This is
+        blocking, don't call it from the event loop.
+        """
+        for directory in {filename.parent for filename in filenames}:
+            if directory in self._disk_of_directory:
+                continue
+            try:
+                self._disk_of_directory[directory] = f"device-{os.stat(directory).st_dev}"
+            except OSError:
+                pass
+
+    def disk_of(self, filename: Path) -> DiskLookups:
+        directory = filename.parent
+        disk = self._disk_of_directory.get(directory, str(directory))
+        lookups = self._disks.get(disk)
+        if lookups is None:
+            lookups = DiskLookups(disk)
+            self._disks[disk] = lookups
+        lookups.directories.add(str(directory))
+        return lookups
+
+    async def run(self, filename: Path, priority: LookupPriority, deadline: float, function: Callable[[], T]) -> T:
+        """
+        Runs the blocking function on the executor, once there's capacity on
+        the disk holding filename. deadline is compared to time.monotonic().
+        Raises LookupSkipped if the lookup wouldn't finish in time.
+        """
+        disk = self.disk_of(filename)
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        heapq.heappush(disk.queue, (priority, next(self._seq), _Job(priority, deadline, function, future)))
+        self._start_jobs(disk)
+        return await future
+
+    def _start_jobs(self, disk: DiskLookups) -> None:
+        loop = asyncio.get_running_loop()
+        while disk.running < self.max_concurrency_per_disk and len(disk.queue) > 0:
+            _, _, job = heapq.heappop(disk.queue)
+            if job.future.done():
+                # the caller gave up on it
+                continue
+            now = time.monotonic()
+            expected = disk.latencies[job.priority].recent_seconds
+            if now + (0 if expected is None else expected) > job.deadline:
+                disk.skipped += 1
+                job.future.set_exception(LookupSkipped(f"{job.priority.name} lookup on {disk.disk} is past deadline"))
+                continue
+            try:
+                executor_future = loop.run_in_executor(self.executor, job.function)
+            except RuntimeError as e:
+                # the executor was shut down
+                job.future.set_exception(e)
+                continue
+            disk.running += 1
+            executor_future.add_done_callback(functools.partial(self._job_done, disk, job, now))
+
+    def _job_done(self, disk: DiskLookups, job: _Job, started: float, executor_future: asyncio.Future[Any]) -> None:
+        disk.running -= 1
+        disk.latencies[job.priority].record(time.monotonic() - started)
+        if not job.future.done():
+            if executor_future.cancelled():
+                job.future.cancel()
+            else:
+                exception = executor_future.exception()
+                if exception is not None:
+                    job.future.set_exception(exception)
+                else:
+                    job.future.set_result(executor_future.result())
+        self._start_jobs(disk)
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        return [disk.to_json_dict() for disk in self._disks.values()]
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import logging
+import mmap
+import os
+import struct
 import time
 import traceback
 from dataclasses import dataclass, field
 from math import ceil
 from pathlib import Path
-from typing import Dict, ItemsView, KeysView, List, Optional, Tuple, ValuesView
+from typing import Dict, ItemsView, KeysView, List, Optional, Set, Tuple, ValuesView
 
 from blspy import G1Element
 from chiapos import DiskProver
@@ -14,14 +17,28 @@ from chiapos import DiskProver
 from chia.plotting.util import parse_plot_info
 from chia.types.blockchain_format.proof_of_space import generate_plot_public_key
 from chia.types.blockchain_format.sized_bytes import bytes32
-from chia.util.ints import uint16, uint64
+from chia.util.ints import uint64
 from chia.util.misc import VersionedBlob
 from chia.util.streamable import Streamable, streamable
 from chia.wallet.derive_keys import master_sk_to_local_sk
 
 log = logging.getLogger(__name__)
 
-CURRENT_VERSION: int = 1
+CURRENT_VERSION: int = 2
+
+# A v2 cache file is the uint16 version, followed by records. Every record is
+# its kind and the length of its payload, followed by the payload. A put
+# record holds the length of a DiskCacheIndexEntry, the entry and then the
+# serialized prover, a remove record holds the path.
+_RECORD_PUT = 0
+_RECORD_REMOVE = 1
+_VERSION = struct.Struct(">H")
+_RECORD_HEADER = struct.Struct(">BI")
+_INDEX_ENTRY_LENGTH = struct.Struct(">I")
+
+# the file is rewritten when the replaced and removed records take up more
+# than half of it, and at least this much
+COMPACTION_MIN_BYTES = 1024 * 1024
 
 
 @streamable
@@ -41,14 +58,55 @@ class CacheDataV1(Streamable):
     entries: List[Tuple[str, DiskCacheEntry]]
 
 
+@streamable
+@dataclass(frozen=True)
+class DiskCacheIndexEntry(Streamable):
+    path: str
+    farmer_public_key: G1Element
+    pool_public_key: Optional[G1Element]
+    pool_contract_puzzle_hash: Optional[bytes32]
+    plot_public_key: G1Element
+    last_use: uint64
+
+
+class _CacheFile:
+    """
+    A read-only memory map of a v2 cache file. The provers that weren't
+    needed yet are read from it.
+    """
+
+    map: Optional[mmap.mmap]
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                self.map = None
+            else:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return 0 if self.map is None else len(self.map)
+
+    def read(self, offset: int, length: int) -> bytes:
+        assert self.map is not None
+        return self.map[offset : offset + length]
+
+    def close(self) -> None:
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
 @dataclass
 class CacheEntry:
-    prover: DiskProver
     farmer_public_key: G1Element
     pool_public_key: Optional[G1Element]
     pool_contract_puzzle_hash: Optional[bytes32]
     plot_public_key: G1Element
     last_use: float
+    _prover: Optional[DiskProver] = None
+    # where the serialized prover is in the cache file, until it's needed
+    _prover_location: Optional[Tuple[_CacheFile, int, int]] = None
 
     @classmethod
     def from_disk_prover(cls, prover: DiskProver) -> "CacheEntry":
@@ -72,7 +130,26 @@ class CacheEntry:
             local_sk.get_g1(), farmer_public_key, pool_contract_puzzle_hash is not None
         )
 
-        return cls(prover, farmer_public_key, pool_public_key, pool_contract_puzzle_hash, plot_public_key, time.time())
+        return cls(farmer_public_key, pool_public_key, pool_contract_puzzle_hash, plot_public_key, time.time(), prover)
+
+    @property
+    def prover(self) -> DiskProver:
+        if self._prover is None:
+            assert self._prover_location is not None
+            cache_file, offset, length = self._prover_location
+            self._prover = DiskProver.from_bytes(cache_file.read(offset, length))
+            self._prover_location = None
+        return self._prover
+
+    def prover_loaded(self) -> bool:
+        return self._prover is not None
+
+    def prover_data(self) -> bytes:
+        if self._prover is not None:
+            return bytes(self._prover)
+        assert self._prover_location is not None
+        cache_file, offset, length = self._prover_location
+        return cache_file.read(offset, length)
 
     def bump_last_use(self) -> None:
         self.last_use = time.time()
@@ -81,12 +158,63 @@ class CacheEntry:
         return time.time() - self.last_use > expiry_seconds
 
 
+def _put_record(path: Path, entry: CacheEntry) -> Tuple[bytes, int]:
+    """
+    Returns the record and the offset of the prover data in it
+    """
+    index_entry = bytes(
+        DiskCacheIndexEntry(
+            str(path),
+            entry.farmer_public_key,
+            entry.pool_public_key,
+            entry.pool_contract_puzzle_hash,
+            entry.plot_public_key,
+            uint64(int(entry.last_use)),
+        )
+    )
+    prover_data = entry.prover_data()
+    prover_offset = _RECORD_HEADER.size + _INDEX_ENTRY_LENGTH.size + len(index_entry)
+    record = b"".join(
+        [
+            _RECORD_HEADER.pack(_RECORD_PUT, _INDEX_ENTRY_LENGTH.size + len(index_entry) + len(prover_data)),
+            _INDEX_ENTRY_LENGTH.pack(len(index_entry)),
+            index_entry,
+            prover_data,
+        ]
+    )
+    return record, prover_offset
+
+
+def _remove_record(path: Path) -> bytes:
+    encoded = str(path).encode()
+    return _RECORD_HEADER.pack(_RECORD_REMOVE, len(encoded)) + encoded
+
+
 @dataclass
 class Cache:
+    """
+    The plot info of the plots we've seen, so they don't have to be opened
+    again after a restart. Changes are appended to the file, which is
+    rewritten once it's mostly stale records. Loading only parses the index
+    entries, the provers are read from the memory mapped file when they are
+    first used. A v1 cache at migrate_from is loaded if there's no v2 cache
+    yet, and saved in the new format.
+    """
+
     _path: Path
+    _migrate_from: Optional[Path] = None
     _changed: bool = False
     _data: Dict[Path, CacheEntry] = field(default_factory=dict)
     expiry_seconds: int = 7 * 24 * 60 * 60  # Keep the cache entries alive for 7 days after its last access
+    _file: Optional[_CacheFile] = None
+    # the end of the last valid record in the file
+    _file_size: int = 0
+    # the size of the replaced and removed records in the file
+    _dead_bytes: int = 0
+    _record_sizes: Dict[Path, int] = field(default_factory=dict)
+    _pending_updates: Set[Path] = field(default_factory=set)
+    _pending_removals: Set[Path] = field(default_factory=set)
+    _needs_rewrite: bool = False
 
     def __post_init__(self) -> None:
         self._path.parent.mkdir(parents=True, exist_ok=True)
@@ -96,86 +224,203 @@ class Cache:
 
     def update(self, path: Path, entry: CacheEntry) -> None:
         self._data[path] = entry
+        self._pending_updates.add(path)
         self._changed = True
 
     def remove(self, cache_keys: List[Path]) -> None:
         for key in cache_keys:
             if key in self._data:
                 del self._data[key]
+                self._pending_removals.add(key)
                 self._changed = True
 
     def save(self) -> None:
         try:
-            disk_cache_entries: Dict[str, DiskCacheEntry] = {
-                str(path): DiskCacheEntry(
-                    bytes(cache_entry.prover),
-                    cache_entry.farmer_public_key,
-                    cache_entry.pool_public_key,
-                    cache_entry.pool_contract_puzzle_hash,
-                    cache_entry.plot_public_key,
-                    uint64(int(cache_entry.last_use)),
-                )
-                for path, cache_entry in self.items()
-            }
-            cache_data: CacheDataV1 = CacheDataV1(
-                [(plot_id, cache_entry) for plot_id, cache_entry in disk_cache_entries.items()]
-            )
-            disk_cache: VersionedBlob = VersionedBlob(uint16(CURRENT_VERSION), bytes(cache_data))
-            serialized: bytes = bytes(disk_cache)
-            self._path.write_bytes(serialized)
+            live_bytes = self._file_size - self._dead_bytes
+            if (
+                self._needs_rewrite
+                or not self._path.exists()
+                or self._dead_bytes > max(COMPACTION_MIN_BYTES, live_bytes)
+            ):
+                self._rewrite()
+            else:
+                self._append()
             self._changed = False
-            log.info(f"Saved {len(serialized)} bytes of cached data")
         except Exception as e:
             log.error(f"Failed to save cache: {e}, {traceback.format_exc()}")
 
+    def _append(self) -> None:
+        records: List[bytes] = []
+        for path in self._pending_removals:
+            if path in self._data or path not in self._record_sizes:
+                continue
+            record = _remove_record(path)
+            self._dead_bytes += self._record_sizes.pop(path) + len(record)
+            records.append(record)
+        for path in self._pending_updates:
+            entry = self._data.get(path)
+            if entry is None:
+                continue
+            record, _ = _put_record(path, entry)
+            self._dead_bytes += self._record_sizes.get(path, 0)
+            self._record_sizes[path] = len(record)
+            records.append(record)
+        serialized = b"".join(records)
+        with open(self._path, "r+b") as file:
+            file.seek(self._file_size)
+            file.write(serialized)
+        self._file_size += len(serialized)
+        self._pending_updates.clear()
+        self._pending_removals.clear()
+        log.info(f"Appended {len(serialized)} bytes of cached data")
+
+    def _rewrite(self) -> None:
+        temp_path = self._path.with_suffix(".tmp")
+        offset = _VERSION.size
+        record_sizes: Dict[Path, int] = {}
+        # the provers that weren't loaded yet, and where they'll be in the new file
+        prover_locations: Dict[Path, Tuple[int, int]] = {}
+        with open(temp_path, "wb") as file:
+            file.write(_VERSION.pack(CURRENT_VERSION))
+            for path, entry in self._data.items():
+                record, prover_offset = _put_record(path, entry)
+                file.write(record)
+                if not entry.prover_loaded():
+                    prover_locations[path] = (offset + prover_offset, len(record) - prover_offset)
+                record_sizes[path] = len(record)
+                offset += len(record)
+        # the old file must be unmapped before it can be replaced on Windows
+        if self._file is not None:
+            self._file.close()
+        os.replace(temp_path, self._path)
+        self._file = _CacheFile(self._path)
+        for path, (prover_offset, length) in prover_locations.items():
+            self._data[path]._prover_location = (self._file, prover_offset, length)
+        self._file_size = offset
+        self._dead_bytes = 0
+        self._record_sizes = record_sizes
+        self._pending_updates.clear()
+        self._pending_removals.clear()
+        self._needs_rewrite = False
+        log.info(f"Saved {offset} bytes of cached data")
+
     def load(self) -> None:
         try:
-            serialized = self._path.read_bytes()
-            log.info(f"Loaded {len(serialized)} bytes of cached data")
-            stored_cache: VersionedBlob = VersionedBlob.from_bytes(serialized)
-            if stored_cache.version == CURRENT_VERSION:
-                start = time.time()
-                cache_data: CacheDataV1 = CacheDataV1.from_bytes(stored_cache.blob)
-                self._data = {}
-                estimated_c2_sizes: Dict[int, int] = {}
-                for path, cache_entry in cache_data.entries:
-                    new_entry = CacheEntry(
-                        DiskProver.from_bytes(cache_entry.prover_data),
-                        cache_entry.farmer_public_key,
-                        cache_entry.pool_public_key,
-                        cache_entry.pool_contract_puzzle_hash,
-                        cache_entry.plot_public_key,
-                        float(cache_entry.last_use),
-                    )
-                    # TODO, drop the below entry dropping after few versions or whenever we force a cache recreation.
-                    #       it's here to filter invalid cache entries coming from bladebit RAM plotting.
-                    #       Related: - https://github.com/Chia-Network/chia-blockchain/issues/13084
-                    #                - https://github.com/Chia-Network/chiapos/pull/337
-                    k = new_entry.prover.get_size()
-                    if k not in estimated_c2_sizes:
-                        estimated_c2_sizes[k] = ceil(2**k / 100_000_000) * ceil(k / 8)
-                    memo_size = len(new_entry.prover.get_memo())
-                    prover_size = len(cache_entry.prover_data)
-                    # Estimated C2 size + memo size + 2000 (static data + path)
-                    # static data: version(2) + table pointers (<=96) + id(32) + k(1) => ~130
-                    # path: up to ~1870, all above will lead to false positive.
-                    # See https://github.com/Chia-Network/chiapos/blob/3ee062b86315823dd775453ad320b8be892c7df3/src/prover_disk.hpp#L282-L287  # noqa: E501
-                    if prover_size > (estimated_c2_sizes[k] + memo_size + 2000):
-                        log.warning(
-                            "Suspicious cache entry dropped. Recommended: stop the harvester, remove "
-                            f"{self._path}, restart. Entry: size {prover_size}, path {path}"
-                        )
-                    else:
-                        self._data[Path(path)] = new_entry
-
-                log.info(f"Parsed {len(self._data)} cache entries in {time.time() - start:.2f}s")
-
+            if not self._path.exists() and self._migrate_from is not None and self._migrate_from.exists():
+                self._load_v1(self._migrate_from)
+                # written in the v2 format with the next save
+                self._needs_rewrite = True
+                self._changed = True
             else:
-                raise ValueError(f"Invalid cache version {stored_cache.version}. Expected version {CURRENT_VERSION}.")
+                self._load_v2()
         except FileNotFoundError:
             log.debug(f"Cache {self._path} not found")
         except Exception as e:
             log.error(f"Failed to load cache: {e}, {traceback.format_exc()}")
+            self._data = {}
+            self._needs_rewrite = True
+
+    def _load_v2(self) -> None:
+        start = time.time()
+        cache_file = _CacheFile(self._path)
+        size = len(cache_file)
+        if size < _VERSION.size:
+            raise ValueError(f"Invalid cache, {size} bytes")
+        assert cache_file.map is not None
+        (version,) = _VERSION.unpack_from(cache_file.map, 0)
+        if version != CURRENT_VERSION:
+            raise ValueError(f"Invalid cache version {version}. Expected version {CURRENT_VERSION}.")
+
+        data: Dict[Path, CacheEntry] = {}
+        record_sizes: Dict[Path, int] = {}
+        dead_bytes = 0
+        offset = _VERSION.size
+        while offset + _RECORD_HEADER.size <= size:
+            kind, length = _RECORD_HEADER.unpack_from(cache_file.map, offset)
+            payload = offset + _RECORD_HEADER.size
+            end = payload + length
+            if end > size:
+                break
+            if kind == _RECORD_PUT:
+                (index_entry_length,) = _INDEX_ENTRY_LENGTH.unpack_from(cache_file.map, payload)
+                prover_offset = payload + _INDEX_ENTRY_LENGTH.size + index_entry_length
+                index_entry = DiskCacheIndexEntry.from_bytes(
+                    cache_file.read(payload + _INDEX_ENTRY_LENGTH.size, index_entry_length)
+                )
+                path = Path(index_entry.path)
+                dead_bytes += record_sizes.get(path, 0)
+                record_sizes[path] = end - offset
+                data[path] = CacheEntry(
+                    index_entry.farmer_public_key,
+                    index_entry.pool_public_key,
+                    index_entry.pool_contract_puzzle_hash,
+                    index_entry.plot_public_key,
+                    float(index_entry.last_use),
+                    _prover_location=(cache_file, prover_offset, end - prover_offset),
+                )
+            elif kind == _RECORD_REMOVE:
+                path = Path(cache_file.read(payload, length).decode())
+                data.pop(path, None)
+                dead_bytes += record_sizes.pop(path, 0) + end - offset
+            else:
+                raise ValueError(f"Invalid cache record kind {kind} at {offset}")
+            offset = end
+
+        if offset != size:
+            # the harvester stopped while appending, the partial record is dropped by the next save
+            log.warning(f"Ignoring {size - offset} bytes of incomplete records at the end of {self._path}")
+            self._needs_rewrite = True
+
+        if self._file is not None:
+            self._file.close()
+        self._file = cache_file
+        self._data = data
+        self._record_sizes = record_sizes
+        self._dead_bytes = dead_bytes
+        self._file_size = offset
+        log.info(f"Loaded {len(data)} cache entries from {size} bytes in {time.time() - start:.2f}s")
+
+    def _load_v1(self, path: Path) -> None:
+        serialized = path.read_bytes()
+        log.info(f"Loaded {len(serialized)} bytes of cached data")
+        stored_cache: VersionedBlob = VersionedBlob.from_bytes(serialized)
+        if stored_cache.version != 1:
+            raise ValueError(f"Invalid cache version {stored_cache.version}. Expected version 1.")
+        start = time.time()
+        cache_data: CacheDataV1 = CacheDataV1.from_bytes(stored_cache.blob)
+        self._data = {}
+        estimated_c2_sizes: Dict[int, int] = {}
+        for path_str, cache_entry in cache_data.entries:
+            new_entry = CacheEntry(
+                cache_entry.farmer_public_key,
+                cache_entry.pool_public_key,
+                cache_entry.pool_contract_puzzle_hash,
+                cache_entry.plot_public_key,
+                float(cache_entry.last_use),
+                DiskProver.from_bytes(cache_entry.prover_data),
+            )
+            # TODO, drop the below entry dropping after few versions or whenever we force a cache recreation.
+            #       it's here to filter invalid cache entries coming from bladebit RAM plotting.
+            #       Related: - https://github.com/Chia-Network/chia-blockchain/issues/13084
+            #                - https://github.com/Chia-Network/chiapos/pull/337
+            k = new_entry.prover.get_size()
+            if k not in estimated_c2_sizes:
+                estimated_c2_sizes[k] = ceil(2**k / 100_000_000) * ceil(k / 8)
+            memo_size = len(new_entry.prover.get_memo())
+            prover_size = len(cache_entry.prover_data)
+            # Estimated C2 size + memo size + 2000 (static data + path)
+            # static data: version(2) + table pointers (<=96) + id(32) + k(1) => ~130
+            # path: up to ~1870, all above will lead to false positive.
+            # See https://github.com/Chia-Network/chiapos/blob/3ee062b86315823dd775453ad320b8be892c7df3/src/prover_disk.hpp#L282-L287  # noqa: E501
+            if prover_size > (estimated_c2_sizes[k] + memo_size + 2000):
+                log.warning(
+                    "Suspicious cache entry dropped. Recommended: stop the harvester, remove "
+                    f"{path}, restart. Entry: size {prover_size}, path {path_str}"
+                )
+            else:
+                self._data[Path(path_str)] = new_entry
+
+        log.info(f"Parsed {len(self._data)} v1 cache entries in {time.time() - start:.2f}s")
 
     def keys(self) -> KeysView[Path]:
         return self._data.keys()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from watchdog.events import (
+    EVENT_TYPE_CLOSED,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_MOVED,
+    FileSystemEvent,
+    FileSystemEventHandler,
+)
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver, ObservedWatch
+
+log = logging.getLogger(__name__)
+
+# A plot file is only looked at once there were no events for it for this long, so that plots which are still being
+# copied aren't opened for every write.
+SETTLE_SECONDS = 5
+
+
+def is_plot_filename(path: Path) -> bool:
+    # Matches the files `get_filenames` picks up
+    return path.suffix == ".plot" and not path.name.startswith("._")
+
+
+class PlotDirectoryWatcher(FileSystemEventHandler):  # type: ignore[misc] # Class cannot subclass "" (has type "Any")
+    """
+    Collects the plot files which were added, removed or renamed in the plot directories so that the `PlotManager`
+    only needs to look at them instead of listing all the directories. Changes to the directories themselves (e.g. a
+    sub-directory being moved) aren't tracked in detail, they just request a full refresh.
+    """
+
+    _observer: Optional[BaseObserver]
+    _watches: Dict[Path, ObservedWatch]
+    _recursive: bool
+    _lock: threading.Lock
+    _changed_paths: Dict[Path, float]
+    _directories_changed: bool
+    settle_seconds: float
+
+    def __init__(self, settle_seconds: float = SETTLE_SECONDS) -> None:
+        self._observer = None
+        self._watches = {}
+        self._recursive = False
+        self._lock = threading.Lock()
+        self._changed_paths = {}
+        self._directories_changed = False
+        self.settle_seconds = settle_seconds
+
+    def watch(self, directories: Set[Path], recursive: bool) -> bool:
+        """
+        Updates the watched directories to the given ones. Returns False if they can't be watched, i.e. if inotify
+        (or the platform specific equivalent) isn't available or out of watches, in which case the watcher is stopped.
+        """
+        try:
+            if self._observer is None:
+                self._observer = Observer()
+                self._observer.start()
+            if recursive != self._recursive:
+                self._observer.unschedule_all()
+                self._watches.clear()
+                self._recursive = recursive
+            for directory in set(self._watches.keys()) - directories:
+                self._observer.unschedule(self._watches.pop(directory))
+            for directory in directories - set(self._watches.keys()):
+                # Missing directories get picked up by the next full refresh after they showed up
+                if directory.is_dir():
+                    self._watches[directory] = self._observer.schedule(self, str(directory), recursive=recursive)
+        except Exception as e:
+            log.warning(f"Failed to watch the plot directories, falling back to polling: {type(e).__name__} {e}")
+            self.stop()
+            return False
+        return True
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            if self._observer.is_alive():
+                self._observer.join()
+            self._observer = None
+        self._watches.clear()
+        self.clear()
+
+    def watching(self) -> bool:
+        return self._observer is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._changed_paths.clear()
+            self._directories_changed = False
+
+    def take_directories_changed(self) -> bool:
+        with self._lock:
+            directories_changed = self._directories_changed
+            self._directories_changed = False
+            return directories_changed
+
+    def take_changed_paths(self) -> Set[Path]:
+        """
+        Returns the plot files which changed but had no events for `settle_seconds`, and forgets about them.
+        """
+        settled_before = time.monotonic() - self.settle_seconds
+        with self._lock:
+            settled = {path for path, last_event in self._changed_paths.items() if last_event <= settled_before}
+            for path in settled:
+                del self._changed_paths[path]
+        return settled
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.is_directory:
+            # Directories get modified with every file change in them
+            if event.event_type in (EVENT_TYPE_MODIFIED, EVENT_TYPE_CLOSED):
+                return
+            with self._lock:
+                self._directories_changed = True
+            return
+        paths = [event.src_path]
+        if event.event_type == EVENT_TYPE_MOVED:
+            paths.append(event.dest_path)
+        now = time.monotonic()
+        with self._lock:
+            for path_str in paths:
+                path = Path(os.fsdecode(path_str))
+                if is_plot_filename(path):
+                    self._changed_paths[path] = now
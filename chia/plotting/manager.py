@@ -13,7 +13,17 @@ from chiapos import DiskProver, decompressor_context_queue
 
 from chia.consensus.pos_quality import UI_ACTUAL_SPACE_CONSTANT_FACTOR, _expected_plot_size
 from chia.plotting.cache import Cache, CacheEntry
-from chia.plotting.util import PlotInfo, PlotRefreshEvents, PlotRefreshResult, PlotsRefreshParameter, get_plot_filenames
+from chia.plotting.directory_watcher import PlotDirectoryWatcher
+from chia.plotting.plot_id_index import PlotIdIndex
+from chia.plotting.util import (
+    PlotInfo,
+    PlotRefreshEvents,
+    PlotRefreshResult,
+    PlotsRefreshParameter,
+    get_plot_directories,
+    get_plot_filenames,
+)
+from chia.util.config import load_config
 from chia.util.misc import to_batches
 
 log = logging.getLogger(__name__)
@@ -21,6 +31,7 @@ log = logging.getLogger(__name__)
 
 class PlotManager:
     plots: Dict[Path, PlotInfo]
+    plot_id_index: PlotIdIndex
     plot_filename_paths: Dict[str, Tuple[str, Set[str]]]
     plot_filename_paths_lock: threading.Lock
     failed_to_open_filenames: Dict[Path, int]
@@ -35,6 +46,9 @@ class PlotManager:
     log: Any
     _lock: threading.Lock
     _refresh_thread: Optional[threading.Thread]
+    _watcher: Optional[PlotDirectoryWatcher]
+    _plot_directories: Set[Path]
+    _plot_paths: Set[Path]
     _refreshing_enabled: bool
     _refresh_callback: Callable
     _initial: bool
@@ -50,13 +64,15 @@ class PlotManager:
     ):
         self.root_path = root_path
         self.plots = {}
+        self.plot_id_index = PlotIdIndex()
         self.plot_filename_paths = {}
         self.plot_filename_paths_lock = threading.Lock()
         self.failed_to_open_filenames = {}
         self.no_key_filenames = set()
         self.farmer_public_keys = []
         self.pool_public_keys = []
-        self.cache = Cache(self.root_path.resolve() / "cache" / "plot_manager.dat")
+        cache_dir = self.root_path.resolve() / "cache"
+        self.cache = Cache(cache_dir / "plot_manager_v2.dat", cache_dir / "plot_manager.dat")
         self.match_str = match_str
         self.open_no_key_filenames = open_no_key_filenames
         self.last_refresh_time = 0
@@ -64,6 +80,9 @@ class PlotManager:
         self.log = logging.getLogger(__name__)
         self._lock = threading.Lock()
         self._refresh_thread = None
+        self._watcher = None
+        self._plot_directories = set()
+        self._plot_paths = set()
         self._refreshing_enabled = False
         self._refresh_callback = refresh_callback
         self._initial = True
@@ -112,6 +131,7 @@ class PlotManager:
         with self:
             self.last_refresh_time = time.time()
             self.plots.clear()
+            self.plot_id_index.clear()
             self.plot_filename_paths.clear()
             self.failed_to_open_filenames.clear()
             self.no_key_filenames.clear()
@@ -142,13 +162,22 @@ class PlotManager:
                 result.append(Path(path) / plot_filename)
         return result
 
+    def plot_file_count(self) -> int:
+        return len(self._plot_paths)
+
     def needs_refresh(self) -> bool:
-        return time.time() - self.last_refresh_time > float(self.refresh_parameter.interval_seconds)
+        if self._watcher is not None:
+            interval_seconds = self.refresh_parameter.full_refresh_interval_seconds
+        else:
+            interval_seconds = self.refresh_parameter.interval_seconds
+        return time.time() - self.last_refresh_time > float(interval_seconds)
 
     def start_refreshing(self, sleep_interval_ms: int = 1000):
         self._refreshing_enabled = True
         if self._refresh_thread is None or not self._refresh_thread.is_alive():
             self.cache.load()
+            if self.refresh_parameter.watch_directories:
+                self._watcher = PlotDirectoryWatcher()
             self._refresh_thread = threading.Thread(target=self._refresh_task, args=(sleep_interval_ms,))
             self._refresh_thread.start()
 
@@ -157,6 +186,9 @@ class PlotManager:
         if self._refresh_thread is not None and self._refresh_thread.is_alive():
             self._refresh_thread.join()
             self._refresh_thread = None
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
 
     def trigger_refresh(self) -> None:
         log.debug("trigger_refresh")
@@ -165,105 +197,194 @@ class PlotManager:
     def _refresh_task(self, sleep_interval_ms: int):
         while self._refreshing_enabled:
             try:
+                changed_paths: Set[Path] = set()
                 while not self.needs_refresh() and self._refreshing_enabled:
+                    if self._watcher is not None:
+                        if self._watcher.take_directories_changed():
+                            self.trigger_refresh()
+                            continue
+                        changed_paths = self._watcher.take_changed_paths()
+                        if len(changed_paths) > 0:
+                            break
                     time.sleep(sleep_interval_ms / 1000.0)
 
                 if not self._refreshing_enabled:
                     return
 
-                plot_filenames: Dict[Path, List[Path]] = get_plot_filenames(self.root_path)
-                plot_directories: Set[Path] = set(plot_filenames.keys())
-                plot_paths: Set[Path] = set()
-                for paths in plot_filenames.values():
-                    plot_paths.update(paths)
-
-                total_result: PlotRefreshResult = PlotRefreshResult()
-                total_size = len(plot_paths)
-
-                self._refresh_callback(PlotRefreshEvents.started, PlotRefreshResult(remaining=total_size))
-
-                # First drop all plots we have in plot_filename_paths but not longer in the filesystem or set in config
-                for path in list(self.failed_to_open_filenames.keys()):
-                    if path not in plot_paths:
-                        del self.failed_to_open_filenames[path]
-
-                for path in self.no_key_filenames.copy():
-                    if path not in plot_paths:
-                        self.no_key_filenames.remove(path)
-
-                filenames_to_remove: List[str] = []
-                for plot_filename, paths_entry in self.plot_filename_paths.items():
-                    loaded_path, duplicated_paths = paths_entry
-                    loaded_plot = Path(loaded_path) / Path(plot_filename)
-                    if loaded_plot not in plot_paths:
-                        filenames_to_remove.append(plot_filename)
-                        with self:
-                            if loaded_plot in self.plots:
-                                del self.plots[loaded_plot]
-                        total_result.removed.append(loaded_plot)
-                        # No need to check the duplicates here since we drop the whole entry
-                        continue
-
-                    paths_to_remove: List[str] = []
-                    for path_str in duplicated_paths:
-                        loaded_plot = Path(path_str) / Path(plot_filename)
-                        if loaded_plot not in plot_paths:
-                            paths_to_remove.append(path_str)
-                    for path_str in paths_to_remove:
-                        duplicated_paths.remove(path_str)
-
-                for filename in filenames_to_remove:
-                    del self.plot_filename_paths[filename]
-
-                for batch in to_batches(sorted(list(plot_paths)), self.refresh_parameter.batch_size):
-                    batch_result: PlotRefreshResult = self.refresh_batch(batch.entries, plot_directories)
-                    if not self._refreshing_enabled:
-                        self.log.debug("refresh_plots: Aborted")
-                        break
-                    # Set the remaining files since `refresh_batch()` doesn't know them but we want to report it
-                    batch_result.remaining = batch.remaining
-                    total_result.loaded += batch_result.loaded
-                    total_result.processed += batch_result.processed
-                    total_result.duration += batch_result.duration
-
-                    self._refresh_callback(PlotRefreshEvents.batch_processed, batch_result)
-                    if batch.remaining == 0:
-                        break
-                    batch_sleep = self.refresh_parameter.batch_sleep_milliseconds
-                    self.log.debug(f"refresh_plots: Sleep {batch_sleep} milliseconds")
-                    time.sleep(float(batch_sleep) / 1000.0)
-
-                if self._refreshing_enabled:
-                    self._refresh_callback(PlotRefreshEvents.done, total_result)
-
-                # Reset the initial refresh indication
-                self._initial = False
-
-                # Cleanup unused cache
-                self.log.debug(f"_refresh_task: cached entries before cleanup: {len(self.cache)}")
-                remove_paths: List[Path] = []
-                for path, cache_entry in self.cache.items():
-                    if cache_entry.expired(Cache.expiry_seconds) and path not in self.plots:
-                        remove_paths.append(path)
-                    elif path in self.plots:
-                        cache_entry.bump_last_use()
-                self.cache.remove(remove_paths)
-                self.log.debug(f"_refresh_task: cached entries removed: {len(remove_paths)}")
-
-                if self.cache.changed():
-                    self.cache.save()
-
-                self.last_refresh_time = time.time()
-
-                self.log.debug(
-                    f"_refresh_task: total_result.loaded {len(total_result.loaded)}, "
-                    f"total_result.removed {len(total_result.removed)}, "
-                    f"total_duration {total_result.duration:.2f} seconds"
-                )
+                if self.needs_refresh():
+                    self._refresh_all()
+                else:
+                    self._refresh_changed(changed_paths)
             except Exception as e:
                 log.error(f"_refresh_callback raised: {e} with the traceback: {traceback.format_exc()}")
                 self.reset()
 
+    def _watch_plot_directories(self) -> None:
+        assert self._watcher is not None
+        config = load_config(self.root_path, "config.yaml")
+        directories: Set[Path] = set()
+        for directory_name in get_plot_directories(self.root_path, config):
+            try:
+                directories.add(Path(directory_name).resolve())
+            except (OSError, RuntimeError):
+                continue
+        if self._watcher.watch(directories, config["harvester"].get("recursive_plot_scan", False)):
+            # The scan which follows picks up everything that happened so far
+            self._watcher.clear()
+        else:
+            self._watcher = None
+
+    def _refresh_all(self) -> None:
+        if self._watcher is not None:
+            self._watch_plot_directories()
+
+        plot_filenames: Dict[Path, List[Path]] = get_plot_filenames(self.root_path)
+        plot_directories: Set[Path] = set(plot_filenames.keys())
+        plot_paths: Set[Path] = set()
+        for paths in plot_filenames.values():
+            plot_paths.update(paths)
+        self._plot_directories = plot_directories
+        self._plot_paths = plot_paths
+
+        total_result: PlotRefreshResult = PlotRefreshResult()
+        total_size = len(plot_paths)
+
+        self._refresh_callback(PlotRefreshEvents.started, PlotRefreshResult(remaining=total_size))
+
+        # First drop all plots we have in plot_filename_paths but not longer in the filesystem or set in config
+        for path in list(self.failed_to_open_filenames.keys()):
+            if path not in plot_paths:
+                del self.failed_to_open_filenames[path]
+
+        for path in self.no_key_filenames.copy():
+            if path not in plot_paths:
+                self.no_key_filenames.remove(path)
+
+        filenames_to_remove: List[str] = []
+        for plot_filename, paths_entry in self.plot_filename_paths.items():
+            loaded_path, duplicated_paths = paths_entry
+            loaded_plot = Path(loaded_path) / Path(plot_filename)
+            if loaded_plot not in plot_paths:
+                filenames_to_remove.append(plot_filename)
+                with self:
+                    if loaded_plot in self.plots:
+                        del self.plots[loaded_plot]
+                        self.plot_id_index.remove(loaded_plot)
+                total_result.removed.append(loaded_plot)
+                # No need to check the duplicates here since we drop the whole entry
+                continue
+
+            paths_to_remove: List[str] = []
+            for path_str in duplicated_paths:
+                loaded_plot = Path(path_str) / Path(plot_filename)
+                if loaded_plot not in plot_paths:
+                    paths_to_remove.append(path_str)
+            for path_str in paths_to_remove:
+                duplicated_paths.remove(path_str)
+
+        for filename in filenames_to_remove:
+            del self.plot_filename_paths[filename]
+
+        self._process_batches(sorted(list(plot_paths)), plot_directories, total_result)
+
+        # Reset the initial refresh indication
+        self._initial = False
+
+        # Cleanup unused cache
+        self.log.debug(f"_refresh_task: cached entries before cleanup: {len(self.cache)}")
+        remove_paths: List[Path] = []
+        for path, cache_entry in self.cache.items():
+            if cache_entry.expired(Cache.expiry_seconds) and path not in self.plots:
+                remove_paths.append(path)
+            elif path in self.plots:
+                cache_entry.bump_last_use()
+        self.cache.remove(remove_paths)
+        self.log.debug(f"_refresh_task: cached entries removed: {len(remove_paths)}")
+
+        if self.cache.changed():
+            self.cache.save()
+
+        self.last_refresh_time = time.time()
+
+        self.log.debug(
+            f"_refresh_task: total_result.loaded {len(total_result.loaded)}, "
+            f"total_result.removed {len(total_result.removed)}, "
+            f"total_duration {total_result.duration:.2f} seconds"
+        )
+
+    def _refresh_changed(self, changed_paths: Set[Path]) -> None:
+        """
+        Refreshes only the plot files the watcher reported, the removed ones get dropped and the others go through
+        `refresh_batch` like in a full refresh.
+        """
+        plot_paths: List[Path] = []
+        removed_paths: List[Path] = []
+        for path in changed_paths:
+            if path.is_file():
+                self._plot_paths.add(path)
+                plot_paths.append(path)
+            else:
+                self._plot_paths.discard(path)
+                removed_paths.append(path)
+
+        total_result: PlotRefreshResult = PlotRefreshResult()
+
+        self._refresh_callback(PlotRefreshEvents.started, PlotRefreshResult(remaining=len(plot_paths)))
+
+        for path in removed_paths:
+            self.failed_to_open_filenames.pop(path, None)
+            self.no_key_filenames.discard(path)
+            paths_entry: Optional[Tuple[str, Set[str]]] = self.plot_filename_paths.get(path.name)
+            if paths_entry is None:
+                continue
+            loaded_path, duplicated_paths = paths_entry
+            if Path(loaded_path) / path.name != path:
+                duplicated_paths.discard(str(path.parent))
+                continue
+            del self.plot_filename_paths[path.name]
+            with self:
+                if path in self.plots:
+                    del self.plots[path]
+                    self.plot_id_index.remove(path)
+            total_result.removed.append(path)
+            # One of the copies takes its place, like it would in a full refresh
+            plot_paths.extend(Path(path_str) / path.name for path_str in duplicated_paths)
+
+        self._process_batches(sorted(set(plot_paths)), self._plot_directories, total_result)
+
+        if self.cache.changed():
+            self.cache.save()
+
+        self.log.debug(
+            f"_refresh_changed: changed {len(changed_paths)}, total_result.loaded {len(total_result.loaded)}, "
+            f"total_result.removed {len(total_result.removed)}, "
+            f"total_duration {total_result.duration:.2f} seconds"
+        )
+
+    def _process_batches(
+        self, plot_paths: List[Path], plot_directories: Set[Path], total_result: PlotRefreshResult
+    ) -> None:
+        for batch in to_batches(plot_paths, self.refresh_parameter.batch_size):
+            batch_result: PlotRefreshResult = self.refresh_batch(batch.entries, plot_directories)
+            if not self._refreshing_enabled:
+                self.log.debug("refresh_plots: Aborted")
+                break
+            # Set the remaining files since `refresh_batch()` doesn't know them but we want to report it
+            batch_result.remaining = batch.remaining
+            total_result.loaded += batch_result.loaded
+            total_result.processed += batch_result.processed
+            total_result.duration += batch_result.duration
+
+            self._refresh_callback(PlotRefreshEvents.batch_processed, batch_result)
+            if batch.remaining == 0:
+                break
+            batch_sleep = self.refresh_parameter.batch_sleep_milliseconds
+            self.log.debug(f"refresh_plots: Sleep {batch_sleep} milliseconds")
+            time.sleep(float(batch_sleep) / 1000.0)
+
+        if self._refreshing_enabled:
+            self._refresh_callback(PlotRefreshEvents.done, total_result)
+
     def refresh_batch(self, plot_paths: List[Path], plot_directories: Set[Path]) -> PlotRefreshResult:
         start_time: float = time.time()
         result: PlotRefreshResult = PlotRefreshResult(processed=len(plot_paths))
@@ -396,6 +517,8 @@ class PlotManager:
                 if new_plot is not None:
                     plots_refreshed[Path(new_plot.prover.get_filename())] = new_plot
             self.plots.update(plots_refreshed)
+            for path, plot_info in plots_refreshed.items():
+                self.plot_id_index.add(path, plot_info.prover.get_id())
 
         result.duration = time.time() - start_time
 
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from typing_extensions import final
+
+from chia.types.blockchain_format.sized_bytes import bytes32
+
+PLOT_ID_SIZE = 32
+
+
+def filter_plot_ids(prefix_bits: int, plot_ids: bytes, challenge_hash: bytes32, signage_point: bytes32) -> List[int]:
+    """
+    Returns the indices of the plot ids, packed into plot_ids, that pass the
+    plot filter. This gives the same answer as passes_plot_filter() for each
+    of them, but only hashes in the loop: a hash has at least prefix_bits
+    leading zero bits if, and only if, it's below 2 ** (256 - prefix_bits).
+    """
+    count = len(plot_ids) // PLOT_ID_SIZE
+    if prefix_bits == 0:
+        return list(range(count))
+    if prefix_bits > 256:
+        return []
+    threshold = (1 << (256 - prefix_bits)).to_bytes(32, "big")
+    suffix = challenge_hash + signage_point
+    sha256 = hashlib.sha256
+    return [
+        offset // PLOT_ID_SIZE
+        for offset in range(0, count * PLOT_ID_SIZE, PLOT_ID_SIZE)
+        if sha256(plot_ids[offset : offset + PLOT_ID_SIZE] + suffix).digest() < threshold
+    ]
+
+
+@final
+@dataclass(frozen=True)
+class PlotIdSnapshot:
+    # the plot ids of the plots in filenames, in the same order, concatenated
+    plot_ids: bytes
+    filenames: Tuple[Path, ...]
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    def passing_plot_filter(self, prefix_bits: int, challenge_hash: bytes32, signage_point: bytes32) -> List[Path]:
+        return [self.filenames[i] for i in filter_plot_ids(prefix_bits, self.plot_ids, challenge_hash, signage_point)]
+
+
+class PlotIdIndex:
+    """
+    The plot ids of the loaded plots, packed into a single buffer. The
+    PlotManager keeps it up to date as plots are loaded and removed, and the
+    harvester evaluates the plot filter over a snapshot of it, without going
+    through the PlotInfo objects (or holding the PlotManager lock).
+    """
+
+    _plot_ids: bytearray
+    _filenames: List[Path]
+    _slots: Dict[Path, int]
+    _snapshot: Optional[PlotIdSnapshot]
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        self._plot_ids = bytearray()
+        self._filenames = []
+        self._slots = {}
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._filenames)
+
+    def __contains__(self, filename: Path) -> bool:
+        return filename in self._slots
+
+    def add(self, filename: Path, plot_id: bytes32) -> None:
+        with self._lock:
+            slot = self._slots.get(filename)
+            if slot is None:
+                self._slots[filename] = len(self._filenames)
+                self._filenames.append(filename)
+                self._plot_ids += plot_id
+            else:
+                self._plot_ids[slot * PLOT_ID_SIZE : (slot + 1) * PLOT_ID_SIZE] = plot_id
+            self._snapshot = None
+
+    def remove(self, filename: Path) -> None:
+        with self._lock:
+            slot = self._slots.pop(filename, None)
+            if slot is None:
+                return
+            # move the last plot into the hole
+            last = len(self._filenames) - 1
+            if slot != last:
+                last_filename = self._filenames[last]
+                self._filenames[slot] = last_filename
+                self._slots[last_filename] = slot
+                self._plot_ids[slot * PLOT_ID_SIZE : (slot + 1) * PLOT_ID_SIZE] = self._plot_ids[last * PLOT_ID_SIZE :]
+            self._filenames.pop()
+            del self._plot_ids[last * PLOT_ID_SIZE :]
+            self._snapshot = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plot_ids = bytearray()
+            self._filenames = []
+            self._slots = {}
+            self._snapshot = None
+
+    def snapshot(self) -> PlotIdSnapshot:
+        """
+        Returns the current plot ids. The snapshot is immutable, and shared
+        until the next change.
+        """
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = PlotIdSnapshot(bytes(self._plot_ids), tuple(self._filenames))
+            return self._snapshot
@@ -25,6 +25,8 @@ class PlotsRefreshParameter(Streamable):
     retry_invalid_seconds: uint32 = uint32(1200)
     batch_size: uint32 = uint32(300)
     batch_sleep_milliseconds: uint32 = uint32(1)
+    watch_directories: bool = False
+    full_refresh_interval_seconds: uint32 = uint32(3600)
 
 
 @dataclass
@@ -39,7 +41,9 @@ class PlotInfo:
 
 class PlotRefreshEvents(Enum):
     """
-    This are the events the `PlotManager` will trigger with the callback during a full refresh cycle:
+    This are the events the `PlotManager` will trigger with the callback during a refresh cycle. That's either a full
+    refresh of all plot directories or, with `PlotsRefreshParameter.watch_directories`, a refresh of only the files
+    which changed:
 
       - started: This event indicates the start of a refresh cycle and contains the total number of files to
                  process in `PlotRefreshResult.remaining`.
@@ -31,6 +31,10 @@ class Capability(IntEnum):
     # a node can handle a None response and not wait the full timeout
     NONE_RESPONSE = 4
 
+    # messages above a size threshold may be sent compressed. When both are shared, zstd is used
+    MESSAGE_COMPRESSION_ZLIB = 5
+    MESSAGE_COMPRESSION_ZSTD = 6
+
 
 @streamable
 @dataclass(frozen=True)
@@ -49,6 +53,8 @@ capabilities = [
     (uint16(Capability.BLOCK_HEADERS.value), "1"),
     (uint16(Capability.RATE_LIMITS_V2.value), "1"),
     # (uint16(Capability.NONE_RESPONSE.value), "1"), # capability removed but functionality is still supported
+    (uint16(Capability.MESSAGE_COMPRESSION_ZLIB.value), "1"),
+    (uint16(Capability.MESSAGE_COMPRESSION_ZSTD.value), "1"),
 ]
 
 
@@ -45,6 +45,8 @@ class FullNodeRpcApi:
             "/get_block": self.get_block,
             "/get_blocks": self.get_blocks,
             "/get_block_count_metrics": self.get_block_count_metrics,
+            "/get_sync_stats": self.get_sync_stats,
+            "/get_db_stats": self.get_db_stats,
             "/get_block_record_by_height": self.get_block_record_by_height,
             "/get_block_record": self.get_block_record,
             "/get_block_records": self.get_block_records,
@@ -386,6 +388,24 @@ class FullNodeRpcApi:
             }
         }
 
+    async def get_sync_stats(self, _: Dict[str, Any]) -> EndpointResult:
+        """
+        Returns per-peer throughput and queue depths of the current (or most
+        recent) long sync, or None if the node hasn't long synced
+        """
+        scheduler = self.service.sync_store.sync_scheduler
+        return {
+            "sync_mode": self.service.sync_store.get_sync_mode(),
+            "sync_stats": None if scheduler is None else scheduler.get_stats(),
+        }
+
+    async def get_db_stats(self, _: Dict[str, Any]) -> EndpointResult:
+        """
+        Returns how long the writers waited for the blockchain database write lock and held it, by calling
+        function, and how busy the pool of reader connections is
+        """
+        return {"db_stats": self.service.db_wrapper.get_stats()}
+
     async def get_block_records(self, request: Dict[str, Any]) -> EndpointResult:
         if "start" not in request:
             raise ValueError("No start in request")
@@ -218,6 +218,14 @@ class FullNodeRpcClient(RpcClient):
         except Exception:
             return None
 
+    async def get_sync_stats(self) -> Optional[Dict[str, Any]]:
+        response = await self.fetch("get_sync_stats", {})
+        return cast(Optional[Dict[str, Any]], response["sync_stats"])
+
+    async def get_db_stats(self) -> Dict[str, Any]:
+        response = await self.fetch("get_db_stats", {})
+        return cast(Dict[str, Any], response["db_stats"])
+
     async def get_all_mempool_tx_ids(self) -> List[bytes32]:
         response = await self.fetch("get_all_mempool_tx_ids", {})
         return [bytes32(hexstr_to_bytes(tx_id_hex)) for tx_id_hex in response["tx_ids"]]
@@ -43,3 +43,9 @@ class HarvesterRpcClient(RpcClient):
         # TODO: casting due to lack of type checked deserialization
         result = cast(bool, response["success"])
         return result
+
+    async def get_lookup_stats(self) -> List[Dict[str, Any]]:
+        response = await self.fetch("get_lookup_stats", {})
+        # TODO: casting due to lack of type checked deserialization
+        result = cast(List[Dict[str, Any]], response["disks"])
+        return result
@@ -70,6 +70,14 @@ class RpcClient:
             connection["node_id"] = hexstr_to_bytes(connection["node_id"])
         return response["connections"]
 
+    async def get_network_metrics(self) -> Dict[str, Any]:
+        response = await self.fetch("get_network_metrics", {})
+        return response["metrics"]
+
+    async def get_network_metrics_prometheus(self) -> str:
+        response = await self.fetch("get_network_metrics", {"format": "prometheus"})
+        return response["metrics"]
+
     async def open_connection(self, host: str, port: int) -> Dict:
         return await self.fetch("open_connection", {"host": host, "port": int(port)})
 
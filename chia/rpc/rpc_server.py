@@ -128,6 +128,7 @@ def default_get_connections(server: ChiaServer, request_node_type: Optional[Node
             "bytes_read": con.bytes_read,
             "bytes_written": con.bytes_written,
             "last_message_time": con.last_message_time,
+            "compression": con.get_compression_stats(),
         }
         for con in connections
     ]
@@ -250,6 +251,7 @@ class RpcServer:
         return {
             **self.rpc_api.get_routes(),
             "/get_connections": self.get_connections,
+            "/get_network_metrics": self.get_network_metrics,
             "/open_connection": self.open_connection,
             "/close_connection": self.close_connection,
             "/stop_node": self.stop_node,
@@ -273,6 +275,21 @@ class RpcServer:
         con_info = self.rpc_api.service.get_connections(request_node_type=request_node_type)
         return {"connections": con_info}
 
+    async def get_network_metrics(self, request: Dict[str, Any]) -> EndpointResult:
+        """
+        Returns the message counts, sizes, rate limiting and handler latencies per message type, over all the
+        connections. With "format": "prometheus", they're returned in the Prometheus text format instead.
+        """
+        if self.rpc_api.service.server is None:
+            raise ValueError("Global connections is not set")
+        metrics = self.rpc_api.service.server.network_metrics
+        request_format = request.get("format", "json")
+        if request_format == "prometheus":
+            return {"metrics": metrics.to_prometheus(self.service_name)}
+        if request_format != "json":
+            raise ValueError(f"Unknown metrics format: {request_format}")
+        return {"metrics": metrics.to_json_dict()}
+
     async def open_connection(self, request: Dict[str, Any]) -> EndpointResult:
         host = request["host"]
         port = request["port"]
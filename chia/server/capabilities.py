@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Set, Tuple
+from typing import Iterable, List, Optional, Set, Tuple
 
 from chia.protocols.shared_protocol import Capability
 from chia.util.ints import uint16
@@ -22,3 +22,20 @@ def known_active_capabilities(values: Iterable[Tuple[uint16, str]]) -> List[Capa
 
     # TODO: consider changing all uses to sets instead of lists
     return list(filtered)
+
+
+# most preferred first
+COMPRESSION_CAPABILITIES = [Capability.MESSAGE_COMPRESSION_ZSTD, Capability.MESSAGE_COMPRESSION_ZLIB]
+
+
+def negotiated_compression(
+    our_capabilities: Iterable[Capability], peer_capabilities: Iterable[Capability]
+) -> Optional[Capability]:
+    """
+    Returns the message compression both sides support, if any
+    """
+    shared = set(our_capabilities) & set(peer_capabilities)
+    for capability in COMPRESSION_CAPABILITIES:
+        if capability in shared:
+            return capability
+    return None
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import zstd
+
+from chia.protocols.shared_protocol import Capability
+from chia.util.errors import Err, ProtocolError
+
+# Messages smaller than this are always sent as-is, compressing them doesn't save enough to be worth the CPU
+COMPRESSION_THRESHOLD = 4096
+
+# Once compression is negotiated, every websocket frame starts with one of these
+FRAME_RAW = 0
+FRAME_COMPRESSED = 1
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+@dataclass
+class CompressionStats:
+    messages: int = 0
+    # size of the serialized messages, i.e. what the rate limiter sees
+    uncompressed_bytes: int = 0
+    # size of the frames on the wire
+    compressed_bytes: int = 0
+    # CPU time spent compressing or decompressing them
+    cpu_seconds: float = 0.0
+
+    def add(self, uncompressed_bytes: int, compressed_bytes: int, cpu_seconds: float) -> None:
+        self.messages += 1
+        self.uncompressed_bytes += uncompressed_bytes
+        self.compressed_bytes += compressed_bytes
+        self.cpu_seconds += cpu_seconds
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "messages": self.messages,
+            "uncompressed_bytes": self.uncompressed_bytes,
+            "compressed_bytes": self.compressed_bytes,
+            "ratio": self.compressed_bytes / self.uncompressed_bytes if self.uncompressed_bytes > 0 else 1.0,
+            "cpu_seconds": self.cpu_seconds,
+        }
+
+
+def _zstd_frame_content_size(data: bytes) -> Optional[int]:
+    """
+    Returns the decompressed size declared by a zstd frame, or None if the data isn't exactly one frame with a
+    declared size. Decompression allocates based on this, so it has to be checked before trusting a peer's data.
+    """
+    if len(data) < 6 or data[:4] != ZSTD_MAGIC:
+        return None
+    descriptor = data[4]
+    single_segment = (descriptor >> 5) & 1
+    has_checksum = (descriptor >> 2) & 1
+    dict_id_size = (0, 1, 2, 4)[descriptor & 3]
+    size_field_size = (single_segment, 2, 4, 8)[descriptor >> 6]
+    if size_field_size == 0:
+        return None
+    pos = 5 + (1 - single_segment) + dict_id_size
+    if pos + size_field_size > len(data):
+        return None
+    content_size = int.from_bytes(data[pos : pos + size_field_size], "little")
+    if size_field_size == 2:
+        content_size += 256
+    pos += size_field_size
+
+    # walk the blocks to make sure nothing follows the frame
+    while True:
+        if pos + 3 > len(data):
+            return None
+        header = int.from_bytes(data[pos : pos + 3], "little")
+        pos += 3
+        block_type = (header >> 1) & 3
+        if block_type == 3:
+            return None
+        # an RLE block is a single byte, repeated
+        pos += 1 if block_type == 1 else header >> 3
+        if header & 1:
+            break
+    if has_checksum:
+        pos += 4
+    if pos != len(data):
+        return None
+    return content_size
+
+
+def compress_frame(encoded: bytes, compression: Capability, threshold: int) -> Tuple[bytes, float]:
+    """
+    Builds the websocket frame for a serialized message, on a connection with negotiated compression. Returns the
+    frame and the CPU time spent compressing it.
+    """
+    if len(encoded) < threshold:
+        return bytes([FRAME_RAW]) + encoded, 0.0
+    start = time.thread_time()
+    if compression == Capability.MESSAGE_COMPRESSION_ZSTD:
+        compressed: bytes = zstd.compress(encoded)
+    else:
+        compressed = zlib.compress(encoded)
+    cpu_seconds = time.thread_time() - start
+    if len(compressed) >= len(encoded):
+        return bytes([FRAME_RAW]) + encoded, cpu_seconds
+    return bytes([FRAME_COMPRESSED]) + compressed, cpu_seconds
+
+
+def decompress_frame(frame: bytes, compression: Capability, max_size: int) -> Tuple[bytes, float]:
+    """
+    Returns the serialized message in a websocket frame received on a connection with negotiated compression, and
+    the CPU time spent decompressing it. Raises a ProtocolError for malformed frames or ones which would decompress
+    to more than max_size bytes.
+    """
+    if len(frame) == 0:
+        raise ProtocolError(Err.INVALID_PROTOCOL_MESSAGE, ["empty frame"])
+    if frame[0] == FRAME_RAW:
+        return frame[1:], 0.0
+    if frame[0] != FRAME_COMPRESSED:
+        raise ProtocolError(Err.INVALID_PROTOCOL_MESSAGE, [f"unknown frame type {frame[0]}"])
+
+    payload = frame[1:]
+    start = time.thread_time()
+    try:
+        if compression == Capability.MESSAGE_COMPRESSION_ZSTD:
+            content_size = _zstd_frame_content_size(payload)
+            if content_size is None or content_size > max_size:
+                raise ProtocolError(Err.INVALID_PROTOCOL_MESSAGE, ["invalid zstd frame"])
+            encoded: bytes = zstd.decompress(payload)
+        else:
+            decompressor = zlib.decompressobj()
+            encoded = decompressor.decompress(payload, max_size)
+            if not decompressor.eof or len(decompressor.unconsumed_tail) > 0 or len(decompressor.unused_data) > 0:
+                raise ProtocolError(Err.INVALID_PROTOCOL_MESSAGE, ["invalid zlib frame"])
+    except (zstd.Error, zlib.error) as e:
+        raise ProtocolError(Err.INVALID_PROTOCOL_MESSAGE, [f"failed to decompress frame: {e}"])
+    return encoded, time.thread_time() - start
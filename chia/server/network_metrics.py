@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import bisect
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+
+# upper bounds, in seconds, of the histogram buckets. The last bucket is unbounded
+LATENCY_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+
+def message_type_name(message_type: int) -> str:
+    try:
+        return ProtocolMessageTypes(message_type).name
+    except ValueError:
+        return str(message_type)
+
+
+@dataclass
+class Histogram:
+    bounds: Tuple[float, ...] = LATENCY_BUCKETS
+    # counts[i] is the number of observations in (bounds[i - 1], bounds[i]], the last one is the overflow
+    counts: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    total: float = 0.0
+    count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative_buckets(self) -> List[Tuple[str, int]]:
+        """
+        Returns the buckets the way Prometheus exports them, (upper bound, number of observations up to it)
+        """
+        result: List[Tuple[str, int]] = []
+        running = 0
+        for bound, count in zip([*(repr(b) for b in self.bounds), "+Inf"], self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets": dict(self.cumulative_buckets()),
+            "sum": self.total,
+            "count": self.count,
+        }
+
+
+@dataclass
+class MessageTypeMetrics:
+    inbound_messages: int = 0
+    inbound_bytes: int = 0
+    outbound_messages: int = 0
+    outbound_bytes: int = 0
+    inbound_rate_limited: int = 0
+    outbound_rate_limited: int = 0
+    # time from receiving a message until its handler starts running
+    queue_wait: Histogram = field(default_factory=Histogram)
+    # time spent in the handler
+    handler_time: Histogram = field(default_factory=Histogram)
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "inbound_messages": self.inbound_messages,
+            "inbound_bytes": self.inbound_bytes,
+            "outbound_messages": self.outbound_messages,
+            "outbound_bytes": self.outbound_bytes,
+            "inbound_rate_limited": self.inbound_rate_limited,
+            "outbound_rate_limited": self.outbound_rate_limited,
+            "queue_wait": self.queue_wait.to_json_dict(),
+            "handler_time": self.handler_time.to_json_dict(),
+        }
+
+
+class NetworkMetrics:
+    """
+    Message counts, sizes, rate limiting and handler latencies per message type, aggregated over all the
+    connections of a server. Sizes are what went over the wire.
+    """
+
+    _metrics: Dict[int, MessageTypeMetrics]
+
+    def __init__(self) -> None:
+        self._metrics = {}
+
+    def get(self, message_type: int) -> MessageTypeMetrics:
+        metrics = self._metrics.get(message_type)
+        if metrics is None:
+            metrics = MessageTypeMetrics()
+            self._metrics[message_type] = metrics
+        return metrics
+
+    def message_received(self, message_type: int, size: int) -> None:
+        metrics = self.get(message_type)
+        metrics.inbound_messages += 1
+        metrics.inbound_bytes += size
+
+    def message_sent(self, message_type: int, size: int) -> None:
+        metrics = self.get(message_type)
+        metrics.outbound_messages += 1
+        metrics.outbound_bytes += size
+
+    def rate_limited(self, message_type: int, inbound: bool) -> None:
+        metrics = self.get(message_type)
+        if inbound:
+            metrics.inbound_rate_limited += 1
+        else:
+            metrics.outbound_rate_limited += 1
+
+    def handler_finished(self, message_type: int, queue_wait: float, handler_time: float) -> None:
+        metrics = self.get(message_type)
+        metrics.queue_wait.observe(queue_wait)
+        metrics.handler_time.observe(handler_time)
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {message_type_name(t): metrics.to_json_dict() for t, metrics in sorted(self._metrics.items())}
+
+    def to_prometheus(self, service: str) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format
+        """
+        lines: List[str] = []
+        items = sorted(self._metrics.items())
+
+        def labels(message_type: int, **extra: str) -> str:
+            pairs = {"service": service, "message_type": message_type_name(message_type), **extra}
+            return ",".join(f'{key}="{value}"' for key, value in pairs.items())
+
+        counters = [
+            ("messages", "Messages sent and received", "inbound_messages", "outbound_messages"),
+            ("bytes", "Bytes sent and received", "inbound_bytes", "outbound_bytes"),
+            ("rate_limited", "Messages rejected by the rate limiter", "inbound_rate_limited", "outbound_rate_limited"),
+        ]
+        for name, description, inbound, outbound in counters:
+            lines.append(f"# HELP chia_network_{name}_total {description}, per message type")
+            lines.append(f"# TYPE chia_network_{name}_total counter")
+            for message_type, metrics in items:
+                for direction, attribute in (("inbound", inbound), ("outbound", outbound)):
+                    value = getattr(metrics, attribute)
+                    lines.append(f"chia_network_{name}_total{{{labels(message_type, direction=direction)}}} {value}")
+
+        histograms = [
+            ("handler_queue_wait_seconds", "Time from receiving a message until its handler starts", "queue_wait"),
+            ("handler_seconds", "Time spent in the message handlers", "handler_time"),
+        ]
+        for name, description, attribute in histograms:
+            lines.append(f"# HELP chia_network_{name} {description}, per message type")
+            lines.append(f"# TYPE chia_network_{name} histogram")
+            for message_type, metrics in items:
+                histogram: Histogram = getattr(metrics, attribute)
+                if histogram.count == 0:
+                    continue
+                for bound, count in histogram.cumulative_buckets():
+                    lines.append(f"chia_network_{name}_bucket{{{labels(message_type, le=bound)}}} {count}")
+                lines.append(f"chia_network_{name}_sum{{{labels(message_type)}}} {histogram.total}")
+                lines.append(f"chia_network_{name}_count{{{labels(message_type)}}} {histogram.count}")
+
+        return "".join(f"{line}\n" for line in lines)
@@ -30,9 +30,10 @@ from chia.protocols.protocol_timing import INVALID_PROTOCOL_BAN_SECONDS
 from chia.protocols.shared_protocol import protocol_version
 from chia.server.api_protocol import ApiProtocol
 from chia.server.introducer_peers import IntroducerPeers
+from chia.server.network_metrics import NetworkMetrics
 from chia.server.outbound_message import Message, NodeType
 from chia.server.ssl_context import private_ssl_paths, public_ssl_paths
-from chia.server.ws_connection import ConnectionCallback, WSChiaConnection
+from chia.server.ws_connection import ConnectionCallback, WSChiaConnection, max_message_size
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.peer_info import PeerInfo
 from chia.util.errors import Err, ProtocolError
@@ -40,8 +41,6 @@ from chia.util.ints import uint16
 from chia.util.network import WebServer, is_in_network, is_localhost, is_trusted_peer
 from chia.util.ssl_check import verify_ssl_certs_and_keys
 
-max_message_size = 50 * 1024 * 1024  # 50MB
-
 
 def ssl_context_for_server(
     ca_cert: Path,
@@ -141,6 +140,7 @@ class ChiaServer:
     connection_close_task: Optional[asyncio.Task[None]] = None
     received_message_callback: Optional[ConnectionCallback] = None
     banned_peers: Dict[str, float] = field(default_factory=dict)
+    network_metrics: NetworkMetrics = field(default_factory=NetworkMetrics)
     invalid_protocol_ban_seconds = INVALID_PROTOCOL_BAN_SECONDS
 
     @classmethod
@@ -334,6 +334,7 @@ class ChiaServer:
                 peer_id=peer_id,
                 inbound_rate_limit_percent=self._inbound_rate_limit_percent,
                 outbound_rate_limit_percent=self._outbound_rate_limit_percent,
+                network_metrics=self.network_metrics,
                 local_capabilities_for_handshake=self._local_capabilities_for_handshake,
             )
             await connection.perform_handshake(self._network_id, protocol_version, self._port, self._local_type)
@@ -478,6 +479,7 @@ class ChiaServer:
                 peer_id=peer_id,
                 inbound_rate_limit_percent=self._inbound_rate_limit_percent,
                 outbound_rate_limit_percent=self._outbound_rate_limit_percent,
+                network_metrics=self.network_metrics,
                 local_capabilities_for_handshake=self._local_capabilities_for_handshake,
                 session=session,
             )
@@ -15,6 +15,7 @@ from chia.cmds.init_funcs import chia_full_version_str
 from chia.daemon.server import service_launch_lock_path
 from chia.rpc.rpc_server import RpcApiProtocol, RpcServer, RpcServiceProtocol, start_rpc_server
 from chia.server.api_protocol import ApiProtocol
+from chia.server.capabilities import COMPRESSION_CAPABILITIES
 from chia.server.chia_policy import set_chia_policy
 from chia.server.outbound_message import NodeType
 from chia.server.server import ChiaServer
@@ -98,6 +99,11 @@ class Service(Generic[_T_RpcServiceProtocol, _T_ApiProtocol]):
         capabilities_to_use: List[Tuple[uint16, str]] = capabilities
         if override_capabilities is not None:
             capabilities_to_use = override_capabilities
+        if not self.config.get("message_compression", True):
+            capabilities_to_use = [
+                (value, "0" if int(value) in COMPRESSION_CAPABILITIES else state)
+                for value, state in capabilities_to_use
+            ]
 
         assert inbound_rlp and outbound_rlp
         self._server = ChiaServer.create(
@@ -5,9 +5,10 @@ import logging
 import math
 import time
 import traceback
+from collections import deque
 from dataclasses import dataclass, field
 from secrets import token_bytes
-from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
 
 from aiohttp import ClientSession, WSCloseCode, WSMessage, WSMsgType
 from aiohttp.client import ClientWebSocketResponse
@@ -21,7 +22,14 @@ from chia.protocols.protocol_state_machine import message_response_ok
 from chia.protocols.protocol_timing import API_EXCEPTION_BAN_SECONDS, INTERNAL_PROTOCOL_ERROR_BAN_SECONDS
 from chia.protocols.shared_protocol import Capability, Error, Handshake
 from chia.server.api_protocol import ApiProtocol
-from chia.server.capabilities import known_active_capabilities
+from chia.server.capabilities import known_active_capabilities, negotiated_compression
+from chia.server.message_compression import (
+    COMPRESSION_THRESHOLD,
+    CompressionStats,
+    compress_frame,
+    decompress_frame,
+)
+from chia.server.network_metrics import NetworkMetrics, message_type_name
 from chia.server.outbound_message import Message, NodeType, make_msg
 from chia.server.rate_limits import RateLimiter
 from chia.types.blockchain_format.sized_bytes import bytes32
@@ -38,6 +46,8 @@ from chia.util.streamable import Streamable
 # Max size 2^(8*4) which is around 4GiB
 LENGTH_BYTES: int = 4
 
+max_message_size = 50 * 1024 * 1024  # 50MB
+
 WebSocket = Union[WebSocketResponse, ClientWebSocketResponse]
 ConnectionCallback = Callable[["WSChiaConnection"], Awaitable[None]]
 
@@ -87,6 +97,8 @@ class WSChiaConnection:
     # Messaging
     received_message_callback: Optional[ConnectionCallback] = field(repr=False)
     incoming_queue: asyncio.Queue[Message] = field(default_factory=asyncio.Queue, repr=False)
+    # when each message in the incoming queue was received, in the same order
+    incoming_times: Deque[float] = field(default_factory=deque, repr=False)
     outgoing_queue: asyncio.Queue[Message] = field(default_factory=asyncio.Queue, repr=False)
     api_tasks: Dict[bytes32, asyncio.Task[None]] = field(default_factory=dict, repr=False)
     # Contains task ids of api tasks which should not be canceled
@@ -97,6 +109,8 @@ class WSChiaConnection:
     bytes_read: int = 0
     bytes_written: int = 0
     last_message_time: float = 0
+    # shared by all the connections of a server
+    network_metrics: NetworkMetrics = field(default_factory=NetworkMetrics, repr=False)
 
     peer_server_port: Optional[uint16] = None
     inbound_task: Optional[asyncio.Task[None]] = field(default=None, repr=False)
@@ -120,6 +134,13 @@ class WSChiaConnection:
         repr=False,
     )
 
+    # Set after the handshake, if both sides support message compression
+    compression: Optional[Capability] = None
+    compression_threshold: int = field(default=COMPRESSION_THRESHOLD, repr=False)
+    # keyed by message type
+    sent_compression_stats: Dict[uint8, CompressionStats] = field(default_factory=dict, repr=False)
+    received_compression_stats: Dict[uint8, CompressionStats] = field(default_factory=dict, repr=False)
+
     @classmethod
     def create(
         cls,
@@ -136,6 +157,7 @@ class WSChiaConnection:
         outbound_rate_limit_percent: int,
         local_capabilities_for_handshake: List[Tuple[uint16, str]],
         session: Optional[ClientSession] = None,
+        network_metrics: Optional[NetworkMetrics] = None,
     ) -> WSChiaConnection:
         assert ws._writer is not None
         peername = ws._writer.transport.get_extra_info("peername")
@@ -167,6 +189,7 @@ class WSChiaConnection:
             is_outbound=is_outbound,
             received_message_callback=received_message_callback,
             session=session,
+            network_metrics=NetworkMetrics() if network_metrics is None else network_metrics,
         )
 
     def _get_extra_info(self, name: str) -> Optional[Any]:
@@ -226,6 +249,7 @@ class WSChiaConnection:
             self.connection_type = NodeType(inbound_handshake.node_type)
             # "1" means capability is enabled
             self.peer_capabilities = known_active_capabilities(inbound_handshake.capabilities)
+            self.compression = negotiated_compression(self.local_capabilities, self.peer_capabilities)
         else:
             try:
                 message = await self._read_one_message()
@@ -254,6 +278,7 @@ class WSChiaConnection:
             self.connection_type = NodeType(inbound_handshake.node_type)
             # "1" means capability is enabled
             self.peer_capabilities = known_active_capabilities(inbound_handshake.capabilities)
+            self.compression = negotiated_compression(self.local_capabilities, self.peer_capabilities)
 
         self.outbound_task = asyncio.create_task(self.outbound_handler())
         self.inbound_task = asyncio.create_task(self.inbound_handler())
@@ -352,8 +377,9 @@ class WSChiaConnection:
                 self.log.error(f"Exception: {e} with {self.peer_info.host}")
                 self.log.error(f"Exception Stack: {error_stack}")
 
-    async def _api_call(self, full_message: Message, task_id: bytes32) -> None:
+    async def _api_call(self, full_message: Message, task_id: bytes32, received_time: float) -> None:
         start_time = time.time()
+        handler_start = time.monotonic()
         message_type = ""
         try:
             if self.received_message_callback is not None:
@@ -449,12 +475,16 @@ class WSChiaConnection:
                 self.api_tasks.pop(task_id)
             if task_id in self.execute_tasks:
                 self.execute_tasks.remove(task_id)
+            self.network_metrics.handler_finished(
+                full_message.type, handler_start - received_time, time.monotonic() - handler_start
+            )
 
     async def incoming_message_handler(self) -> None:
         while True:
             message = await self.incoming_queue.get()
+            received_time = self.incoming_times.popleft()
             task_id: bytes32 = bytes32(token_bytes(32))
-            api_task = asyncio.create_task(self._api_call(message, task_id))
+            api_task = asyncio.create_task(self._api_call(message, task_id, received_time))
             self.api_tasks[task_id] = api_task
 
     async def inbound_handler(self) -> None:
@@ -467,6 +497,7 @@ class WSChiaConnection:
                         event = self.pending_requests[message.id]
                         event.set()
                     else:
+                        self.incoming_times.append(time.monotonic())
                         await self.incoming_queue.put(message)
                 else:
                     continue
@@ -489,7 +520,13 @@ class WSChiaConnection:
         request_method: Callable[..., Awaitable[Optional[Message]]],
         message: Streamable,
         timeout: int = 60,
+        *,
+        raw_response: bool = False,
     ) -> Any:
+        """
+        Sends the request and returns the parsed response, an Error, or None on timeout. With raw_response, a
+        valid response is returned as the Message, for callers which parse it themselves.
+        """
         if self.connection_type is None:
             raise ValueError("handshake not done yet")
         request_metadata = get_metadata(request_method)
@@ -520,6 +557,8 @@ class WSChiaConnection:
             f"but received {recv_message_type.name}"
             await self.ban_peer_bad_protocol(error_message)
             raise ProtocolError(Err.INVALID_PROTOCOL_MESSAGE, [error_message])
+        if raw_response:
+            return response
 
         recv_method = getattr(class_for_type(self.local_type), recv_message_type.name)
         receive_metadata = get_metadata(recv_method)
@@ -587,6 +626,7 @@ class WSChiaConnection:
         if not self.outbound_rate_limiter.process_msg_and_check(
             message, self.local_capabilities, self.peer_capabilities
         ):
+            self.network_metrics.rate_limited(message.type, inbound=False)
             if not is_localhost(self.peer_info.host):
                 message_type = ProtocolMessageTypes(message.type)
                 last_time = self.log_rate_limit_last_time[message_type]
@@ -607,11 +647,18 @@ class WSChiaConnection:
                     f"peer: {self.peer_info.host}"
                 )
 
+        if self.compression is not None:
+            encoded, cpu_seconds = compress_frame(encoded, self.compression, self.compression_threshold)
+            stats = self.sent_compression_stats.setdefault(message.type, CompressionStats())
+            stats.add(size, len(encoded), cpu_seconds)
+            size = len(encoded)
+
         await self.ws.send_bytes(encoded)
         self.log.debug(
             f"-> {ProtocolMessageTypes(message.type).name} to peer {self.peer_info.host} {self.peer_node_id}"
         )
         self.bytes_written += size
+        self.network_metrics.message_sent(message.type, size)
 
     async def _read_one_message(self) -> Optional[Message]:
         try:
@@ -651,8 +698,27 @@ class WSChiaConnection:
                 return None
         elif message.type == WSMsgType.BINARY:
             data = message.data
-            full_message_loaded: Message = Message.from_bytes(data)
             self.bytes_read += len(data)
+            if self.compression is not None:
+                frame_size = len(data)
+                try:
+                    data, cpu_seconds = decompress_frame(data, self.compression, max_message_size)
+                except ProtocolError as e:
+                    self.log.error(f"Banning peer for invalid message frame: {self.peer_info.host} {e}")
+                    asyncio.create_task(
+                        self.close(
+                            INTERNAL_PROTOCOL_ERROR_BAN_SECONDS,
+                            WSCloseCode.PROTOCOL_ERROR,
+                            Err.INVALID_PROTOCOL_MESSAGE,
+                        )
+                    )
+                    await asyncio.sleep(3)
+                    return None
+            full_message_loaded: Message = Message.from_bytes(data)
+            self.network_metrics.message_received(full_message_loaded.type, len(message.data))
+            if self.compression is not None:
+                stats = self.received_compression_stats.setdefault(full_message_loaded.type, CompressionStats())
+                stats.add(len(data), frame_size, cpu_seconds)
             self.last_message_time = time.time()
             try:
                 message_type = ProtocolMessageTypes(full_message_loaded.type).name
@@ -661,6 +727,7 @@ class WSChiaConnection:
             if not self.inbound_rate_limiter.process_msg_and_check(
                 full_message_loaded, self.local_capabilities, self.peer_capabilities
             ):
+                self.network_metrics.rate_limited(full_message_loaded.type, inbound=True)
                 if self.local_type == NodeType.FULL_NODE and not is_localhost(self.peer_info.host):
                     self.log.error(
                         f"Peer has been rate limited and will be disconnected: {self.peer_info.host}, "
@@ -721,3 +788,16 @@ class WSChiaConnection:
 
     def has_capability(self, capability: Capability) -> bool:
         return capability in self.peer_capabilities
+
+    def get_compression_stats(self) -> Dict[str, Any]:
+        """
+        Returns the compression ratio and CPU cost per message type, in both directions
+        """
+
+        return {
+            "compression": None if self.compression is None else self.compression.name,
+            "sent": {message_type_name(t): stats.to_json_dict() for t, stats in self.sent_compression_stats.items()},
+            "received": {
+                message_type_name(t): stats.to_json_dict() for t, stats in self.received_compression_stats.items()
+            },
+        }
@@ -3,7 +3,7 @@ from __future__ import annotations
 import io
 from typing import Any, Callable, Dict, Set, Tuple
 
-from chia_rs import run_chia_program, tree_hash
+from chia_rs import run_chia_program
 from clvm import SExp
 from clvm.casts import int_from_bytes
 from clvm.EvalError import EvalError
@@ -13,7 +13,7 @@ from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.byte_types import hexstr_to_bytes
 from chia.util.hash import std_hash
 
-from .tree_hash import sha256_treehash
+from .tree_hash import TREE_HASH_CACHE, sha256_treehash
 
 INFINITE_COST = 11000000000
 
@@ -106,7 +106,7 @@ class Program(SExp):
         return sha256_treehash(self, set(args))
 
     def get_tree_hash(self) -> bytes32:
-        return bytes32(tree_hash(bytes(self)))
+        return TREE_HASH_CACHE.tree_hash(self)
 
     def run_with_cost(self, max_cost: int, args) -> Tuple[int, "Program"]:
         prog_args = Program.to(args)
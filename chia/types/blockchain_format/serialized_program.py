@@ -33,6 +33,11 @@ class SerializedProgram:
         length = serialized_length(f.getvalue()[f.tell() :])
         return SerializedProgram.from_bytes(f.read(length))
 
+    @classmethod
+    def parse_buffer(cls: Type[SerializedProgram], buf: memoryview, pos: int) -> Tuple[SerializedProgram, int]:
+        length = serialized_length(buf[pos:])
+        return SerializedProgram.from_bytes(bytes(buf[pos : pos + length])), pos + length
+
     def stream(self, f: io.BytesIO) -> None:
         f.write(self._buf)
 
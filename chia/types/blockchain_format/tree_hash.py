@@ -8,12 +8,16 @@ have to worry about blowing out the python stack.
 
 from __future__ import annotations
 
-from typing import Callable, List, Optional, Set
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Set, Tuple
 
 from clvm import CLVMObject
 
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.hash import std_hash
+from chia.util.lru_cache import LRUCache
 
 Op = Callable[[List["CLVMObject"], List["Op"], Set[bytes32]], None]
 
@@ -60,3 +64,117 @@ def sha256_treehash(sexp: CLVMObject, precalculated: Optional[Set[bytes32]] = No
         op = op_stack.pop()
         op(sexp_stack, op_stack, precalculated)
     return bytes32(sexp_stack[0])
+
+
+_VISIT = 0
+_VISIT_AND_CACHE = 1
+_COMBINE = 2
+_COMBINE_AND_CACHE = 3
+
+
+@dataclass(frozen=True)
+class TreeHashCacheInfo:
+    # tree_hash() calls answered from the cache
+    hits: int
+    # tree_hash() calls which had to walk the tree
+    misses: int
+    # sub-trees found in the cache while walking a tree
+    subtree_hits: int
+    size: int
+    capacity: int
+
+
+class TreeHashCache:
+    """
+    An LRU cache of the tree hashes of CLVM trees. CLVM objects are immutable,
+    so they're identified by their id(). The cache holds on to them, so the
+    id can't be reused by another object while it's cached.
+
+    Curried puzzles reference the object of their mod, so once the mod's hash
+    is cached, hashing a curried puzzle only walks the curried arguments.
+    """
+
+    _cache: LRUCache[int, Tuple[CLVMObject, bytes32]]
+    _lock: threading.Lock
+    hits: int
+    misses: int
+    subtree_hits: int
+
+    def __init__(self, capacity: int) -> None:
+        self._cache = LRUCache(capacity)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.subtree_hits = 0
+
+    def _get(self, sexp: CLVMObject) -> Optional[bytes32]:
+        with self._lock:
+            entry = self._cache.get(id(sexp))
+        if entry is None or entry[0] is not sexp:
+            return None
+        return entry[1]
+
+    def tree_hash(self, sexp: CLVMObject) -> bytes32:
+        cached = self._get(sexp)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        sha256 = hashlib.sha256
+        entries = self._cache.cache
+        # a post-order walk, non-recursive like sha256_treehash() above
+        hashes: List[bytes] = []
+        stack: List[Tuple[CLVMObject, int]] = [(sexp, _VISIT)]
+        while len(stack) > 0:
+            node, op = stack.pop()
+            if op >= _COMBINE:
+                right = hashes.pop()
+                left = hashes.pop()
+                node_hash = sha256(b"\2" + left + right).digest()
+                hashes.append(node_hash)
+                if op == _COMBINE_AND_CACHE:
+                    with self._lock:
+                        self._cache.put(id(node), (node, bytes32(node_hash)))
+                continue
+            pair = node.pair
+            if pair is None:
+                hashes.append(sha256(b"\1" + node.atom).digest())
+                continue
+            # most sub-trees aren't cached, so check without taking the lock first
+            entry = entries.get(id(node))
+            if entry is not None and entry[0] is node:
+                cached = self._get(node)
+                if cached is not None:
+                    self.subtree_hits += 1
+                    hashes.append(cached)
+                    continue
+            first, rest = pair
+            stack.append((node, _COMBINE_AND_CACHE if op == _VISIT_AND_CACHE else _COMBINE))
+            # Quoted programs, e.g. the mod and the puzzle arguments of a curried puzzle, are cached as well
+            if first.atom == b"\1" and rest.pair is not None:
+                stack.append((rest, _VISIT_AND_CACHE))
+            else:
+                stack.append((rest, _VISIT))
+            stack.append((first, _VISIT))
+
+        result = bytes32(hashes[0])
+        with self._lock:
+            self._cache.put(id(sexp), (sexp, result))
+        return result
+
+    def info(self) -> TreeHashCacheInfo:
+        return TreeHashCacheInfo(
+            self.hits, self.misses, self.subtree_hits, len(self._cache.cache), self._cache.capacity
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache = LRUCache(self._cache.capacity)
+        self.hits = 0
+        self.misses = 0
+        self.subtree_hits = 0
+
+
+# shared by all the Program.get_tree_hash() calls in the process
+TREE_HASH_CACHE = TreeHashCache(50000)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from dataclasses import dataclass
+from typing import List
+
+from chia.util.ints import uint8, uint32, uint64
+from chia.util.streamable import Streamable, streamable
+
+
+@streamable
+@dataclass(frozen=True)
+class BloomFilterData(Streamable):
+    capacity: uint64
+    num_items: uint64
+    num_hashes: uint8
+    bits: bytes
+
+
+class BloomFilter:
+    """
+    A set of byte strings which answers "maybe" or "certainly not". The false
+    positive rate stays below error_rate as long as it holds at most capacity
+    items.
+    """
+
+    capacity: int
+    num_items: int
+    num_hashes: int
+    _num_bits: int
+    _bits: bytearray
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = max(capacity, 1)
+        self.num_items = 0
+        num_bits = math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.num_hashes = max(1, round(num_bits / self.capacity * math.log(2)))
+        self._num_bits = (num_bits + 7) // 8 * 8
+        self._bits = bytearray(self._num_bits // 8)
+
+    def _positions(self, item: bytes) -> List[int]:
+        # double hashing, see Kirsch and Mitzenmacher, "Less Hashing, Same Performance"
+        digest = hashlib.sha256(item).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return [(h1 + i * h2) % self._num_bits for i in range(self.num_hashes)]
+
+    def add(self, item: bytes) -> None:
+        bits = self._bits
+        for pos in self._positions(item):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.num_items += 1
+
+    def __contains__(self, item: bytes) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def full(self) -> bool:
+        return self.num_items >= self.capacity
+
+    def to_data(self) -> BloomFilterData:
+        return BloomFilterData(uint64(self.capacity), uint64(self.num_items), uint8(self.num_hashes), bytes(self._bits))
+
+    @classmethod
+    def from_data(cls, data: BloomFilterData) -> BloomFilter:
+        self = cls.__new__(cls)
+        self.capacity = data.capacity
+        self.num_items = data.num_items
+        self.num_hashes = data.num_hashes
+        self._num_bits = len(data.bits) * 8
+        self._bits = bytearray(data.bits)
+        return self
+
+
+@streamable
+@dataclass(frozen=True)
+class ScalableBloomFilterData(Streamable):
+    initial_capacity: uint64
+    error_rate_ppm: uint32
+    filters: List[BloomFilterData]
+
+
+class ScalableBloomFilter:
+    """
+    A BloomFilter which doesn't need to know how many items it will hold. Once
+    the current filter is full, a new one with four times its capacity is
+    started, so lookups only ever go through a handful of them.
+    """
+
+    initial_capacity: int
+    error_rate: float
+    _filters: List[BloomFilter]
+
+    def __init__(self, initial_capacity: int, error_rate: float) -> None:
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self._filters = []
+
+    def __len__(self) -> int:
+        return sum(f.num_items for f in self._filters)
+
+    def add(self, item: bytes) -> None:
+        if len(self._filters) == 0 or self._filters[-1].full():
+            capacity = self.initial_capacity * 4 ** len(self._filters)
+            # the error rates of the filters add up, so each one gets a smaller share of it
+            self._filters.append(BloomFilter(capacity, self.error_rate / 2 ** (len(self._filters) + 1)))
+        self._filters[-1].add(item)
+
+    def __contains__(self, item: bytes) -> bool:
+        return any(item in f for f in self._filters)
+
+    def to_data(self) -> ScalableBloomFilterData:
+        return ScalableBloomFilterData(
+            uint64(self.initial_capacity),
+            uint32(round(self.error_rate * 1000000)),
+            [f.to_data() for f in self._filters],
+        )
+
+    @classmethod
+    def from_data(cls, data: ScalableBloomFilterData) -> ScalableBloomFilter:
+        self = cls(data.initial_capacity, data.error_rate_ppm / 1000000)
+        self._filters = [BloomFilter.from_data(f) for f in data.filters]
+        return self
@@ -2,16 +2,21 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import enum
 import functools
 import sqlite3
 import sys
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, AsyncIterator, Dict, Iterable, Optional, TextIO, Type, Union
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, Iterable, Optional, TextIO, Type, Union
 
 import aiosqlite
 from typing_extensions import final
 
+from chia.util.priority_mutex import PriorityMutex
+
 if aiosqlite.sqlite_version_info < (3, 32, 0):
     SQLITE_MAX_VARIABLE_NUMBER = 900
 else:
@@ -95,18 +100,65 @@ def get_host_parameter_limit() -> int:
     return host_parameter_limit
 
 
+class WriterPriority(enum.IntEnum):
+    # lower values are higher priority
+    high = 0
+    normal = 1
+    low = 2
+
+
+@dataclass
+class WaitStats:
+    count: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    hold_seconds: float = 0.0
+    max_hold_seconds: float = 0.0
+
+    def add(self, wait_seconds: float, hold_seconds: float) -> None:
+        self.count += 1
+        self.wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        self.hold_seconds += hold_seconds
+        self.max_hold_seconds = max(self.max_hold_seconds, hold_seconds)
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "wait_seconds": self.wait_seconds,
+            "max_wait_seconds": self.max_wait_seconds,
+            "hold_seconds": self.hold_seconds,
+            "max_hold_seconds": self.max_hold_seconds,
+        }
+
+
+def _caller_name() -> str:
+    # the function which called writer() or writer_maybe_transaction()
+    frame = sys._getframe(2)
+    return f"{frame.f_globals.get('__name__', '')}.{frame.f_code.co_name}"
+
+
 @final
 class DBWrapper2:
     db_version: int
     host_parameter_limit: int
-    _lock: asyncio.Lock
+    _lock: PriorityMutex[WriterPriority]
     _read_connections: asyncio.Queue[aiosqlite.Connection]
     _write_connection: aiosqlite.Connection
     _num_read_connections: int
     _in_use: Dict[asyncio.Task, aiosqlite.Connection]
     _current_writer: Optional[asyncio.Task]
     _savepoint_name: int
+    # the number of transactions rolled back, so caches of the DB contents can tell when they need to be reloaded
+    rollback_count: int
     _log_file: Optional[TextIO]
+    # how long the top level writers waited for and held the write lock, by calling function
+    writer_stats: Dict[str, WaitStats]
+    # how long readers waited for a connection from the pool, and held it. Only the readers which had to wait count
+    # towards the wait time
+    reader_stats: WaitStats
+    reader_waits: int
+    max_readers_in_use: int
 
     async def add_connection(self, c: aiosqlite.Connection) -> None:
         # this guarantees that reader connections can only be used for reading
@@ -123,13 +175,18 @@ class DBWrapper2:
     ) -> None:
         self._read_connections = asyncio.Queue()
         self._write_connection = connection
-        self._lock = asyncio.Lock()
+        self._lock = PriorityMutex.create(priority_type=WriterPriority)
         self.db_version = db_version
         self._num_read_connections = 0
         self._in_use = {}
         self._current_writer = None
         self._savepoint_name = 0
+        self.rollback_count = 0
         self._log_file = log_file
+        self.writer_stats = {}
+        self.reader_stats = WaitStats()
+        self.reader_waits = 0
+        self.max_readers_in_use = 0
         self.host_parameter_limit = get_host_parameter_limit()
 
     @classmethod
@@ -196,14 +253,14 @@ class DBWrapper2:
             yield
         except:  # noqa E722
             await self._write_connection.execute(f"ROLLBACK TO {name}")
+            self.rollback_count += 1
             raise
         finally:
             # rollback to a savepoint doesn't cancel the transaction, it
             # just rolls back the state. We need to cancel it regardless
             await self._write_connection.execute(f"RELEASE {name}")
 
-    @contextlib.asynccontextmanager
-    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+    def writer(self, priority: WriterPriority = WriterPriority.normal) -> AsyncContextManager[aiosqlite.Connection]:
         """
         Initiates a new, possibly nested, transaction. If this task is already
         in a transaction, none of the changes made as part of this transaction
@@ -213,25 +270,14 @@ class DBWrapper2:
         transaction is not necessarily cancelled. It would also need to exit
         with an exception to be cancelled.
         The sqlite features this relies on are SAVEPOINT, ROLLBACK TO and RELEASE.
+        While other tasks wait for the write lock, the ones with the highest
+        priority get it first.
         """
-        task = asyncio.current_task()
-        assert task is not None
-        if self._current_writer == task:
-            # we allow nesting writers within the same task
-            async with self._savepoint_ctx():
-                yield self._write_connection
-            return
-
-        async with self._lock:
-            async with self._savepoint_ctx():
-                self._current_writer = task
-                try:
-                    yield self._write_connection
-                finally:
-                    self._current_writer = None
+        return self._writer(priority, _caller_name(), nested_savepoint=True)
 
-    @contextlib.asynccontextmanager
-    async def writer_maybe_transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+    def writer_maybe_transaction(
+        self, priority: WriterPriority = WriterPriority.normal
+    ) -> AsyncContextManager[aiosqlite.Connection]:
         """
         Initiates a write to the database. If this task is already in a write
         transaction with the DB, this is a no-op. Any changes made to the
@@ -239,20 +285,46 @@ class DBWrapper2:
         current task is not already in a transaction, one will be created and
         committed (or rolled back in the case of an exception).
         """
+        return self._writer(priority, _caller_name(), nested_savepoint=False)
+
+    @contextlib.asynccontextmanager
+    async def _writer(
+        self, priority: WriterPriority, caller: str, nested_savepoint: bool
+    ) -> AsyncIterator[aiosqlite.Connection]:
         task = asyncio.current_task()
         assert task is not None
         if self._current_writer == task:
-            # just use the existing transaction
-            yield self._write_connection
+            if nested_savepoint:
+                # we allow nesting writers within the same task
+                async with self._savepoint_ctx():
+                    yield self._write_connection
+            else:
+                # just use the existing transaction
+                yield self._write_connection
             return
 
-        async with self._lock:
-            async with self._savepoint_ctx():
-                self._current_writer = task
-                try:
-                    yield self._write_connection
-                finally:
-                    self._current_writer = None
+        start = time.monotonic()
+        async with self._lock.acquire(priority=priority):
+            acquired = time.monotonic()
+            try:
+                async with self._savepoint_ctx():
+                    self._current_writer = task
+                    try:
+                        yield self._write_connection
+                    finally:
+                        self._current_writer = None
+            finally:
+                stats = self.writer_stats.get(caller)
+                if stats is None:
+                    stats = WaitStats()
+                    self.writer_stats[caller] = stats
+                stats.add(acquired - start, time.monotonic() - acquired)
+
+    def holds_writer(self) -> bool:
+        """
+        Returns True if the current task is in a writer() transaction, i.e. if it sees the uncommitted changes
+        """
+        return self._current_writer is not None and self._current_writer == asyncio.current_task()
 
     @contextlib.asynccontextmanager
     async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
@@ -291,12 +363,34 @@ class DBWrapper2:
         if task in self._in_use:
             yield self._in_use[task]
         else:
+            start = time.monotonic()
+            waited = self._read_connections.empty()
             c = await self._read_connections.get()
+            acquired = time.monotonic()
             try:
                 # record our connection in this dict to allow nested calls in
                 # the same task to use the same connection
                 self._in_use[task] = c
+                self.max_readers_in_use = max(self.max_readers_in_use, len(self._in_use))
                 yield c
             finally:
                 del self._in_use[task]
                 self._read_connections.put_nowait(c)
+                if waited:
+                    self.reader_waits += 1
+                self.reader_stats.add(acquired - start, time.monotonic() - acquired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the contention on the write lock, by calling function, and on the pool of reader connections
+        """
+        return {
+            "writers": {caller: stats.to_json_dict() for caller, stats in sorted(self.writer_stats.items())},
+            "readers": {
+                **self.reader_stats.to_json_dict(),
+                "pool_size": self._num_read_connections,
+                "in_use": len(self._in_use),
+                "max_in_use": self.max_readers_in_use,
+                "waits": self.reader_waits,
+            },
+        }
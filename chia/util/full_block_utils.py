@@ -13,6 +13,8 @@ from chia.types.blockchain_format.coin import Coin
 from chia.types.blockchain_format.foliage import TransactionsInfo
 from chia.types.blockchain_format.serialized_program import SerializedProgram
 from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.full_block import FullBlock
+from chia.util.hash import std_hash
 from chia.util.ints import uint32
 
 
@@ -228,6 +230,35 @@ def generator_from_block(buf: memoryview) -> Optional[SerializedProgram]:
     return SerializedProgram.from_bytes(bytes(buf[:length]))
 
 
+def block_without_generator(buf: memoryview) -> bytes:
+    """
+    Returns the serialized FullBlock with transactions_generator set to None,
+    without parsing the block. This is byte-for-byte equivalent to
+    bytes(dataclasses.replace(block, transactions_generator=None))
+    """
+    buf2 = buf[:]
+    buf2 = skip_list(buf2, skip_end_of_sub_slot_bundle)  # finished_sub_slots
+    buf2 = skip_reward_chain_block(buf2)  # reward_chain_block
+    buf2 = skip_optional(buf2, skip_vdf_proof)  # challenge_chain_sp_proof
+    buf2 = skip_vdf_proof(buf2)  # challenge_chain_ip_proof
+    buf2 = skip_optional(buf2, skip_vdf_proof)  # reward_chain_sp_proof
+    buf2 = skip_vdf_proof(buf2)  # reward_chain_ip_proof
+    buf2 = skip_optional(buf2, skip_vdf_proof)  # infused_challenge_chain_ip_proof
+    buf2 = skip_foliage(buf2)  # foliage
+    buf2 = skip_optional(buf2, skip_foliage_transaction_block)  # foliage_transaction_block
+    buf2 = skip_optional(buf2, skip_transactions_info)  # transactions_info
+
+    # this is the transactions_generator optional
+    if buf2[0] == 0:
+        return bytes(buf)
+
+    prefix_length = len(buf) - len(buf2)
+    buf2 = buf2[1:]
+    length = serialized_length(buf2)
+    # keep the transactions_generator_ref_list
+    return b"".join([buf[:prefix_length], b"\x00", buf2[length:]])
+
+
 # this implements the BlockInfo protocol
 @dataclass(frozen=True)
 class GeneratorBlockInfo:
@@ -347,3 +378,99 @@ def plot_filter_info_from_block(buf: memoryview) -> PlotFilterInfo:
     buf = buf[1 + 32 + 8 :]  # optional, vdf info challenge, vdf info number_of_iterations
     output = ClassgroupElement.from_bytes(buf[:100])
     return PlotFilterInfo(pos_ss_cc_challenge_hash, output.get_hash())
+
+
+def skip_program(buf: memoryview) -> memoryview:
+    return buf[serialized_length(buf) :]
+
+
+def skip_full_block(buf: memoryview) -> memoryview:
+    buf = skip_list(buf, skip_end_of_sub_slot_bundle)  # finished_sub_slots
+    buf = skip_reward_chain_block(buf)  # reward_chain_block
+    buf = skip_optional(buf, skip_vdf_proof)  # challenge_chain_sp_proof
+    buf = skip_vdf_proof(buf)  # challenge_chain_ip_proof
+    buf = skip_optional(buf, skip_vdf_proof)  # reward_chain_sp_proof
+    buf = skip_vdf_proof(buf)  # reward_chain_ip_proof
+    buf = skip_optional(buf, skip_vdf_proof)  # infused_challenge_chain_ip_proof
+    buf = skip_foliage(buf)  # foliage
+    buf = skip_optional(buf, skip_foliage_transaction_block)  # foliage_transaction_block
+    buf = skip_optional(buf, skip_transactions_info)  # transactions_info
+    buf = skip_optional(buf, skip_program)  # transactions_generator
+    return skip_list(buf, skip_uint32)  # transactions_generator_ref_list
+
+
+class FullBlockView:
+    """
+    A serialized FullBlock, typically a slice of a message received from a
+    peer. The header hash, height and previous header hash are read from the
+    buffer, the block itself is only parsed when it's used, and bytes()
+    returns the block as it was received instead of serializing it again.
+    """
+
+    _buf: memoryview
+    _reward_chain_block: memoryview
+    _foliage: memoryview
+    _header_hash: Optional[bytes32]
+    _block: Optional[FullBlock]
+
+    def __init__(self, buf: memoryview) -> None:
+        self._buf = buf
+        self._reward_chain_block = skip_list(buf, skip_end_of_sub_slot_bundle)  # finished_sub_slots
+        foliage = skip_reward_chain_block(self._reward_chain_block)  # reward_chain_block
+        foliage = skip_optional(foliage, skip_vdf_proof)  # challenge_chain_sp_proof
+        foliage = skip_vdf_proof(foliage)  # challenge_chain_ip_proof
+        foliage = skip_optional(foliage, skip_vdf_proof)  # reward_chain_sp_proof
+        foliage = skip_vdf_proof(foliage)  # reward_chain_ip_proof
+        foliage = skip_optional(foliage, skip_vdf_proof)  # infused_challenge_chain_ip_proof
+        self._foliage = foliage[: len(foliage) - len(skip_foliage(foliage))]
+        self._header_hash = None
+        self._block = None
+
+    @property
+    def header_hash(self) -> bytes32:
+        # the header hash is the hash of the serialized foliage
+        if self._header_hash is None:
+            self._header_hash = std_hash(self._foliage, skip_bytes_conversion=True)
+        return self._header_hash
+
+    @property
+    def prev_header_hash(self) -> bytes32:
+        return bytes32(self._foliage[:32])
+
+    @property
+    def height(self) -> uint32:
+        # the height follows the uint128 weight
+        return uint32.from_bytes(self._reward_chain_block[16:20])
+
+    @property
+    def block(self) -> FullBlock:
+        if self._block is None:
+            self._block = FullBlock.from_bytes(self._buf)
+        return self._block
+
+    def __bytes__(self) -> bytes:
+        return bytes(self._buf)
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+
+def full_blocks_from_respond_blocks(buf: memoryview) -> List[FullBlockView]:
+    """
+    Splits a serialized RespondBlocks message into views of its blocks, without
+    parsing them. Raises a ValueError if the message is malformed.
+    """
+    try:
+        buf = buf[4 + 4 :]  # start_height, end_height
+        n = int.from_bytes(buf[:4], "big", signed=False)
+        buf = buf[4:]
+        blocks: List[FullBlockView] = []
+        for _ in range(n):
+            rest = skip_full_block(buf)
+            blocks.append(FullBlockView(buf[: len(buf) - len(rest)]))
+            buf = rest
+    except (IndexError, AssertionError) as e:
+        raise ValueError(f"malformed RespondBlocks: {e}")
+    if len(buf) != 0:
+        raise ValueError("malformed RespondBlocks: unexpected trailing bytes")
+    return blocks
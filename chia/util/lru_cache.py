@@ -27,3 +27,36 @@ class LRUCache(Generic[K, V]):
 
     def remove(self, key: K) -> None:
         self.cache.pop(key)
+
+
+class BytesLRUCache(Generic[K]):
+    """
+    An LRU cache of byte strings, bounded by their total size rather than
+    their number. Values larger than the whole cache are not stored.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.cache: OrderedDict[K, bytes] = OrderedDict()
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+
+    def get(self, key: K) -> Optional[bytes]:
+        if key not in self.cache:
+            return None
+        else:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+    def put(self, key: K, value: bytes) -> None:
+        if key in self.cache:
+            self.remove(key)
+        if len(value) > self.max_bytes:
+            return
+        self.cache[key] = value
+        self.total_bytes += len(value)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.cache.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+    def remove(self, key: K) -> None:
+        self.total_bytes -= len(self.cache.pop(key))
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import dataclasses
+import functools
 import io
+import operator
 import os
 import pprint
+import struct
 import traceback
 from enum import Enum
 from typing import (
@@ -26,9 +29,10 @@ from blspy import G1Element, G2Element, PrivateKey
 from typing_extensions import TYPE_CHECKING, Literal, get_args, get_origin
 
 from chia.types.blockchain_format.sized_bytes import bytes32
-from chia.util.byte_types import hexstr_to_bytes
+from chia.util.byte_types import SizedBytes, hexstr_to_bytes
 from chia.util.hash import std_hash
 from chia.util.ints import uint32
+from chia.util.struct_stream import StructStream
 
 if TYPE_CHECKING:
     from _typeshed import DataclassInstance
@@ -529,6 +533,340 @@ def function_to_stream_one_item(f_type: Type[Any]) -> StreamFunctionType:
         raise UnsupportedType(f"can't stream {f_type}")
 
 
+# The fast path used by from_bytes() and bytes(). The decorator puts together the steps to parse and stream each
+# class, reading straight from a buffer at an offset and appending to a bytearray. Runs of fields with a fixed size
+# (sized ints and bytes, bools) are handled by a single struct, and the sized ints and bytes are created without
+# running their constructors since the size already guarantees they're valid.
+
+ParseBufferFunctionType = Callable[[memoryview, int], Tuple[Any, int]]
+StreamBufferFunctionType = Callable[[Any, bytearray], None]
+ParseBufferStepType = Callable[[memoryview, int, List[object]], int]
+StreamBufferStepType = Callable[[Any, bytearray], None]
+
+_uint32_struct = struct.Struct(">I")
+
+
+@dataclasses.dataclass(frozen=True)
+class FixedSizeFormat:
+    format: str
+    from_unpacked: ConvertFunctionType
+    to_packable: Optional[ConvertFunctionType] = None
+
+
+def bool_from_int(value: object) -> bool:
+    if value == 0:
+        return False
+    elif value == 1:
+        return True
+    raise ValueError("Bool byte must be 0 or 1")
+
+
+def fixed_size_format(f_type: Type[Any]) -> Optional[FixedSizeFormat]:
+    if f_type is bool:
+        return FixedSizeFormat("B", bool_from_int)
+    if isinstance(f_type, type) and issubclass(f_type, StructStream):
+        if f_type.SIZE in (1, 2, 4, 8):
+            code = {1: "b", 2: "h", 4: "i", 8: "q"}[f_type.SIZE]
+            return FixedSizeFormat(code if f_type.SIGNED else code.upper(), functools.partial(int.__new__, f_type))
+        # struct doesn't do ints larger than 8 bytes, these go through bytes
+        size, signed = f_type.SIZE, f_type.SIGNED
+
+        def from_unpacked(item: Any) -> object:
+            return int.__new__(f_type, int.from_bytes(item, "big", signed=signed))
+
+        def to_packable(item: Any) -> object:
+            return item.to_bytes(size, "big", signed=signed)
+
+        return FixedSizeFormat(f"{size}s", from_unpacked, to_packable)
+    if isinstance(f_type, type) and issubclass(f_type, SizedBytes):
+        return FixedSizeFormat(f"{f_type._size}s", functools.partial(bytes.__new__, f_type))
+    return None
+
+
+def read_buffer(buf: memoryview, pos: int, size: int) -> Tuple[memoryview, int]:
+    end = pos + size
+    assert end <= len(buf)  # Checks for EOF
+    return buf[pos:end], end
+
+
+def parse_buffer_fixed_size(
+    buf: memoryview, pos: int, fixed_struct: struct.Struct, from_unpacked: ConvertFunctionType
+) -> Tuple[object, int]:
+    return from_unpacked(fixed_struct.unpack_from(buf, pos)[0]), pos + fixed_struct.size
+
+
+def parse_buffer_optional(buf: memoryview, pos: int, parse_inner_f: ParseBufferFunctionType) -> Tuple[object, int]:
+    is_present = buf[pos]
+    if is_present == 0:
+        return None, pos + 1
+    elif is_present == 1:
+        return parse_inner_f(buf, pos + 1)
+    raise ValueError("Optional must be 0 or 1")
+
+
+def parse_buffer_rust(buf: memoryview, pos: int, f_type: Type[Any]) -> Tuple[object, int]:
+    ret, advance = f_type.parse_rust(buf[pos:])
+    return ret, pos + advance
+
+
+def parse_buffer_stream(buf: memoryview, pos: int, parse_f: ParseFunctionType) -> Tuple[object, int]:
+    f = io.BytesIO(buf[pos:])
+    return parse_f(f), pos + f.tell()
+
+
+def parse_buffer_bytes(buf: memoryview, pos: int) -> Tuple[bytes, int]:
+    (size,) = _uint32_struct.unpack_from(buf, pos)
+    data, pos = read_buffer(buf, pos + 4, size)
+    return bytes(data), pos
+
+
+def parse_buffer_list(buf: memoryview, pos: int, parse_inner_f: ParseBufferFunctionType) -> Tuple[List[object], int]:
+    (size,) = _uint32_struct.unpack_from(buf, pos)
+    pos += 4
+    full_list: List[object] = []
+    for _ in range(size):
+        item, pos = parse_inner_f(buf, pos)
+        full_list.append(item)
+    return full_list, pos
+
+
+def parse_buffer_fixed_size_list(
+    buf: memoryview, pos: int, fixed_struct: struct.Struct, from_unpacked: ConvertFunctionType
+) -> Tuple[List[object], int]:
+    (size,) = _uint32_struct.unpack_from(buf, pos)
+    data, pos = read_buffer(buf, pos + 4, size * fixed_struct.size)
+    return [from_unpacked(item) for (item,) in fixed_struct.iter_unpack(data)], pos
+
+
+def parse_buffer_tuple(
+    buf: memoryview, pos: int, parse_inner_fs: List[ParseBufferFunctionType]
+) -> Tuple[Tuple[object, ...], int]:
+    full_list: List[object] = []
+    for parse_f in parse_inner_fs:
+        item, pos = parse_f(buf, pos)
+        full_list.append(item)
+    return tuple(full_list), pos
+
+
+def parse_buffer_size_hints(
+    buf: memoryview, pos: int, f_type: Type[Any], bytes_to_read: int, unchecked: bool
+) -> Tuple[object, int]:
+    data, pos = read_buffer(buf, pos, bytes_to_read)
+    if unchecked:
+        return f_type.from_bytes_unchecked(bytes(data)), pos
+    return f_type.from_bytes(bytes(data)), pos
+
+
+def parse_buffer_str(buf: memoryview, pos: int) -> Tuple[str, int]:
+    (size,) = _uint32_struct.unpack_from(buf, pos)
+    data, pos = read_buffer(buf, pos + 4, size)
+    return bytes(data).decode("utf-8"), pos
+
+
+def function_to_parse_buffer_one_item(f_type: Type[Any]) -> ParseBufferFunctionType:
+    """
+    The buffer based version of function_to_parse_one_item(). The returned function takes the buffer and the position
+    to parse the item at, and returns the item along with the position after it.
+    """
+    fixed = fixed_size_format(f_type)
+    if fixed is not None:
+        fixed_struct = struct.Struct(">" + fixed.format)
+        from_unpacked = fixed.from_unpacked
+        return lambda buf, pos: parse_buffer_fixed_size(buf, pos, fixed_struct, from_unpacked)
+    if is_type_SpecificOptional(f_type):
+        parse_inner_f = function_to_parse_buffer_one_item(get_args(f_type)[0])
+        return lambda buf, pos: parse_buffer_optional(buf, pos, parse_inner_f)
+    if hasattr(f_type, "parse_rust"):
+        return lambda buf, pos: parse_buffer_rust(buf, pos, f_type)
+    if hasattr(f_type, "parse_buffer"):
+        # Ignoring for now as the proper solution isn't obvious
+        return f_type.parse_buffer  # type: ignore[no-any-return]
+    if hasattr(f_type, "parse"):
+        parse_f = f_type.parse
+        return lambda buf, pos: parse_buffer_stream(buf, pos, parse_f)
+    if f_type == bytes:
+        return parse_buffer_bytes
+    if is_type_List(f_type):
+        inner_type = get_args(f_type)[0]
+        fixed = fixed_size_format(inner_type)
+        if fixed is not None:
+            fixed_struct = struct.Struct(">" + fixed.format)
+            from_unpacked = fixed.from_unpacked
+            return lambda buf, pos: parse_buffer_fixed_size_list(buf, pos, fixed_struct, from_unpacked)
+        parse_inner_f = function_to_parse_buffer_one_item(inner_type)
+        return lambda buf, pos: parse_buffer_list(buf, pos, parse_inner_f)
+    if is_type_Tuple(f_type):
+        parse_inner_fs = [function_to_parse_buffer_one_item(_) for _ in get_args(f_type)]
+        return lambda buf, pos: parse_buffer_tuple(buf, pos, parse_inner_fs)
+    if hasattr(f_type, "from_bytes_unchecked") and f_type.__name__ in size_hints:
+        bytes_to_read = size_hints[f_type.__name__]
+        return lambda buf, pos: parse_buffer_size_hints(buf, pos, f_type, bytes_to_read, unchecked=True)
+    if hasattr(f_type, "from_bytes") and f_type.__name__ in size_hints:
+        bytes_to_read = size_hints[f_type.__name__]
+        return lambda buf, pos: parse_buffer_size_hints(buf, pos, f_type, bytes_to_read, unchecked=False)
+    if f_type is str:
+        return parse_buffer_str
+    raise UnsupportedType(f"Type {f_type} does not have parse")
+
+
+def stream_buffer_optional(stream_inner_f: StreamBufferFunctionType, item: Any, out: bytearray) -> None:
+    if item is None:
+        out.append(0)
+    else:
+        out.append(1)
+        stream_inner_f(item, out)
+
+
+def stream_buffer_fixed_size(
+    fixed_struct: struct.Struct, to_packable: Optional[ConvertFunctionType], item: Any, out: bytearray
+) -> None:
+    out += fixed_struct.pack(item if to_packable is None else to_packable(item))
+
+
+def stream_buffer_bytes(item: Any, out: bytearray) -> None:
+    out += _uint32_struct.pack(len(item))
+    out += item
+
+
+def stream_buffer_streamable(item: Any, out: bytearray) -> None:
+    item.stream_buffer(out)
+
+
+def stream_buffer_byte_convertible(item: Any, out: bytearray) -> None:
+    out += item.__bytes__()
+
+
+def stream_buffer_stream(item: Any, out: bytearray) -> None:
+    f = io.BytesIO()
+    item.stream(f)
+    out += f.getvalue()
+
+
+def stream_buffer_list(stream_inner_f: StreamBufferFunctionType, item: Any, out: bytearray) -> None:
+    out += _uint32_struct.pack(len(item))
+    for element in item:
+        stream_inner_f(element, out)
+
+
+def stream_buffer_tuple(stream_inner_fs: List[StreamBufferFunctionType], item: Any, out: bytearray) -> None:
+    assert len(stream_inner_fs) == len(item)
+    for stream_inner_f, element in zip(stream_inner_fs, item):
+        stream_inner_f(element, out)
+
+
+def stream_buffer_str(item: Any, out: bytearray) -> None:
+    str_bytes = item.encode("utf-8")
+    out += _uint32_struct.pack(len(str_bytes))
+    out += str_bytes
+
+
+def function_to_stream_buffer_one_item(f_type: Type[Any]) -> StreamBufferFunctionType:
+    """
+    The buffer based version of function_to_stream_one_item(). The returned function appends the serialized item to
+    the bytearray it's passed.
+    """
+    fixed = fixed_size_format(f_type)
+    if fixed is not None:
+        fixed_struct = struct.Struct(">" + fixed.format)
+        to_packable = fixed.to_packable
+        return lambda item, out: stream_buffer_fixed_size(fixed_struct, to_packable, item, out)
+    if is_type_SpecificOptional(f_type):
+        stream_inner_f = function_to_stream_buffer_one_item(get_args(f_type)[0])
+        return lambda item, out: stream_buffer_optional(stream_inner_f, item, out)
+    if f_type == bytes:
+        return stream_buffer_bytes
+    if hasattr(f_type, "stream_buffer"):
+        return stream_buffer_streamable
+    if hasattr(f_type, "__bytes__"):
+        return stream_buffer_byte_convertible
+    if hasattr(f_type, "stream"):
+        return stream_buffer_stream
+    if is_type_List(f_type):
+        stream_inner_f = function_to_stream_buffer_one_item(get_args(f_type)[0])
+        return lambda item, out: stream_buffer_list(stream_inner_f, item, out)
+    if is_type_Tuple(f_type):
+        stream_inner_fs = [function_to_stream_buffer_one_item(_) for _ in get_args(f_type)]
+        return lambda item, out: stream_buffer_tuple(stream_inner_fs, item, out)
+    if f_type is str:
+        return stream_buffer_str
+    raise UnsupportedType(f"can't stream {f_type}")
+
+
+def create_buffer_steps(fields: StreamableFields) -> Tuple[List[ParseBufferStepType], List[StreamBufferStepType]]:
+    """
+    Returns the steps parsing and streaming all the fields of a class. Each run of fixed size fields is handled by
+    a single step.
+    """
+    parse_steps: List[ParseBufferStepType] = []
+    stream_steps: List[StreamBufferStepType] = []
+    fixed_run: List[Tuple[str, FixedSizeFormat]] = []
+
+    def add_fixed_run() -> None:
+        if len(fixed_run) == 0:
+            return
+        names = [name for name, _ in fixed_run]
+        run_struct = struct.Struct(">" + "".join(fixed.format for _, fixed in fixed_run))
+        from_unpacked = [fixed.from_unpacked for _, fixed in fixed_run]
+        to_packable = [fixed.to_packable for _, fixed in fixed_run]
+        getter = operator.attrgetter(*names)
+
+        def parse_fixed_run(buf: memoryview, pos: int, values: List[object]) -> int:
+            values.extend([convert(item) for convert, item in zip(from_unpacked, run_struct.unpack_from(buf, pos))])
+            return pos + run_struct.size
+
+        if len(names) == 1:
+
+            def stream_fixed_run(obj: Any, out: bytearray) -> None:
+                stream_buffer_fixed_size(run_struct, to_packable[0], getter(obj), out)
+
+        elif all(convert is None for convert in to_packable):
+
+            def stream_fixed_run(obj: Any, out: bytearray) -> None:
+                out += run_struct.pack(*getter(obj))
+
+        else:
+
+            def stream_fixed_run(obj: Any, out: bytearray) -> None:
+                out += run_struct.pack(
+                    *(item if convert is None else convert(item) for convert, item in zip(to_packable, getter(obj)))
+                )
+
+        parse_steps.append(parse_fixed_run)
+        stream_steps.append(stream_fixed_run)
+        fixed_run.clear()
+
+    for field in fields:
+        fixed = fixed_size_format(field.type)
+        if fixed is not None:
+            fixed_run.append((field.name, fixed))
+            continue
+        add_fixed_run()
+        parse_f = function_to_parse_buffer_one_item(field.type)
+        stream_f = function_to_stream_buffer_one_item(field.type)
+        getter = operator.attrgetter(field.name)
+
+        def parse_field(
+            buf: memoryview, pos: int, values: List[object], parse_f: ParseBufferFunctionType = parse_f
+        ) -> int:
+            item, pos = parse_f(buf, pos)
+            values.append(item)
+            return pos
+
+        def stream_field(
+            obj: Any,
+            out: bytearray,
+            stream_f: StreamBufferFunctionType = stream_f,
+            getter: Callable[[Any], Any] = getter,
+        ) -> None:
+            stream_f(getter(obj), out)
+
+        parse_steps.append(parse_field)
+        stream_steps.append(stream_field)
+    add_fixed_run()
+
+    return parse_steps, stream_steps
+
+
 def streamable(cls: Type[_T_Streamable]) -> Type[_T_Streamable]:
     """
     This decorator forces correct streamable protocol syntax/usage and populates the caches for types hints and
@@ -561,6 +899,10 @@ def streamable(cls: Type[_T_Streamable]) -> Type[_T_Streamable]:
         raise DefinitionError("Streamable inheritance required.", cls)
 
     cls._streamable_fields = create_fields(cls)
+    cls._streamable_field_names = tuple(field.name for field in cls._streamable_fields)
+    parse_steps, stream_steps = create_buffer_steps(cls._streamable_fields)
+    cls._streamable_parse_steps = tuple(parse_steps)
+    cls._streamable_stream_steps = tuple(stream_steps)
 
     return cls  # type: ignore[return-value]
 
@@ -604,6 +946,9 @@ class Streamable:
 
     Furthermore, a get_hash() member is added, which performs a serialization and a sha256.
 
+    from_bytes() and bytes() don't go through parse() and stream(), but through parse_buffer() and stream_buffer(),
+    which work on a buffer and are put together for each class by the decorator.
+
     This class is used for deterministic serialization and hashing, for consensus critical
     objects such as the block header.
 
@@ -611,6 +956,9 @@ class Streamable:
     """
 
     _streamable_fields: ClassVar[StreamableFields]
+    _streamable_field_names: ClassVar[Tuple[str, ...]]
+    _streamable_parse_steps: ClassVar[Tuple[ParseBufferStepType, ...]]
+    _streamable_stream_steps: ClassVar[Tuple[StreamBufferStepType, ...]]
 
     @classmethod
     def streamable_fields(cls) -> StreamableFields:
@@ -635,24 +983,48 @@ class Streamable:
             object.__setattr__(obj, field.name, field.parse_function(f))
         return obj
 
+    @classmethod
+    def parse_buffer(cls: Type[_T_Streamable], buf: memoryview, pos: int) -> Tuple[_T_Streamable, int]:
+        """
+        Parses the object at position pos of buf, and returns it along with the position after it.
+        """
+        values: List[object] = []
+        for step in cls._streamable_parse_steps:
+            pos = step(buf, pos, values)
+        # Like parse(), create the object without calling __init__() to avoid the post-init checks
+        obj: _T_Streamable = object.__new__(cls)
+        obj.__dict__.update(zip(cls._streamable_field_names, values))
+        return obj, pos
+
     def stream(self, f: BinaryIO) -> None:
         for field in self._streamable_fields:
             field.stream_function(getattr(self, field.name), f)
 
+    def stream_buffer(self, out: bytearray) -> None:
+        for step in self._streamable_stream_steps:
+            step(self, out)
+
     def get_hash(self) -> bytes32:
         return std_hash(bytes(self), skip_bytes_conversion=True)
 
     @classmethod
     def from_bytes(cls: Type[_T_Streamable], blob: bytes) -> _T_Streamable:
+        try:
+            parsed, end = cls.parse_buffer(memoryview(blob), 0)
+            if end == len(blob):
+                return parsed
+        except Exception:
+            pass
+        # The data is invalid, parse it again the slow way to fail with the same errors as parse()
         f = io.BytesIO(blob)
         parsed = cls.parse(f)
         assert f.read() == b""
         return parsed
 
     def __bytes__(self: Any) -> bytes:
-        f = io.BytesIO()
-        self.stream(f)
-        return bytes(f.getvalue())
+        out = bytearray()
+        self.stream_buffer(out)
+        return bytes(out)
 
     def __str__(self: Any) -> str:
         return pp.pformat(recurse_jsonify(self))
@@ -2,18 +2,101 @@ from __future__ import annotations
 
 import logging
 import random
-from typing import Dict, List, Optional, Set
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 from chia.types.blockchain_format.coin import Coin
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.ints import uint64, uint128
 from chia.wallet.wallet_coin_record import WalletCoinRecord
 
+# The knapsack algorithm only picks from this many of the largest coins below the target. It has to be at least
+# max_num_coins, so sum_largest_coins still finds every solution which doesn't take too many coins.
+KNAPSACK_WINDOW = 1000
+
+
+class CoinAmountIndex:
+    """
+    A set of coins sorted by amount, which can be updated coin by coin. The coins
+    are ordered by (amount, name), so finding the coins in an amount range is a
+    binary search.
+    """
+
+    total_amount: int
+    _amounts: List[int]
+    _names: List[bytes32]
+    _coins: Dict[bytes32, Coin]
+
+    def __init__(self) -> None:
+        self.total_amount = 0
+        self._amounts = []
+        self._names = []
+        self._coins = {}
+
+    @classmethod
+    def from_coins(cls, coins: Iterable[Tuple[bytes32, Coin]]) -> CoinAmountIndex:
+        self = cls()
+        self._coins = dict(coins)
+        entries = sorted((coin.amount, name) for name, coin in self._coins.items())
+        self._amounts = [amount for amount, _ in entries]
+        self._names = [name for _, name in entries]
+        self.total_amount = sum(self._amounts)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._coins)
+
+    def __contains__(self, name: bytes32) -> bool:
+        return name in self._coins
+
+    def get(self, name: bytes32) -> Optional[Coin]:
+        return self._coins.get(name)
+
+    def _position(self, amount: int, name: bytes32) -> int:
+        start = bisect_left(self._amounts, amount)
+        return bisect_left(self._names, name, start, bisect_right(self._amounts, amount, start))
+
+    def add(self, name: bytes32, coin: Coin) -> None:
+        if name in self._coins:
+            return
+        pos = self._position(coin.amount, name)
+        self._amounts.insert(pos, coin.amount)
+        self._names.insert(pos, name)
+        self._coins[name] = coin
+        self.total_amount += coin.amount
+
+    def remove(self, name: bytes32) -> None:
+        coin = self._coins.pop(name, None)
+        if coin is None:
+            return
+        pos = self._position(coin.amount, name)
+        del self._amounts[pos]
+        del self._names[pos]
+        self.total_amount -= coin.amount
+
+    def ascending(self, min_amount: int, max_amount: int) -> Iterator[Tuple[bytes32, Coin]]:
+        """
+        Yields the coins with min_amount <= amount <= max_amount, smallest first
+        """
+        end = bisect_right(self._amounts, max_amount)
+        for pos in range(bisect_left(self._amounts, min_amount), end):
+            name = self._names[pos]
+            yield name, self._coins[name]
+
+    def descending(self, min_amount: int, max_amount: int) -> Iterator[Tuple[bytes32, Coin]]:
+        """
+        Yields the coins with min_amount <= amount <= max_amount, largest first
+        """
+        start = bisect_left(self._amounts, min_amount)
+        for pos in range(bisect_right(self._amounts, max_amount) - 1, start - 1, -1):
+            name = self._names[pos]
+            yield name, self._coins[name]
+
 
 async def select_coins(
     spendable_amount: uint128,
     max_coin_amount: uint64,
-    spendable_coins: List[WalletCoinRecord],
+    spendable_coins: Union[List[WalletCoinRecord], CoinAmountIndex],
     unconfirmed_removals: Dict[bytes32, Coin],
     log: logging.Logger,
     amount: uint128,
@@ -40,57 +123,65 @@ async def select_coins(
 
     log.debug(f"About to select coins for amount {amount}")
 
+    if isinstance(spendable_coins, CoinAmountIndex):
+        coin_index = spendable_coins
+    else:
+        coin_index = CoinAmountIndex.from_coins((record.name(), record.coin) for record in spendable_coins)
+
+    # remove all the unconfirmed coins, excluded coins and dust.
+    excluded_names: Set[bytes32] = set(unconfirmed_removals.keys())
+    excluded_names.update(coin.name() for coin in exclude)
+    excluded_amounts: Set[int] = set(excluded_coin_amounts)
+
+    def valid(coins: Iterator[Tuple[bytes32, Coin]]) -> Iterator[Coin]:
+        for name, coin in coins:
+            if name not in excluded_names and coin.amount not in excluded_amounts:
+                yield coin
+
     max_num_coins = 500
-    sum_spendable_coins = 0
-    valid_spendable_coins: List[Coin] = []
-
-    for coin_record in spendable_coins:  # remove all the unconfirmed coins, excluded coins and dust.
-        if coin_record.coin.name() in unconfirmed_removals:
-            continue
-        if coin_record.coin in exclude:
-            continue
-        if coin_record.coin.amount < min_coin_amount or coin_record.coin.amount > max_coin_amount:
-            continue
-        if coin_record.coin.amount in excluded_coin_amounts:
-            continue
-        valid_spendable_coins.append(coin_record.coin)
-        sum_spendable_coins += coin_record.coin.amount
+
+    # Go through the coins smaller than the amount, largest first. We only need to know how their sum compares to
+    # the amount, and the largest of them for the knapsack algorithm.
+    smaller_coin_sum = 0  # coins smaller than target.
+    smaller_coin_count = 0
+    smaller_coins: List[Coin] = []
+    for coin in valid(coin_index.descending(min_coin_amount, min(amount - 1, max_coin_amount))):
+        smaller_coin_sum += coin.amount
+        smaller_coin_count += 1
+        if len(smaller_coins) < KNAPSACK_WINDOW:
+            smaller_coins.append(coin)
+        elif smaller_coin_sum > amount:
+            break
+
+    # the smallest coin that covers the amount on its own, if it matches exactly we're done
+    smallest_coin: Optional[Coin] = next(
+        valid(coin_index.ascending(max(amount, min_coin_amount), max_coin_amount)), None
+    )
 
     # This happens when we couldn't use one of the coins because it's already used
     # but unconfirmed, and we are waiting for the change. (unconfirmed_additions)
-    if sum_spendable_coins < amount:
+    if smaller_coin_sum < amount and smallest_coin is None:
         raise ValueError(
-            f"Transaction for {amount} is greater than spendable balance of {sum_spendable_coins}. "
+            f"Transaction for {amount} is greater than spendable balance of {smaller_coin_sum}. "
             "There may be other transactions pending or our minimum coin amount is too high."
         )
-    if amount == 0 and sum_spendable_coins == 0:
+    if amount == 0 and next(valid(coin_index.descending(max(min_coin_amount, 1), max_coin_amount)), None) is None:
         raise ValueError(
             "No coins available to spend, you can not create a coin with an amount of 0,"
             " without already having coins."
         )
 
-    # Sort the coins by amount
-    valid_spendable_coins.sort(reverse=True, key=lambda r: r.amount)
-
     # check for exact 1 to 1 coin match.
-    exact_match_coin: Optional[Coin] = check_for_exact_match(valid_spendable_coins, uint64(amount))
-    if exact_match_coin:
-        log.debug(f"selected coin with an exact match: {exact_match_coin}")
-        return {exact_match_coin}
+    if smallest_coin is not None and smallest_coin.amount == amount:
+        log.debug(f"selected coin with an exact match: {smallest_coin}")
+        return {smallest_coin}
 
     # Check for an exact match with all of the coins smaller than the amount.
     # If we have more, smaller coins than the amount we run the next algorithm.
-    smaller_coin_sum = 0  # coins smaller than target.
-    smaller_coins: List[Coin] = []
-    for coin in valid_spendable_coins:
-        if coin.amount < amount:
-            smaller_coin_sum += coin.amount
-            smaller_coins.append(coin)
-    if smaller_coin_sum == amount and len(smaller_coins) < max_num_coins and amount != 0:
+    if smaller_coin_sum == amount and smaller_coin_count < max_num_coins and amount != 0:
         log.debug(f"Selected all smaller coins because they equate to an exact match of the target.: {smaller_coins}")
         return set(smaller_coins)
     elif smaller_coin_sum < amount:
-        smallest_coin: Optional[Coin] = select_smallest_coin_over_target(amount, valid_spendable_coins)
         assert smallest_coin is not None  # Since we know we have enough, there must be a larger coin
         log.debug(f"Selected closest greater coin: {smallest_coin.name()}")
         return {smallest_coin}
@@ -100,21 +191,19 @@ async def select_coins(
         if coin_set is None:
             coin_set = sum_largest_coins(amount, smaller_coins)
             if coin_set is None or len(coin_set) > max_num_coins:
-                greater_coin = select_smallest_coin_over_target(amount, valid_spendable_coins)
-                if greater_coin is None:
+                if smallest_coin is None:
                     raise ValueError(
                         f"Transaction of {amount} mojo would use more than "
                         f"{max_num_coins} coins. Try sending a smaller amount"
                     )
-                coin_set = {greater_coin}
+                coin_set = {smallest_coin}
         return coin_set
     else:
         # if smaller_coin_sum == amount and (len(smaller_coins) >= max_num_coins or amount == 0)
-        potential_large_coin: Optional[Coin] = select_smallest_coin_over_target(amount, valid_spendable_coins)
-        if potential_large_coin is None:
+        if smallest_coin is None:
             raise ValueError("Too many coins are required to make this transaction")
-        log.debug(f"Resorted to selecting smallest coin over target due to dust.: {potential_large_coin}")
-        return {potential_large_coin}
+        log.debug(f"Resorted to selecting smallest coin over target due to dust.: {smallest_coin}")
+        return {smallest_coin}
 
 
 # These algorithms were based off of the algorithms in:
@@ -20,7 +20,7 @@ from chia.types.generator_types import BlockGenerator
 from chia.types.spend_bundle import SpendBundle
 from chia.util.hash import std_hash
 from chia.util.ints import uint32, uint64, uint128
-from chia.wallet.coin_selection import select_coins
+from chia.wallet.coin_selection import CoinAmountIndex, select_coins
 from chia.wallet.derivation_record import DerivationRecord
 from chia.wallet.payment import Payment
 from chia.wallet.puzzles.p2_delegated_puzzle_or_hidden_puzzle import (
@@ -274,16 +274,20 @@ class Wallet:
         Returns a set of coins that can be used for generating a new transaction.
         Note: Must be called under wallet state manager lock
         """
-        spendable_amount: uint128 = await self.get_spendable_balance()
-        spendable_coins: List[WalletCoinRecord] = list(
-            await self.wallet_state_manager.get_spendable_coins_for_wallet(self.id())
-        )
+        spendable_coins: CoinAmountIndex = await self.wallet_state_manager.coin_store.get_unspent_coin_index(self.id())
 
         # Try to use coins from the store, if there isn't enough of "unused"
         # coins use change coins that are not confirmed yet
         unconfirmed_removals: Dict[bytes32, Coin] = await self.wallet_state_manager.unconfirmed_removals_for_wallet(
             self.id()
         )
+        # coins that are part of a trade can't be spent either
+        for name, record in (await self.wallet_state_manager.trade_manager.get_locked_coins()).items():
+            unconfirmed_removals[name] = record.coin
+        spendable_amount = uint128(
+            spendable_coins.total_amount
+            - sum(coin.amount for name, coin in unconfirmed_removals.items() if name in spendable_coins)
+        )
         if max_coin_amount is None:
             max_coin_amount = uint64(self.wallet_state_manager.constants.MAX_COIN_AMOUNT)
         coins = await select_coins(
@@ -13,6 +13,7 @@ from chia.util.ints import uint8, uint32, uint64
 from chia.util.lru_cache import LRUCache
 from chia.util.misc import UInt32Range, UInt64Range, VersionedBlob
 from chia.util.streamable import Streamable, streamable
+from chia.wallet.coin_selection import CoinAmountIndex
 from chia.wallet.util.query_filter import AmountFilter, FilterMode, HashFilter
 from chia.wallet.util.wallet_types import CoinType, WalletType
 from chia.wallet.wallet_coin_record import WalletCoinRecord
@@ -59,6 +60,9 @@ class WalletCoinStore:
 
     db_wrapper: DBWrapper2
     total_count_cache: LRUCache[bytes32, uint32]
+    # the unspent normal coins of the wallets coins were selected from, by wallet id
+    unspent_coin_indexes: Dict[int, CoinAmountIndex]
+    _indexes_rollback_count: int
 
     @classmethod
     async def create(cls, wrapper: DBWrapper2):
@@ -66,6 +70,8 @@ class WalletCoinStore:
 
         self.db_wrapper = wrapper
         self.total_count_cache = LRUCache(100)
+        self.unspent_coin_indexes = {}
+        self._indexes_rollback_count = wrapper.rollback_count
 
         async with self.db_wrapper.writer_maybe_transaction() as conn:
             await conn.execute(
@@ -141,12 +147,18 @@ class WalletCoinStore:
                 ),
             )
         self.total_count_cache.cache.clear()
+        self._remove_from_indexes(name)
+        if not record.spent and record.coin_type == CoinType.NORMAL:
+            index = self.unspent_coin_indexes.get(record.wallet_id)
+            if index is not None:
+                index.add(name, record.coin)
 
     # Sometimes we realize that a coin is actually not interesting to us so we need to delete it
     async def delete_coin_record(self, coin_name: bytes32) -> None:
         async with self.db_wrapper.writer_maybe_transaction() as conn:
             await (await conn.execute("DELETE FROM coin_record WHERE coin_name=?", (coin_name.hex(),))).close()
         self.total_count_cache.cache.clear()
+        self._remove_from_indexes(coin_name)
 
     # Update coin_record to be spent in DB
     async def set_spent(self, coin_name: bytes32, height: uint32) -> None:
@@ -160,6 +172,11 @@ class WalletCoinStore:
                 ),
             )
         self.total_count_cache.cache.clear()
+        self._remove_from_indexes(coin_name)
+
+    def _remove_from_indexes(self, coin_name: bytes32) -> None:
+        for index in self.unspent_coin_indexes.values():
+            index.remove(coin_name)
 
     def coin_record_from_row(self, row: sqlite3.Row) -> WalletCoinRecord:
         coin = Coin(bytes32.fromhex(row[6]), bytes32.fromhex(row[5]), uint64.from_bytes(row[7]))
@@ -303,6 +320,34 @@ class WalletCoinStore:
             )
         return set(self.coin_record_from_row(row) for row in rows)
 
+    async def get_unspent_coin_index(self, wallet_id: int) -> CoinAmountIndex:
+        """
+        Returns the unspent normal coins of a wallet, indexed by amount. The index is kept up to date as coins are
+        added and spent, so the coins are only loaded from the DB once. It must not be modified by the caller.
+        """
+        if self._indexes_rollback_count != self.db_wrapper.rollback_count:
+            # a transaction was rolled back, the indexes might contain changes which never made it to the DB
+            self.unspent_coin_indexes.clear()
+            self._indexes_rollback_count = self.db_wrapper.rollback_count
+        index = self.unspent_coin_indexes.get(wallet_id)
+        if index is None:
+            # holding the writer makes sure no coin changes while we load them, which the index would then miss
+            async with self.db_wrapper.writer_maybe_transaction() as conn:
+                rows = await conn.execute_fetchall(
+                    "SELECT coin_name, coin_parent, puzzle_hash, amount FROM coin_record "
+                    "WHERE coin_type=? AND wallet_id=? AND spent_height=0",
+                    (CoinType.NORMAL, wallet_id),
+                )
+                index = CoinAmountIndex.from_coins(
+                    (
+                        bytes32.fromhex(row[0]),
+                        Coin(bytes32.fromhex(row[1]), bytes32.fromhex(row[2]), uint64.from_bytes(row[3])),
+                    )
+                    for row in rows
+                )
+                self.unspent_coin_indexes[wallet_id] = index
+        return index
+
     async def get_all_unspent_coins(self, coin_type: CoinType = CoinType.NORMAL) -> Set[WalletCoinRecord]:
         """Returns set of CoinRecords that have not been spent yet for a wallet."""
         async with self.db_wrapper.reader_no_transaction() as conn:
@@ -344,9 +389,11 @@ class WalletCoinStore:
                 )
             ).close()
         self.total_count_cache.cache.clear()
+        self.unspent_coin_indexes.clear()
 
     async def delete_wallet(self, wallet_id: uint32) -> None:
         async with self.db_wrapper.writer_maybe_transaction() as conn:
             cursor = await conn.execute("DELETE FROM coin_record WHERE wallet_id=?", (wallet_id,))
             await cursor.close()
         self.total_count_cache.cache.clear()
+        self.unspent_coin_indexes.pop(wallet_id, None)
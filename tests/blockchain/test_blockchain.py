@@ -17,7 +17,11 @@ from chia.consensus.block_rewards import calculate_base_farmer_reward
 from chia.consensus.blockchain import AddBlockResult
 from chia.consensus.coinbase import create_farmer_coin
 from chia.consensus.constants import ConsensusConstants
-from chia.consensus.multiprocess_validation import PreValidationResult
+from chia.consensus.multiprocess_validation import (
+    PreValidationResult,
+    ValidationWorkerCache,
+    batch_pre_validate_blocks_cached,
+)
 from chia.consensus.pot_iterations import is_overflow_block
 from chia.full_node.bundle_tools import detect_potential_template_generator
 from chia.full_node.mempool_check_conditions import get_name_puzzle_conditions
@@ -1786,6 +1790,36 @@ class TestPreValidation:
         log.info(f"Average pv: {sum(times_pv)/(len(blocks)/n_at_a_time)}")
         log.info(f"Average rb: {sum(times_rb)/(len(blocks))}")
 
+    @pytest.mark.asyncio
+    async def test_pre_validation_worker_cache(self, empty_blockchain, default_1000_blocks, bt):
+        blocks = default_1000_blocks[:100]
+        cache = ValidationWorkerCache()
+        for i in range(0, len(blocks), 32):
+            blocks_to_validate = blocks[i : i + 32]
+            empty_blockchain.validation_worker_cache = None
+            expected = await empty_blockchain.pre_validate_blocks_multiprocessing(
+                blocks_to_validate, {}, validate_signatures=True
+            )
+            empty_blockchain.validation_worker_cache = cache
+            res = await empty_blockchain.pre_validate_blocks_multiprocessing(
+                blocks_to_validate, {}, validate_signatures=True
+            )
+            assert res == expected
+            assert len(cache.sent) > 0
+            for n, block in enumerate(blocks_to_validate):
+                assert res[n].error is None
+                result, err, _ = await empty_blockchain.add_block(block, res[n])
+                assert err is None
+
+        # a worker that doesn't have the block records asks for them, rather
+        # than validating anything
+        unknown = bytes32([1] * 32)
+        missing, results = batch_pre_validate_blocks_cached(
+            bt.constants, [unknown], {}, None, [], [], {}, True, [], [], False
+        )
+        assert missing == [unknown]
+        assert results == []
+
 
 class TestBodyValidation:
     # TODO: add test for
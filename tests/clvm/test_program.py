@@ -2,11 +2,14 @@ from __future__ import annotations
 
 from unittest import TestCase
 
+from chia_rs import tree_hash
 from clvm.EvalError import EvalError
 from clvm.operators import KEYWORD_TO_ATOM
 from clvm_tools.binutils import assemble, disassemble
 
 from chia.types.blockchain_format.program import Program
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.blockchain_format.tree_hash import TreeHashCache, TreeHashCacheInfo
 
 
 class TestProgram(TestCase):
@@ -99,3 +102,28 @@ def test_uncurry_args_garbage():
     # there's garbage at the end of the args list
     plus = Program.to(assemble("(2 (q . 1) (c (q . 1) (q . 1) (q . 0x1337)))"))
     assert plus.uncurry() == (plus, Program.to(0))
+
+
+def test_tree_hash_cache():
+    cache = TreeHashCache(3)
+    mod = Program.to(assemble("(+ 2 5)"))
+    mod_hash = bytes32(tree_hash(bytes(mod)))
+    assert cache.tree_hash(mod) == mod_hash
+    assert cache.tree_hash(mod) == mod_hash
+    assert cache.info() == TreeHashCacheInfo(hits=1, misses=1, subtree_hits=0, size=1, capacity=3)
+
+    # the curried puzzle finds the mod in the cache
+    curried = mod.curry(200, [30, 40])
+    assert cache.tree_hash(curried) == bytes32(tree_hash(bytes(curried)))
+    assert cache.info().subtree_hits == 1
+    assert cache.tree_hash(Program.to(10)) == bytes32(tree_hash(bytes(Program.to(10))))
+
+    # an equal but different object isn't mixed up with an evicted one
+    cache.tree_hash(Program.to(11))
+    assert cache.info().size == 3
+    assert cache.tree_hash(Program.to(assemble("(+ 2 5)"))) == mod_hash
+    cache.clear()
+    assert cache.info() == TreeHashCacheInfo(hits=0, misses=0, subtree_hits=0, size=0, capacity=3)
+
+    # Program.get_tree_hash() uses the shared cache
+    assert Program.to([1, 2, [3]]).get_tree_hash() == bytes32(tree_hash(bytes(Program.to([1, 2, [3]]))))
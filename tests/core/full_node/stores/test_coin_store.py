@@ -19,6 +19,7 @@ from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.coin_record import CoinRecord
 from chia.types.full_block import FullBlock
 from chia.types.generator_types import BlockGenerator
+from chia.util.db_wrapper import DBWrapper2
 from chia.util.generator_tools import tx_removals_and_additions
 from chia.util.hash import std_hash
 from chia.util.ints import uint32, uint64
@@ -510,3 +511,115 @@ class TestCoinStoreWithBlocks:
 
             # if the limit is very high, we should get all of them
             assert len(await coin_store.get_coin_states_by_ids(True, coins, uint32(0), max_items=10000)) == 600
+
+    @pytest.mark.asyncio
+    async def test_write_back_cache(self, db_version: int, bt: BlockTools, consensus_mode: Mode) -> None:
+        if consensus_mode != Mode.PLAIN:
+            pytest.skip("only run in PLAIN mode to save time")
+
+        blocks = [block for block in bt.get_consecutive_blocks(30) if block.is_transaction_block()]
+
+        async def add_blocks(coin_store: CoinStore, db_wrapper: DBWrapper2) -> None:
+            # every block spends the reward coins of the block two blocks before it
+            for i, block in enumerate(blocks):
+                removals: List[bytes32] = []
+                if i >= 2:
+                    removals = [coin.name() for coin in blocks[i - 2].get_included_reward_coins()]
+                assert block.foliage_transaction_block is not None
+                async with db_wrapper.writer():
+                    await coin_store.new_block(
+                        block.height,
+                        block.foliage_transaction_block.timestamp,
+                        block.get_included_reward_coins(),
+                        [],
+                        removals,
+                    )
+                coin_store.commit_cache_changes()
+                await coin_store.maybe_flush_cache()
+
+        async with DBConnection(db_version) as db_wrapper, DBConnection(db_version) as db_wrapper_cached:
+            coin_store = await CoinStore.create(db_wrapper)
+            cached_store = await CoinStore.create(db_wrapper_cached, cache_flush_blocks=7)
+            await add_blocks(coin_store, db_wrapper)
+            await add_blocks(cached_store, db_wrapper_cached)
+
+            # the last blocks are only in the cache
+            assert coin_store.checkpoint_height() is None
+            cached_blocks = len(blocks) % 7
+            assert cached_blocks > 0
+            checkpoint = blocks[-cached_blocks - 1].height
+            assert cached_store.checkpoint_height() == checkpoint
+            all_coins = [coin.name() for block in blocks for coin in block.get_included_reward_coins()]
+            for name in all_coins:
+                assert await cached_store.get_coin_record(name) == await coin_store.get_coin_record(name)
+            assert set(await cached_store.get_coin_records(all_coins)) == set(
+                await coin_store.get_coin_records(all_coins)
+            )
+
+            # the coins of the block two blocks back can't be spent again
+            last_coins = [coin.name() for coin in blocks[-3].get_included_reward_coins()]
+            with pytest.raises(ValueError, match="Invalid operation to set spent"):
+                await cached_store._cache_set_spent(last_coins, uint32(blocks[-1].height + 1))
+
+            # a failed block leaves the cache as it was
+            with pytest.raises(ValueError):
+                async with db_wrapper_cached.writer():
+                    await cached_store.rollback_to_block(10)
+                    raise ValueError("failed to add the block")
+            cached_store.rollback_cache_changes()
+            assert cached_store.checkpoint_height() == checkpoint
+            for name in all_coins:
+                assert await cached_store.get_coin_record(name) == await coin_store.get_coin_record(name)
+
+            # rolling back before the checkpoint
+            fork_height = blocks[len(blocks) // 2].height
+            assert fork_height < checkpoint
+            changes = await coin_store.rollback_to_block(fork_height)
+            async with db_wrapper_cached.writer():
+                cached_changes = await cached_store.rollback_to_block(fork_height)
+            cached_store.commit_cache_changes()
+            assert set(cached_changes) == set(changes)
+            assert cached_store.checkpoint_height() == fork_height
+            for name in all_coins:
+                assert await cached_store.get_coin_record(name) == await coin_store.get_coin_record(name)
+
+            # the other queries see the cached changes, too
+            assert set(await cached_store.get_all_coins(True)) == set(await coin_store.get_all_coins(True))
+            assert cached_store.checkpoint_height() == fork_height
+            assert await cached_store.get_coins_removed_at_height(fork_height) == (
+                await coin_store.get_coins_removed_at_height(fork_height)
+            )
+
+    @pytest.mark.asyncio
+    async def test_write_back_cache_replay(
+        self, tmp_dir: Path, db_version: int, bt: BlockTools, consensus_mode: Mode
+    ) -> None:
+        if consensus_mode != Mode.PLAIN:
+            pytest.skip("only run in PLAIN mode to save time")
+
+        blocks = bt.get_consecutive_blocks(20)
+        async with DBConnection(db_version) as db_wrapper:
+            coin_store = await CoinStore.create(db_wrapper, cache_flush_blocks=8)
+            store = await BlockStore.create(db_wrapper)
+            b: Blockchain = await Blockchain.create(coin_store, store, bt.constants, tmp_dir, 2)
+            try:
+                for block in blocks:
+                    await _validate_and_add_block(b, block)
+                checkpoint = coin_store.checkpoint_height()
+                assert checkpoint is not None and checkpoint < 19
+                expected = await coin_store.get_coin_records(
+                    [coin.name() for block in blocks for coin in block.get_included_reward_coins()]
+                )
+            finally:
+                b.shut_down()
+
+            # the node stopped without flushing the cache, which is re-applied from the blocks on startup
+            coin_store = await CoinStore.create(db_wrapper, cache_flush_blocks=8)
+            assert coin_store.checkpoint_height() == checkpoint
+            store = await BlockStore.create(db_wrapper)
+            b = await Blockchain.create(coin_store, store, bt.constants, tmp_dir, 2)
+            try:
+                assert coin_store.checkpoint_height() == 19
+                assert set(await coin_store.get_all_coins(True)) == set(expected)
+            finally:
+                b.shut_down()
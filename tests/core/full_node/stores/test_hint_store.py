@@ -181,3 +181,31 @@ class TestHintStore:
                 assert len(await hint_store.get_coin_ids(hint, max_items=limit)) == limit
 
             assert len(await hint_store.get_coin_ids(hint, max_items=10000)) == 200
+
+    @pytest.mark.asyncio
+    async def test_hint_filter(self, db_version, tmp_path):
+        filter_path = tmp_path / "hint_filter.dat"
+        async with DBConnection(db_version) as db_wrapper:
+            hint_store = await HintStore.create(db_wrapper, filter_path=filter_path)
+            hints = [(bytes32(i.to_bytes(32, "big")), bytes32((i % 10).to_bytes(32, "big"))) for i in range(100)]
+            await hint_store.add_hints(hints[:50])
+            await hint_store.save_filter()
+            assert filter_path.exists()
+
+            # the hints which were added after the filter was saved are picked up on the next start
+            await hint_store.add_hints(hints[50:] + [(32 * b"\4", 32 * b"\5")])
+            for use_filter in [True, False]:
+                hint_store = await HintStore.create(db_wrapper, use_filter=use_filter, filter_path=filter_path)
+                assert (hint_store._filter is not None) == use_filter
+                for i in range(10):
+                    assert len(await hint_store.get_coin_ids(bytes32(i.to_bytes(32, "big")))) == 10
+                assert await hint_store.get_coin_ids(32 * b"\5") == [32 * b"\4"]
+                assert await hint_store.get_coin_ids(32 * b"\6") == []
+
+        # a filter which doesn't belong to the DB is rebuilt
+        async with DBConnection(db_version) as db_wrapper:
+            hint_store = await HintStore.create(db_wrapper, filter_path=filter_path)
+            assert hint_store._filter is not None
+            assert len(hint_store._filter) == 0
+            await hint_store.add_hints([(32 * b"\7", 32 * b"\5")])
+            assert await hint_store.get_coin_ids(32 * b"\5") == [32 * b"\7"]
@@ -1102,7 +1102,7 @@ class TestFullNodeProtocol:
         assert res.type != ProtocolMessageTypes.reject_block.value
 
     @pytest.mark.asyncio
-    async def test_request_blocks(self, wallet_nodes):
+    async def test_request_blocks(self, wallet_nodes, monkeypatch):
         full_node_1, full_node_2, server_1, server_2, wallet_a, wallet_receiver, bt = wallet_nodes
         blocks = await full_node_1.get_all_full_blocks()
 
@@ -1162,6 +1162,22 @@ class TestFullNodeProtocol:
         assert fetched_blocks[-1].transactions_generator is not None
         assert std_hash(fetched_blocks[-1]) == std_hash(blocks_t[-1])
 
+        # the same range is served from the response cache, without querying the block store
+        block_store = full_node_1.full_node.block_store
+        get_block_bytes_by_hash = block_store.get_block_bytes_by_hash
+        queries = []
+
+        async def counting_get_block_bytes_by_hash(header_hashes):
+            queries.append(header_hashes)
+            return await get_block_bytes_by_hash(header_hashes)
+
+        monkeypatch.setattr(block_store, "get_block_bytes_by_hash", counting_get_block_bytes_by_hash)
+        cached = await full_node_1.request_blocks(fnp.RequestBlocks(uint32(peak_height - 5), uint32(peak_height), True))
+        assert cached.data == res.data
+        assert queries == []
+        await full_node_1.request_blocks(fnp.RequestBlocks(uint32(peak_height - 6), uint32(peak_height), True))
+        assert len(queries) == 1
+
     @pytest.mark.asyncio
     async def test_new_unfinished_block(self, wallet_nodes, self_hostname):
         full_node_1, full_node_2, server_1, server_2, wallet_a, wallet_receiver, bt = wallet_nodes
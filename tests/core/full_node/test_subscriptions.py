@@ -355,3 +355,16 @@ def test_ph_subscription_duplicates() -> None:
     assert sub.has_ph_subscription(ph2) is False
     assert sub.has_ph_subscription(ph3) is False
     assert sub.has_ph_subscription(ph4) is False
+
+
+def test_peers_for_coin_ids_and_puzzle_hashes() -> None:
+    sub = PeerSubscriptions()
+    sub.add_coin_subscriptions(peer1, [coin1, coin2], 100)
+    sub.add_coin_subscriptions(peer2, [coin2], 100)
+    sub.add_ph_subscriptions(peer1, [ph1], 100)
+    sub.add_ph_subscriptions(peer2, [ph1, ph2], 100)
+
+    assert sub.peers_for_coin_ids({coin1, coin2, coin3}) == {coin1: {peer1}, coin2: {peer1, peer2}}
+    assert sub.peers_for_coin_ids(set()) == {}
+    assert sub.peers_for_puzzle_hashes({ph2, ph3}) == {ph2: {peer2}}
+    assert sub.peers_for_puzzle_hashes({ph1}) == {ph1: {peer1, peer2}}
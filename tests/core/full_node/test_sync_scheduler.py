@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from typing import List, Tuple, cast
+
+from chia.full_node.sync_scheduler import SyncScheduler
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util.full_block_utils import FullBlockView
+from chia.util.hash import std_hash
+
+peer_a = std_hash(b"a")
+peer_b = std_hash(b"b")
+
+
+def fake_blocks(start: int, end: int) -> List[FullBlockView]:
+    # the scheduler never looks inside the blocks
+    return cast(List[FullBlockView], list(range(start, end + 1)))
+
+
+def take_range(scheduler: SyncScheduler, peer: bytes32, now: float) -> Tuple[int, int]:
+    r = scheduler.next_range(peer, now=now)
+    assert r is not None
+    return r
+
+
+def test_ranges_cover_heights_in_order() -> None:
+    scheduler = SyncScheduler(start_height=10, end_height=100, max_batch_size=32)
+    scheduler.add_peer(peer_a, "127.0.0.1")
+    scheduler.add_peer(peer_b, "127.0.0.2")
+
+    ranges = [take_range(scheduler, peer, now=0) for peer in (peer_a, peer_b, peer_a)]
+    assert ranges == [(10, 41), (42, 73), (74, 100)]
+    assert scheduler.next_range(peer_b, now=0) is None
+
+    # out of order completion is held back until the gap is filled
+    scheduler.range_fetched(42, fake_blocks(42, 73), now=1)
+    assert scheduler.pop_ready() == []
+    scheduler.range_fetched(10, fake_blocks(10, 41), now=1)
+    scheduler.range_fetched(74, fake_blocks(74, 100), now=1)
+    ready = scheduler.pop_ready()
+    assert [peer for peer, _ in ready] == [peer_a, peer_b, peer_a]
+    assert [b for _, blocks in ready for b in blocks] == fake_blocks(10, 100)
+    assert scheduler.done()
+
+
+def test_timed_out_range_is_reassigned() -> None:
+    scheduler = SyncScheduler(start_height=0, end_height=63, max_batch_size=32)
+    scheduler.add_peer(peer_a, "127.0.0.1")
+    scheduler.add_peer(peer_b, "127.0.0.2")
+
+    assert scheduler.next_range(peer_a, now=0) == (0, 31)
+    assert scheduler.next_range(peer_b, now=0) == (32, 63)
+    scheduler.range_fetched(32, fake_blocks(32, 63), now=1)
+    scheduler.range_failed(0, timed_out=True)
+    assert scheduler.peers[peer_a].timeouts == 1
+    assert scheduler.peers[peer_a].batch_size == 16
+
+    # peer b picks up the range peer a dropped
+    assert scheduler.next_range(peer_b, now=2) == (0, 31)
+    scheduler.range_fetched(0, fake_blocks(0, 31), now=3)
+    assert len(scheduler.pop_ready()) == 2
+    assert scheduler.done()
+
+
+def test_retry_range_is_split_to_batch_size() -> None:
+    scheduler = SyncScheduler(start_height=0, end_height=31, max_batch_size=32)
+    scheduler.add_peer(peer_a, "127.0.0.1")
+    scheduler.add_peer(peer_b, "127.0.0.2")
+    assert scheduler.next_range(peer_a, now=0) == (0, 31)
+    scheduler.remove_peer(peer_a)
+    scheduler.peers[peer_b].batch_size = 10
+    assert scheduler.next_range(peer_b, now=0) == (0, 9)
+    assert scheduler.next_range(peer_b, now=0) == (10, 19)
+    assert scheduler.get_stats()["retry_queue"] == 1
+
+
+def test_adaptive_batch_size() -> None:
+    scheduler = SyncScheduler(
+        start_height=0, end_height=10000, max_batch_size=32, max_in_flight_per_peer=1, target_request_seconds=2
+    )
+    scheduler.add_peer(peer_a, "127.0.0.1")
+    scheduler.add_peer(peer_b, "127.0.0.2")
+
+    # a slow peer (4 blocks per second) gets smaller batches
+    start, end = take_range(scheduler, peer_a, now=0)
+    scheduler.range_fetched(start, fake_blocks(start, end), now=8)
+    assert scheduler.peers[peer_a].batch_size == 8
+
+    # a fast peer stays at the maximum
+    start, end = take_range(scheduler, peer_b, now=0)
+    scheduler.range_fetched(start, fake_blocks(start, end), now=0.1)
+    assert scheduler.peers[peer_b].batch_size == 32
+
+    # when validation is the bottleneck, there's no point in small requests
+    scheduler.record_validation(32, 16)
+    start, end = take_range(scheduler, peer_a, now=10)
+    assert end - start + 1 == 8
+    scheduler.range_fetched(start, fake_blocks(start, end), now=12)
+    assert scheduler.peers[peer_a].batch_size == 32
+
+    stats = scheduler.get_stats()
+    assert stats["validation_throughput"] == 2
+    assert {p["peer_host"] for p in stats["peers"]} == {"127.0.0.1", "127.0.0.2"}
+
+
+def test_buffer_limit() -> None:
+    scheduler = SyncScheduler(
+        start_height=0, end_height=1000, max_batch_size=10, max_in_flight_per_peer=100, max_buffered_blocks=30
+    )
+    scheduler.add_peer(peer_a, "127.0.0.1")
+    assert scheduler.next_range(peer_a, now=0) == (0, 9)
+    assert scheduler.next_range(peer_a, now=0) == (10, 19)
+    assert scheduler.next_range(peer_a, now=0) == (20, 29)
+    assert scheduler.next_range(peer_a, now=0) is None
+    assert scheduler.get_stats()["buffered_blocks"] == 30
+
+    # failed ranges are below the buffered ones, so they're always handed out
+    # (and split to the reduced batch size)
+    scheduler.range_failed(0)
+    assert scheduler.next_range(peer_a, now=0) == (0, 4)
+    assert scheduler.next_range(peer_a, now=0) == (5, 9)
+
+    scheduler.range_fetched(0, fake_blocks(0, 4), now=1)
+    scheduler.range_fetched(5, fake_blocks(5, 9), now=1)
+    assert len(scheduler.pop_ready()) == 2
+    assert scheduler.next_range(peer_a, now=1) is not None
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, List, cast
+
+import pytest
+
+from chia.full_node.subscriptions import PeerSubscriptions
+from chia.full_node.wallet_update_dispatcher import WalletUpdateDispatcher
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+from chia.protocols.wallet_protocol import CoinStateUpdate, NewPeakWallet
+from chia.server.outbound_message import Message, NodeType
+from chia.server.ws_connection import WSChiaConnection
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.coin_record import CoinRecord
+from chia.util.ints import uint32, uint64, uint128
+
+peer1 = bytes32(b"1" * 32)
+peer2 = bytes32(b"2" * 32)
+peer3 = bytes32(b"3" * 32)
+
+ph1 = bytes32(b"e" * 32)
+ph2 = bytes32(b"f" * 32)
+hint_ph = bytes32(b"g" * 32)
+
+
+@dataclass
+class FakeConnection:
+    peer_node_id: bytes32
+    connection_type: NodeType = NodeType.WALLET
+    closed: bool = False
+    # the messages are only "sent" once they're taken off the queue
+    outgoing_queue: asyncio.Queue[Message] = field(default_factory=asyncio.Queue)
+    sent: List[Message] = field(default_factory=list)
+
+    async def send_message(self, message: Message) -> bool:
+        await self.outgoing_queue.put(message)
+        return True
+
+    def deliver(self) -> None:
+        while not self.outgoing_queue.empty():
+            self.sent.append(self.outgoing_queue.get_nowait())
+
+    def get_peer_logging(self) -> str:
+        return self.peer_node_id.hex()
+
+
+def coin_record(parent: int, ph: bytes32, height: int, spent: int = 0) -> CoinRecord:
+    coin = Coin(bytes32(parent.to_bytes(32, "big")), ph, uint64(1))
+    return CoinRecord(coin, uint32(height), uint32(spent), False, uint64(0))
+
+
+def new_peak(height: int, fork: int) -> NewPeakWallet:
+    return NewPeakWallet(bytes32(height.to_bytes(32, "big")), uint32(height), uint128(height), uint32(fork))
+
+
+def updates(connection: FakeConnection) -> List[CoinStateUpdate]:
+    return [
+        CoinStateUpdate.from_bytes(m.data)
+        for m in connection.sent
+        if m.type == ProtocolMessageTypes.coin_state_update.value
+    ]
+
+
+def peaks(connection: FakeConnection) -> List[NewPeakWallet]:
+    return [
+        NewPeakWallet.from_bytes(m.data)
+        for m in connection.sent
+        if m.type == ProtocolMessageTypes.new_peak_wallet.value
+    ]
+
+
+async def settle(connections: Dict[bytes32, FakeConnection]) -> None:
+    for _ in range(20):
+        await asyncio.sleep(0.06)
+        for connection in connections.values():
+            connection.deliver()
+
+
+@pytest.mark.asyncio
+async def test_fan_out() -> None:
+    subscriptions = PeerSubscriptions()
+    subscriptions.add_ph_subscriptions(peer1, [ph1], 100)
+    subscriptions.add_ph_subscriptions(peer2, [ph1], 100)
+    subscriptions.add_ph_subscriptions(peer3, [hint_ph], 100)
+    dispatcher = WalletUpdateDispatcher(subscriptions)
+    connections = {peer: FakeConnection(peer) for peer in [peer1, peer2, peer3]}
+    all_connections = cast(Dict[bytes32, WSChiaConnection], connections)
+
+    records = [coin_record(1, ph1, 10), coin_record(2, ph2, 10)]
+    hints = {records[1].name: hint_ph}
+    dispatcher.add_peak(all_connections, uint32(10), uint32(9), bytes32(b"p" * 32), records, hints, new_peak(10, 9))
+    await settle(connections)
+
+    for peer in [peer1, peer2]:
+        assert [u.items for u in updates(connections[peer])] == [[records[0].coin_state]]
+        # the coin states arrive before the new peak
+        assert connections[peer].sent[1].type == ProtocolMessageTypes.new_peak_wallet.value
+    # the wallets which get the same update share the message
+    assert connections[peer1].sent[0] is connections[peer2].sent[0]
+    assert [u.items for u in updates(connections[peer3])] == [[records[1].coin_state]]
+    assert all(peaks(c) == [new_peak(10, 9)] for c in connections.values())
+    dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_slow_peer() -> None:
+    subscriptions = PeerSubscriptions()
+    subscriptions.add_ph_subscriptions(peer1, [ph1], 100)
+    dispatcher = WalletUpdateDispatcher(subscriptions)
+    connection = FakeConnection(peer1)
+    all_connections = cast(Dict[bytes32, WSChiaConnection], {peer1: connection})
+
+    created = coin_record(1, ph1, 10)
+    dispatcher.add_peak(all_connections, uint32(10), uint32(9), bytes32(b"a" * 32), [created], {}, new_peak(10, 9))
+    await asyncio.sleep(0)
+    # the wallet doesn't take the first update off the queue, so the next peaks are merged into one
+    spent = coin_record(1, ph1, 10, spent=11)
+    other = coin_record(2, ph1, 12)
+    dispatcher.add_peak(all_connections, uint32(11), uint32(10), bytes32(b"b" * 32), [spent], {}, new_peak(11, 10))
+    dispatcher.add_peak(all_connections, uint32(12), uint32(11), bytes32(b"c" * 32), [other], {}, new_peak(12, 11))
+    await settle({peer1: connection})
+
+    assert [(u.height, u.fork_height, set(u.items)) for u in updates(connection)] == [
+        (10, 9, {created.coin_state}),
+        (12, 10, {spent.coin_state, other.coin_state}),
+    ]
+    assert peaks(connection) == [new_peak(10, 9), new_peak(12, 10)]
+    dispatcher.close()
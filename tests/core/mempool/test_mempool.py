@@ -16,8 +16,9 @@ from chia.consensus.default_constants import DEFAULT_CONSTANTS
 from chia.full_node.bitcoin_fee_estimator import create_bitcoin_fee_estimator
 from chia.full_node.fee_estimation import EmptyMempoolInfo, MempoolInfo
 from chia.full_node.full_node_api import FullNodeAPI
-from chia.full_node.mempool import Mempool
+from chia.full_node.mempool import BlockFillStrategy, Mempool, MempoolRemoveReason
 from chia.full_node.mempool_check_conditions import get_name_puzzle_conditions, get_puzzle_and_solution_for_coin
+from chia.full_node.mempool_index import MempoolIndexBackend
 from chia.full_node.mempool_manager import MEMPOOL_MIN_FEE_INCREASE
 from chia.full_node.pending_tx_cache import ConflictTxCache, PendingTxCache
 from chia.protocols import full_node_protocol, wallet_protocol
@@ -2755,6 +2756,7 @@ coins = make_test_coins()
 
 
 # This test makes sure we're properly sorting items by fee rate
+@pytest.mark.parametrize("backend", list(MempoolIndexBackend))
 @pytest.mark.parametrize(
     "items,expected",
     [
@@ -2789,7 +2791,7 @@ coins = make_test_coins()
         ),
     ],
 )
-def test_items_by_feerate(items: List[MempoolItem], expected: List[Coin]) -> None:
+def test_items_by_feerate(items: List[MempoolItem], expected: List[Coin], backend: MempoolIndexBackend) -> None:
     fee_estimator = create_bitcoin_fee_estimator(uint64(11000000000))
 
     mempool_info = MempoolInfo(
@@ -2797,7 +2799,7 @@ def test_items_by_feerate(items: List[MempoolItem], expected: List[Coin]) -> Non
         FeeRate(uint64(1000000)),
         CLVMCost(uint64(11000000000)),
     )
-    mempool = Mempool(mempool_info, fee_estimator)
+    mempool = Mempool(mempool_info, fee_estimator, backend)
     for i in items:
         mempool.add_to_pool(i)
 
@@ -2828,6 +2830,7 @@ def item_cost(cost: int, fee_rate: float) -> MempoolItem:
     return mk_item([coin], cost=cost, fee=int(cost * fee_rate))
 
 
+@pytest.mark.parametrize("backend", list(MempoolIndexBackend))
 @pytest.mark.parametrize(
     "items,add,expected",
     [
@@ -2842,7 +2845,7 @@ def item_cost(cost: int, fee_rate: float) -> MempoolItem:
         ([75, 15, 9], 10, [10, 75, 15]),
     ],
 )
-def test_full_mempool(items: List[int], add: int, expected: List[int]) -> None:
+def test_full_mempool(items: List[int], add: int, expected: List[int], backend: MempoolIndexBackend) -> None:
     fee_estimator = create_bitcoin_fee_estimator(uint64(11000000000))
 
     mempool_info = MempoolInfo(
@@ -2850,7 +2853,7 @@ def test_full_mempool(items: List[int], add: int, expected: List[int]) -> None:
         FeeRate(uint64(1000000)),
         CLVMCost(uint64(100)),
     )
-    mempool = Mempool(mempool_info, fee_estimator)
+    mempool = Mempool(mempool_info, fee_estimator, backend)
     fee_rate: float = 3.0
     for i in items:
         mempool.add_to_pool(item_cost(i, fee_rate))
@@ -2867,6 +2870,7 @@ def test_full_mempool(items: List[int], add: int, expected: List[int]) -> None:
         assert mi.cost == expected_cost
 
 
+@pytest.mark.parametrize("backend", list(MempoolIndexBackend))
 @pytest.mark.parametrize("height", [True, False])
 @pytest.mark.parametrize(
     "items,expected,increase_fee",
@@ -2886,7 +2890,9 @@ def test_full_mempool(items: List[int], add: int, expected: List[int]) -> None:
         ([10, 11, 12, 13, 50], [10, 11, 12, 13], False),
     ],
 )
-def test_limit_expiring_transactions(height: bool, items: List[int], expected: List[int], increase_fee: bool) -> None:
+def test_limit_expiring_transactions(
+    height: bool, items: List[int], expected: List[int], increase_fee: bool, backend: MempoolIndexBackend
+) -> None:
     fee_estimator = create_bitcoin_fee_estimator(uint64(11000000000))
 
     mempool_info = MempoolInfo(
@@ -2894,7 +2900,7 @@ def test_limit_expiring_transactions(height: bool, items: List[int], expected: L
         FeeRate(uint64(1000000)),
         CLVMCost(uint64(50)),
     )
-    mempool = Mempool(mempool_info, fee_estimator)
+    mempool = Mempool(mempool_info, fee_estimator, backend)
     mempool.new_tx_block(uint32(10), uint64(100000))
 
     # fill the mempool with regular transactions (without expiration)
@@ -2938,6 +2944,7 @@ def test_limit_expiring_transactions(height: bool, items: List[int], expected: L
     assert mempool.total_mempool_cost() > 90
 
 
+@pytest.mark.parametrize("backend", list(MempoolIndexBackend))
 @pytest.mark.parametrize(
     "items,coin_ids,expected",
     [
@@ -2961,20 +2968,115 @@ def test_limit_expiring_transactions(height: bool, items: List[int], expected: L
         ),
     ],
 )
-def test_get_items_by_coin_ids(items: List[MempoolItem], coin_ids: List[bytes32], expected: List[MempoolItem]) -> None:
+def test_get_items_by_coin_ids(
+    items: List[MempoolItem], coin_ids: List[bytes32], expected: List[MempoolItem], backend: MempoolIndexBackend
+) -> None:
     fee_estimator = create_bitcoin_fee_estimator(uint64(11000000000))
     mempool_info = MempoolInfo(
         CLVMCost(uint64(11000000000 * 3)),
         FeeRate(uint64(1000000)),
         CLVMCost(uint64(11000000000)),
     )
-    mempool = Mempool(mempool_info, fee_estimator)
+    mempool = Mempool(mempool_info, fee_estimator, backend)
     for i in items:
         mempool.add_to_pool(i)
     result = mempool.get_items_by_coin_ids(coin_ids)
     assert set(result) == set(expected)
 
 
+def test_mempool_index_backends_agree() -> None:
+    # run the same random sequence of operations against both index backends
+    # and make sure they always agree on the order and content of the mempool
+    rng = random.Random(1337)
+    fee_estimator = create_bitcoin_fee_estimator(uint64(11000000000))
+    mempool_info = MempoolInfo(
+        CLVMCost(uint64(5000)),
+        FeeRate(uint64(1000000)),
+        CLVMCost(uint64(1000)),
+    )
+    mempools = [Mempool(mempool_info, fee_estimator, backend) for backend in MempoolIndexBackend]
+    all_coins = [Coin(rand_hash(), rand_hash(), uint64(i + 1)) for i in range(300)]
+    height = 10
+    timestamp = 100000
+    for mempool in mempools:
+        mempool.new_tx_block(uint32(height), uint64(timestamp))
+
+    for i in range(500):
+        action = rng.random()
+        if action < 0.8:
+            spent = rng.sample(all_coins, rng.randint(1, 3))
+            cost = rng.randint(1, 200)
+            item = mk_item(
+                spent,
+                cost=cost,
+                fee=rng.choice([0, cost, rng.randint(0, cost * 10)]),
+                assert_before_height=rng.choice([None, height + rng.randint(1, 60)]),
+                assert_before_seconds=rng.choice([None, timestamp + rng.randint(1, 1200)]),
+            )
+            if any(m.get_item_by_id(item.name) is not None for m in mempools):
+                continue
+            results = [m.add_to_pool(item) for m in mempools]
+            assert results[0] == results[1]
+        elif action < 0.9:
+            coin_ids = [c.name() for c in rng.sample(all_coins, 5)]
+            to_remove = list({mi.name for mi in mempools[0].get_items_by_coin_ids(coin_ids)})
+            for m in mempools:
+                m.remove_from_pool(to_remove, MempoolRemoveReason.BLOCK_INCLUSION)
+        else:
+            height += 1
+            timestamp += 19
+            for m in mempools:
+                m.new_tx_block(uint32(height), uint64(timestamp))
+
+        ordered = [[mi.name for mi in m.items_by_feerate()] for m in mempools]
+        assert ordered[0] == ordered[1]
+        assert mempools[0].total_mempool_cost() == mempools[1].total_mempool_cost()
+        assert mempools[0].total_mempool_fees() == mempools[1].total_mempool_fees()
+        assert mempools[0].get_min_fee_rate(500) == mempools[1].get_min_fee_rate(500)
+        coin_ids = [c.name() for c in rng.sample(all_coins, 10)]
+        assert set(mempools[0].get_items_by_coin_ids(coin_ids)) == set(mempools[1].get_items_by_coin_ids(coin_ids))
+
+
+@pytest.mark.parametrize(
+    "strategy,expected_costs",
+    [
+        # we stop at the first item that doesn't fit
+        (BlockFillStrategy.GREEDY, [600000000]),
+        # we skip the item that doesn't fit and pack the remaining cost
+        (BlockFillStrategy.GREEDY_WITH_SKIP, [600000000, 300000000, 100000000]),
+    ],
+)
+def test_block_fill_strategy(strategy: BlockFillStrategy, expected_costs: List[int]) -> None:
+    fee_estimator = create_bitcoin_fee_estimator(uint64(11000000000))
+    mempool_info = MempoolInfo(
+        CLVMCost(uint64(3000000000)),
+        FeeRate(uint64(1000000)),
+        CLVMCost(uint64(1000000000)),
+    )
+    mempool = Mempool(mempool_info, fee_estimator)
+    costs = [600000000, 500000000, 300000000, 100000000]
+    fee_rate = 10
+    items = []
+    for cost in costs:
+        item = item_cost(cost, fee_rate)
+        items.append(item)
+        mempool.add_to_pool(item)
+        fee_rate -= 1
+
+    def always(_: bytes32) -> bool:
+        return True
+
+    assert mempool.create_bundle_from_mempool_items(always, strategy) is not None
+    included = [item for item in items if item.cost in expected_costs]
+    stats = mempool.last_block_assembly
+    assert stats is not None
+    assert stats.strategy == strategy
+    assert stats.items_included == len(expected_costs)
+    assert stats.cost == sum(expected_costs)
+    assert stats.fees == sum(item.fee for item in included)
+    assert stats.fill_ratio == sum(expected_costs) / 1000000000
+
+
 def test_aggregating_on_a_solution_then_a_more_cost_saving_one_appears() -> None:
     def always(_: bytes32) -> bool:
         return True
@@ -1391,6 +1391,129 @@ async def test_coin_spending_different_ways_then_finding_it_spent_in_new_peak(ne
     assert len(list(mempool_manager.mempool.items_by_feerate())) == 0
 
 
+@pytest.mark.asyncio
+async def test_incremental_reorg() -> None:
+    # on a reorg, only the items spending coins touched by the rolled back or
+    # added blocks are re-validated, and their coin records are looked up in
+    # a single batch
+    coins = [Coin(IDENTITY_PUZZLE_HASH, IDENTITY_PUZZLE_HASH, uint64(amount)) for amount in range(100, 104)]
+    test_coin_records = {c.name(): CoinRecord(c, uint32(0), uint32(0), False, uint64(0)) for c in coins}
+    batch_lookups: List[List[bytes32]] = []
+
+    async def get_coin_record(coin_id: bytes32) -> Optional[CoinRecord]:
+        return test_coin_records.get(coin_id)
+
+    async def get_coin_records(coin_ids: List[bytes32]) -> List[CoinRecord]:
+        batch_lookups.append(coin_ids)
+        return [test_coin_records[coin_id] for coin_id in coin_ids if coin_id in test_coin_records]
+
+    mempool_manager = MempoolManager(
+        get_coin_record, DEFAULT_CONSTANTS, get_coin_records=get_coin_records, single_threaded=True
+    )
+    await mempool_manager.new_peak(create_test_block_record(), None)
+    bundles = []
+    for coin in coins:
+        sb, _, result = await generate_and_add_spendbundle(
+            mempool_manager, [[ConditionOpcode.CREATE_COIN, IDENTITY_PUZZLE_HASH, 1]], coin
+        )
+        assert result[1] == MempoolInclusionStatus.SUCCESS
+        bundles.append(sb)
+    assert mempool_manager.mempool.size() == 4
+
+    # coin 0 was spent in the new chain, coin 1 was created in a rolled back
+    # block, and coin 2 was re-created at a different height. Coin 3 isn't
+    # affected by the reorg at all
+    test_coin_records[coins[0].name()] = CoinRecord(coins[0], uint32(0), uint32(TEST_HEIGHT + 1), False, uint64(0))
+    del test_coin_records[coins[1].name()]
+    test_coin_records[coins[2].name()] = CoinRecord(coins[2], uint32(TEST_HEIGHT + 1), uint32(0), False, uint64(0))
+    touched_coin_ids = {coins[0].name(), coins[1].name(), coins[2].name()}
+    block_record = TestBlockRecord(
+        header_hash=height_hash(1000),
+        height=uint32(TEST_HEIGHT + 2),
+        timestamp=uint64(TEST_TIMESTAMP + 20),
+        prev_transaction_block_height=uint32(TEST_HEIGHT + 1),
+        prev_transaction_block_hash=height_hash(1001),
+    )
+    await mempool_manager.new_peak(block_record, None, touched_coin_ids)
+
+    assert len(batch_lookups) == 1
+    assert set(batch_lookups[0]) == touched_coin_ids
+    assert_sb_not_in_pool(mempool_manager, bundles[0])
+    assert_sb_not_in_pool(mempool_manager, bundles[1])
+    assert_sb_in_pool(mempool_manager, bundles[2])
+    assert_sb_in_pool(mempool_manager, bundles[3])
+    assert mempool_manager.mempool.size() == 2
+
+
+@pytest.mark.asyncio
+async def test_reorg_without_touched_coins_rebuilds() -> None:
+    # after a long sync, the full node reports the new peak without listing
+    # the coins that changed. The coins may well have been spent in the
+    # meantime, so the whole mempool must be re-validated
+    coin = Coin(IDENTITY_PUZZLE_HASH, IDENTITY_PUZZLE_HASH, uint64(100))
+    test_coin_records = {coin.name(): CoinRecord(coin, uint32(0), uint32(0), False, uint64(0))}
+
+    async def get_coin_record(coin_id: bytes32) -> Optional[CoinRecord]:
+        return test_coin_records.get(coin_id)
+
+    mempool_manager = await instantiate_mempool_manager(get_coin_record)
+    sb, _, result = await generate_and_add_spendbundle(
+        mempool_manager, [[ConditionOpcode.CREATE_COIN, IDENTITY_PUZZLE_HASH, 1]], coin
+    )
+    assert result[1] == MempoolInclusionStatus.SUCCESS
+
+    test_coin_records[coin.name()] = CoinRecord(coin, uint32(0), uint32(TEST_HEIGHT + 50), False, uint64(0))
+    await mempool_manager.new_peak(create_test_block_record(height=uint32(TEST_HEIGHT + 100)), None, set())
+    assert_sb_not_in_pool(mempool_manager, sb)
+    assert mempool_manager.mempool.size() == 0
+
+
+@pytest.mark.asyncio
+async def test_reorg_to_non_transaction_block() -> None:
+    # the coins rolled back by a reorg to a non-transaction block are
+    # re-validated with the next transaction block
+    coins = [Coin(IDENTITY_PUZZLE_HASH, IDENTITY_PUZZLE_HASH, uint64(amount)) for amount in range(100, 102)]
+    test_coin_records = {c.name(): CoinRecord(c, uint32(0), uint32(0), False, uint64(0)) for c in coins}
+
+    async def get_coin_record(coin_id: bytes32) -> Optional[CoinRecord]:
+        return test_coin_records.get(coin_id)
+
+    mempool_manager = await instantiate_mempool_manager(get_coin_record)
+    bundles = []
+    for coin in coins:
+        sb, _, result = await generate_and_add_spendbundle(
+            mempool_manager, [[ConditionOpcode.CREATE_COIN, IDENTITY_PUZZLE_HASH, 1]], coin
+        )
+        assert result[1] == MempoolInclusionStatus.SUCCESS
+        bundles.append(sb)
+
+    # coin 0 was created in a rolled back block
+    del test_coin_records[coins[0].name()]
+    non_tx_peak = TestBlockRecord(
+        header_hash=height_hash(1000),
+        height=uint32(TEST_HEIGHT + 1),
+        timestamp=None,
+        prev_transaction_block_height=uint32(TEST_HEIGHT - 5),
+        prev_transaction_block_hash=height_hash(1001),
+    )
+    await mempool_manager.new_peak(non_tx_peak, None, {coins[0].name()})
+    assert mempool_manager.mempool.size() == 2
+
+    # coin 1 is spent by the next transaction block
+    test_coin_records[coins[1].name()] = CoinRecord(coins[1], uint32(0), uint32(TEST_HEIGHT + 2), False, uint64(0))
+    tx_peak = TestBlockRecord(
+        header_hash=height_hash(1002),
+        height=uint32(TEST_HEIGHT + 2),
+        timestamp=uint64(TEST_TIMESTAMP + 20),
+        prev_transaction_block_height=uint32(TEST_HEIGHT - 5),
+        prev_transaction_block_hash=height_hash(1001),
+    )
+    await mempool_manager.new_peak(tx_peak, None, {coins[1].name()})
+    assert_sb_not_in_pool(mempool_manager, bundles[0])
+    assert_sb_not_in_pool(mempool_manager, bundles[1])
+    assert mempool_manager.mempool.size() == 0
+
+
 @pytest.mark.asyncio
 async def test_bundle_coin_spends() -> None:
     # This tests the construction of bundle_coin_spends map for mempool items
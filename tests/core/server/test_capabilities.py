@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import pytest
 
 from chia.protocols.shared_protocol import Capability
-from chia.server.capabilities import known_active_capabilities
+from chia.server.capabilities import known_active_capabilities, negotiated_compression
 from chia.util.ints import uint16
 
 
@@ -66,3 +66,26 @@ def test_known_active_capabilities_filter(
         expected = []
 
     assert known_active_capabilities(values=values) == expected
+
+
+ZLIB = Capability.MESSAGE_COMPRESSION_ZLIB
+ZSTD = Capability.MESSAGE_COMPRESSION_ZSTD
+
+
+@pytest.mark.parametrize(
+    argnames=["ours", "peers", "expected"],
+    argvalues=[
+        [[Capability.BASE], [Capability.BASE], None],
+        [[Capability.BASE, ZLIB, ZSTD], [Capability.BASE], None],
+        [[Capability.BASE], [Capability.BASE, ZLIB, ZSTD], None],
+        [[ZLIB, ZSTD], [ZSTD, ZLIB], ZSTD],
+        [[ZLIB, ZSTD], [ZLIB], ZLIB],
+        [[ZLIB], [ZLIB, ZSTD], ZLIB],
+        [[ZSTD], [ZLIB], None],
+    ],
+)
+def test_negotiated_compression(
+    ours: List[Capability], peers: List[Capability], expected: Optional[Capability]
+) -> None:
+    assert negotiated_compression(ours, peers) == expected
+    assert negotiated_compression(peers, ours) == expected
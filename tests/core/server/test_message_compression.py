@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import zlib
+
+import pytest
+import zstd
+
+from chia.protocols.shared_protocol import Capability
+from chia.server.message_compression import (
+    FRAME_COMPRESSED,
+    FRAME_RAW,
+    CompressionStats,
+    compress_frame,
+    decompress_frame,
+)
+from chia.util.errors import ProtocolError
+
+COMPRESSIONS = [Capability.MESSAGE_COMPRESSION_ZLIB, Capability.MESSAGE_COMPRESSION_ZSTD]
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+@pytest.mark.parametrize("size", [0, 100, 4095, 4096, 100000])
+def test_round_trip(compression: Capability, size: int) -> None:
+    encoded = bytes(range(100)) * (size // 100) + bytes(size % 100)
+    frame, _ = compress_frame(encoded, compression, 4096)
+    if size < 4096:
+        assert frame == bytes([FRAME_RAW]) + encoded
+    else:
+        assert frame[0] == FRAME_COMPRESSED
+        assert len(frame) < size
+    assert decompress_frame(frame, compression, 100000)[0] == encoded
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_incompressible(compression: Capability) -> None:
+    encoded = bytes(range(256))
+    frame, _ = compress_frame(encoded, compression, 0)
+    assert frame == bytes([FRAME_RAW]) + encoded
+    assert decompress_frame(frame, compression, 1000)[0] == encoded
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_too_large(compression: Capability) -> None:
+    frame, _ = compress_frame(bytes(10001), compression, 0)
+    assert decompress_frame(frame, compression, 10001)[0] == bytes(10001)
+    with pytest.raises(ProtocolError):
+        decompress_frame(frame, compression, 10000)
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_invalid_frames(compression: Capability) -> None:
+    with pytest.raises(ProtocolError):
+        decompress_frame(b"", compression, 1000)
+    with pytest.raises(ProtocolError):
+        decompress_frame(bytes([2]) + bytes(100), compression, 1000)
+    with pytest.raises(ProtocolError):
+        decompress_frame(bytes([FRAME_COMPRESSED]) + bytes(100), compression, 1000)
+    frame, _ = compress_frame(bytes(10000), compression, 0)
+    with pytest.raises(ProtocolError):
+        decompress_frame(frame[:-1], compression, 100000)
+
+
+def test_concatenated_frames() -> None:
+    # the declared size of the first zstd frame mustn't hide a second one
+    payload = zstd.compress(bytes(100)) + zstd.compress(bytes(1000000))
+    with pytest.raises(ProtocolError):
+        decompress_frame(bytes([FRAME_COMPRESSED]) + payload, Capability.MESSAGE_COMPRESSION_ZSTD, 1000)
+    payload = zlib.compress(bytes(100)) + zlib.compress(bytes(1000000))
+    with pytest.raises(ProtocolError):
+        decompress_frame(bytes([FRAME_COMPRESSED]) + payload, Capability.MESSAGE_COMPRESSION_ZLIB, 1000)
+
+
+def test_stats() -> None:
+    stats = CompressionStats()
+    assert stats.to_json_dict()["ratio"] == 1.0
+    stats.add(1000, 100, 0.5)
+    stats.add(1000, 300, 0.25)
+    assert stats.to_json_dict() == {
+        "messages": 2,
+        "uncompressed_bytes": 2000,
+        "compressed_bytes": 400,
+        "ratio": 0.2,
+        "cpu_seconds": 0.75,
+    }
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from chia.protocols.protocol_message_types import ProtocolMessageTypes
+from chia.server.network_metrics import Histogram, NetworkMetrics
+
+
+def test_histogram() -> None:
+    histogram = Histogram(bounds=(0.1, 1.0), counts=[0, 0, 0])
+    for value in [0.05, 0.1, 0.5, 2.0, 3.0]:
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 2]
+    assert histogram.cumulative_buckets() == [("0.1", 2), ("1.0", 3), ("+Inf", 5)]
+    assert histogram.to_json_dict() == {"buckets": {"0.1": 2, "1.0": 3, "+Inf": 5}, "sum": 5.65, "count": 5}
+
+
+def test_network_metrics() -> None:
+    metrics = NetworkMetrics()
+    respond_block = ProtocolMessageTypes.respond_block.value
+    metrics.message_received(respond_block, 100)
+    metrics.message_received(respond_block, 200)
+    metrics.message_sent(ProtocolMessageTypes.request_block.value, 10)
+    metrics.rate_limited(respond_block, inbound=True)
+    metrics.handler_finished(respond_block, 0.002, 0.2)
+    # unknown message types are kept by number
+    metrics.message_received(254, 5)
+
+    result = metrics.to_json_dict()
+    assert list(result.keys()) == ["request_block", "respond_block", "254"]
+    assert result["request_block"]["outbound_messages"] == 1
+    assert result["request_block"]["outbound_bytes"] == 10
+    assert result["respond_block"]["inbound_messages"] == 2
+    assert result["respond_block"]["inbound_bytes"] == 300
+    assert result["respond_block"]["inbound_rate_limited"] == 1
+    assert result["respond_block"]["outbound_rate_limited"] == 0
+    assert result["respond_block"]["queue_wait"]["buckets"]["0.005"] == 1
+    assert result["respond_block"]["queue_wait"]["buckets"]["0.001"] == 0
+    assert result["respond_block"]["handler_time"]["count"] == 1
+    assert result["254"]["inbound_bytes"] == 5
+
+    text = metrics.to_prometheus("chia_full_node")
+    lines = text.splitlines()
+    assert "# TYPE chia_network_messages_total counter" in lines
+    assert (
+        'chia_network_messages_total{service="chia_full_node",message_type="respond_block",direction="inbound"} 2'
+        in lines
+    )
+    assert 'chia_network_bytes_total{service="chia_full_node",message_type="254",direction="inbound"} 5' in lines
+    assert (
+        'chia_network_rate_limited_total{service="chia_full_node",message_type="respond_block",direction="inbound"} 1'
+        in lines
+    )
+    assert "# TYPE chia_network_handler_seconds histogram" in lines
+    assert (
+        'chia_network_handler_seconds_bucket{service="chia_full_node",message_type="respond_block",le="0.5"} 1' in lines
+    )
+    assert 'chia_network_handler_seconds_count{service="chia_full_node",message_type="respond_block"} 1' in lines
+    # histograms without observations are left out
+    assert 'message_type="request_block",le=' not in text
@@ -9,9 +9,9 @@ from packaging.version import Version
 
 from chia.cmds.init_funcs import chia_full_version_str
 from chia.full_node.full_node_api import FullNodeAPI
-from chia.protocols.full_node_protocol import RequestTransaction
+from chia.protocols.full_node_protocol import RequestBlock, RequestTransaction, RespondBlock
 from chia.protocols.protocol_message_types import ProtocolMessageTypes
-from chia.protocols.shared_protocol import Error, protocol_version
+from chia.protocols.shared_protocol import Capability, Error, protocol_version
 from chia.protocols.wallet_protocol import RejectHeaderRequest
 from chia.server.outbound_message import make_msg
 from chia.server.server import ChiaServer
@@ -23,7 +23,7 @@ from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.peer_info import PeerInfo
 from chia.util.api_decorators import api_request
 from chia.util.errors import ApiError, Err
-from chia.util.ints import int16, uint16, uint32
+from chia.util.ints import int16, uint8, uint16, uint32
 from tests.connection_utils import connect_and_get_peer
 
 
@@ -58,11 +58,69 @@ async def test_connection_string_conversion(
 ) -> None:
     _, _, server_1, server_2, _ = two_nodes_one_block
     peer = await connect_and_get_peer(server_1, server_2, self_hostname)
-    # 1000 is based on the current implementation (example below), should be reconsidered/adjusted if this test fails
+    # 1200 is based on the current implementation (example below), should be reconsidered/adjusted if this test fails
     # WSChiaConnection(local_type=<NodeType.FULL_NODE: 1>, local_port=50632, local_capabilities=[<Capability.BASE: 1>, <Capability.BLOCK_HEADERS: 2>, <Capability.RATE_LIMITS_V2: 3>], peer_host='127.0.0.1', peer_port=50640, peer_node_id=<bytes32: 566a318f0f656125b4fef0e85fbddcf9bc77f8003d35293c392479fc5d067f4d>, outbound_rate_limiter=<chia.server.rate_limits.RateLimiter object at 0x114a13f50>, inbound_rate_limiter=<chia.server.rate_limits.RateLimiter object at 0x114a13e90>, is_outbound=False, creation_time=1675271096.275591, bytes_read=68, bytes_written=162, last_message_time=1675271096.276271, peer_server_port=50636, active=False, closed=False, connection_type=<NodeType.FULL_NODE: 1>, request_nonce=32768, peer_capabilities=[<Capability.BASE: 1>, <Capability.BLOCK_HEADERS: 2>, <Capability.RATE_LIMITS_V2: 3>], version='', protocol_version='') # noqa
     converted = method(peer)
     print(converted)
-    assert len(converted) < 1000
+    assert len(converted) < 1200
+
+
+@pytest.mark.asyncio
+async def test_message_compression(
+    two_nodes_one_block: Tuple[FullNodeAPI, FullNodeAPI, ChiaServer, ChiaServer, BlockTools], self_hostname: str
+) -> None:
+    _, _, server_1, server_2, _ = two_nodes_one_block
+    connection_1 = await connect_and_get_peer(server_1, server_2, self_hostname)
+    connection_2 = server_2.all_connections[server_1.node_id]
+    assert connection_1.compression == Capability.MESSAGE_COMPRESSION_ZSTD
+    assert connection_2.compression == Capability.MESSAGE_COMPRESSION_ZSTD
+
+    connection_1.compression_threshold = 0
+    response = await connection_2.call_api(FullNodeAPI.request_block, RequestBlock(uint32(0), True))
+    assert isinstance(response, RespondBlock)
+    assert response.block.height == 0
+
+    message_type = uint8(ProtocolMessageTypes.respond_block.value)
+    sent = connection_1.sent_compression_stats[message_type]
+    received = connection_2.received_compression_stats[message_type]
+
+    def all_received() -> bool:
+        return received.messages == sent.messages
+
+    # node 2 may be asking for the block as well, while syncing
+    await time_out_assert(10, all_received)
+    assert sent.uncompressed_bytes == received.uncompressed_bytes
+    assert sent.compressed_bytes == received.compressed_bytes < sent.uncompressed_bytes
+    # the rate limiter counts the uncompressed size
+    limited_size = connection_2.inbound_rate_limiter.message_cumulative_sizes[ProtocolMessageTypes.respond_block]
+    assert limited_size == received.messages * len(bytes(response))
+    stats = connection_1.get_compression_stats()
+    assert stats["compression"] == "MESSAGE_COMPRESSION_ZSTD"
+    assert stats["sent"]["respond_block"]["ratio"] < 1
+
+
+@pytest.mark.asyncio
+async def test_network_metrics(
+    two_nodes_one_block: Tuple[FullNodeAPI, FullNodeAPI, ChiaServer, ChiaServer, BlockTools], self_hostname: str
+) -> None:
+    _, _, server_1, server_2, _ = two_nodes_one_block
+    await connect_and_get_peer(server_1, server_2, self_hostname)
+    connection_2 = server_2.all_connections[server_1.node_id]
+    response = await connection_2.call_api(FullNodeAPI.request_block, RequestBlock(uint32(0), True))
+    assert isinstance(response, RespondBlock)
+
+    received = server_1.network_metrics.get(ProtocolMessageTypes.request_block.value)
+    sent = server_2.network_metrics.get(ProtocolMessageTypes.request_block.value)
+
+    # node 2 may be asking for the block as well, while syncing
+    def all_handled() -> bool:
+        return received.handler_time.count == received.inbound_messages == sent.outbound_messages
+
+    await time_out_assert(10, all_handled)
+    assert received.inbound_messages >= 1
+    assert received.queue_wait.count == received.handler_time.count
+    assert received.inbound_bytes == sent.outbound_bytes
+    assert server_1.network_metrics.get(ProtocolMessageTypes.respond_block.value).outbound_bytes > 0
 
 
 @pytest.mark.asyncio
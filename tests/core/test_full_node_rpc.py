@@ -52,6 +52,8 @@ class TestRpc:
             assert not state["sync"]["sync_mode"]
             assert state["difficulty"] > 0
             assert state["sub_slot_iters"] > 0
+            # this node has never long synced
+            assert await client.get_sync_stats() is None
 
             blocks = bt.get_consecutive_blocks(num_blocks)
             blocks = bt.get_consecutive_blocks(num_blocks, block_list_input=blocks, guarantee_transaction_block=True)
@@ -279,6 +281,11 @@ class TestRpc:
             await client.close_connection(connections[0]["node_id"])
             await time_out_assert(10, num_connections, 0)
 
+            metrics = await client.get_network_metrics()
+            assert metrics["handshake"]["inbound_messages"] == metrics["handshake"]["outbound_messages"] == 1
+            prometheus = await client.get_network_metrics_prometheus()
+            assert "# TYPE chia_network_messages_total counter" in prometheus
+
             blocks: List[FullBlock] = await client.get_blocks(0, 5)
             assert len(blocks) == 5
 
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from chia.util.bloom_filter import BloomFilter, ScalableBloomFilter, ScalableBloomFilterData
+from chia.util.hash import std_hash
+
+
+def test_bloom_filter() -> None:
+    items = [std_hash(i.to_bytes(4, "big")) for i in range(1000)]
+    f = BloomFilter(1000, 0.01)
+    for item in items:
+        f.add(item)
+    assert f.full()
+    assert all(item in f for item in items)
+
+    false_positives = sum(std_hash(i.to_bytes(8, "big")) in f for i in range(10000))
+    assert false_positives < 300
+
+
+def test_scalable_bloom_filter() -> None:
+    items = [std_hash(i.to_bytes(4, "big")) for i in range(5000)]
+    f = ScalableBloomFilter(100, 0.01)
+    for item in items:
+        f.add(item)
+    assert len(f) == 5000
+    assert all(item in f for item in items)
+
+    false_positives = sum(std_hash(i.to_bytes(8, "big")) in f for i in range(10000))
+    assert false_positives < 300
+
+    restored = ScalableBloomFilter.from_data(ScalableBloomFilterData.from_bytes(bytes(f.to_data())))
+    assert len(restored) == 5000
+    assert restored.error_rate == f.error_rate
+    assert all(item in restored for item in items)
+    assert [std_hash(i.to_bytes(8, "big")) in restored for i in range(1000)] == [
+        std_hash(i.to_bytes(8, "big")) in f for i in range(1000)
+    ]
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import unittest
 
-from chia.util.lru_cache import LRUCache
+from chia.util.lru_cache import BytesLRUCache, LRUCache
 
 
 class TestLRUCache(unittest.TestCase):
@@ -54,3 +54,29 @@ class TestLRUCache(unittest.TestCase):
         assert len(cache.cache) == 5
         assert cache.get(b"0") is None
         assert cache.get(b"1") == 1
+
+    def test_bytes_lru_cache(self):
+        cache = BytesLRUCache(10)
+        cache.put(0, b"aaaa")
+        cache.put(1, b"bbbb")
+        assert cache.total_bytes == 8
+        assert cache.get(0) == b"aaaa"
+
+        # evicts the least recently used value to make room
+        cache.put(2, b"cccc")
+        assert cache.get(1) is None
+        assert cache.get(0) == b"aaaa"
+        assert cache.get(2) == b"cccc"
+        assert cache.total_bytes == 8
+
+        # replacing a value accounts for the new size
+        cache.put(0, b"a")
+        assert cache.total_bytes == 5
+
+        # a value larger than the cache isn't stored
+        cache.put(3, b"d" * 11)
+        assert cache.get(3) is None
+        assert cache.total_bytes == 5
+
+        cache.remove(2)
+        assert cache.total_bytes == 1
@@ -14,10 +14,11 @@ from chia.protocols.wallet_protocol import RespondRemovals
 from chia.simulator.block_tools import BlockTools, test_constants
 from chia.types.blockchain_format.coin import Coin
 from chia.types.blockchain_format.program import Program
+from chia.types.blockchain_format.serialized_program import SerializedProgram
 from chia.types.blockchain_format.sized_bytes import bytes4, bytes32
 from chia.types.full_block import FullBlock
 from chia.types.weight_proof import SubEpochChallengeSegment
-from chia.util.ints import uint8, uint32, uint64
+from chia.util.ints import int16, uint8, uint32, uint64, uint128
 from chia.util.streamable import (
     ConversionError,
     DefinitionError,
@@ -476,6 +477,87 @@ def test_basic() -> None:
     assert a == TestClass.from_bytes(b)
 
 
+@streamable
+@dataclass(frozen=True)
+class BufferInner(Streamable):
+    a: uint8
+    b: bytes32
+
+
+@streamable
+@dataclass(frozen=True)
+class BufferOuter(Streamable):
+    a: uint32
+    b: int16
+    c: uint128
+    d: bool
+    e: bytes4
+    f: Optional[BufferInner]
+    g: List[bytes32]
+    h: List[BufferInner]
+    i: Tuple[uint64, str, bytes]
+    j: Coin
+    k: G1Element
+    l: SerializedProgram
+    m: Optional[List[Optional[uint32]]]
+
+
+def test_parse_and_stream_buffer() -> None:
+    inner = BufferInner(uint8(255), bytes32(b"i" * 32))
+    program = SerializedProgram.from_program(Program.to([1, 2, (3, b"abc")]))
+    objects = [
+        BufferOuter(
+            uint32(5),
+            int16(-300),
+            uint128(2**127 + 5),
+            True,
+            bytes4(b"1234"),
+            inner,
+            [bytes32(b"a" * 32), bytes32(b"b" * 32)],
+            [inner, inner],
+            (uint64(7), "seven", b"7"),
+            Coin(bytes32(b"p" * 32), bytes32(b"h" * 32), uint64(1000)),
+            G1Element(),
+            program,
+            [uint32(1), None],
+        ),
+        BufferOuter(
+            uint32(0),
+            int16(0),
+            uint128(0),
+            False,
+            bytes4(b"0000"),
+            None,
+            [],
+            [],
+            (uint64(0), "", b""),
+            Coin(bytes32(b"p" * 32), bytes32(b"h" * 32), uint64(0)),
+            G1Element(),
+            program,
+            None,
+        ),
+    ]
+    for obj in objects:
+        # the buffer based functions have to match stream() and parse()
+        f = io.BytesIO()
+        obj.stream(f)
+        blob = f.getvalue()
+        assert bytes(obj) == blob
+        assert BufferOuter.from_bytes(blob) == obj
+        assert BufferOuter.parse(io.BytesIO(blob)) == obj
+
+        parsed, end = BufferOuter.parse_buffer(memoryview(b"prefix" + blob + b"suffix"), 6)
+        assert parsed == obj
+        assert end == 6 + len(blob)
+        assert type(parsed.b) is int16 and type(parsed.c) is uint128 and type(parsed.e) is bytes4
+
+        # truncated or trailing data fails the same way it always did
+        with pytest.raises(AssertionError):
+            BufferOuter.from_bytes(blob + b"\x00")
+        with pytest.raises(Exception):
+            BufferOuter.from_bytes(blob[:-1])
+
+
 def test_variable_size() -> None:
     @streamable
     @dataclass(frozen=True)
@@ -10,7 +10,7 @@ import pytest
 # TODO: update after resolution in https://github.com/pytest-dev/pytest/issues/7469
 from _pytest.fixtures import SubRequest
 
-from chia.util.db_wrapper import DBWrapper2
+from chia.util.db_wrapper import DBWrapper2, WriterPriority
 from tests.util.db_connection import DBConnection
 
 if TYPE_CHECKING:
@@ -429,3 +429,57 @@ async def test_cancelled_reader_does_not_cancel_writer() -> None:
             assert await query_value(connection=writer) == 1
 
         assert await query_value(connection=writer) == 1
+
+
+@pytest.mark.asyncio
+async def test_writer_priority() -> None:
+    async with DBConnection(2) as db_wrapper:
+        await setup_table(db_wrapper)
+        order: List[WriterPriority] = []
+
+        async def write(priority: WriterPriority) -> None:
+            async with db_wrapper.writer(priority):
+                order.append(priority)
+
+        async with db_wrapper.writer():
+            tasks = []
+            for priority in [WriterPriority.low, WriterPriority.normal, WriterPriority.high, WriterPriority.low]:
+                tasks.append(asyncio.create_task(write(priority)))
+                # make sure they queue up in this order
+                await asyncio.sleep(0)
+            assert order == []
+
+        await asyncio.gather(*tasks)
+        assert order == [WriterPriority.high, WriterPriority.normal, WriterPriority.low, WriterPriority.low]
+
+
+@pytest.mark.asyncio
+async def test_writer_and_reader_stats() -> None:
+    async with DBConnection(2) as db_wrapper:
+        await setup_table(db_wrapper)
+        await asyncio.gather(*(increment_counter(db_wrapper) for _ in range(10)))
+        async with db_wrapper.writer():
+            # nested writers don't take the lock, so they aren't counted
+            await increment_counter(db_wrapper)
+
+        stats = db_wrapper.get_stats()
+        assert set(stats["writers"].keys()) == {
+            f"{__name__}.setup_table",
+            f"{__name__}.increment_counter",
+            f"{__name__}.test_writer_and_reader_stats",
+        }
+        increments = stats["writers"][f"{__name__}.increment_counter"]
+        assert increments["count"] == 10
+        # all but the first one had to wait for the others
+        assert increments["max_wait_seconds"] > 0
+        assert increments["hold_seconds"] > 0
+
+        output: List[int] = []
+        await asyncio.gather(*(sum_counter(db_wrapper, output) for _ in range(6)))
+        assert output == [11] * 6
+        readers = db_wrapper.get_stats()["readers"]
+        assert readers["count"] == 6
+        assert readers["pool_size"] == 4
+        assert readers["in_use"] == 0
+        assert readers["max_in_use"] == 4
+        assert readers["waits"] == 2
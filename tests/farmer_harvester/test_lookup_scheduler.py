@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from chia.harvester.lookup_scheduler import LatencyHistogram, LookupPriority, LookupScheduler, LookupSkipped
+
+
+@pytest.fixture
+def executor() -> Iterator[ThreadPoolExecutor]:
+    executor = ThreadPoolExecutor(max_workers=10)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def make_scheduler(executor: ThreadPoolExecutor, concurrency: int) -> LookupScheduler:
+    scheduler = LookupScheduler(executor, concurrency)
+    # pretend these directories are on separate disks
+    scheduler._disk_of_directory[Path("/slow")] = "slow"
+    scheduler._disk_of_directory[Path("/fast")] = "fast"
+    return scheduler
+
+
+def far_deadline() -> float:
+    return time.monotonic() + 60
+
+
+@pytest.mark.asyncio
+async def test_slow_disk_does_not_block_other_disks(executor: ThreadPoolExecutor) -> None:
+    scheduler = make_scheduler(executor, 2)
+    release = threading.Event()
+
+    def slow_lookup() -> int:
+        release.wait()
+        return 1
+
+    slow = [
+        asyncio.create_task(
+            scheduler.run(Path(f"/slow/plot-{i}.plot"), LookupPriority.QUALITIES, far_deadline(), slow_lookup)
+        )
+        for i in range(8)
+    ]
+    fast = await asyncio.gather(
+        *(
+            scheduler.run(Path(f"/fast/plot-{i}.plot"), LookupPriority.QUALITIES, far_deadline(), lambda: 2)
+            for i in range(8)
+        )
+    )
+    assert fast == [2] * 8
+
+    stats = {disk["disk"]: disk for disk in scheduler.get_stats()}
+    assert stats["slow"]["running"] == 2
+    assert stats["slow"]["queued"] == 6
+    assert stats["fast"]["latency"]["qualities"]["count"] == 8
+
+    release.set()
+    assert await asyncio.gather(*slow) == [1] * 8
+    stats = {disk["disk"]: disk for disk in scheduler.get_stats()}
+    assert stats["slow"]["running"] == 0
+    assert stats["slow"]["queued"] == 0
+    assert stats["slow"]["directories"] == ["/slow"]
+
+
+@pytest.mark.asyncio
+async def test_qualities_before_full_proofs(executor: ThreadPoolExecutor) -> None:
+    scheduler = make_scheduler(executor, 1)
+    release = threading.Event()
+    order: List[str] = []
+
+    def lookup(name: str) -> None:
+        release.wait()
+        order.append(name)
+
+    tasks = [
+        asyncio.create_task(
+            scheduler.run(Path("/slow/a.plot"), LookupPriority.QUALITIES, far_deadline(), lambda: lookup("first"))
+        )
+    ]
+    await asyncio.sleep(0)
+    for priority in (LookupPriority.FULL_PROOF, LookupPriority.QUALITIES, LookupPriority.FULL_PROOF):
+        tasks.append(
+            asyncio.create_task(
+                scheduler.run(Path("/slow/b.plot"), priority, far_deadline(), functools.partial(lookup, priority.name))
+            )
+        )
+        await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ["first", "QUALITIES", "FULL_PROOF", "FULL_PROOF"]
+
+
+@pytest.mark.asyncio
+async def test_skip_past_deadline(executor: ThreadPoolExecutor) -> None:
+    scheduler = make_scheduler(executor, 1)
+
+    with pytest.raises(LookupSkipped):
+        await scheduler.run(Path("/slow/a.plot"), LookupPriority.QUALITIES, time.monotonic() - 1, lambda: 1)
+
+    # a disk that takes longer than the time left is skipped too
+    scheduler.disk_of(Path("/slow/a.plot")).latencies[LookupPriority.FULL_PROOF].record(10)
+    with pytest.raises(LookupSkipped):
+        await scheduler.run(Path("/slow/a.plot"), LookupPriority.FULL_PROOF, time.monotonic() + 5, lambda: 1)
+    assert await scheduler.run(Path("/slow/a.plot"), LookupPriority.QUALITIES, time.monotonic() + 5, lambda: 1) == 1
+    assert scheduler.get_stats()[0]["skipped"] == 2
+
+
+@pytest.mark.asyncio
+async def test_lookup_exception(executor: ThreadPoolExecutor) -> None:
+    scheduler = make_scheduler(executor, 1)
+
+    def failing_lookup() -> None:
+        raise RuntimeError("disk error")
+
+    with pytest.raises(RuntimeError, match="disk error"):
+        await scheduler.run(Path("/slow/a.plot"), LookupPriority.QUALITIES, far_deadline(), failing_lookup)
+    assert await scheduler.run(Path("/slow/a.plot"), LookupPriority.QUALITIES, far_deadline(), lambda: 1) == 1
+
+
+def test_latency_histogram() -> None:
+    histogram = LatencyHistogram()
+    assert histogram.mean() is None
+    for seconds in (0.001, 0.005, 0.2, 30):
+        histogram.record(seconds)
+    json_dict = histogram.to_json_dict()
+    assert json_dict["counts"][0] == 2
+    assert json_dict["counts"][5] == 1
+    assert json_dict["counts"][-1] == 1
+    assert json_dict["count"] == 4
+    assert json_dict["recent_seconds"] is not None
+
+    # the recent estimate recovers once the disk is fast again
+    for _ in range(20):
+        histogram.record(0.01)
+    assert histogram.recent_seconds is not None and histogram.recent_seconds < 0.1
+
+
+def test_resolve_disks(executor: ThreadPoolExecutor, tmp_path: Path) -> None:
+    scheduler = LookupScheduler(executor, 1)
+    plot = tmp_path / "a.plot"
+    # not resolved yet, the directory stands in for the disk
+    assert scheduler.disk_of(plot).disk == str(tmp_path)
+
+    scheduler.resolve_disks([plot, tmp_path / "missing" / "b.plot"])
+    assert scheduler.disk_of(plot).disk == f"device-{tmp_path.stat().st_dev}"
+    assert scheduler.disk_of(tmp_path / "missing" / "b.plot").disk == str(tmp_path / "missing")
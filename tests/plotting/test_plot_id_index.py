@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+from chia.plotting.plot_id_index import PlotIdIndex, filter_plot_ids
+from chia.types.blockchain_format.proof_of_space import passes_plot_filter
+from chia.types.blockchain_format.sized_bytes import bytes32
+
+
+def rand_hash(rng: random.Random) -> bytes32:
+    return bytes32(rng.getrandbits(256).to_bytes(32, "big"))
+
+
+@pytest.mark.parametrize("prefix_bits", [0, 1, 2, 5, 9])
+def test_filter_matches_passes_plot_filter(prefix_bits: int) -> None:
+    rng = random.Random(prefix_bits)
+    plot_ids = [rand_hash(rng) for _ in range(2000)]
+    for _ in range(3):
+        challenge_hash = rand_hash(rng)
+        signage_point = rand_hash(rng)
+        expected = [
+            i
+            for i, plot_id in enumerate(plot_ids)
+            if passes_plot_filter(prefix_bits, plot_id, challenge_hash, signage_point)
+        ]
+        assert filter_plot_ids(prefix_bits, b"".join(plot_ids), challenge_hash, signage_point) == expected
+
+
+def test_add_and_remove() -> None:
+    rng = random.Random(1)
+    index = PlotIdIndex()
+    plots = {Path(f"/plots/plot-{i}.plot"): rand_hash(rng) for i in range(10)}
+    for filename, plot_id in plots.items():
+        index.add(filename, plot_id)
+    assert len(index) == 10
+
+    snapshot = index.snapshot()
+    assert index.snapshot() is snapshot
+
+    # removing from the middle moves the last plot into the hole
+    for i in (3, 9, 0):
+        filename = Path(f"/plots/plot-{i}.plot")
+        index.remove(filename)
+        del plots[filename]
+    index.remove(Path("/plots/missing.plot"))
+    # re-adding a plot replaces its id
+    plots[Path("/plots/plot-5.plot")] = rand_hash(rng)
+    index.add(Path("/plots/plot-5.plot"), plots[Path("/plots/plot-5.plot")])
+
+    # the old snapshot is unchanged
+    assert len(snapshot) == 10
+    snapshot = index.snapshot()
+    assert len(snapshot) == len(index) == 7
+    assert {
+        filename: snapshot.plot_ids[i * 32 : (i + 1) * 32] for i, filename in enumerate(snapshot.filenames)
+    } == plots
+    assert snapshot.passing_plot_filter(0, rand_hash(rng), rand_hash(rng)) == list(snapshot.filenames)
+
+    index.clear()
+    assert len(index.snapshot()) == 0
@@ -11,22 +11,25 @@ from typing import Callable, Iterator, List, Optional
 
 import pytest
 from blspy import G1Element
+from watchdog.observers.api import BaseObserver
 
-from chia.plotting.cache import CURRENT_VERSION, CacheDataV1
+import chia.plotting.cache
+from chia.plotting.cache import CacheDataV1, DiskCacheEntry
 from chia.plotting.manager import Cache, PlotManager
 from chia.plotting.util import (
     PlotInfo,
     PlotRefreshEvents,
     PlotRefreshResult,
+    PlotsRefreshParameter,
     add_plot_directory,
     get_plot_directories,
     remove_plot,
     remove_plot_directory,
 )
-from chia.simulator.block_tools import get_plot_dir
+from chia.simulator.block_tools import BlockTools, get_plot_dir
 from chia.simulator.time_out_assert import time_out_assert
 from chia.util.config import create_default_chia_config, lock_and_load_config, save_config
-from chia.util.ints import uint16, uint32
+from chia.util.ints import uint16, uint32, uint64
 from chia.util.misc import VersionedBlob
 from tests.plotting.util import get_test_plots
 
@@ -193,6 +196,8 @@ async def test_plot_refreshing(environment):
         assert len(get_plot_directories(env.root_path)) == expected_directories
         await env.refresh_tester.run(expected_result)
         assert len(env.refresh_tester.plot_manager.plots) == expect_total_plots
+        plot_ids = env.refresh_tester.plot_manager.plot_id_index.snapshot()
+        assert set(plot_ids.filenames) == set(env.refresh_tester.plot_manager.plots.keys())
         assert len(env.refresh_tester.plot_manager.get_duplicates()) == expect_duplicates
         assert len(env.refresh_tester.plot_manager.failed_to_open_filenames) == 0
 
@@ -533,11 +538,25 @@ async def test_drop_too_large_cache_entries(environment, bt):
     await env.refresh_tester.run(expected_result)
     assert env.refresh_tester.plot_manager.cache.path().exists()
     assert len(env.dir_1) >= 6, "This test requires at least 6 cache entries"
-    # Load the cache entries
+    # The size check only runs when a v1 cache gets migrated, so convert the cache entries
     cache_path = env.refresh_tester.plot_manager.cache.path()
-    serialized = cache_path.read_bytes()
-    stored_cache: VersionedBlob = VersionedBlob.from_bytes(serialized)
-    cache_data: CacheDataV1 = CacheDataV1.from_bytes(stored_cache.blob)
+    v1_cache_path = cache_path.parent / "plot_manager.dat"
+    cache_data: CacheDataV1 = CacheDataV1(
+        [
+            (
+                str(path),
+                DiskCacheEntry(
+                    cache_entry.prover_data(),
+                    cache_entry.farmer_public_key,
+                    cache_entry.pool_public_key,
+                    cache_entry.pool_contract_puzzle_hash,
+                    cache_entry.plot_public_key,
+                    uint64(int(cache_entry.last_use)),
+                ),
+            )
+            for path, cache_entry in env.refresh_tester.plot_manager.cache.items()
+        ]
+    )
 
     def modify_cache_entry(index: int, additional_data: int, modify_memo: bool) -> str:
         path, cache_entry = cache_data.entries[index]
@@ -583,13 +602,17 @@ async def test_drop_too_large_cache_entries(environment, bt):
         return path
 
     def assert_cache(expected: List[MockPlotInfo]) -> None:
-        test_cache = Cache(cache_path)
+        test_cache = Cache(cache_path.parent / "migrated.dat", v1_cache_path)
         assert len(test_cache) == 0
         test_cache.load()
         assert len(test_cache) == len(expected)
         for plot_info in expected:
             assert test_cache.get(Path(plot_info.prover.get_filename())) is not None
 
+    # Make sure the cache currently contains all plots from dir1
+    v1_cache_path.write_bytes(bytes(VersionedBlob(uint16(1), bytes(cache_data))))
+    assert_cache(env.dir_1.plot_info_list())
+
     # Modify two entries, with and without memo modification, they both should remain in the cache after load
     modify_cache_entry(0, 1500, modify_memo=False)
     modify_cache_entry(1, 1500, modify_memo=True)
@@ -602,10 +625,8 @@ async def test_drop_too_large_cache_entries(environment, bt):
     ]
 
     plot_infos = env.dir_1.plot_info_list()
-    # Make sure the cache currently contains all plots from dir1
-    assert_cache(plot_infos)
     # Write the modified cache entries to the file
-    cache_path.write_bytes(bytes(VersionedBlob(uint16(CURRENT_VERSION), bytes(cache_data))))
+    v1_cache_path.write_bytes(bytes(VersionedBlob(uint16(1), bytes(cache_data))))
     # And now test that plots in invalid_entries are not longer loaded
     assert_cache([plot_info for plot_info in plot_infos if plot_info.prover.get_filename() not in invalid_entries])
 
@@ -644,6 +665,197 @@ async def test_cache_lifetime(environment: Environment) -> None:
         assert cache_entry.last_use != last_use_before
 
 
+@pytest.mark.asyncio
+async def test_cache_append_only(environment: Environment, bt: BlockTools, monkeypatch: pytest.MonkeyPatch) -> None:
+    env: Environment = environment
+    expected_result = PlotRefreshResult(processed=len(env.dir_1))
+    expected_result.loaded = env.dir_1.plot_info_list()  # type: ignore[assignment]
+    add_plot_directory(env.root_path, str(env.dir_1.path))
+    await env.refresh_tester.run(expected_result)
+    cache = env.refresh_tester.plot_manager.cache
+    size_before = cache.path().stat().st_size
+    content_before = cache.path().read_bytes()
+    # Removing an entry only appends a record
+    removed = env.dir_1.path_list()[0]
+    entry = cache.get(removed)
+    assert entry is not None
+    cache.remove([removed])
+    cache.save()
+    assert cache.path().read_bytes()[:size_before] == content_before
+    assert cache.path().stat().st_size > size_before
+    # And so does adding it again
+    cache.update(removed, entry)
+    cache.save()
+    assert cache.path().read_bytes()[:size_before] == content_before
+
+    def load_cache() -> Cache:
+        loaded = Cache(cache.path())
+        loaded.load()
+        return loaded
+
+    loaded_cache = load_cache()
+    assert loaded_cache.keys() == cache.keys()
+    cache_entries = dict(cache.items())
+    for path, cache_entry in loaded_cache.items():
+        # The provers are only read from the file when they are used
+        assert not cache_entry.prover_loaded()
+        assert cache_entry.farmer_public_key in bt.plot_manager.farmer_public_keys
+        assert bytes(cache_entry.prover) == bytes(cache_entries[path].prover)
+        assert cache_entry.prover_loaded()
+
+    # An interrupted append is ignored, and dropped by the next save
+    size_before = cache.path().stat().st_size
+    with open(cache.path(), "ab") as file:
+        file.write(b"\x00\x00\x01")
+    loaded_cache = load_cache()
+    assert loaded_cache.keys() == cache.keys()
+    loaded_cache.save()
+    # Which rewrote the file without the stale records
+    compacted_size = cache.path().stat().st_size
+    assert compacted_size < size_before
+    assert load_cache().keys() == cache.keys()
+
+    # Once most of the file is stale records, it gets rewritten
+    monkeypatch.setattr(chia.plotting.cache, "COMPACTION_MIN_BYTES", 0)
+    loaded_cache = load_cache()
+    # The two byte version header and the live records
+    records_size = compacted_size - 2
+    for expected_records in [2, 3, 1]:
+        for path, cache_entry in list(loaded_cache.items()):
+            loaded_cache.update(path, cache_entry)
+        loaded_cache.save()
+        assert cache.path().stat().st_size == 2 + expected_records * records_size
+        assert load_cache().keys() == cache.keys()
+    assert not any(cache_entry.prover_loaded() for cache_entry in loaded_cache.values())
+    for path, cache_entry in load_cache().items():
+        assert bytes(cache_entry.prover) == bytes(dict(loaded_cache.items())[path].prover)
+
+
+@pytest.mark.asyncio
+async def test_cache_migration(environment: Environment) -> None:
+    env: Environment = environment
+    expected_result = PlotRefreshResult(processed=len(env.dir_1))
+    expected_result.loaded = env.dir_1.plot_info_list()  # type: ignore[assignment]
+    add_plot_directory(env.root_path, str(env.dir_1.path))
+    await env.refresh_tester.run(expected_result)
+    cache = env.refresh_tester.plot_manager.cache
+    cache_data = CacheDataV1(
+        [
+            (
+                str(path),
+                DiskCacheEntry(
+                    cache_entry.prover_data(),
+                    cache_entry.farmer_public_key,
+                    cache_entry.pool_public_key,
+                    cache_entry.pool_contract_puzzle_hash,
+                    cache_entry.plot_public_key,
+                    uint64(int(cache_entry.last_use)),
+                ),
+            )
+            for path, cache_entry in cache.items()
+        ]
+    )
+    v1_cache_path = cache.path().parent / "plot_manager.dat"
+    v1_cache_path.write_bytes(bytes(VersionedBlob(uint16(1), bytes(cache_data))))
+    unlink(cache.path())
+    # The v1 cache is only used if there is no v2 cache yet
+    migrated_cache = Cache(cache.path(), v1_cache_path)
+    migrated_cache.load()
+    assert migrated_cache.keys() == cache.keys()
+    assert migrated_cache.changed()
+    migrated_cache.save()
+    assert cache.path().exists()
+    v1_cache_path.write_bytes(bytes(VersionedBlob(uint16(1), bytes(CacheDataV1([])))))
+    loaded_cache = Cache(cache.path(), v1_cache_path)
+    loaded_cache.load()
+    assert loaded_cache.keys() == cache.keys()
+    cache_entries = dict(cache.items())
+    for path, cache_entry in loaded_cache.items():
+        assert bytes(cache_entry.prover) == bytes(cache_entries[path].prover)
+
+
+@pytest.mark.asyncio
+async def test_watch_plot_directories(environment: Environment, bt: BlockTools, tmp_path: Path) -> None:
+    env: Environment = environment
+    add_plot_directory(env.root_path, str(env.dir_1.path))
+    results: List[PlotRefreshResult] = []
+
+    def refresh_callback(event: PlotRefreshEvents, refresh_result: PlotRefreshResult) -> None:
+        if event == PlotRefreshEvents.done:
+            results.append(refresh_result)
+
+    plot_manager = PlotManager(
+        env.root_path,
+        refresh_callback,
+        refresh_parameter=PlotsRefreshParameter(watch_directories=True),
+    )
+    plot_manager.set_public_keys(bt.plot_manager.farmer_public_keys, bt.plot_manager.pool_public_keys)
+    plot_manager.start_refreshing(sleep_interval_ms=10)
+    try:
+        assert plot_manager._watcher is not None
+        plot_manager._watcher.settle_seconds = 0
+        # The first refresh is a full one
+        await time_out_assert(5, len, 1, results)
+        assert len(results[0].loaded) == len(env.dir_1)
+        assert plot_manager.plot_count() == plot_manager.plot_file_count() == len(env.dir_1)
+        last_refresh_time = plot_manager.last_refresh_time
+
+        # After that only the changed files get processed
+        moved_plot = env.dir_1.path_list()[0]
+        move(moved_plot, tmp_path / moved_plot.name)
+        await time_out_assert(5, len, 2, results)
+        assert results[1].removed == [moved_plot]
+        assert results[1].loaded == []
+        assert results[1].processed == 0
+        assert moved_plot not in plot_manager.plots
+        assert moved_plot not in plot_manager.plot_id_index
+        assert plot_manager.plot_file_count() == len(env.dir_1) - 1
+
+        move(tmp_path / moved_plot.name, moved_plot)
+        await time_out_assert(5, len, 3, results)
+        assert [plot_info.prover.get_filename() for plot_info in results[2].loaded] == [str(moved_plot)]
+        assert results[2].processed == 1
+        assert moved_plot in plot_manager.plot_id_index
+        assert plot_manager.plot_count() == plot_manager.plot_file_count() == len(env.dir_1)
+        assert plot_manager.last_refresh_time == last_refresh_time
+
+        # Directory changes lead to a full refresh
+        (env.dir_1.path / "subdir").mkdir()
+        await time_out_assert(5, len, 4, results)
+        assert results[3].processed == len(env.dir_1)
+        assert plot_manager.last_refresh_time != last_refresh_time
+    finally:
+        plot_manager.stop_refreshing()
+
+
+@pytest.mark.asyncio
+async def test_watch_plot_directories_fallback(
+    environment: Environment, bt: BlockTools, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    env: Environment = environment
+    add_plot_directory(env.root_path, str(env.dir_1.path))
+
+    def schedule(*args: object, **kwargs: object) -> None:
+        raise OSError("inotify watch limit reached")
+
+    monkeypatch.setattr(BaseObserver, "schedule", schedule)
+    plot_manager = PlotManager(
+        env.root_path,
+        lambda event, refresh_result: None,
+        refresh_parameter=PlotsRefreshParameter(watch_directories=True),
+    )
+    plot_manager.set_public_keys(bt.plot_manager.farmer_public_keys, bt.plot_manager.pool_public_keys)
+    plot_manager.start_refreshing(sleep_interval_ms=10)
+    try:
+        await time_out_assert(5, plot_manager.plot_count, len(env.dir_1))
+        # Without the watcher it refreshes every `interval_seconds` again
+        assert plot_manager._watcher is None
+        plot_manager.last_refresh_time = time.time() - plot_manager.refresh_parameter.interval_seconds - 1
+        assert plot_manager.needs_refresh()
+    finally:
+        plot_manager.stop_refreshing()
+
+
 @pytest.mark.parametrize(
     ["event_to_raise"],
     [
@@ -11,6 +11,7 @@ async def validate_get_routes(client: RpcClient, api: RpcApiProtocol) -> None:
     # TODO: avoid duplication of RpcServer.get_routes()
     routes_server = [
         "/get_connections",
+        "/get_network_metrics",
         "/open_connection",
         "/close_connection",
         "/stop_node",
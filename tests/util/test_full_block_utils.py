@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import dataclasses
 import random
 from typing import Generator, Iterator, List, Optional
 
@@ -7,6 +8,7 @@ import pytest
 from blspy import G1Element, G2Element
 
 from benchmarks.utils import rand_bytes, rand_g1, rand_g2, rand_hash, rand_vdf, rand_vdf_proof, rewards
+from chia.protocols.full_node_protocol import RespondBlocks
 from chia.types.blockchain_format.foliage import Foliage, FoliageBlockData, FoliageTransactionBlock, TransactionsInfo
 from chia.types.blockchain_format.pool_target import PoolTarget
 from chia.types.blockchain_format.proof_of_space import ProofOfSpace
@@ -24,7 +26,10 @@ from chia.types.end_of_slot_bundle import EndOfSubSlotBundle
 from chia.types.full_block import FullBlock
 from chia.types.header_block import HeaderBlock
 from chia.util.full_block_utils import (
+    FullBlockView,
     block_info_from_block,
+    block_without_generator,
+    full_blocks_from_respond_blocks,
     generator_from_block,
     header_block_from_block,
     plot_filter_info_from_block,
@@ -270,6 +275,13 @@ async def test_parser():
         else:
             expected_cc_sp_hash = block.reward_chain_block.challenge_chain_sp_vdf.output.get_hash()
         assert pfi.cc_sp_hash == expected_cc_sp_hash
+        stripped = block_without_generator(memoryview(block_bytes))
+        assert stripped == bytes(dataclasses.replace(block, transactions_generator=None))
+        view = FullBlockView(memoryview(block_bytes))
+        assert view.header_hash == block.header_hash
+        assert view.prev_header_hash == block.prev_header_hash
+        assert view.height == block.height
+        assert bytes(view) == block_bytes
         # this doubles the run-time of this test, with questionable utility
         # assert gen == FullBlock.from_bytes(block_bytes).transactions_generator
 
@@ -281,3 +293,21 @@ async def test_header_block():
         hb: HeaderBlock = get_block_header(block, [], [])
         hb_bytes = header_block_from_block(memoryview(bytes(block)))
         assert HeaderBlock.from_bytes(hb_bytes) == hb
+
+
+def test_respond_blocks() -> None:
+    blocks = [block for _, block in zip(range(20), get_full_blocks())]
+    message = bytes(RespondBlocks(uint32(1), uint32(20), blocks))
+    views = full_blocks_from_respond_blocks(memoryview(message))
+    assert [bytes(view) for view in views] == [bytes(block) for block in blocks]
+    assert [view.block for view in views] == blocks
+
+    assert full_blocks_from_respond_blocks(memoryview(bytes(RespondBlocks(uint32(1), uint32(0), [])))) == []
+    with pytest.raises(ValueError):
+        full_blocks_from_respond_blocks(memoryview(message + b"\x00"))
+    with pytest.raises(ValueError):
+        full_blocks_from_respond_blocks(memoryview(message[: len(message) // 2]))
+    # a truncated last block is only caught when it's parsed
+    views = full_blocks_from_respond_blocks(memoryview(message[:-1]))
+    with pytest.raises(ValueError):
+        views[-1].block
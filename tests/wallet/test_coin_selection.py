@@ -13,6 +13,7 @@ from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.hash import std_hash
 from chia.util.ints import uint32, uint64, uint128
 from chia.wallet.coin_selection import (
+    CoinAmountIndex,
     check_for_exact_match,
     knapsack_coin_algorithm,
     select_coins,
@@ -416,6 +417,67 @@ class TestCoinSelection:
         assert sum_largest_coins(uint128(79), coin_list) == {coin_list[0], coin_list[1]}
         assert sum_largest_coins(uint128(40000), coin_list) is None
 
+    def test_coin_amount_index(self, a_hash: bytes32) -> None:
+        coins = [Coin(a_hash, std_hash(i.to_bytes(4, "big")), uint64(i % 10)) for i in range(100)]
+        index = CoinAmountIndex.from_coins((coin.name(), coin) for coin in coins[:50])
+        for coin in coins[50:]:
+            index.add(coin.name(), coin)
+        assert len(index) == 100
+        assert index.total_amount == sum(coin.amount for coin in coins)
+
+        for coin in coins[::3]:
+            index.remove(coin.name())
+        # removing it twice is fine
+        index.remove(coins[0].name())
+        remaining = [coin for i, coin in enumerate(coins) if i % 3 != 0]
+        assert len(index) == len(remaining)
+        assert coins[0].name() not in index
+        assert index.get(coins[1].name()) == coins[1]
+        assert index.total_amount == sum(coin.amount for coin in remaining)
+
+        ascending = [coin for _, coin in index.ascending(3, 5)]
+        assert [coin.amount for coin in ascending] == sorted(coin.amount for coin in ascending)
+        assert set(ascending) == {coin for coin in remaining if 3 <= coin.amount <= 5}
+        descending = [coin for _, coin in index.descending(3, 5)]
+        assert descending == list(reversed(ascending))
+        assert list(index.ascending(10, 20)) == []
+
+    @pytest.mark.asyncio
+    async def test_coin_selection_from_index(self, a_hash: bytes32) -> None:
+        # lots of dust and a few large coins, the dust must not be taken
+        coins = [Coin(a_hash, std_hash(i.to_bytes(4, "big")), uint64(1)) for i in range(20000)]
+        coins += [Coin(a_hash, std_hash(i.to_bytes(4, "big")), uint64(i * 1000)) for i in range(1, 11)]
+        index = CoinAmountIndex.from_coins((coin.name(), coin) for coin in coins)
+        spendable_amount = uint128(index.total_amount)
+
+        result = await select_coins(
+            spendable_amount, uint64(DEFAULT_CONSTANTS.MAX_COIN_AMOUNT), index, {}, log, uint128(3000)
+        )
+        assert [coin.amount for coin in result] == [3000]
+
+        result = await select_coins(
+            spendable_amount,
+            uint64(DEFAULT_CONSTANTS.MAX_COIN_AMOUNT),
+            index,
+            {},
+            log,
+            uint128(3000),
+            exclude=list(result),
+        )
+        assert sum(coin.amount for coin in result) >= 3000
+        assert all(coin.amount != 3000 for coin in result)
+
+        result = await select_coins(
+            spendable_amount,
+            uint64(DEFAULT_CONSTANTS.MAX_COIN_AMOUNT),
+            index,
+            {},
+            log,
+            uint128(54500),
+        )
+        assert sum(coin.amount for coin in result) >= 54500
+        assert len(result) <= 500
+
     @pytest.mark.asyncio
     async def test_knapsack_perf(self, a_hash: bytes32) -> None:
         start = time.time()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field, replace
 from secrets import token_bytes
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 import pytest
 
@@ -997,3 +997,52 @@ async def test_delete_wallet() -> None:
             # Remove the wallet_id and make sure its removed fully
             await store.delete_wallet(wallet_id)
             assert (await store.get_coin_records(wallet_id=wallet_id)).records == []
+
+
+@pytest.mark.asyncio
+async def test_get_unspent_coin_index() -> None:
+    async with DBConnection(1) as db_wrapper:
+        store = await WalletCoinStore.create(db_wrapper)
+
+        async def index_coins(wallet_id: int) -> Set[Coin]:
+            index = await store.get_unspent_coin_index(wallet_id)
+            coins = {coin for _, coin in index.ascending(0, uint64.MAXIMUM)}
+            # the index has to match what's in the DB
+            assert coins == {record.coin for record in await store.get_unspent_coins_for_wallet(wallet_id)}
+            assert index.total_amount == sum(coin.amount for coin in coins)
+            return coins
+
+        await store.add_coin_record(record_5)  # wallet 1
+        assert await index_coins(1) == {coin_5}
+        assert await index_coins(2) == set()
+
+        # changes are applied to the indexes already loaded
+        await store.add_coin_record(record_6)  # this is spent and wallet 2
+        await store.add_coin_record(record_7)  # wallet 2
+        await store.add_coin_record(record_8)  # clawback coins aren't spendable
+        assert await index_coins(1) == {coin_5}
+        assert await index_coins(2) == {coin_7}
+
+        await store.set_spent(coin_7.name(), uint32(12))
+        assert await index_coins(2) == set()
+
+        await store.add_coin_record(replace(record_7, spent_block_height=uint32(0), spent=False, wallet_id=1))
+        assert await index_coins(1) == {coin_5, coin_7}
+        await store.delete_coin_record(coin_5.name())
+        assert await index_coins(1) == {coin_7}
+
+        await store.rollback_to_block(4)
+        assert await index_coins(1) == set()
+        assert await index_coins(2) == set()
+
+        # a failed transaction must not leave its changes in the index
+        await store.add_coin_record(record_5)
+        with pytest.raises(RuntimeError):
+            async with db_wrapper.writer():
+                await store.set_spent(coin_5.name(), uint32(12))
+                assert await index_coins(1) == set()
+                raise RuntimeError("rollback")
+        assert await index_coins(1) == {coin_5}
+
+        await store.delete_wallet(uint32(1))
+        assert await index_coins(1) == set()
@@ -18,6 +18,7 @@ from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.blockchain_format.sub_epoch_summary import SubEpochSummary
 from chia.types.full_block import FullBlock
 from chia.types.header_block import HeaderBlock
+from chia.types.weight_proof import WeightProof
 from chia.util.block_cache import BlockCache
 from chia.util.generator_tools import get_block_header
 from chia.util.ints import uint32, uint64
@@ -314,6 +315,31 @@ class TestWeightProof:
         assert valid
         assert fork_point == 0
 
+    @pytest.mark.asyncio
+    async def test_weight_proof_recent_chain(self, default_1000_blocks, blockchain_constants):
+        blocks = default_1000_blocks
+        header_cache, height_to_hash, sub_blocks, summaries = await load_blocks_dont_validate(
+            blocks, blockchain_constants
+        )
+        wpf = WeightProofHandler(blockchain_constants, BlockCache(sub_blocks, header_cache, height_to_hash, summaries))
+        expected = await wpf.get_proof_of_weight_bytes(blocks[-1].header_hash)
+        assert expected is not None
+        wp = WeightProof.from_bytes(expected)
+        assert wp.recent_chain_data[-1].header_hash == blocks[-1].header_hash
+        ses_heights = sorted(summaries.keys())
+        assert wp.recent_chain_data[0].height == ses_heights[-2] - 1
+
+        # the recent chain maintained by the peaks is only dropped once it's too old
+        wpf = WeightProofHandler(blockchain_constants, BlockCache(sub_blocks, header_cache, height_to_hash, summaries))
+        for block in blocks:
+            wpf.add_recent_block(block)
+        assert min(height for height, _ in wpf._recent_chain.values()) == ses_heights[-2] - 1
+        assert await wpf.get_proof_of_weight_bytes(blocks[-1].header_hash) == expected
+        # an older tip still gets its whole recent chain
+        older = await wpf.get_proof_of_weight(blocks[ses_heights[-2]].header_hash)
+        assert older is not None
+        assert older.recent_chain_data[0].height == ses_heights[-3] - 1
+
     @pytest.mark.asyncio
     async def test_weight_proof1000_pre_genesis_empty_slots(
         self, pre_genesis_empty_slots_1000_blocks, blockchain_constants
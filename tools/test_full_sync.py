@@ -6,12 +6,14 @@ import asyncio
 import cProfile
 import logging
 import os
+import pickle
 import shutil
 import tempfile
 import time
+from concurrent.futures import Executor, Future
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Callable, Iterator, List, Optional, cast
+from typing import Any, Callable, Iterator, List, Optional, cast
 
 import aiosqlite
 import click
@@ -58,6 +60,23 @@ def enable_profiler(profile: bool, counter: int) -> Iterator[None]:
         pr.dump_stats(f"slow-batch-{counter:05d}.profile")
 
 
+class MeasuringExecutor(Executor):
+    """
+    Wraps the block validation pool to count the bytes sent to the workers
+    """
+
+    def __init__(self, pool: Executor) -> None:
+        self.pool = pool
+        self.bytes_sent = 0
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future[Any]:
+        self.bytes_sent += len(pickle.dumps((fn, args, kwargs)))
+        return self.pool.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, **kwargs: Any) -> None:
+        self.pool.shutdown(wait, **kwargs)
+
+
 class FakeServer:
     async def send_to_all(self, messages: List[Message], node_type: NodeType, exclude: Optional[bytes32] = None):
         pass
@@ -107,6 +126,8 @@ async def run_sync_test(
     db_sync: str,
     node_profiler: bool,
     start_at_checkpoint: Optional[str],
+    validation_worker_cache: bool = False,
+    measure_bytes: bool = False,
 ) -> None:
     logger = logging.getLogger()
     logger.setLevel(logging.WARNING)
@@ -138,6 +159,7 @@ async def run_sync_test(
             config["full_node"]["single_threaded"] = True
         config["full_node"]["db_sync"] = db_sync
         config["full_node"]["enable_profiler"] = node_profiler
+        config["full_node"]["validation_worker_cache"] = validation_worker_cache
         full_node = FullNode(
             config["full_node"],
             root_path=root_path,
@@ -147,6 +169,10 @@ async def run_sync_test(
         try:
             full_node.set_server(cast(ChiaServer, FakeServer()))
             await full_node._start()
+            measuring_pool: Optional[MeasuringExecutor] = None
+            if measure_bytes:
+                measuring_pool = MeasuringExecutor(full_node.blockchain.pool)
+                full_node.blockchain.pool = measuring_pool
 
             peak = full_node.blockchain.get_peak()
             if peak is not None:
@@ -159,6 +185,7 @@ async def run_sync_test(
             print()
             counter = 0
             monotonic = height
+            monotonic_start = height
             prev_hash = None
             async with aiosqlite.connect(file) as in_db:
                 await in_db.execute("pragma query_only")
@@ -221,8 +248,18 @@ async def run_sync_test(
                         counter = 0
                         print()
                 end_time = time.monotonic()
+                blocks_synced = height - monotonic_start
                 logger.warning(f"test completed at {end_time}")
                 logger.warning(f"duration: {end_time - start_time:0.2f} s")
+                if blocks_synced > 0:
+                    logger.warning(f"throughput: {blocks_synced / (end_time - start_time):0.2f} blocks/s")
+                if measuring_pool is not None and blocks_synced > 0:
+                    logger.warning(
+                        f"bytes sent to validation workers per block: {measuring_pool.bytes_sent / blocks_synced:0.0f}"
+                    )
+                validation_cache = full_node.blockchain.validation_worker_cache
+                if validation_cache is not None:
+                    logger.warning(f"validation worker cache misses: {validation_cache.misses}")
                 logger.warning(f"worst time-per-block: {worst_batch_time_per_block:0.2f} s")
                 logger.warning(f"worst height: {worst_batch_height}")
                 logger.warning(f"end-height: {height}")
@@ -273,6 +310,18 @@ def main() -> None:
     default=None,
     help="start test from this specified checkpoint state",
 )
+@click.option(
+    "--validation-worker-cache/--no-validation-worker-cache",
+    default=False,
+    help="keep recent block records in the validation workers, and only send them new ones",
+)
+@click.option(
+    "--measure-bytes",
+    is_flag=True,
+    required=False,
+    default=False,
+    help="count the bytes sent to the block validation workers (adds pickling overhead)",
+)
 def run(
     file: Path,
     db_version: int,
@@ -283,9 +332,15 @@ def run(
     db_sync: str,
     node_profiler: bool,
     start_at_checkpoint: Optional[str],
+    validation_worker_cache: bool,
+    measure_bytes: bool,
 ) -> None:
     """
     The FILE parameter should point to an existing blockchain database file (in v2 format)
+
+    To compare the bytes sent to, and throughput of, the block validation
+    workers with and without the worker cache, run with --measure-bytes and
+    --validation-worker-cache / --no-validation-worker-cache
     """
     print(f"PID: {os.getpid()}")
     asyncio.run(
@@ -299,6 +354,8 @@ def run(
             db_sync,
             node_profiler,
             start_at_checkpoint,
+            validation_worker_cache,
+            measure_bytes,
         )
     )
 